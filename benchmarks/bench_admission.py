@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Cost of rejecting bad tokens in JWT.unpack, with and without an admission filter.
+
+Usage: python benchmarks/bench_admission.py [-n TOKENS]
+"""
+import argparse
+import logging
+import time
+
+from cryptojwt.admission import AdmissionFilter
+from cryptojwt.jwk.ec import new_ec_key
+from cryptojwt.jws.jws import JWS
+from cryptojwt.jwt import JWT
+from cryptojwt.key_jar import build_keyjar
+
+ISS = "https://op.example.org"
+KEYDEFS = [{"type": "EC", "crv": "P-256", "use": ["sig"]}]
+
+
+def bad_tokens(key_jar):
+    _unknown = new_ec_key("P-256", kid="unknown")
+    _known = key_jar.get_signing_key("EC")
+    return {
+        "unknown kid": JWS({"iss": ISS}, alg="ES256").sign_compact([_unknown]),
+        "alg none": JWS({"iss": ISS}, alg="none").sign_compact(),
+        "wrong alg": JWS({"iss": ISS}, alg="ES384").sign_compact([new_ec_key("P-384")]),
+        "oversized": JWS({"iss": ISS, "x": "x" * 200000}, alg="ES256").sign_compact(_known),
+        "unknown issuer": JWS({"iss": "https://evil.example.org"}, alg="ES256").sign_compact(
+            _known
+        ),
+    }
+
+
+def reject_all(jwt, token, rounds):
+    _start = time.perf_counter()
+    for _ in range(rounds):
+        try:
+            jwt.unpack(token)
+        except Exception:
+            pass
+    return (time.perf_counter() - _start) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="tokens", type=int, default=500)
+    args = parser.parse_args()
+    # The rejected tokens are logged
+    logging.disable(logging.ERROR)
+
+    key_jar = build_keyjar(KEYDEFS)
+    key_jar.import_jwks(key_jar.export_jwks(), ISS)
+    admission = AdmissionFilter(
+        max_token_length=8192,
+        allowed_algs=["ES256"],
+        key_jar=key_jar,
+        check_kid=True,
+        check_iss=True,
+        refresh_interval=60,
+    )
+    plain = JWT(key_jar=key_jar, allowed_sign_algs=["ES256"])
+    filtered = JWT(key_jar=key_jar, allowed_sign_algs=["ES256"], admission_filter=admission)
+
+    print("{:<16}{:>14}{:>14}".format("token", "plain us", "filtered us"))
+    for name, token in bad_tokens(key_jar).items():
+        _plain = reject_all(plain, token, args.tokens)
+        _filtered = reject_all(filtered, token, args.tokens)
+        print("{:<16}{:>14.1f}{:>14.1f}".format(name, _plain, _filtered))
+    print()
+    print("rejections: {}".format(dict(admission.counters)))
+
+
+if __name__ == "__main__":
+    main()
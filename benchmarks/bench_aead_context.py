@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Content encryption throughput (MB/s), a context per message and the key's own.
+
+Usage: python benchmarks/bench_aead_context.py [-n ROUNDS] [-e ENC]
+"""
+import argparse
+import os
+import timeit
+
+from cryptojwt.jwe import KEY_LEN_BYTES
+from cryptojwt.jwe.aes import aead_context
+from cryptojwt.jwk.hmac import SYMKey
+
+SIZES = [64, 1024, 16 * 1024, 256 * 1024, 1024 * 1024]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="rounds", type=int, default=0)
+    parser.add_argument("-e", dest="enc", action="append")
+    args = parser.parse_args()
+
+    encs = args.enc or ["A128GCM", "A256GCM", "A128CBC-HS256", "A256CBC-HS512"]
+    aad = os.urandom(64)
+
+    print("{:<15}{:>9}{:>14}{:>14}".format("enc", "size", "per message", "key's own"))
+    for enc in encs:
+        key = os.urandom(KEY_LEN_BYTES[enc])
+        sym_key = SYMKey(key=key)
+        iv = os.urandom(12 if enc.endswith("GCM") else 16)
+        for size in SIZES:
+            msg = os.urandom(size)
+            # Keep the total amount of data per measurement roughly constant
+            rounds = args.rounds or max(20, (32 * 1024 * 1024) // (size * 8))
+            timers = [
+                lambda: aead_context(enc, key).encrypt(msg, iv, aad),
+                lambda: sym_key.aead_context(enc).encrypt(msg, iv, aad),
+            ]
+            _rates = []
+            for timer in timers:
+                _time = timeit.timeit(timer, number=rounds)
+                _rates.append(size * rounds / _time / 1e6)
+            print("{:<15}{:>9}{:>14.1f}{:>14.1f}".format(enc, size, *_rates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Memory and lookup cost of a KeyJar with many issuers, unbounded and bounded.
+
+Usage: python benchmarks/bench_bounded_keyjar.py [-i ISSUERS] [-r RESIDENT] [-n ROUNDS]
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from cryptojwt.jwk.rsa import new_rsa_key
+from cryptojwt.key_jar import KeyJar
+
+
+def traced():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-i", dest="issuers", type=int, default=20000)
+    parser.add_argument("-r", dest="resident", type=int, default=2000)
+    parser.add_argument("-n", dest="rounds", type=int, default=20000)
+    args = parser.parse_args()
+
+    # The key material is repeated but every key is parsed on its own
+    _jwks = [new_rsa_key(2048).serialize() for _ in range(20)]
+    _ids = ["https://rp{}.example.com".format(i) for i in range(args.issuers)]
+
+    # Most lookups are for a small set of active issuers
+    rnd = random.Random(0)
+    _active = _ids[: args.resident // 2]
+    _lookups = [
+        rnd.choice(_active) if rnd.random() < 0.99 else rnd.choice(_ids) for _ in range(args.rounds)
+    ]
+
+    print(
+        "{:<12}{:>12}{:>16}{:>10}".format(
+            "{} issuers".format(args.issuers), "MiB", "us per lookup", "reloads"
+        )
+    )
+    # OpenSSL's allocations for the key instances aren't traced, the memory
+    # saved by evicting parsed keys is larger than shown
+    tracemalloc.start()
+    for name, max_resident in [("unbounded", 0), ("bounded", args.resident)]:
+        _start = traced()
+        key_jar = KeyJar(max_resident_issuers=max_resident)
+        for n, _id in enumerate(_ids):
+            _jwk = dict(_jwks[n % len(_jwks)], kid="key-{}".format(n))
+            key_jar.import_jwks({"keys": [_jwk]}, _id)
+        _used = traced() - _start
+
+        _begin = time.perf_counter()
+        for _id in _lookups:
+            key_jar.get_verify_key("RSA", _id)
+        _time = (time.perf_counter() - _begin) / args.rounds
+
+        print(
+            "{:<12}{:>12.1f}{:>16.2f}{:>10}".format(
+                name, _used / 2 ** 20, _time * 1e6, key_jar.issuer_stats()["reloads"]
+            )
+        )
+        del key_jar
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+CPU time spent by JWT.unpack on expired tokens, with the claims checked after and before verifying.
+
+Usage: python benchmarks/bench_claims_policy.py [-n TOKENS] [-e EXPIRED]
+"""
+import argparse
+import time
+
+from cryptojwt.claims import ClaimsPolicy
+from cryptojwt.exception import Expired
+from cryptojwt.jws.jws import JWS
+from cryptojwt.jwt import JWT
+from cryptojwt.jwt import utc_time_sans_frac
+from cryptojwt.key_jar import build_keyjar
+
+ISS = "https://op.example.org"
+KEYDEFS = [{"type": "RSA", "key": "", "use": ["sig"]}]
+
+
+def make_tokens(key_jar, count, expired):
+    _keys = key_jar.get_signing_key("RSA", "")
+    _now = utc_time_sans_frac()
+    _tokens = []
+    for i in range(count):
+        _exp = _now - 3600 if i < count * expired else _now + 3600
+        _claims = {"iss": ISS, "sub": "sub", "iat": _now - 60, "exp": _exp}
+        _tokens.append(JWS(_claims, alg="RS256").sign_compact(_keys))
+    return _tokens
+
+
+def after(key_jar, tokens):
+    """Verifying the signature and then checking the claims."""
+    _jwt = JWT(key_jar=key_jar)
+    _policy = ClaimsPolicy(iss=ISS)
+    for token in tokens:
+        try:
+            _policy.check(_jwt.unpack(token))
+        except Expired:
+            pass
+
+
+def before(key_jar, tokens):
+    _jwt = JWT(key_jar=key_jar, claims_policy=ClaimsPolicy(iss=ISS))
+    for token in tokens:
+        try:
+            _jwt.unpack(token)
+        except Expired:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="tokens", type=int, default=2000)
+    parser.add_argument("-e", dest="expired", type=float, default=0.9)
+    args = parser.parse_args()
+
+    key_jar = build_keyjar(KEYDEFS)
+    key_jar.import_jwks(key_jar.export_jwks(), ISS)
+    tokens = make_tokens(key_jar, args.tokens, args.expired)
+
+    print("{:.0f}% of {} RS256 tokens expired".format(args.expired * 100, args.tokens))
+    print("{:<16}{:>14}".format("claims checked", "CPU us/token"))
+    for func in [after, before]:
+        _start = time.process_time()
+        func(key_jar, tokens)
+        _used = time.process_time() - _start
+        print("{:<16}{:>14.1f}".format(func.__name__, _used / args.tokens * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+DPoP proof verification throughput with DPoPVerifier and with the plain JWS and JWK primitives.
+
+Usage: python benchmarks/bench_dpop.py [-n PROOFS] [-c CLIENTS]
+"""
+import argparse
+import time
+import uuid
+
+from cryptojwt.dpop import DPoPVerifier
+from cryptojwt.dpop import access_token_hash
+from cryptojwt.jwk.ec import new_ec_key
+from cryptojwt.jwk.jwk import key_from_jwk_dict
+from cryptojwt.jwk.rsa import new_rsa_key
+from cryptojwt.jws.jws import JWS
+from cryptojwt.jws.jws import factory
+from cryptojwt.utils import as_unicode
+
+HTM = "GET"
+HTU = "https://resource.example.com/data"
+ACCESS_TOKEN = "Kz~8mXK1EalYznwH-LC-1fBAo.4Ljp~zsPE_NeO.gxU"
+
+
+def make_proofs(keys, alg, count, now):
+    _proofs = []
+    for i in range(count):
+        _key = keys[i % len(keys)]
+        _claims = {
+            "jti": uuid.uuid4().hex,
+            "htm": HTM,
+            "htu": HTU,
+            "iat": now,
+            "ath": access_token_hash(ACCESS_TOKEN),
+        }
+        _proofs.append(
+            JWS(_claims, alg=alg).sign_compact([_key], typ="dpop+jwt", jwk=_key.serialize())
+        )
+    return _proofs
+
+
+def plain(proofs, now):
+    """What every resource server had to write with the primitives."""
+    _seen = set()
+    for proof in proofs:
+        _jws = factory(proof)
+        _headers = _jws.jwt.headers
+        assert _headers["typ"] == "dpop+jwt"
+        _key = key_from_jwk_dict(_headers["jwk"], private=False)
+        _claims = _jws.verify_compact(proof, [_key], sigalg=_headers["alg"])
+        _jkt = as_unicode(_key.thumbprint("SHA-256"))
+        assert _claims["htm"] == HTM and _claims["htu"] == HTU
+        assert now - 300 <= _claims["iat"] <= now + 5
+        assert _claims["ath"] == access_token_hash(ACCESS_TOKEN)
+        assert (_jkt, _claims["jti"]) not in _seen
+        _seen.add((_jkt, _claims["jti"]))
+
+
+def verifier(proofs, now):
+    _verifier = DPoPVerifier()
+    for proof in proofs:
+        _verifier.verify(proof, HTM, HTU, access_token=ACCESS_TOKEN, now=now)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="proofs", type=int, default=2000)
+    parser.add_argument("-c", dest="clients", type=int, default=20)
+    args = parser.parse_args()
+
+    now = int(time.time())
+    key_sets = {
+        "ES256": [new_ec_key("P-256") for _ in range(args.clients)],
+        "RS256": [new_rsa_key(2048) for _ in range(args.clients)],
+    }
+
+    print("{:<8}{:>16}{:>16}{:>10}".format("alg", "plain proofs/s", "verifier", "speedup"))
+    for alg, keys in key_sets.items():
+        proofs = make_proofs(keys, alg, args.proofs, now)
+        _rates = []
+        for func in [plain, verifier]:
+            _start = time.perf_counter()
+            func(proofs, now)
+            _rates.append(len(proofs) / (time.perf_counter() - _start))
+        print("{:<8}{:>16.0f}{:>16.0f}{:>9.2f}x".format(alg, *_rates, _rates[1] / _rates[0]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+ECDH-ES encryption latency with ephemeral keys generated per token compared
+with keys taken from a background EphemeralKeyPool. Tokens are encrypted at
+a steady rate so that the pool has time to refill between requests.
+
+Usage: python benchmarks/bench_epk_pool.py [-n TOKENS] [-c CURVE] [-i INTERVAL_MS]
+"""
+import argparse
+import time
+
+from cryptojwt.jwe.epk_pool import EphemeralKeyPool
+from cryptojwt.jwe.jwe import JWE
+from cryptojwt.jwk.ec import new_ec_key
+
+
+def percentile(values, pct):
+    _sorted = sorted(values)
+    return _sorted[min(len(_sorted) - 1, int(len(_sorted) * pct / 100))]
+
+
+def run(key, pool, tokens, interval):
+    _latency = []
+    for _ in range(tokens):
+        _start = time.perf_counter()
+        JWE(b"benchmark payload", alg="ECDH-ES", enc="A128GCM", epk_pool=pool).encrypt([key])
+        _latency.append(time.perf_counter() - _start)
+        time.sleep(interval)
+    return _latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="tokens", type=int, default=500)
+    parser.add_argument("-c", dest="curve", default="P-384")
+    parser.add_argument("-i", dest="interval", type=float, default=2.0)
+    args = parser.parse_args()
+
+    key = new_ec_key(args.curve)
+    pool = EphemeralKeyPool(curves=[args.curve], size=32, start=False)
+    pool.fill()
+    pool.start()
+
+    print("{} tokens, {}, one every {} ms".format(args.tokens, args.curve, args.interval))
+    for label, _pool in [("no pool", None), ("pool", pool)]:
+        _latency = run(key, _pool, args.tokens, args.interval / 1000)
+        print(
+            "{:<8} p50 {:>8.1f} us  p99 {:>8.1f} us".format(
+                label, percentile(_latency, 50) * 1e6, percentile(_latency, 99) * 1e6
+            )
+        )
+    print("pool hits {} misses {}".format(pool.hits, pool.misses))
+    pool.stop()
+
+
+if __name__ == "__main__":
+    main()
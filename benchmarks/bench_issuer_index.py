@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Issuer lookups in a KeyJar with many issuers, scanning them and indexed.
+
+Usage: python benchmarks/bench_issuer_index.py [-n ROUNDS] [-i ISSUERS]
+"""
+import argparse
+import timeit
+
+from cryptojwt.key_bundle import KeyBundle
+from cryptojwt.key_issuer import KeyIssuer
+from cryptojwt.key_jar import KeyJar
+
+
+def scan_match_owner(key_jar, url):
+    return [i for i in key_jar._issuers.keys() if i.startswith(url)][0]
+
+
+def scan_find(key_jar, source):
+    res = {}
+    for _, _issuer in key_jar._issuers.items():
+        kbs = _issuer.find(source)
+        if kbs:
+            res[_issuer.name] = kbs
+    return res
+
+
+def scan_get_issuer(key_jar, issuer_id):
+    _issuer = key_jar._issuers.get(issuer_id)
+    if _issuer is None:
+        if issuer_id.endswith("/"):
+            _issuer = key_jar._issuers.get(issuer_id[:-1])
+        else:
+            _issuer = key_jar._issuers.get(issuer_id + "/")
+    return _issuer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="rounds", type=int, default=200)
+    parser.add_argument("-i", dest="issuers", type=int, default=10000)
+    args = parser.parse_args()
+
+    # Bundles with a source are only fetched when their keys are asked for
+    key_jar = KeyJar()
+    for i in range(args.issuers):
+        _issuer = KeyIssuer(name="https://rp{}.example.com/".format(i))
+        _issuer.add_kb(KeyBundle(source="https://rp{}.example.com/jwks.json".format(i)))
+        key_jar["https://rp{}.example.com/".format(i)] = _issuer
+
+    _last = args.issuers - 1
+    _prefix = "https://rp{}.".format(_last)
+    _source = "https://rp{}.example.com/jwks.json".format(_last)
+    _id = "https://rp{}.example.com".format(_last)
+    _timers = [
+        ("match_owner", lambda: scan_match_owner(key_jar, _prefix)),
+        ("", lambda: key_jar.match_owner(_prefix)),
+        ("find", lambda: scan_find(key_jar, _source)),
+        ("", lambda: key_jar.find(_source)),
+        ("issuer without /", lambda: scan_get_issuer(key_jar, _id)),
+        ("", lambda: key_jar._issuers.get(key_jar._index.resolve(_id))),
+        ("unknown issuer", lambda: scan_get_issuer(key_jar, "https://example.com")),
+        ("", lambda: key_jar._index.resolve("https://example.com")),
+    ]
+    print("{:<20}{:>14}{:>14}".format("{} issuers".format(args.issuers), "scan us", "index us"))
+    for i in range(0, len(_timers), 2):
+        _scan = timeit.timeit(_timers[i][1], number=args.rounds) / args.rounds
+        _index = timeit.timeit(_timers[i + 1][1], number=args.rounds) / args.rounds
+        print("{:<20}{:>14.2f}{:>14.2f}".format(_timers[i][0], _scan * 1e6, _index * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Per call time of the JSON heavy paths with each installed JSON codec.
+
+Usage: python benchmarks/bench_json_codec.py [-n ROUNDS]
+"""
+import argparse
+import os
+import timeit
+
+from cryptojwt import json_codec
+from cryptojwt.jwk.ec import new_ec_key
+from cryptojwt.jwk.hmac import SYMKey
+from cryptojwt.jws.jws import JWS
+from cryptojwt.key_bundle import KeyBundle
+from cryptojwt.key_jar import KeyJar
+from cryptojwt.simple_jwt import SimpleJWT
+from cryptojwt.utils import b64encode_item
+
+
+class _Response(object):
+    headers = {"Content-Type": "application/json"}
+
+    def __init__(self, text):
+        self.text = text
+
+
+def paths():
+    header = {"alg": "ES256", "typ": "JWT", "kid": "a" * 43}
+    claims = {
+        "iss": "https://server.example.com",
+        "sub": "248289761001",
+        "aud": ["s6BhdRkqt3", "other"],
+        "scope": " ".join(["scope{}".format(i) for i in range(20)]),
+        "iat": 1311280970,
+        "exp": 1311281970,
+    }
+    hmac_keys = [SYMKey(key=os.urandom(32), kid="k{}".format(i)) for i in range(3)]
+    jws_json = JWS(json_codec.dumps(claims)).sign_json(
+        headers=[({"alg": "HS256"}, {"kid": k.kid}) for k in hmac_keys], keys=hmac_keys
+    )
+    token = JWS(claims, alg="HS256").sign_compact(hmac_keys[:1])
+
+    bundle = KeyBundle()
+    bundle.extend([new_ec_key("P-256") for _ in range(50)])
+    jwks_text = bundle.jwks()
+
+    key_jar = KeyJar()
+    key_jar.add_kb("https://example.com", bundle)
+
+    return {
+        "b64encode_item (header)": lambda: b64encode_item(header),
+        "SimpleJWT.unpack/payload": lambda: SimpleJWT().unpack(token).payload(),
+        "JWS.verify_json (3 sigs)": lambda: JWS().verify_json(jws_json, hmac_keys),
+        "KeyBundle.jwks (50 keys)": bundle.jwks,
+        "_parse_remote_response": lambda: bundle._parse_remote_response(_Response(jwks_text)),
+        "KeyJar.export_jwks_as_json": lambda: key_jar.export_jwks_as_json(
+            issuer_id="https://example.com"
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    codecs = []
+    for name in json_codec.PREFERENCE:
+        if json_codec.set_codec(name).name == name:
+            codecs.append(name)
+
+    _paths = paths()
+    results = {}
+    for name in codecs:
+        json_codec.set_codec(name)
+        for path, func in _paths.items():
+            results[(path, name)] = timeit.timeit(func, number=args.rounds) / args.rounds * 1e6
+    json_codec.set_codec("json")
+
+    print(
+        "{:<30}".format("us per call") + "".join(["{:>10}".format(c) for c in codecs]) + "  speedup"
+    )
+    for path in _paths:
+        _times = [results[(path, c)] for c in codecs]
+        print(
+            "{:<30}".format(path)
+            + "".join(["{:>10.1f}".format(t) for t in _times])
+            + "{:>8.2f}x".format(results[(path, "json")] / min(_times))
+        )
+
+
+if __name__ == "__main__":
+    main()
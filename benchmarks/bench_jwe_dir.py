@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Per token cost of encrypting and decrypting a small JWE with direct
+encryption ("dir") compared with AES key wrap ("A128KW").
+
+Usage: python benchmarks/bench_jwe_dir.py [-n ROUNDS] [-e ENC]
+"""
+import argparse
+import json
+import os
+import timeit
+
+from cryptojwt.jwe import KEY_LEN_BYTES
+from cryptojwt.jwe.jwe import JWE
+from cryptojwt.jwk.hmac import SYMKey
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="rounds", type=int, default=5000)
+    parser.add_argument("-e", dest="enc", default="A128GCM")
+    args = parser.parse_args()
+
+    payload = json.dumps({"iss": "https://example.com", "sub": "benchmark", "scope": "read"})
+    keys = {
+        "dir": SYMKey(key=os.urandom(KEY_LEN_BYTES[args.enc])),
+        "A128KW": SYMKey(key=os.urandom(16)),
+    }
+
+    print("{:<8}{:>16}{:>16}".format(args.enc, "encrypt us", "decrypt us"))
+    for alg, key in keys.items():
+        token = JWE(payload, alg=alg, enc=args.enc).encrypt([key])
+        _enc = timeit.timeit(
+            lambda: JWE(payload, alg=alg, enc=args.enc).encrypt([key]), number=args.rounds
+        )
+        _dec = timeit.timeit(lambda: JWE().decrypt(token, [key]), number=args.rounds)
+        print(
+            "{:<8}{:>16.1f}{:>16.1f}".format(
+                alg, _enc / args.rounds * 1e6, _dec / args.rounds * 1e6
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
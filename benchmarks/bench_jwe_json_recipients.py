@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Cost of encrypting one payload for a growing number of recipients, one
+compact JWE per recipient compared with one JWE JSON Serialization where
+the content is encrypted once and only the CEK is wrapped per recipient.
+
+Usage: python benchmarks/bench_jwe_json_recipients.py [-n ROUNDS] [-s SIZE_KB] [-a ALG]
+"""
+import argparse
+import os
+import timeit
+
+from cryptojwt.jwe.jwe import JWE
+from cryptojwt.jwk.hmac import SYMKey
+from cryptojwt.jwk.rsa import new_rsa_key
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="rounds", type=int, default=20)
+    parser.add_argument("-s", dest="size", type=int, default=1024)
+    parser.add_argument("-a", dest="alg", default="A128KW")
+    args = parser.parse_args()
+
+    payload = os.urandom(args.size * 1024)
+    if args.alg.startswith("RSA"):
+        keys = [new_rsa_key(kid=str(i)) for i in range(16)]
+    else:
+        keys = [SYMKey(key=os.urandom(16), kid=str(i)) for i in range(16)]
+
+    print("{} KB payload, {}/A256GCM".format(args.size, args.alg))
+    print("{:>10}{:>16}{:>16}".format("recipients", "compact ms", "json ms"))
+    for count in [1, 2, 4, 8, 16]:
+        _keys = keys[:count]
+        _compact = timeit.timeit(
+            lambda: [JWE(payload, alg=args.alg, enc="A256GCM").encrypt([k]) for k in _keys],
+            number=args.rounds,
+        )
+        _json = timeit.timeit(
+            lambda: JWE(payload, alg=args.alg, enc="A256GCM").encrypt_json(_keys),
+            number=args.rounds,
+        )
+        print(
+            "{:>10}{:>16.2f}{:>16.2f}".format(
+                count, _compact / args.rounds * 1e3, _json / args.rounds * 1e3
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
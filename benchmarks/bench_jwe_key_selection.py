@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Decryption cost when a receiver holds several RSA encryption keys, with
+and without a kid in the JWE header pointing out the key to use.
+
+Usage: python benchmarks/bench_jwe_key_selection.py [-n ROUNDS] [-k KEYS] [-b BITS]
+"""
+import argparse
+import timeit
+
+from cryptojwt.jwe.jwe import JWE
+from cryptojwt.jwk.rsa import RSAKey
+from cryptojwt.jwk.rsa import new_rsa_key
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="rounds", type=int, default=200)
+    parser.add_argument("-k", dest="keys", type=int, default=4)
+    parser.add_argument("-b", dest="bits", type=int, default=2048)
+    args = parser.parse_args()
+
+    keys = [new_rsa_key(key_size=args.bits, kid="k{}".format(i)) for i in range(args.keys)]
+    anonymous = [RSAKey(priv_key=k.priv_key) for k in keys]
+    payload = b"benchmark payload"
+
+    cases = [
+        ("no kid", JWE(payload, alg="RSA-OAEP", enc="A128GCM").encrypt([anonymous[-1]]), anonymous),
+        ("kid", JWE(payload, alg="RSA-OAEP", enc="A128GCM").encrypt([keys[-1]]), keys),
+    ]
+    for label, token, _keys in cases:
+        _jwe = JWE()
+        _jwe.decrypt(token, _keys)
+        _time = timeit.timeit(lambda: JWE().decrypt(token, _keys), number=args.rounds)
+        print(
+            "{:<8}{:>10.1f} us/token{:>6} trials/token".format(
+                label, _time / args.rounds * 1e6, _jwe.key_trials
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
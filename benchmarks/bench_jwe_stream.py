@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Peak memory and time for encrypting and decrypting a large payload, in memory
+with encrypt/decrypt compared with encrypt_stream/decrypt_stream between files.
+
+Usage: python benchmarks/bench_jwe_stream.py [-s SIZE_MB] [-e ENC]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from cryptojwt.jwe.jwe import JWE
+from cryptojwt.jwk.hmac import SYMKey
+
+
+def measure(func):
+    tracemalloc.start()
+    _start = time.perf_counter()
+    func()
+    _time = time.perf_counter() - _start
+    _, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return _time, _peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-s", dest="size", type=int, default=20)
+    parser.add_argument("-e", dest="enc", default="A256GCM")
+    args = parser.parse_args()
+
+    key = SYMKey(key=os.urandom(16))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        plain = os.path.join(tmpdir, "plain")
+        token = os.path.join(tmpdir, "token")
+        out = os.path.join(tmpdir, "out")
+        with open(plain, "wb") as fp:
+            for _ in range(args.size):
+                fp.write(os.urandom(1024 * 1024))
+
+        def in_memory():
+            with open(plain, "rb") as src:
+                payload = src.read()
+            _token = JWE(payload, alg="A128KW", enc=args.enc).encrypt([key])
+            JWE().decrypt(_token, [key])
+
+        def streaming():
+            with open(plain, "rb") as src, open(token, "wb") as dst:
+                JWE(alg="A128KW", enc=args.enc).encrypt_stream(src, dst, [key])
+            with open(token, "rb") as src, open(out, "wb") as dst:
+                JWE().decrypt_stream(src, dst, [key])
+
+        print("{} MB payload, A128KW/{}".format(args.size, args.enc))
+        for label, func in [("in memory", in_memory), ("streaming", streaming)]:
+            _time, _peak = measure(func)
+            print("{:<12}{:>10.2f} s{:>12.1f} MB peak".format(label, _time, _peak / 1024 / 1024))
+
+
+if __name__ == "__main__":
+    main()
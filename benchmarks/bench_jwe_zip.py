@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Token size and per token cost of JWE compression (zip "DEF") at different compression levels.
+
+Usage: python benchmarks/bench_jwe_zip.py [-n ROUNDS] [-a ALG] [-e ENC]
+"""
+import argparse
+import json
+import os
+import timeit
+
+from cryptojwt.jwe.jwe import JWE
+from cryptojwt.jwk.hmac import SYMKey
+
+CLAIM_SETS = {
+    "id_token": {
+        "iss": "https://server.example.com",
+        "sub": "24400320",
+        "aud": "s6BhdRkqt3",
+        "nonce": "n-0S6_WzA2Mj",
+        "exp": 1311281970,
+        "iat": 1311280970,
+        "auth_time": 1311280969,
+        "acr": "urn:mace:incommon:iap:silver",
+    },
+    "userinfo": {
+        "sub": "248289761001",
+        "name": "Jane Doe",
+        "given_name": "Jane",
+        "family_name": "Doe",
+        "preferred_username": "j.doe",
+        "email": "janedoe@example.com",
+        "email_verified": True,
+        "picture": "http://example.com/janedoe/me.jpg",
+        "address": {
+            "street_address": "1234 Hollywood Blvd.",
+            "locality": "Los Angeles",
+            "region": "CA",
+            "postal_code": "90210",
+            "country": "US",
+        },
+        "groups": ["group-{}".format(i) for i in range(20)],
+    },
+    "access_token": {
+        "iss": "https://server.example.com",
+        "sub": "248289761001",
+        "client_id": "s6BhdRkqt3",
+        "scope": " ".join(["api:read:{}".format(i) for i in range(50)]),
+        "authorization_details": [
+            {"type": "account_information", "actions": ["list_accounts", "read_balances"]}
+        ]
+        * 10,
+    },
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="rounds", type=int, default=2000)
+    parser.add_argument("-a", dest="alg", default="A128KW")
+    parser.add_argument("-e", dest="enc", default="A128GCM")
+    args = parser.parse_args()
+
+    key = SYMKey(key=os.urandom(16))
+    levels = [None, 1, 6, 9]
+
+    print(
+        "{:<14}{:>7}{:>8}{:>12}{:>14}{:>14}".format(
+            "claims", "level", "bytes", "token", "encrypt us", "decrypt us"
+        )
+    )
+    for name, claims in CLAIM_SETS.items():
+        payload = json.dumps(claims)
+        for level in levels:
+            if level is None:
+                _kwargs = {}
+            else:
+                _kwargs = {"zip": "DEF", "zip_level": level}
+
+            def _encrypt():
+                return JWE(payload, alg=args.alg, enc=args.enc, **_kwargs).encrypt([key])
+
+            token = _encrypt()
+            _enc = timeit.timeit(_encrypt, number=args.rounds)
+            _dec = timeit.timeit(lambda: JWE().decrypt(token, [key]), number=args.rounds)
+            print(
+                "{:<14}{:>7}{:>8}{:>12}{:>14.1f}{:>14.1f}".format(
+                    name,
+                    "-" if level is None else level,
+                    len(payload),
+                    len(token),
+                    _enc / args.rounds * 1e6,
+                    _dec / args.rounds * 1e6,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
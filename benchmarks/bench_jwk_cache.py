@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Per token cost of verifying JWSs and decrypting JWEs that carry their key in a jwk header.
+
+Each round handles tokens from a fixed set of senders, so the embedded keys
+repeat as they would for DPoP proofs or clients that include their key.
+
+Usage: python benchmarks/bench_jwk_cache.py [-n ROUNDS] [-s SENDERS]
+"""
+import argparse
+import timeit
+from contextlib import contextmanager
+
+import cryptojwt.jwe.jwe
+import cryptojwt.jwx
+from cryptojwt.jwe.jwe import JWE
+from cryptojwt.jwk.ec import new_ec_key
+from cryptojwt.jwk.jwk import key_from_jwk_dict
+from cryptojwt.jwk.rsa import new_rsa_key
+from cryptojwt.jws.jws import JWS
+from cryptojwt.simple_jwt import peek_header
+
+CLAIMS = {"htm": "POST", "htu": "https://server.example.com/token", "iat": 1311280970}
+
+
+@contextmanager
+def cache(enabled):
+    if enabled:
+        yield
+        return
+
+    _saved = [
+        (module, module.cached_key_from_jwk_dict) for module in [cryptojwt.jwx, cryptojwt.jwe.jwe]
+    ]
+    for module, _ in _saved:
+        module.cached_key_from_jwk_dict = lambda jwk_dict: key_from_jwk_dict(jwk_dict)
+    try:
+        yield
+    finally:
+        for module, func in _saved:
+            module.cached_key_from_jwk_dict = func
+
+
+def signed_tokens(senders, keygen, alg):
+    _tokens = []
+    for _ in range(senders):
+        _key = keygen()
+        _tokens.append(JWS(CLAIMS, alg=alg).sign_compact([_key], jwk=_key.serialize()))
+    return _tokens
+
+
+def verify(tokens, alg):
+    for token in tokens:
+        _jwk = peek_header(token)["jwk"]
+        JWS(alg=alg, jwk=_jwk).verify_compact(token)
+
+
+def encrypted_tokens(senders, recipient):
+    _tokens = []
+    for _ in range(senders):
+        _sender = new_ec_key("P-256").serialize()
+        _jwe = JWE(str(CLAIMS), alg="ECDH-ES", enc="A128GCM", jwk=_sender)
+        _tokens.append(_jwe.encrypt([recipient]))
+    return _tokens
+
+
+def decrypt(tokens, recipient):
+    for token in tokens:
+        JWE().decrypt(token, [recipient])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="rounds", type=int, default=200)
+    parser.add_argument("-s", dest="senders", type=int, default=10)
+    args = parser.parse_args()
+
+    recipient = new_ec_key("P-256")
+    es256 = signed_tokens(args.senders, lambda: new_ec_key("P-256"), "ES256")
+    rs256 = signed_tokens(args.senders, lambda: new_rsa_key(2048), "RS256")
+    ecdh = encrypted_tokens(args.senders, recipient)
+    paths = {
+        "JWS ES256 verify": lambda: verify(es256, "ES256"),
+        "JWS RS256 verify": lambda: verify(rs256, "RS256"),
+        "JWE ECDH-ES decrypt": lambda: decrypt(ecdh, recipient),
+    }
+
+    _tokens = args.rounds * args.senders
+    print("{:<22}{:>14}{:>14}{:>10}".format("us per token", "no cache", "cache", "speedup"))
+    for name, func in paths.items():
+        _times = []
+        for enabled in [False, True]:
+            with cache(enabled):
+                _times.append(timeit.timeit(func, number=args.rounds) / _tokens * 1e6)
+        print("{:<22}{:>14.1f}{:>14.1f}{:>9.2f}x".format(name, *_times, _times[0] / _times[1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Time to load and serialize a JWKS of RSA keys with the current and the old integer helpers.
+
+Generating RSA-4096 keys is slow, so only a few distinct keys are generated
+and repeated, with different kids, to fill the JWKS.
+
+Usage: python benchmarks/bench_jwk_codec.py [-n ROUNDS] [-k KEYS] [-g DISTINCT] [-b BITS] [-p]
+"""
+import argparse
+import base64
+import struct
+import timeit
+from binascii import unhexlify
+from contextlib import contextmanager
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+import cryptojwt.jwk
+import cryptojwt.jwk.jwk
+import cryptojwt.jwk.rsa
+import cryptojwt.utils
+from cryptojwt.jwk.rsa import RSAKey
+from cryptojwt.key_bundle import KeyBundle
+from cryptojwt.utils import as_bytes
+
+
+def legacy_intarr2long(arr):
+    return int("".join(["%02x" % byte for byte in arr]), 16)
+
+
+def legacy_long2intarr(long_int):
+    _bytes = []
+    while long_int:
+        long_int, r = divmod(long_int, 256)
+        _bytes.insert(0, r)
+    return _bytes
+
+
+def legacy_long_to_base64(n, mlen=0):
+    bys = legacy_long2intarr(n)
+    if mlen:
+        _len = mlen - len(bys)
+        if _len:
+            bys = [0] * _len + bys
+    data = struct.pack("%sB" % len(bys), *bys)
+    if not len(data):
+        data = b"\x00"
+    s = base64.urlsafe_b64encode(data).rstrip(b"=")
+    return s.decode("ascii")
+
+
+def legacy_base64_to_long(data):
+    if isinstance(data, str):
+        data = data.encode("ascii")
+    _d = base64.urlsafe_b64decode(as_bytes(data) + b"==")
+    return legacy_intarr2long(struct.unpack("%sB" % len(_d), _d))
+
+
+def legacy_base64url_to_long(data):
+    _data = as_bytes(data)
+    _d = base64.urlsafe_b64decode(_data + b"==")
+    if [e for e in [b"+", b"/", b"="] if e in _data]:
+        raise ValueError("Not base64url encoded")
+    return legacy_intarr2long(struct.unpack("%sB" % len(_d), _d))
+
+
+LEGACY = {
+    cryptojwt.utils: {
+        "intarr2bin": lambda arr: unhexlify("".join(["%02x" % byte for byte in arr])),
+        "intarr2long": legacy_intarr2long,
+        "long2intarr": legacy_long2intarr,
+        "long_to_base64": legacy_long_to_base64,
+        "base64_to_long": legacy_base64_to_long,
+        "base64url_to_long": legacy_base64url_to_long,
+    },
+    cryptojwt.jwk: {"base64url_to_long": legacy_base64url_to_long},
+    cryptojwt.jwk.jwk: {"base64url_to_long": legacy_base64url_to_long},
+    cryptojwt.jwk.rsa: {"long_to_base64": legacy_long_to_base64},
+}
+
+
+@contextmanager
+def helpers(name):
+    if name == "current":
+        yield
+        return
+
+    _saved = {}
+    for module, funcs in LEGACY.items():
+        for attr, func in funcs.items():
+            _saved[(module, attr)] = getattr(module, attr)
+            setattr(module, attr, func)
+    try:
+        yield
+    finally:
+        for (module, attr), func in _saved.items():
+            setattr(module, attr, func)
+
+
+def make_jwks(keys, distinct, bits, private):
+    _keys = [
+        RSAKey(priv_key=rsa.generate_private_key(public_exponent=65537, key_size=bits))
+        for _ in range(distinct)
+    ]
+    _jwks = []
+    for i in range(keys):
+        _jwk = _keys[i % distinct].serialize(private=private)
+        _jwk["kid"] = "key-{}".format(i)
+        _jwks.append(_jwk)
+    return _jwks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="rounds", type=int, default=5)
+    parser.add_argument("-k", dest="keys", type=int, default=1000)
+    parser.add_argument("-g", dest="distinct", type=int, default=4)
+    parser.add_argument("-b", dest="bits", type=int, default=4096)
+    parser.add_argument("-p", dest="private", action="store_true")
+    args = parser.parse_args()
+
+    jwks = make_jwks(args.keys, args.distinct, args.bits, args.private)
+    _attr = "priv_key" if args.private else "pub_key"
+    crypto_keys = [{_attr: getattr(k, _attr)} for k in KeyBundle(keys=jwks)]
+
+    def _load():
+        return KeyBundle(keys=jwks)
+
+    def _serialize():
+        # RSAKey.serialize reuses the base64url values it already has, so
+        # start from the cryptography key instances
+        return [
+            RSAKey(kid=_jwk["kid"], **_key).serialize(private=args.private)
+            for _key, _jwk in zip(crypto_keys, jwks)
+        ]
+
+    print(
+        "{} RSA-{} keys, {}".format(args.keys, args.bits, "private" if args.private else "public")
+    )
+    print("{:<12}{:>14}{:>14}".format("helpers", "load ms", "serialize ms"))
+    for name in ["legacy", "current"]:
+        with helpers(name):
+            _load_time = timeit.timeit(_load, number=args.rounds)
+            _ser_time = timeit.timeit(_serialize, number=args.rounds)
+        print(
+            "{:<12}{:>14.1f}{:>14.1f}".format(
+                name, _load_time / args.rounds * 1e3, _ser_time / args.rounds * 1e3
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
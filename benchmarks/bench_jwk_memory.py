@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Memory used by parsed RSA public keys, as loaded and after compact().
+
+Usage: python benchmarks/bench_jwk_memory.py [-k KEYS] [-d DISTINCT]
+"""
+import argparse
+import gc
+import tracemalloc
+
+from cryptojwt.jwk.jwk import key_from_jwk_dict
+from cryptojwt.jwk.rsa import new_rsa_key
+
+
+def traced():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-k", dest="keys", type=int, default=10000)
+    parser.add_argument("-d", dest="distinct", type=int, default=20)
+    args = parser.parse_args()
+
+    # Generating 10k RSA keys takes too long, the key material is repeated
+    # but every key is parsed on its own
+    _jwks = [new_rsa_key(2048).serialize() for _ in range(args.distinct)]
+    _specs = []
+    for i in range(args.keys):
+        _spec = dict(_jwks[i % args.distinct])
+        _spec["kid"] = "key-{}".format(i)
+        _specs.append(_spec)
+
+    # OpenSSL's allocations for the key instances aren't traced
+    tracemalloc.start()
+    _start = traced()
+    keys = [key_from_jwk_dict(spec) for spec in _specs]
+    _loaded = traced() - _start
+    for key in keys:
+        key.compact()
+    _compacted = traced() - _start
+    tracemalloc.stop()
+
+    print("{:<14}{:>14}{:>16}".format("{} keys".format(args.keys), "total KiB", "bytes per key"))
+    for name, used in [("loaded", _loaded), ("compacted", _compacted)]:
+        print("{:<14}{:>14.0f}{:>16.0f}".format(name, used / 1024, used / args.keys))
+
+
+if __name__ == "__main__":
+    main()
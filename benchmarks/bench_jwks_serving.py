@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Cost of serving a JWKS from a KeyJar, serialized on every request and cached.
+
+Usage: python benchmarks/bench_jwks_serving.py [-n ROUNDS] [-r ROTATIONS]
+"""
+import argparse
+import timeit
+
+from cryptojwt import json_codec
+from cryptojwt.key_jar import build_keyjar
+
+KEYDEFS = [
+    {"type": "RSA", "key": "", "use": ["sig"]},
+    {"type": "EC", "crv": "P-256", "use": ["sig"]},
+    {"type": "EC", "crv": "P-384", "use": ["sig"]},
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="rounds", type=int, default=2000)
+    parser.add_argument("-r", dest="rotations", type=int, default=1)
+    args = parser.parse_args()
+
+    key_jar = build_keyjar(KEYDEFS)
+    for _ in range(args.rotations):
+        key_jar.rotate_keys(KEYDEFS)
+    _keys = len(key_jar.export_jwks()["keys"])
+
+    _timers = {
+        "serialized": lambda: json_codec.dumps(key_jar.export_jwks()),
+        "cached": lambda: key_jar.serialized_jwks().content,
+        "cached gzip + etag": lambda: (
+            key_jar.serialized_jwks().gzipped,
+            key_jar.serialized_jwks().etag,
+        ),
+    }
+    print("{:<22}{:>14}".format("{} public keys".format(_keys), "us per call"))
+    for method, timer in _timers.items():
+        _time = timeit.timeit(timer, number=args.rounds)
+        print("{:<22}{:>14.2f}".format(method, _time / args.rounds * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Verification cost of a JSON serialized JWS carrying several RSA signatures,
+sequentially, on a thread pool and with at_least_one early exit.
+
+Usage: python benchmarks/bench_jws_json_verify.py [-n ROUNDS] [-s SIGNATURES] [-w WORKERS]
+"""
+import argparse
+import json
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+
+from cryptojwt.jwk.rsa import new_rsa_key
+from cryptojwt.jws.jws import JWS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="rounds", type=int, default=200)
+    parser.add_argument("-s", dest="signatures", type=int, default=4)
+    parser.add_argument("-w", dest="workers", type=int, default=4)
+    args = parser.parse_args()
+
+    keys = [new_rsa_key(key_size=2048, kid="k{}".format(i)) for i in range(args.signatures)]
+    payload = json.dumps({"iss": "https://example.com", "sub": "benchmark"})
+    token = JWS(payload).sign_json(
+        headers=[({"alg": "RS256"}, {"kid": k.kid}) for k in keys], keys=keys
+    )
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        for label, kwargs in [
+            ("sequential", {}),
+            ("thread pool", {"executor": executor}),
+            ("at_least_one", {"at_least_one": True}),
+        ]:
+            _time = timeit.timeit(
+                lambda: JWS().verify_json(token, keys=keys, **kwargs), number=args.rounds
+            )
+            print("{:<14}{:>10.1f} us/token".format(label, _time / args.rounds * 1e6))
+
+
+if __name__ == "__main__":
+    main()
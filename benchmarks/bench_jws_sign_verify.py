@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Compare JWS compact signing and verification speed across the supported
+asymmetric signature algorithms.
+
+Usage: python benchmarks/bench_jws_sign_verify.py [-n ROUNDS]
+"""
+import argparse
+import timeit
+
+from cryptojwt.jwk.ec import new_ec_key
+from cryptojwt.jwk.okp import new_okp_key
+from cryptojwt.jwk.rsa import new_rsa_key
+from cryptojwt.jws.jws import JWS
+
+PAYLOAD = '{"iss": "https://example.com", "sub": "benchmark", "aud": "client"}'
+
+
+def keys():
+    return [
+        ("RS256", new_rsa_key(key_size=2048)),
+        ("PS256", new_rsa_key(key_size=2048)),
+        ("ES256", new_ec_key(crv="P-256")),
+        ("ES384", new_ec_key(crv="P-384")),
+        ("EdDSA", new_okp_key(crv="Ed25519")),
+        ("EdDSA", new_okp_key(crv="Ed448")),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    print("{:<16}{:>14}{:>14}".format("alg", "sign (us)", "verify (us)"))
+    for alg, key in keys():
+        token = JWS(PAYLOAD, alg=alg).sign_compact([key])
+        label = "{}/{}".format(alg, getattr(key, "crv", key.kty))
+
+        sign = timeit.timeit(lambda: JWS(PAYLOAD, alg=alg).sign_compact([key]), number=args.rounds)
+        verify = timeit.timeit(
+            lambda: JWS(alg=alg).verify_compact(token, [key]), number=args.rounds
+        )
+        print(
+            "{:<16}{:>14.1f}{:>14.1f}".format(
+                label, sign / args.rounds * 1e6, verify / args.rounds * 1e6
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Peak memory and time for signing and verifying a large payload, in memory
+with sign_compact/verify_compact compared with sign_stream/verify_stream
+reading the payload from a file.
+
+Usage: python benchmarks/bench_jws_stream.py [-s SIZE_MB] [-a ALG]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from cryptojwt.jwk.ec import new_ec_key
+from cryptojwt.jwk.hmac import SYMKey
+from cryptojwt.jwk.rsa import new_rsa_key
+from cryptojwt.jws.jws import JWS
+
+
+def measure(func):
+    tracemalloc.start()
+    _start = time.perf_counter()
+    func()
+    _time = time.perf_counter() - _start
+    _, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return _time, _peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-s", dest="size", type=int, default=20)
+    parser.add_argument("-a", dest="alg", default="RS256")
+    args = parser.parse_args()
+
+    if args.alg.startswith("HS"):
+        key = SYMKey(key=os.urandom(32))
+    elif args.alg.startswith("ES"):
+        key = new_ec_key(crv="P-256")
+    else:
+        key = new_rsa_key()
+
+    with tempfile.NamedTemporaryFile() as fp:
+        for _ in range(args.size):
+            fp.write(os.urandom(1024 * 1024))
+        fp.flush()
+
+        def in_memory():
+            with open(fp.name, "rb") as src:
+                payload = src.read()
+            token = JWS(payload, alg=args.alg).sign_compact([key])
+            JWS(alg=args.alg).verify_compact(token, [key])
+
+        def streaming():
+            with open(fp.name, "rb") as src:
+                token = JWS(alg=args.alg).sign_stream(src, [key])
+            with open(fp.name, "rb") as src:
+                JWS(alg=args.alg).verify_stream(token, src, [key])
+
+        print("{} MB payload, {}".format(args.size, args.alg))
+        for label, func in [("in memory", in_memory), ("streaming", streaming)]:
+            _time, _peak = measure(func)
+            print("{:<12}{:>10.2f} s{:>12.1f} MB peak".format(label, _time, _peak / 1024 / 1024))
+
+
+if __name__ == "__main__":
+    main()
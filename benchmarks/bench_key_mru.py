@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Verification cost for tokens without a kid when the issuer publishes
+several keys, trying keys in list order compared with trying the key that
+last verified a token from the issuer first.
+
+Usage: python benchmarks/bench_key_mru.py [-n ROUNDS] [-k KEYS]
+"""
+import argparse
+import json
+import timeit
+
+from cryptojwt.jwk.rsa import new_rsa_key
+from cryptojwt.jws.jws import JWS
+from cryptojwt.jws.utils import KeyMRU
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="rounds", type=int, default=500)
+    parser.add_argument("-k", dest="keys", type=int, default=8)
+    args = parser.parse_args()
+
+    keys = [new_rsa_key(key_size=2048) for _ in range(args.keys)]
+    for key in keys:
+        key.kid = ""
+
+    payload = json.dumps({"iss": "https://example.com", "sub": "benchmark"})
+    # Signed with the last key, the worst case for list order
+    token = JWS(payload, alg="RS256").sign_compact([keys[-1]])
+
+    mru = KeyMRU()
+    for label, kwargs in [("list order", {}), ("MRU first", {"key_mru": mru})]:
+        _jws = JWS(alg="RS256", **kwargs)
+        _jws.verify_compact(token, keys)
+        _time = timeit.timeit(
+            lambda: JWS(alg="RS256", **kwargs).verify_compact(token, keys), number=args.rounds
+        )
+        _jws = JWS(alg="RS256", **kwargs)
+        _jws.verify_compact(token, keys)
+        print(
+            "{:<12}{:>10.1f} us/token{:>6} trials/token".format(
+                label, _time / args.rounds * 1e6, _jws.key_trials
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
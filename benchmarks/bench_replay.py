@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Throughput and memory of the replay stores, compared with an unbounded dictionary.
+
+Usage: python benchmarks/bench_replay.py [-n KEYS] [-l LIFETIME] [-r RATE]
+"""
+import argparse
+import itertools
+import os
+import tempfile
+import time
+import tracemalloc
+
+from cryptojwt.replay import MemoryReplayStore
+from cryptojwt.replay import SQLiteReplayStore
+
+
+class DictStore(object):
+    """What is often used instead, nothing is ever forgotten."""
+
+    def __init__(self):
+        self._seen = {}
+
+    def add(self, key, expires_at, now=None):
+        if key in self._seen:
+            return False
+        self._seen[key] = expires_at
+        return True
+
+
+def run(store, keys, lifetime, rate):
+    # rate new tokens per second, each valid for lifetime seconds
+    _start = time.perf_counter()
+    for i, key in enumerate(keys):
+        _now = 1700000000 + i / rate
+        store.add(key, _now + lifetime, now=_now)
+    return len(keys) / (time.perf_counter() - _start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="keys", type=int, default=200000)
+    parser.add_argument("-l", dest="lifetime", type=int, default=300)
+    parser.add_argument("-r", dest="rate", type=int, default=100)
+    args = parser.parse_args()
+
+    keys = ["https://op.example.org:{:032x}".format(i) for i in range(args.keys)]
+    print("{:<10}{:>14}{:>14}".format("store", "adds/s", "memory KiB"))
+    _counter = itertools.count()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _stores = {
+            "dict": DictStore,
+            "memory": MemoryReplayStore,
+            "sqlite": lambda: SQLiteReplayStore(
+                os.path.join(tmpdir, "replay-{}.db".format(next(_counter)))
+            ),
+        }
+        for name, factory in _stores.items():
+            _rate = run(factory(), keys, args.lifetime, args.rate)
+            tracemalloc.start()
+            _store = factory()
+            run(_store, keys, args.lifetime, args.rate)
+            _memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            print("{:<10}{:>14.0f}{:>14.0f}".format(name, _rate, _memory / 1024))
+
+
+if __name__ == "__main__":
+    main()
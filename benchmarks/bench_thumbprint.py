@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Cost of JWK thumbprints, computed and memoized, and of finding a key in a KeyBundle by thumbprint.
+
+Usage: python benchmarks/bench_thumbprint.py [-n ROUNDS] [-k KEYS]
+"""
+import argparse
+import timeit
+
+from cryptojwt.jwk.ec import new_ec_key
+from cryptojwt.jwk.rsa import new_rsa_key
+from cryptojwt.key_bundle import KeyBundle
+
+
+def scan(bundle, thumbprint):
+    """Finding a key the way it had to be done before, without memoization."""
+    for key in bundle:
+        if key.thumbprint("SHA-256", members=key.required) == thumbprint:
+            return key
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="rounds", type=int, default=200)
+    parser.add_argument("-k", dest="keys", type=int, default=100)
+    args = parser.parse_args()
+
+    keys = {"EC P-256": new_ec_key("P-256"), "RSA 2048": new_rsa_key(2048)}
+    print("{:<26}{:>12}".format("thumbprint", "us per call"))
+    for name, key in keys.items():
+        _timers = {
+            "computed": lambda: key.thumbprint("SHA-256", members=key.required),
+            "memoized": lambda: key.thumbprint("SHA-256"),
+        }
+        for method, timer in _timers.items():
+            _time = timeit.timeit(timer, number=args.rounds * 10)
+            print("{:<26}{:>12.2f}".format(name + " " + method, _time / args.rounds / 10 * 1e6))
+
+    bundle = KeyBundle()
+    bundle.extend([new_ec_key("P-256") for _ in range(args.keys)])
+    _last = bundle.keys()[-1].thumbprint("SHA-256")
+    print()
+    print("{:<26}{:>12}".format("lookup in {} keys".format(args.keys), "us per call"))
+    _timers = {
+        "scan": lambda: scan(bundle, _last),
+        "get_key_by_thumbprint": lambda: bundle.get_key_by_thumbprint(_last),
+    }
+    for method, timer in _timers.items():
+        _time = timeit.timeit(timer, number=args.rounds)
+        print("{:<26}{:>12.2f}".format(method, _time / args.rounds * 1e6))
+
+
+if __name__ == "__main__":
+    main()
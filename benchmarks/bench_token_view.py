@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Time and peak memory for getting at the header of a compact JWS: eager
+decoding of all parts compared with the lazy token view and peek_header.
+
+Usage: python benchmarks/bench_token_view.py [-n ROUNDS]
+"""
+import argparse
+import os
+import timeit
+import tracemalloc
+
+from cryptojwt.jwk.hmac import SYMKey
+from cryptojwt.jws.jws import JWS
+from cryptojwt.jws.jws import JWSig
+from cryptojwt.simple_jwt import peek_header
+from cryptojwt.utils import b64e
+from cryptojwt.utils import split_token
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    func()
+    _, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return _peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", dest="rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    key = SYMKey(key=os.urandom(32), kid="bench")
+
+    print("{:<8}{:<14}{:>12}{:>14}".format("token", "method", "time us", "peak bytes"))
+    for size in [1024, 100 * 1024]:
+        # The payload is base64url encoded twice, once here and once in the JWS
+        payload = {"data": b64e(os.urandom(size * 9 // 16 - 64)).decode()}
+        token = JWS(payload, alg="HS256").sign_compact([key])
+
+        methods = {
+            "eager": lambda: JWSig().unpack_parts(split_token(token.encode())).headers,
+            "lazy": lambda: JWSig().unpack(token).headers,
+            "peek_header": lambda: peek_header(token),
+            "verify": lambda: JWS(alg="HS256").verify_compact(token, [key]),
+        }
+        for name, method in methods.items():
+            _time = timeit.timeit(method, number=args.rounds)
+            print(
+                "{:<8}{:<14}{:>12.1f}{:>14}".format(
+                    "{}KB".format(size // 1024),
+                    name,
+                    _time / args.rounds * 1e6,
+                    peak_memory(method),
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -59,6 +59,7 @@ setup(
         "testing": tests_requires,
         "docs": ["Sphinx", "sphinx-autobuild", "alabaster"],
         "quality": ["isort>=5.0.2", "black"],
+        "orjson": ["orjson"],
     },
     scripts=glob.glob("script/*.py"),
     entry_points={
@@ -9,6 +9,7 @@ from cryptojwt.key_bundle import KeyBundle
 from cryptojwt.key_jar import KeyJar
 
 from .exception import BadSyntax
+from .simple_jwt import peek_header
 from .utils import as_unicode
 from .utils import b64d
 from .utils import b64encode_item
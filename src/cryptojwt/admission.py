@@ -0,0 +1,188 @@
+"""Cheap checks on raw tokens, to reject bad ones before they are parsed."""
+import threading
+import time
+from collections import Counter
+
+from . import json_codec
+from .exception import BadSyntax
+from .exception import TokenRejected
+from .utils import as_bytes
+from .utils import b64d
+
+# Header parameters from the crit list that this library knows how to handle
+UNDERSTOOD_CRIT = ["b64"]
+
+
+class AdmissionFilter(object):
+    """
+    Checks a token on the raw bytes before it's parsed. Only the protected
+    header is decoded, and the payload of a signed token if the issuer is
+    checked. Every rejection is counted by reason, see :py:attr:`counters`.
+
+    The reasons are: 'token_length', 'malformed', 'header_size', 'alg',
+    'enc', 'crit', 'kid' and 'iss'.
+    """
+
+    def __init__(
+        self,
+        max_token_length=65536,
+        max_header_length=4096,
+        allowed_algs=None,
+        allowed_encs=None,
+        understood_crit=None,
+        key_jar=None,
+        check_kid=False,
+        require_kid=False,
+        check_iss=False,
+        allow_json=False,
+        refresh_interval=300,
+    ):
+        """
+        :param max_token_length: The maximum length of a token
+        :param max_header_length: The maximum length of the base64url encoded
+            protected header
+        :param allowed_algs: The alg header values accepted, signing and key
+            management algorithms alike. Any if not given.
+        :param allowed_encs: The enc header values accepted in encrypted
+            tokens, any if not given
+        :param understood_crit: Header parameters that may be listed in crit
+        :param key_jar: A :py:class:`cryptojwt.key_jar.KeyJar` instance, used
+            for the kid and issuer checks
+        :param check_kid: Whether a kid in the header must belong to a key in
+            the key jar
+        :param require_kid: Whether tokens without a kid are rejected
+        :param check_iss: Whether the issuer of a signed token must have keys
+            in the key jar
+        :param allow_json: Whether tokens using the JSON serialization are let
+            through. Only the length is checked for them.
+        :param refresh_interval: The index of the key jar is updated on a
+            miss, see :py:meth:`cryptojwt.key_jar.KeyJar.update_index`, but
+            at most once every this many seconds. The default is the default
+            cache time of a key bundle.
+        """
+        self.max_token_length = max_token_length
+        self.max_header_length = max_header_length
+        self.allowed_algs = allowed_algs
+        self.allowed_encs = allowed_encs
+        if understood_crit is None:
+            self.understood_crit = UNDERSTOOD_CRIT
+        else:
+            self.understood_crit = understood_crit
+        if (check_kid or check_iss) and key_jar is None:
+            raise ValueError("The kid and issuer checks need a key jar")
+        self.key_jar = key_jar
+        self.check_kid = check_kid
+        self.require_kid = require_kid
+        self.check_iss = check_iss
+        self.allow_json = allow_json
+        self.refresh_interval = refresh_interval
+        # rejection reason -> number of tokens
+        self.counters = Counter()
+        self._index_updated = None
+        self._lock = threading.Lock()
+
+    def _reject(self, reason, msg=""):
+        self.counters[reason] += 1
+        raise TokenRejected(reason, msg)
+
+    def _known_kid(self, kid):
+        if self.key_jar.issuers_with_kid(kid):
+            return True
+
+        with self._lock:
+            # Unknown kids are chosen by the sender, don't let them trigger
+            # an update of the index more than once per refresh_interval
+            _now = time.monotonic()
+            if (
+                self._index_updated is not None
+                and _now - self._index_updated < self.refresh_interval
+            ):
+                return False
+            self._index_updated = _now
+
+        self.key_jar.update_index()
+        return bool(self.key_jar.issuers_with_kid(kid))
+
+    def admit(self, token):
+        """
+        Check a token.
+
+        :param token: The token as received
+        :return: The protected header as a dictionary, None for tokens using
+            the JSON serialization
+        :raises: TokenRejected if the token should not be processed further
+        """
+        if len(token) > self.max_token_length:
+            self._reject("token_length", "Token too long: {}".format(len(token)))
+
+        token = as_bytes(token)
+        if token[:1] == b"{":
+            if not self.allow_json:
+                self._reject("malformed", "JSON serialization not allowed")
+            return None
+
+        # 3 parts for a signed token and 5 for an encrypted one
+        _dots = token.count(b".")
+        if _dots not in (2, 4):
+            self._reject("malformed", "Wrong number of parts: {}".format(_dots + 1))
+
+        _end = token.index(b".")
+        if _end > self.max_header_length:
+            self._reject("header_size", "Header too large: {}".format(_end))
+
+        try:
+            headers = json_codec.loads(b64d(token[:_end]))
+        except (BadSyntax, ValueError):
+            self._reject("malformed", "Header can't be decoded")
+        if not isinstance(headers, dict):
+            self._reject("malformed", "Header is not a JSON object")
+
+        if self.allowed_algs is not None and headers.get("alg") not in self.allowed_algs:
+            self._reject("alg", "Algorithm not allowed: {}".format(headers.get("alg")))
+
+        if _dots == 4:
+            if self.allowed_encs is not None and headers.get("enc") not in self.allowed_encs:
+                self._reject("enc", "Encryption not allowed: {}".format(headers.get("enc")))
+
+        if "crit" in headers:
+            _crit = headers["crit"]
+            if not isinstance(_crit, list) or not _crit:
+                self._reject("crit", "crit must be a non-empty list")
+            for param in _crit:
+                if (
+                    not isinstance(param, str)
+                    or param not in self.understood_crit
+                    or param not in headers
+                ):
+                    self._reject("crit", "Critical header not understood: {}".format(param))
+
+        if self.check_kid:
+            _kid = headers.get("kid")
+            if _kid is None:
+                if self.require_kid:
+                    self._reject("kid", "No kid")
+            elif not isinstance(_kid, str) or not self._known_kid(_kid):
+                self._reject("kid", "Unknown kid: {}".format(_kid))
+
+        # An unencoded payload (b64=false) can't be decoded on its own
+        if self.check_iss and _dots == 2 and headers.get("b64", True):
+            self._check_issuer(token, _end)
+
+        return headers
+
+    def _check_issuer(self, token, start):
+        _end = token.index(b".", start + 1)
+        try:
+            _payload = b64d(token[start + 1 : _end])
+        except BadSyntax:
+            self._reject("malformed", "Payload can't be decoded")
+
+        # A payload that isn't a JSON object has no issuer to check
+        try:
+            _claims = json_codec.loads(_payload)
+        except ValueError:
+            return
+        if isinstance(_claims, dict) and "iss" in _claims:
+            _iss = _claims["iss"]
+            if not isinstance(_iss, str) or _iss not in self.key_jar:
+                self._reject("iss", "Unknown issuer: {}".format(_iss))
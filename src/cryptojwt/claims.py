@@ -0,0 +1,95 @@
+"""Validation of the registered claims of a JWT."""
+import time
+
+from .exception import Expired
+from .exception import InvalidClaim
+
+TIME_CLAIMS = ["exp", "nbf", "iat"]
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return list(value)
+
+
+class ClaimsPolicy(object):
+    """
+    The requirements the claims of a JWT must fulfill to be accepted.
+
+    A policy only ever rejects. :py:class:`cryptojwt.jwt.JWT` uses it on the
+    unverified payload, to avoid verifying the signature of tokens that would
+    be rejected anyway, and again on the verified payload.
+    """
+
+    def __init__(self, iss=None, aud=None, skew=15, max_age=0, required=None):
+        """
+        :param iss: The issuer, or list of issuers, to accept tokens from.
+            If not given any issuer is accepted.
+        :param aud: Who I am, one identifier or a list of them. If given the
+            aud claim must contain at least one of them.
+        :param skew: Allowed clock skew in seconds
+        :param max_age: If not 0 an iat claim is required and the token must
+            not have been issued more than this many seconds ago
+        :param required: Claims that must be present
+        """
+        self.iss = _as_list(iss)
+        self.aud = _as_list(aud)
+        self.skew = skew
+        self.max_age = max_age
+        self.required = _as_list(required)
+        if self.iss and "iss" not in self.required:
+            self.required.append("iss")
+        if self.aud and "aud" not in self.required:
+            self.required.append("aud")
+        if self.max_age and "iat" not in self.required:
+            self.required.append("iat")
+
+    def check(self, claims, now=None):
+        """
+        Verify that a set of claims fulfill the policy.
+
+        :param claims: The claims of a JWT as a dictionary
+        :param now: The current time, seconds since epoch
+        :raises: Expired if the token isn't valid at this time, InvalidClaim
+            if a claim is missing or has a value that isn't accepted
+        """
+        if not isinstance(claims, dict):
+            raise InvalidClaim("The payload is not a JSON object")
+
+        for claim in self.required:
+            if claim not in claims:
+                raise InvalidClaim("Missing claim: {}".format(claim))
+
+        for claim in TIME_CLAIMS:
+            if claim in claims:
+                _val = claims[claim]
+                if isinstance(_val, bool) or not isinstance(_val, (int, float)):
+                    raise InvalidClaim("Invalid {}".format(claim))
+
+        if now is None:
+            now = time.time()
+
+        if "exp" in claims and claims["exp"] < now - self.skew:
+            raise Expired("Token has expired")
+        if "nbf" in claims and claims["nbf"] > now + self.skew:
+            raise Expired("Token is not yet valid")
+        if "iat" in claims:
+            if claims["iat"] > now + self.skew:
+                raise Expired("Token issued in the future")
+            if self.max_age and claims["iat"] < now - self.max_age - self.skew:
+                raise Expired("Token too old")
+
+        if self.iss and claims["iss"] not in self.iss:
+            raise InvalidClaim("Issuer not accepted: {}".format(claims["iss"]))
+
+        if self.aud:
+            _aud = claims["aud"]
+            if isinstance(_aud, str):
+                _aud = [_aud]
+            elif not isinstance(_aud, list):
+                raise InvalidClaim("Invalid aud")
+            if not any(a in self.aud for a in _aud):
+                raise InvalidClaim("Not in the audience: {}".format(_aud))
@@ -0,0 +1,227 @@
+"""Verification of DPoP proofs as described in RFC 9449."""
+import hashlib
+import logging
+import time
+from urllib.parse import urlsplit
+from urllib.parse import urlunsplit
+
+from . import json_codec
+from .exception import BadSyntax
+from .exception import BadType
+from .exception import Expired
+from .exception import InvalidDPoPProof
+from .exception import JWKESTException
+from .exception import KeyIOError
+from .exception import ReplayDetected
+from .exception import WrongNumberOfParts
+from .jwk.jwk import key_from_jwk_dict
+from .jws.exception import NoSuitableSigningKeys
+from .jws.jws import JWS
+from .jws.utils import alg2keytype
+from .replay import MemoryReplayStore
+from .utils import LRUCache
+from .utils import as_bytes
+from .utils import as_unicode
+from .utils import b64d
+from .utils import b64e
+
+logger = logging.getLogger(__name__)
+
+DPOP_TYPE = "dpop+jwt"
+
+DPOP_ALGS = [
+    "ES256",
+    "ES384",
+    "ES512",
+    "RS256",
+    "RS384",
+    "RS512",
+    "PS256",
+    "PS384",
+    "PS512",
+    "EdDSA",
+]
+
+DPOP_REQUIRED_CLAIMS = ["jti", "htm", "htu", "iat"]
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_htu(uri):
+    """
+    Normalize a URI for comparison with a htu claim. The query and fragment
+    are removed, the scheme and host are lower cased and a default port is
+    removed.
+
+    :param uri: The URI
+    :return: The normalized URI
+    :raises: ValueError if the URI has an invalid port
+    """
+    _parts = urlsplit(uri)
+    _scheme = _parts.scheme.lower()
+    _netloc = _parts.netloc.lower()
+    if _parts.port is not None and _parts.port == DEFAULT_PORTS.get(_scheme):
+        _netloc = _netloc.rsplit(":", 1)[0]
+    return urlunsplit((_scheme, _netloc, _parts.path or "/", "", ""))
+
+
+def access_token_hash(access_token):
+    """
+    The value of the ath claim for an access token.
+
+    :param access_token: The access token
+    :return: The base64url encoded SHA-256 hash of the access token
+    """
+    return as_unicode(b64e(hashlib.sha256(as_bytes(access_token)).digest()))
+
+
+class DPoPVerifier(object):
+    """
+    Verifies DPoP proofs. The keys from the jwk headers and their thumbprints
+    are cached and the jti of every accepted proof is remembered for as long
+    as the proof could be accepted, to detect replays.
+    """
+
+    def __init__(
+        self, allowed_algs=None, lifetime=300, leeway=5, replay_store=None, cache_size=1024
+    ):
+        """
+        :param allowed_algs: The signing algorithms that are accepted
+        :param lifetime: For how many seconds after iat a proof is accepted
+        :param leeway: Allowed clock skew in seconds
+        :param replay_store: A :py:class:`cryptojwt.replay.ReplayStore` where
+            jti values are remembered, a
+            :py:class:`cryptojwt.replay.MemoryReplayStore` if not given.
+            When the store is full proofs are rejected with
+            :py:class:`cryptojwt.exception.ReplayStoreFull`.
+        :param cache_size: The maximum number of parsed headers kept
+        """
+        self.allowed_algs = allowed_algs or DPOP_ALGS
+        self.lifetime = lifetime
+        self.leeway = leeway
+        if replay_store is None:
+            self.replay_store = MemoryReplayStore()
+        else:
+            self.replay_store = replay_store
+        # protected header -> (headers, key, jkt)
+        self._header_cache = LRUCache(cache_size)
+
+    def _check_header(self, b64_header):
+        """
+        Verify the protected header of a proof and load the key from it.
+
+        :param b64_header: The base64url encoded header
+        :return: 3-tuple of the headers, the key and its thumbprint
+        """
+        _cached = self._header_cache.get(b64_header)
+        if _cached is not None:
+            return _cached
+
+        try:
+            headers = json_codec.loads(as_unicode(b64d(as_bytes(b64_header))))
+        except (BadSyntax, ValueError):
+            raise InvalidDPoPProof("Malformed header")
+        if not isinstance(headers, dict):
+            raise InvalidDPoPProof("Malformed header")
+
+        if headers.get("typ") != DPOP_TYPE:
+            raise BadType("typ should be {}".format(DPOP_TYPE))
+
+        _alg = headers.get("alg")
+        if _alg not in self.allowed_algs:
+            raise InvalidDPoPProof("Signing algorithm not allowed: {}".format(_alg))
+
+        _jwk = headers.get("jwk")
+        if not isinstance(_jwk, dict):
+            raise InvalidDPoPProof("Missing jwk header")
+        if "d" in _jwk:
+            raise InvalidDPoPProof("The jwk header contains a private key")
+
+        try:
+            key = key_from_jwk_dict(_jwk, private=False)
+        except (JWKESTException, KeyIOError, ValueError) as err:
+            raise InvalidDPoPProof("Invalid jwk header: {}".format(err))
+        if key.kty != alg2keytype(_alg):
+            raise InvalidDPoPProof("Key type doesn't match the signing algorithm")
+
+        _res = (headers, key, as_unicode(key.thumbprint("SHA-256")))
+        self._header_cache.set(b64_header, _res)
+        return _res
+
+    def _check_claims(self, claims, htm, htu, now):
+        for claim in DPOP_REQUIRED_CLAIMS:
+            if claim not in claims:
+                raise InvalidDPoPProof("Missing claim: {}".format(claim))
+
+        if not isinstance(claims["jti"], str) or not claims["jti"]:
+            raise InvalidDPoPProof("Invalid jti")
+
+        if claims["htm"] != htm:
+            raise InvalidDPoPProof("htm doesn't match the request method")
+
+        try:
+            _match = normalize_htu(claims["htu"]) == normalize_htu(htu)
+        except (AttributeError, TypeError, ValueError):
+            raise InvalidDPoPProof("Invalid htu")
+        if not _match:
+            raise InvalidDPoPProof("htu doesn't match the request URI")
+
+        _iat = claims["iat"]
+        if isinstance(_iat, bool) or not isinstance(_iat, (int, float)):
+            raise InvalidDPoPProof("Invalid iat")
+        if _iat < now - self.lifetime - self.leeway:
+            raise Expired("DPoP proof too old")
+        if _iat > now + self.leeway:
+            raise Expired("DPoP proof issued in the future")
+
+    def verify(self, proof, htm, htu, access_token=None, jkt=None, nonce=None, now=None):
+        """
+        Verify a DPoP proof.
+
+        :param proof: The value of the DPoP HTTP header
+        :param htm: The HTTP method of the request
+        :param htu: The URI of the request
+        :param access_token: The access token sent with the request, if any.
+            If given the proof must contain a matching ath claim.
+        :param jkt: The key thumbprint the access token is bound to
+            (cnf/jkt), if any
+        :param nonce: The nonce the server has provided, if any
+        :param now: The current time, seconds since epoch
+        :return: Dictionary with the keys 'msg', 'key' and 'jkt'. The value of
+            'msg' is the claims of the proof, 'key' is the key from the jwk
+            header and 'jkt' is the thumbprint of that key.
+        """
+        if now is None:
+            now = time.time()
+
+        proof = as_unicode(proof)
+        _parts = proof.split(".")
+        if len(_parts) != 3:
+            raise WrongNumberOfParts(len(_parts))
+
+        headers, key, _jkt = self._check_header(_parts[0])
+
+        try:
+            claims = JWS(alg=headers["alg"]).verify_compact(proof, [key], sigalg=headers["alg"])
+        except NoSuitableSigningKeys:
+            raise InvalidDPoPProof("kid doesn't match the jwk header")
+        if not isinstance(claims, dict):
+            raise InvalidDPoPProof("Payload is not a JSON object")
+
+        self._check_claims(claims, htm, htu, now)
+
+        if nonce is not None and claims.get("nonce") != nonce:
+            raise InvalidDPoPProof("nonce doesn't match")
+
+        if access_token is not None and claims.get("ath") != access_token_hash(access_token):
+            raise InvalidDPoPProof("ath doesn't match the access token")
+
+        if jkt is not None and jkt != _jkt:
+            raise InvalidDPoPProof("The key doesn't match the one the access token is bound to")
+
+        # Only remember proofs with a valid signature
+        _expires_at = claims["iat"] + self.lifetime + self.leeway
+        if not self.replay_store.add("{}:{}".format(_jkt, claims["jti"]), _expires_at, now):
+            raise ReplayDetected(claims["jti"])
+
+        return {"msg": claims, "key": key, "jkt": _jkt}
@@ -39,6 +39,30 @@ class BadType(Invalid):
     """The JWT has an unexpected "typ" value."""
 
 
+class ReplayDetected(Invalid):
+    """The JWT has been used before."""
+
+
+class ReplayStoreFull(Invalid):
+    """The replay store is full so a replay of the JWT can't be ruled out."""
+
+
+class InvalidDPoPProof(Invalid):
+    """The DPoP proof doesn't fulfill the requirements."""
+
+
+class InvalidClaim(Invalid):
+    """A claim in the JWT is missing or has an unacceptable value."""
+
+
+class TokenRejected(Invalid):
+    """The token was rejected before being parsed."""
+
+    def __init__(self, reason, msg=""):
+        Invalid.__init__(self, msg or reason)
+        self.reason = reason
+
+
 class MissingKey(JWKESTException):
     """No usable key"""
 
@@ -121,3 +145,7 @@ class HTTPException(JWKESTException):
 
 class UnsupportedECurve(Unsupported):
     pass
+
+
+class UnsupportedOKPCurve(Unsupported):
+    pass
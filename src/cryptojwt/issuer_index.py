@@ -0,0 +1,305 @@
+"""Indexes over the issuers in a key jar, to avoid scanning all of them."""
+
+
+def normalize_issuer(issuer_id):
+    """
+    An issuer ID with and without a trailing '/' is regarded as the same
+    issuer when keys are looked up.
+
+    :param issuer_id: An issuer ID
+    :return: The issuer ID without a trailing '/'
+    """
+    if issuer_id.endswith("/"):
+        return issuer_id[:-1]
+    return issuer_id
+
+
+def _update(reverse, issuer_id, old, new):
+    """
+    Move an issuer ID in a reverse index from the values it had to the ones
+    it has now.
+
+    :param reverse: Dictionary of value -> issuer IDs, a dictionary used as
+        an ordered set
+    :param issuer_id: The issuer ID
+    :param old: The set of values it had
+    :param new: The set of values it has
+    :return: new
+    """
+    for value in old - new:
+        _ids = reverse[value]
+        del _ids[issuer_id]
+        if not _ids:
+            del reverse[value]
+    for value in new - old:
+        reverse.setdefault(value, {})[issuer_id] = None
+    return new
+
+
+class _Node(object):
+    __slots__ = ["label", "children", "issuer_id", "seq", "first"]
+
+    def __init__(self, label=""):
+        self.label = label
+        # first character of the child's label -> child
+        self.children = {}
+        self.issuer_id = None
+        self.seq = None
+        # (seq, issuer_id) of the first added issuer ID in this subtree
+        self.first = None
+
+    def refresh_first(self):
+        _first = [c.first for c in self.children.values()]
+        if self.issuer_id is not None:
+            _first.append((self.seq, self.issuer_id))
+        self.first = min(_first) if _first else None
+
+
+class PrefixTrie(object):
+    """
+    A radix tree of strings. Finds the first added string that starts with a
+    given prefix in time proportional to the length of the prefix.
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self._seq = 0
+
+    def add(self, key):
+        """
+        Add a string. Adding one that is already in the tree is a no-op.
+
+        :param key: The string
+        """
+        node = self._root
+        _path = []
+        i = 0
+        while i < len(key):
+            _path.append(node)
+            child = node.children.get(key[i])
+            if child is None:
+                child = _Node(key[i:])
+                node.children[key[i]] = child
+                node = child
+                break
+
+            label = child.label
+            _common = 0
+            _max = min(len(label), len(key) - i)
+            while _common < _max and label[_common] == key[i + _common]:
+                _common += 1
+
+            if _common < len(label):
+                # Split the edge
+                _mid = _Node(label[:_common])
+                child.label = label[_common:]
+                _mid.children[child.label[0]] = child
+                _mid.first = child.first
+                node.children[key[i]] = _mid
+                child = _mid
+            node = child
+            i += _common
+
+        if node.issuer_id is not None:
+            return
+
+        node.issuer_id = key
+        node.seq = self._seq
+        self._seq += 1
+        node.refresh_first()
+        _first = node.first
+        for _node in _path:
+            if _node.first is None or _first < _node.first:
+                _node.first = _first
+
+    def remove(self, key):
+        """
+        Remove a string if it's in the tree.
+
+        :param key: The string
+        """
+        node = self._root
+        _path = []
+        i = 0
+        while i < len(key):
+            child = node.children.get(key[i])
+            if child is None or not key.startswith(child.label, i):
+                return
+            _path.append(node)
+            node = child
+            i += len(child.label)
+
+        if node.issuer_id != key:
+            return
+        node.issuer_id = None
+        node.seq = None
+
+        for parent in reversed(_path):
+            if node.issuer_id is None and not node.children:
+                del parent.children[node.label[0]]
+            elif node.issuer_id is None and len(node.children) == 1:
+                # Merge with the only child
+                (child,) = node.children.values()
+                child.label = node.label + child.label
+                parent.children[child.label[0]] = child
+            else:
+                node.refresh_first()
+            node = parent
+        node.refresh_first()
+
+    def first_with_prefix(self, prefix):
+        """
+        Find the first added string that starts with a prefix.
+
+        :param prefix: The prefix
+        :return: The string or None if there is none
+        """
+        node = self._root
+        i = 0
+        while i < len(prefix):
+            child = node.children.get(prefix[i])
+            if child is None:
+                return None
+            label = child.label
+            if len(prefix) - i <= len(label):
+                if label.startswith(prefix[i:]):
+                    node = child
+                    break
+                return None
+            if not prefix.startswith(label, i):
+                return None
+            node = child
+            i += len(label)
+
+        if node.first is None:
+            return None
+        return node.first[1]
+
+    def clear(self):
+        self._root = _Node()
+        self._seq = 0
+
+
+class IssuerIndex(object):
+    """
+    Lookup structures kept by a :py:class:`cryptojwt.key_jar.KeyJar` next to
+    its issuers:
+
+    * issuer IDs by their normalized form, see :py:func:`normalize_issuer`
+    * issuer IDs in a :py:class:`PrefixTrie`
+    * issuer IDs by the sources of their key bundles
+    * issuer IDs by the key IDs of their keys
+    """
+
+    def __init__(self):
+        self._normalized = {}
+        self._trie = PrefixTrie()
+        # source -> issuer IDs, a dictionary is used as an ordered set
+        self._by_source = {}
+        self._sources = {}
+        # kid -> issuer IDs, also an ordered set
+        self._by_kid = {}
+        self._kids = {}
+
+    def __contains__(self, issuer_id):
+        return issuer_id in self._sources
+
+    def __len__(self):
+        return len(self._sources)
+
+    def add(self, issuer_id, issuer):
+        """
+        Add an issuer or update the sources and key IDs of one already in the
+        index. The key bundles are not updated from their sources.
+
+        :param issuer_id: The issuer ID
+        :param issuer: A :py:class:`cryptojwt.key_issuer.KeyIssuer` instance
+        """
+        self.add_sources(
+            issuer_id,
+            {kb.source for kb in issuer},
+            {kid for kb in issuer for kid in kb.kids(update=False)},
+        )
+
+    def add_sources(self, issuer_id, sources, kids=()):
+        """
+        Like :py:meth:`add` for an issuer that is known only by the sources of
+        its key bundles and the key IDs of its keys.
+
+        :param issuer_id: The issuer ID
+        :param sources: A set of sources
+        :param kids: A set of key IDs
+        """
+        if issuer_id not in self._sources:
+            self._normalized.setdefault(normalize_issuer(issuer_id), []).append(issuer_id)
+            self._trie.add(issuer_id)
+        self._sources[issuer_id] = _update(
+            self._by_source, issuer_id, self._sources.get(issuer_id, set()), set(sources)
+        )
+        self._kids[issuer_id] = _update(
+            self._by_kid, issuer_id, self._kids.get(issuer_id, set()), set(kids)
+        )
+
+    def remove(self, issuer_id):
+        """
+        Remove an issuer from the index.
+
+        :param issuer_id: The issuer ID
+        """
+        _sources = self._sources.pop(issuer_id, None)
+        if _sources is None:
+            return
+
+        _update(self._by_source, issuer_id, _sources, set())
+        _update(self._by_kid, issuer_id, self._kids.pop(issuer_id), set())
+        _norm = normalize_issuer(issuer_id)
+        _ids = self._normalized[_norm]
+        _ids.remove(issuer_id)
+        if not _ids:
+            del self._normalized[_norm]
+        self._trie.remove(issuer_id)
+
+    def clear(self):
+        self._normalized = {}
+        self._trie.clear()
+        self._by_source = {}
+        self._sources = {}
+        self._by_kid = {}
+        self._kids = {}
+
+    def resolve(self, issuer_id):
+        """
+        Find the issuer ID used in the key jar for an issuer, which may differ
+        by a trailing '/'. An exact match is preferred.
+
+        :param issuer_id: The issuer ID
+        :return: The issuer ID in the key jar or None
+        """
+        _ids = self._normalized.get(normalize_issuer(issuer_id))
+        if not _ids:
+            return None
+        if issuer_id in _ids:
+            return issuer_id
+        return _ids[0]
+
+    def match_prefix(self, prefix):
+        """
+        :param prefix: The start of an issuer ID
+        :return: The first added issuer ID starting with prefix or None
+        """
+        return self._trie.first_with_prefix(prefix)
+
+    def issuers_with_source(self, source):
+        """
+        :param source: Where the keys of a key bundle were loaded from
+        :return: List of IDs of the issuers that has a key bundle with
+            that source
+        """
+        return list(self._by_source.get(source, []))
+
+    def issuers_with_kid(self, kid):
+        """
+        :param kid: A key ID
+        :return: List of IDs of the issuers that has a key with that key ID
+        """
+        return list(self._by_kid.get(kid, []))
@@ -0,0 +1,182 @@
+"""
+The JSON encoder/decoder used for headers, payloads and JWKS documents.
+
+The standard library json module is used unless another codec is chosen
+with :py:func:`set_codec`. Other backends are only used if they are
+installed, otherwise the standard library is used.
+"""
+import codecs
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+COMPACT_SEPARATORS = (",", ":")
+
+# orjson parses integers that don't fit in 64 bits as floats
+_LONG_NUMBER = re.compile(r"\d{19}")
+_LONG_NUMBER_BYTES = re.compile(rb"\d{19}")
+
+
+class JSONCodec(object):
+    """JSON encoding and decoding with the standard library json module."""
+
+    name = "json"
+
+    def dumps(self, obj, compact=False, sort_keys=False):
+        """
+        Serialize an object to a JSON document.
+
+        :param obj: The object
+        :param compact: Use separators without any whitespace
+        :param sort_keys: Sort the keys of dictionaries
+        :return: The JSON document as a string
+        """
+        if compact:
+            return json.dumps(obj, separators=COMPACT_SEPARATORS, sort_keys=sort_keys)
+        return json.dumps(obj, sort_keys=sort_keys)
+
+    def loads(self, doc):
+        """
+        Deserialize a JSON document.
+
+        :param doc: The JSON document as a string or bytes
+        :return: The object
+        :raises: ValueError if the document is not valid JSON
+        """
+        return json.loads(doc)
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    JSON encoding and decoding with orjson. The output is always compact.
+    Integers larger than 64 bits and documents that aren't UTF-8 encoded
+    are passed on to the standard library.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def dumps(self, obj, compact=False, sort_keys=False):
+        _option = self._orjson.OPT_SORT_KEYS if sort_keys else 0
+        try:
+            return self._orjson.dumps(obj, option=_option).decode("utf-8")
+        except TypeError:
+            return JSONCodec.dumps(self, obj, compact, sort_keys)
+
+    def loads(self, doc):
+        if isinstance(doc, str):
+            _long = _LONG_NUMBER.search(doc)
+        else:
+            _long = _LONG_NUMBER_BYTES.search(doc)
+        if _long:
+            return json.loads(doc)
+
+        try:
+            return self._orjson.loads(doc)
+        except self._orjson.JSONDecodeError:
+            if _is_utf8(doc):
+                raise
+            return json.loads(doc)
+
+
+def _is_utf8(doc):
+    """
+    :param doc: A JSON document as a string or bytes
+    :return: False if the document can only be read by the standard library
+        because it is a string with surrogates, or bytes in another encoding
+        than UTF-8 or starting with a byte order mark
+    """
+    if isinstance(doc, str):
+        try:
+            doc.encode("utf-8")
+        except UnicodeEncodeError:
+            return False
+        return True
+
+    if bytes(doc[:3]) == codecs.BOM_UTF8:
+        return False
+    return json.detect_encoding(doc) == "utf-8"
+
+
+CODECS = {"json": JSONCodec, "orjson": OrjsonCodec}
+
+# Tried in order when the codec is chosen automatically
+PREFERENCE = ["orjson", "json"]
+
+_codec = JSONCodec()
+
+
+def register_codec(name, cls):
+    """
+    Make a codec available to :py:func:`set_codec`.
+
+    :param name: The name of the codec
+    :param cls: A :py:class:`JSONCodec` subclass. Instantiating it must raise
+        ImportError if the backend isn't installed.
+    """
+    CODECS[name] = cls
+
+
+def set_codec(name="auto"):
+    """
+    Choose the JSON codec. If the backend of the codec isn't installed the
+    standard library json module is used.
+
+    :param name: The name of a registered codec or "auto" for the fastest
+        one that is installed
+    :return: The codec in use
+    """
+    global _codec
+
+    if name == "auto":
+        _names = PREFERENCE
+    else:
+        _names = [name]
+
+    for _name in _names:
+        try:
+            _codec = CODECS[_name]()
+        except KeyError:
+            logger.warning("Unknown JSON codec: {}".format(_name))
+        except ImportError:
+            logger.info("JSON codec {} not installed".format(_name))
+        else:
+            return _codec
+
+    _codec = JSONCodec()
+    return _codec
+
+
+def get_codec():
+    """
+    :return: The codec in use
+    """
+    return _codec
+
+
+def dumps(obj, compact=False, sort_keys=False):
+    """
+    Serialize an object to a JSON document with the codec in use.
+
+    :param obj: The object
+    :param compact: Use separators without any whitespace
+    :param sort_keys: Sort the keys of dictionaries
+    :return: The JSON document as a string
+    """
+    return _codec.dumps(obj, compact, sort_keys)
+
+
+def loads(doc):
+    """
+    Deserialize a JSON document with the codec in use.
+
+    :param doc: The JSON document as a string or bytes
+    :return: The object
+    """
+    return _codec.loads(doc)
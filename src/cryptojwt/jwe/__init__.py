@@ -21,6 +21,7 @@ SUPPORTED = {
         "ECDH-ES+A128KW",
         "ECDH-ES+A192KW",
         "ECDH-ES+A256KW",
+        "dir",
     ],
     "enc": [
         "A128CBC-HS256",
@@ -1,6 +1,8 @@
 import os
+from hmac import compare_digest
 from struct import pack
 
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hmac
 from cryptography.hazmat.primitives.ciphers import Cipher
@@ -13,12 +15,263 @@ from ..exception import MissingKey
 from ..exception import Unsupported
 from ..exception import VerificationError
 from . import Encrypter
+from .exception import NotSupportedAlgorithm
 from .exception import UnsupportedBitLength
+from .utils import LENMET
 from .utils import get_keys_seclen_dgst
 
 
+class AES_CBCStream(object):
+    """
+    Incremental AES-CBC with HMAC-SHA2 encryption or decryption as defined in
+    RFC 7518 section 5.2. The HMAC is computed over the ciphertext as it
+    passes through so the data never has to be held in memory.
+
+    :param key: The content encryption key, MAC key followed by ENC key
+    :param iv: The initialization vector
+    :param auth_data: Additional authenticated data
+    :param decrypt: Whether to decrypt instead of encrypt
+    """
+
+    def __init__(self, key, iv, auth_data=b"", decrypt=False):
+        hash_key, enc_key, self.key_len, hash_func = get_keys_seclen_dgst(key, iv)
+        cipher = Cipher(algorithms.AES(enc_key), modes.CBC(iv), backend=default_backend())
+        self.decrypting = decrypt
+        if decrypt:
+            self._cipher = cipher.decryptor()
+            self._padding = PKCS7(128).unpadder()
+        else:
+            self._cipher = cipher.encryptor()
+            self._padding = PKCS7(128).padder()
+
+        self._hmac = hmac.HMAC(hash_key, hash_func(), backend=default_backend())
+        self._hmac.update(auth_data)
+        self._hmac.update(iv)
+        self._al = pack("!Q", 8 * len(auth_data))
+
+    def update(self, data):
+        """
+        Process the next piece of data.
+
+        :param data: Plain text when encrypting, ciphertext when decrypting
+        :return: The output that is available so far
+        """
+        if self.decrypting:
+            self._hmac.update(data)
+            return self._padding.update(self._cipher.update(data))
+
+        ct = self._cipher.update(self._padding.update(data))
+        self._hmac.update(ct)
+        return ct
+
+    def _tag(self):
+        self._hmac.update(self._al)
+        return self._hmac.finalize()[: self.key_len]
+
+    def finalize(self, tag=b""):
+        """
+        Finish the operation.
+
+        :param tag: The authentication tag, only used when decrypting
+        :return: When encrypting a tuple of the remaining ciphertext and the
+            authentication tag. When decrypting the remaining plain text.
+        :raises: VerificationError if the tag doesn't match
+        """
+        if self.decrypting:
+            if not compare_digest(self._tag(), tag):
+                raise VerificationError("AES-CBC HMAC")
+            return self._padding.update(self._cipher.finalize()) + self._padding.finalize()
+
+        ct = self._cipher.update(self._padding.finalize())
+        ct += self._cipher.finalize()
+        self._hmac.update(ct)
+        return ct, self._tag()
+
+
+class AES_GCMStream(object):
+    """
+    Incremental AES-GCM encryption or decryption.
+
+    :param key: The content encryption key
+    :param iv: The initialization vector
+    :param auth_data: Additional authenticated data
+    :param decrypt: Whether to decrypt instead of encrypt
+    """
+
+    def __init__(self, key, iv, auth_data=b"", decrypt=False):
+        if not iv:
+            raise ValueError("Missing Nonce")
+
+        cipher = Cipher(algorithms.AES(key), modes.GCM(iv), backend=default_backend())
+        self.decrypting = decrypt
+        if decrypt:
+            self._cipher = cipher.decryptor()
+        else:
+            self._cipher = cipher.encryptor()
+        if auth_data:
+            self._cipher.authenticate_additional_data(auth_data)
+
+    def update(self, data):
+        """
+        Process the next piece of data.
+
+        :param data: Plain text when encrypting, ciphertext when decrypting
+        :return: The output that is available so far
+        """
+        return self._cipher.update(data)
+
+    def finalize(self, tag=b""):
+        """
+        Finish the operation.
+
+        :param tag: The authentication tag, only used when decrypting
+        :return: When encrypting a tuple of the remaining ciphertext and the
+            authentication tag. When decrypting the remaining plain text.
+        :raises: VerificationError if the tag doesn't match
+        """
+        if self.decrypting:
+            try:
+                return self._cipher.finalize_with_tag(tag)
+            except (InvalidTag, ValueError):
+                raise VerificationError("AES-GCM")
+
+        ct = self._cipher.finalize()
+        return ct, self._cipher.tag
+
+
+class AES_GCMContext(object):
+    """
+    AES-GCM content encryption with a prepared key. An instance holds no
+    per message state and can be used for any number of messages, also
+    from several threads.
+
+    :param key: The content encryption key
+    """
+
+    tag_len = 16
+
+    def __init__(self, key):
+        self._aead = AESGCM(key)
+
+    def encrypt(self, msg, iv, auth_data=b""):
+        """
+        Encrypt and authenticate a message.
+
+        :param msg: The plain text
+        :param iv: The initialization vector
+        :param auth_data: Additional authenticated data
+        :return: Tuple (ciphertext, tag) as memoryviews over one buffer
+        """
+        if not iv:
+            raise ValueError("Missing Nonce")
+        _out = memoryview(self._aead.encrypt(iv, msg, auth_data))
+        return _out[: -self.tag_len], _out[-self.tag_len :]
+
+    def decrypt(self, ctxt, iv, auth_data=b"", tag=b""):
+        """
+        Verify and decrypt a message.
+
+        :param ctxt: The ciphertext
+        :param iv: The initialization vector
+        :param auth_data: Additional authenticated data
+        :param tag: The authentication tag
+        :return: The plain text
+        :raises: VerificationError if the tag doesn't match
+        """
+        if not iv:
+            raise ValueError("Missing Nonce")
+        try:
+            return self._aead.decrypt(iv, bytes(ctxt) + tag, auth_data)
+        except InvalidTag:
+            raise VerificationError("AES-GCM")
+
+
+class AES_CBCContext(object):
+    """
+    AES-CBC with HMAC-SHA2 content encryption as defined in RFC 7518
+    section 5.2 with a prepared key. The key is split, and the AES and HMAC
+    keys set up, once. An instance holds no per message state.
+
+    :param key: The content encryption key, MAC key followed by ENC key
+    """
+
+    block_size = 16
+
+    def __init__(self, key):
+        try:
+            self.key_len, hash_method = LENMET[len(key)]
+        except KeyError:
+            raise Exception("Invalid CBC+HMAC key length: %s bytes" % len(key))
+        self._aes = algorithms.AES(key[self.key_len :])
+        self._hmac = hmac.HMAC(key[: self.key_len], hash_method(), backend=default_backend())
+
+    def _tag(self, auth_data, iv, ctxt):
+        _mac = self._hmac.copy()
+        _mac.update(auth_data)
+        _mac.update(iv)
+        _mac.update(ctxt)
+        _mac.update(pack("!Q", 8 * len(auth_data)))
+        return _mac.finalize()[: self.key_len]
+
+    def _cipher(self, iv):
+        if len(iv) != self.block_size:
+            raise Exception("IV for AES-CBC must be 16 octets long")
+        return Cipher(self._aes, modes.CBC(iv), backend=default_backend())
+
+    def encrypt(self, msg, iv, auth_data=b""):
+        """
+        Encrypt and authenticate a message.
+
+        :param msg: The plain text
+        :param iv: The initialization vector
+        :param auth_data: Additional authenticated data
+        :return: Tuple (ciphertext, tag), the ciphertext as a memoryview
+        """
+        _msg = memoryview(msg)
+        _full = len(_msg) - len(_msg) % self.block_size
+        _pad = self.block_size - len(_msg) % self.block_size
+        _last = bytes(_msg[_full:]) + bytes([_pad]) * _pad
+
+        # The whole ciphertext is written into a single buffer
+        _size = _full + self.block_size
+        _buf = bytearray(_size + self.block_size - 1)
+        _encryptor = self._cipher(iv).encryptor()
+        _n = _encryptor.update_into(_msg[:_full], _buf)
+        _n += _encryptor.update_into(_last, memoryview(_buf)[_n:])
+        _encryptor.finalize()
+
+        ctxt = memoryview(_buf)[:_size]
+        return ctxt, self._tag(auth_data, iv, ctxt)
+
+    def decrypt(self, ctxt, iv, auth_data=b"", tag=b""):
+        """
+        Verify and decrypt a message.
+
+        :param ctxt: The ciphertext
+        :param iv: The initialization vector
+        :param auth_data: Additional authenticated data
+        :param tag: The authentication tag
+        :return: The plain text
+        :raises: VerificationError if the tag or the padding is wrong
+        """
+        if not compare_digest(self._tag(auth_data, iv, ctxt), tag):
+            raise VerificationError("AES-CBC HMAC")
+        if not ctxt or len(ctxt) % self.block_size:
+            raise VerificationError("AES-CBC ciphertext length")
+
+        _decryptor = self._cipher(iv).decryptor()
+        _msg = _decryptor.update(ctxt) + _decryptor.finalize()
+        _pad = _msg[-1]
+        if not 0 < _pad <= self.block_size or _msg[-_pad:] != bytes([_pad]) * _pad:
+            raise VerificationError("AES-CBC padding")
+        return _msg[:-_pad]
+
+
 class AES_CBCEncrypter(Encrypter):
-    """"""
+    """
+    AES-CBC with HMAC-SHA2 encryption, a wrapper around
+    :py:class:`AES_CBCContext`.
+    """
 
     def __init__(self, key_len=32, key=None, msg_padding="PKCS7"):
         Encrypter.__init__(self)
@@ -27,42 +280,18 @@ class AES_CBCEncrypter(Encrypter):
         else:
             self.key = os.urandom(key_len)
 
-        if msg_padding == "PKCS7":
-            self.padder = PKCS7(128).padder()
-            self.unpadder = PKCS7(128).unpadder()
-        else:
+        if msg_padding != "PKCS7":
             raise Unsupported("Message padding: {}".format(msg_padding))
 
         self.iv = None
 
-    def _mac(self, hash_key, hash_func, auth_data, iv, enc_msg, key_len):
-        al = pack("!Q", 8 * len(auth_data))
-        h = hmac.HMAC(hash_key, hash_func(), backend=default_backend())
-        h.update(auth_data)
-        h.update(iv)
-        h.update(enc_msg)
-        h.update(al)
-        m = h.finalize()
-        return m[:key_len]
-
     def encrypt(self, msg, iv="", auth_data=b""):
         if not iv:
             iv = os.urandom(16)
-            self.iv = iv
-        else:
-            self.iv = iv
-
-        hash_key, enc_key, key_len, hash_func = get_keys_seclen_dgst(self.key, iv)
+        self.iv = iv
 
-        cipher = Cipher(algorithms.AES(enc_key), modes.CBC(iv), backend=default_backend())
-        encryptor = cipher.encryptor()
-
-        pmsg = self.padder.update(msg)
-        pmsg += self.padder.finalize()
-        ct = encryptor.update(pmsg)
-        ct += encryptor.finalize()
-        tag = self._mac(hash_key, hash_func, auth_data, iv, ct, key_len)
-        return ct, tag
+        ctxt, tag = AES_CBCContext(self.key).encrypt(msg, iv, auth_data)
+        return bytes(ctxt), tag
 
     def decrypt(self, msg, iv="", auth_data=b"", tag=b"", key=None):
         if key is None:
@@ -71,34 +300,24 @@ class AES_CBCEncrypter(Encrypter):
             else:
                 raise MissingKey("No available key")
 
-        hash_key, enc_key, key_len, hash_func = get_keys_seclen_dgst(key, iv)
-
-        comp_tag = self._mac(hash_key, hash_func, auth_data, iv, msg, key_len)
-        if comp_tag != tag:
-            raise VerificationError("AES-CBC HMAC")
-
-        cipher = Cipher(algorithms.AES(enc_key), modes.CBC(iv), backend=default_backend())
-        decryptor = cipher.decryptor()
-
-        ctext = decryptor.update(msg)
-        ctext += decryptor.finalize()
-        unpad = self.unpadder.update(ctext)
-        unpad += self.unpadder.finalize()
-        return unpad
+        return AES_CBCContext(key).decrypt(msg, iv, auth_data, tag)
 
 
 class AES_GCMEncrypter(Encrypter):
+    """
+    AES-GCM encryption, a wrapper around :py:class:`AES_GCMContext`.
+    """
+
     def __init__(self, bit_length=0, key=None):
         Encrypter.__init__(self)
-        if key:
-            self.key = AESGCM(key)
-        elif bit_length:
+        if not key:
+            if not bit_length:
+                raise ValueError("Need key or key bit length")
             if bit_length not in [128, 192, 256]:
                 raise UnsupportedBitLength(bit_length)
+            key = AESGCM.generate_key(bit_length=bit_length)
 
-            self.key = AESGCM(AESGCM.generate_key(bit_length=bit_length))
-        else:
-            raise ValueError("Need key or key bit length")
+        self._context = AES_GCMContext(key)
 
     def encrypt(self, msg, iv="", auth_data=None):
         """
@@ -110,10 +329,9 @@ class AES_GCMEncrypter(Encrypter):
         :param auth_data: Associated data
         :return: The cipher text bytes with the 16 byte tag appended.
         """
-        if not iv:
-            raise ValueError("Missing Nonce")
-
-        return self.key.encrypt(iv, msg, auth_data)
+        ctxt, _ = self._context.encrypt(msg, iv, auth_data)
+        # Both are views over the cipher text with the tag appended
+        return ctxt.obj
 
     def decrypt(self, cipher_text, iv="", auth_data=None, tag=b""):
         """
@@ -125,7 +343,21 @@ class AES_GCMEncrypter(Encrypter):
         :param tag: Authentication tag
         :return: The original plaintext
         """
-        if not iv:
-            raise ValueError("Missing Nonce")
+        return self._context.decrypt(cipher_text, iv, auth_data, tag)
+
+
+def aead_context(enc_alg, key):
+    """
+    Set up content encryption and decryption with a content encryption key.
 
-        return self.key.decrypt(iv, cipher_text + tag, auth_data)
+    :param enc_alg: The JWE "enc" value specifying the encryption algorithm
+    :param key: Key (CEK)
+    :return: A :py:class:`cryptojwt.jwe.aes.AES_GCMContext` or
+        :py:class:`cryptojwt.jwe.aes.AES_CBCContext` instance
+    """
+    if enc_alg in ["A128GCM", "A192GCM", "A256GCM"]:
+        return AES_GCMContext(key)
+    elif enc_alg in ["A128CBC-HS256", "A192CBC-HS384", "A256CBC-HS512"]:
+        return AES_CBCContext(key)
+    else:
+        raise NotSupportedAlgorithm(enc_alg)
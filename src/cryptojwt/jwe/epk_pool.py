@@ -0,0 +1,141 @@
+"""A pool of pre-generated ephemeral EC keys for ECDH-ES encryption."""
+import logging
+import os
+import queue
+import threading
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from ..exception import UnsupportedECurve
+from ..jwk.ec import NIST2SEC
+from ..jwk.ec import ECKey
+from ..utils import as_unicode
+
+logger = logging.getLogger(__name__)
+
+
+def new_ephemeral_key(crv):
+    """
+    Generate an ephemeral key pair together with the JWK representation of
+    its public part.
+
+    :param crv: The NIST name of the curve
+    :return: Tuple (private key, public ECKey instance, public JWK as a dictionary)
+    """
+    try:
+        _curve = NIST2SEC[as_unicode(crv)]
+    except KeyError:
+        raise UnsupportedECurve("Unsupported elliptic curve: {}".format(crv))
+
+    _key = ec.generate_private_key(_curve(), default_backend())
+    epk = ECKey().load_key(_key.public_key())
+    return _key, epk, epk.serialize(False)
+
+
+class EphemeralKeyPool(object):
+    """
+    Keeps a number of ephemeral key pairs per curve ready for use. A daemon
+    thread refills the pool in the background as keys are taken.
+
+    Every key is handed out once at most. If the process forks the keys
+    generated in the parent are discarded by the child.
+
+    :param curves: The curves to keep keys for
+    :param size: The number of keys to keep per curve
+    :param start: Whether to start the refill thread at once
+    """
+
+    def __init__(self, curves=("P-256",), size=8, start=True):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._curves = [as_unicode(c) for c in curves]
+        for crv in self._curves:
+            if crv not in NIST2SEC:
+                raise UnsupportedECurve("Unsupported elliptic curve: {}".format(crv))
+        self._lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self._reset()
+        if start:
+            self.start()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._keys = dict([(crv, queue.Queue(maxsize=self.size)) for crv in self._curves])
+        self._thread = None
+
+    def start(self):
+        """Start the background refill thread, if it isn't already running."""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped = False
+            self._thread = threading.Thread(
+                target=self._refill, name="EphemeralKeyPool", daemon=True
+            )
+            self._thread.start()
+        self._wakeup.set()
+
+    def stop(self):
+        """Stop the background refill thread."""
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def fill(self):
+        """Fill the pool for all curves, in this thread."""
+        for crv, _queue in self._keys.items():
+            # Don't generate a key that there's no room for
+            while not self._stopped and not _queue.full():
+                _item = new_ephemeral_key(crv)
+                try:
+                    _queue.put_nowait(_item)
+                except queue.Full:
+                    break
+
+    def _refill(self):
+        while not self._stopped:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                self.fill()
+            except Exception as err:
+                logger.error("Could not refill ephemeral key pool: {}".format(err))
+
+    def get(self, crv):
+        """
+        Take an ephemeral key pair for a curve out of the pool. If there is
+        none ready one is generated on the spot.
+
+        :param crv: The NIST name of the curve
+        :return: Tuple (private key, public ECKey instance, public JWK as a dictionary)
+        """
+        crv = as_unicode(crv)
+        if self._pid != os.getpid():
+            # Never share keys with the parent process
+            self.start()
+
+        try:
+            _item = self._keys[crv].get_nowait()
+        except (KeyError, queue.Empty):
+            with self._counter_lock:
+                self.misses += 1
+            _item = new_ephemeral_key(crv)
+        else:
+            with self._counter_lock:
+                self.hits += 1
+
+        if crv in self._keys:
+            self._wakeup.set()
+        return _item
+
+    def __len__(self):
+        return sum([q.qsize() for q in self._keys.values()])
@@ -43,3 +43,7 @@ class WrongEncryptionAlgorithm(JWEException):
 
 class UnsupportedBitLength(JWEException):
     pass
+
+
+class DecompressionLimitExceeded(JWEException):
+    pass
@@ -1,22 +1,46 @@
 import logging
+import tempfile
 
+from .. import json_codec
+from ..exception import VerificationError
+from ..exception import WrongNumberOfParts
 from ..jwk.asym import AsymmetricKey
 from ..jwk.ec import ECKey
 from ..jwk.hmac import SYMKey
-from ..jwk.jwk import key_from_jwk_dict
+from ..jwk.jwk import cached_key_from_jwk_dict
 from ..jwk.rsa import RSAKey
 from ..jwx import JWx
+from ..utils import as_bytes
+from ..utils import as_unicode
+from ..utils import b64d
+from ..utils import b64d_stream
+from ..utils import b64e
+from ..utils import b64e_stream
+from ..utils import b64encode_item
+from ..utils import bytes2str_conv
+from ..utils import read_chunks
+from . import KEY_LEN_BYTES
+from . import SUPPORTED
 from .exception import DecryptionFailed
 from .exception import NoSuitableDecryptionKey
 from .exception import NoSuitableECDHKey
 from .exception import NoSuitableEncryptionKey
 from .exception import NotSupportedAlgorithm
+from .exception import ParameterError
 from .exception import WrongEncryptionAlgorithm
 from .jwe_ec import JWE_EC
+from .jwe_hmac import JWE_DIR
 from .jwe_hmac import JWE_SYM
 from .jwe_rsa import JWE_RSA
+from .jwekey import JWEKey
 from .jwenc import JWEnc
+from .utils import ZIP_MAX_SIZE
+from .utils import CompactStreamReader
 from .utils import alg2keytype
+from .utils import deflate
+from .utils import deflate_stream
+from .utils import inflate
+from .utils import inflate_stream
 
 logger = logging.getLogger(__name__)
 
@@ -71,9 +95,36 @@ class JWE(JWx):
     :param apu: Agreement PartyUInfo
     :param crit: indicates which extensions that are being used and MUST
         be understood and processed.
+    :param strict_key_selection: When decrypting only try keys that match
+        the kid, x5t or jwk in the JWE header.
+    :param epk_pool: A :py:class:`cryptojwt.jwe.epk_pool.EphemeralKeyPool`
+        instance to take ECDH-ES ephemeral keys from.
+    :param zip_level: The compression level used with zip "DEF", 0-9 or -1
+        for the zlib default
+    :param zip_max_size: The maximum size in bytes of decompressed content,
+        None for no limit
     :return: A class instance
     """
 
+    def __init__(
+        self,
+        msg=None,
+        with_digest=False,
+        httpc=None,
+        strict_key_selection=False,
+        epk_pool=None,
+        zip_level=-1,
+        zip_max_size=ZIP_MAX_SIZE,
+        **kwargs
+    ):
+        JWx.__init__(self, msg, with_digest, httpc, **kwargs)
+        self.strict_key_selection = strict_key_selection
+        self.epk_pool = epk_pool
+        self.zip_level = zip_level
+        self.zip_max_size = zip_max_size
+        # The number of keys tried by the last decrypt
+        self.key_trials = 0
+
     def encrypt(self, keys=None, cek="", iv="", **kwargs):
         """
         Encrypt a payload.
@@ -98,12 +149,8 @@ class JWE(JWx):
             raise NoSuitableEncryptionKey(_alg)
 
         # Determine Encryption Class by Algorithm
-        if _alg in ["RSA-OAEP", "RSA-OAEP-256", "RSA1_5"]:
-            encrypter = JWE_RSA(self.msg, **self._dict)
-        elif _alg.startswith("A") and _alg.endswith("KW"):
-            encrypter = JWE_SYM(self.msg, **self._dict)
-        else:  # _alg.startswith("ECDH-ES"):
-            encrypter = JWE_EC(**self._dict)
+        encrypter = self._key_manager(_alg, self.msg)
+        if isinstance(encrypter, JWE_EC):
             cek, encrypted_key, iv, params, eprivk = encrypter.enc_setup(
                 self.msg, key=keys[0], **self._dict
             )
@@ -118,7 +165,8 @@ class JWE(JWx):
 
         for key in keys:
             if isinstance(key, SYMKey):
-                _key = key.key
+                # With direct encryption the key's prepared context is used
+                _key = key if isinstance(encrypter, JWE_DIR) else key.key
             elif isinstance(key, ECKey):
                 _key = key.public_key()
             else:  # isinstance(key, RSAKey):
@@ -159,30 +207,23 @@ class JWE(JWx):
         else:
             keys = self.pick_keys(self._get_keys(), use="enc", alg=_alg)
 
-        try:
-            keys.append(key_from_jwk_dict(_jwe.headers["jwk"]))
-        except KeyError:
-            pass
+        keys = self._order_keys(_jwe.headers, keys)
+
+        if not self.strict_key_selection:
+            try:
+                keys.append(cached_key_from_jwk_dict(_jwe.headers["jwk"]))
+            except KeyError:
+                pass
 
         if not keys and not cek:
             raise NoSuitableDecryptionKey(_alg)
 
-        if _alg in ["RSA-OAEP", "RSA-OAEP-256", "RSA1_5"]:
-            decrypter = JWE_RSA(**self._dict)
-        elif _alg.startswith("A") and _alg.endswith("KW"):
-            decrypter = JWE_SYM(self.msg, **self._dict)
-        elif _alg.startswith("ECDH-ES"):
-            decrypter = JWE_EC(**self._dict)
-
-            if isinstance(keys[0], AsymmetricKey):
-                _key = keys[0].private_key()
-            else:
-                _key = keys[0].key
-
-            cek = decrypter.dec_setup(_jwe, key=_key)
-        else:
-            raise NotSupportedAlgorithm
+        decrypter = self._key_manager(_alg)
+        if isinstance(decrypter, JWE_EC):
+            # The content encryption key is derived from the recipients key
+            cek = None
 
+        self.key_trials = 0
         if cek:
             try:
                 msg = decrypter.decrypt(_jwe, cek=cek)
@@ -194,13 +235,18 @@ class JWE(JWx):
                 return msg
 
         for key in keys:
-            if isinstance(key, AsymmetricKey):
-                _key = key.private_key()
+            if isinstance(decrypter, JWE_DIR) and isinstance(key, SYMKey):
+                _key = key
             else:
-                _key = key.key
+                _key = self._decryption_key(key)
 
+            self.key_trials += 1
             try:
-                msg = decrypter.decrypt(_jwe, _key)
+                if isinstance(decrypter, JWE_EC):
+                    decrypter.dec_setup(_jwe, key=_key)
+                    msg = decrypter.decrypt(_jwe)
+                else:
+                    msg = decrypter.decrypt(_jwe, _key)
                 self["cek"] = decrypter.cek if "cek" in decrypter else None
             except (KeyError, DecryptionFailed):
                 pass
@@ -210,6 +256,450 @@ class JWE(JWx):
 
         raise DecryptionFailed("No available key that could decrypt the message")
 
+    def _order_keys(self, headers, keys):
+        """
+        Order the keys so that the ones pointed out by the JWE header are
+        tried first, first a matching kid, then a matching x5t and last
+        a matching jwk thumbprint. With strict key selection only such keys
+        are returned.
+
+        :param headers: The JWE header
+        :param keys: A list of keys
+        :return: A new list of keys
+        """
+        _kid = headers.get("kid")
+        _x5t = headers.get("x5t")
+        _thumbprint = None
+        if "jwk" in headers:
+            try:
+                _thumbprint = cached_key_from_jwk_dict(headers["jwk"]).thumbprint("SHA-256")
+            except Exception as err:
+                logger.warning("Could not use jwk header: {}".format(err))
+
+        _ranked = []
+        for index, key in enumerate(keys):
+            if _kid and key.kid == _kid:
+                _rank = 0
+            elif _x5t and key.x5t == _x5t:
+                _rank = 1
+            elif _thumbprint and key.thumbprint("SHA-256") == _thumbprint:
+                _rank = 2
+            elif self.strict_key_selection:
+                continue
+            else:
+                _rank = 3
+            _ranked.append((_rank, index, key))
+
+        return [key for _, _, key in sorted(_ranked, key=lambda x: x[:2])]
+
+    def _key_manager(self, alg, msg=None):
+        _args = self._dict.copy()
+        _args["alg"] = alg
+        _args["zip_level"] = self.zip_level
+        _args["zip_max_size"] = self.zip_max_size
+        if alg in ["RSA-OAEP", "RSA-OAEP-256", "RSA1_5"]:
+            return JWE_RSA(msg, **_args)
+        elif alg.startswith("A") and alg.endswith("KW"):
+            return JWE_SYM(msg, **_args)
+        elif alg == "dir":
+            return JWE_DIR(msg, **_args)
+        elif alg.startswith("ECDH-ES"):
+            return JWE_EC(msg, epk_pool=self.epk_pool, **_args)
+        else:
+            raise NotSupportedAlgorithm(alg)
+
+    @staticmethod
+    def _encryption_key(key):
+        if isinstance(key, SYMKey):
+            return key.key
+        elif isinstance(key, ECKey):
+            return key
+        else:  # isinstance(key, RSAKey):
+            return key.public_key()
+
+    @staticmethod
+    def _decryption_key(key):
+        if isinstance(key, AsymmetricKey):
+            return key.private_key()
+        else:
+            return key.key
+
+    def _unwrap_cek(self, decrypter, headers, encrypted_key, keys):
+        """
+        Find the first key that recovers a content encryption key of the
+        right length for the content encryption algorithm.
+
+        :return: Tuple of the content encryption key and the key used to get
+            it, (None, None) if no key worked
+        """
+        for key in keys:
+            self.key_trials += 1
+            try:
+                cek = decrypter.unwrap_cek(headers, encrypted_key, self._decryption_key(key))
+            except DecryptionFailed:
+                continue
+
+            if len(cek) == KEY_LEN_BYTES[headers["enc"]]:
+                logger.debug("Unwrapped CEK using key with kid=%s" % key.kid)
+                return cek, key
+        return None, None
+
+    def _plaintext(self, msg):
+        _msg = as_bytes(msg)
+        if "zip" not in self:
+            return _msg
+        elif self["zip"] == "DEF":
+            return deflate(_msg, self.zip_level)
+        else:
+            raise ParameterError("Zip has unknown value: %s" % self["zip"])
+
+    def _plaintext_chunks(self, src, chunk_size):
+        _chunks = read_chunks(src, chunk_size)
+        if "zip" not in self:
+            return _chunks
+        elif self["zip"] == "DEF":
+            return deflate_stream(_chunks, self.zip_level)
+        else:
+            raise ParameterError("Zip has unknown value: %s" % self["zip"])
+
+    def encrypt_stream(self, src, dst, keys=None, cek="", iv="", chunk_size=65536):
+        """
+        Encrypt the content of a file like object and write the result as a
+        compact serialized JWE to another file like object. The content is
+        processed chunk by chunk so memory use doesn't depend on its size.
+
+        :param src: File like object to read the plain text from
+        :param dst: File like object, opened for writing bytes
+        :param keys: A set of possibly usable keys
+        :param cek: Content master key
+        :param iv: Initialization vector
+        :param chunk_size: The number of bytes to read from src at a time
+        :return: The number of bytes written to dst
+        """
+
+        _alg = self["alg"]
+        _enc = self["enc"]
+
+        if keys:
+            keys = self.pick_keys(keys, use="enc")
+        else:
+            keys = self.pick_keys(self._get_keys(), use="enc")
+
+        if not keys:
+            logger.error(KEY_ERR.format(_alg))
+            raise NoSuitableEncryptionKey(_alg)
+
+        key = keys[0]
+        encrypter = self._key_manager(_alg)
+        _args = self._dict.copy()
+        _args.pop("cek", None)
+        cek, encrypted_key, params = encrypter.wrap_cek(self._encryption_key(key), cek, **_args)
+
+        _header = self.headers()
+        _header.update(params)
+        if key.kid:
+            _header["kid"] = key.kid
+        _auth_data = JWEnc(**_header).b64_encode_header()
+
+        iv = encrypter._generate_iv(_enc, iv)
+        _ctx = JWEKey.stream_setup(_enc, cek, iv, _auth_data)
+        _tag = []
+
+        def _ciphertext():
+            for chunk in self._plaintext_chunks(src, chunk_size):
+                yield _ctx.update(chunk)
+            _ct, tag = _ctx.finalize()
+            _tag.append(tag)
+            yield _ct
+
+        _written = 0
+        for piece in [_auth_data, b".", b64e(encrypted_key or b""), b".", b64e(iv), b"."]:
+            dst.write(piece)
+            _written += len(piece)
+
+        for piece in b64e_stream(_ciphertext()):
+            dst.write(piece)
+            _written += len(piece)
+
+        piece = b"." + b64e(_tag[0])
+        dst.write(piece)
+        logger.debug("Encrypted stream using key with kid={}".format(key.kid))
+        return _written + len(piece)
+
+    def decrypt_stream(self, src, dst, keys=None, alg=None, chunk_size=65536, spool_size=1048576):
+        """
+        Decrypt a compact serialized JWE read from a file like object and
+        write the plain text to another file like object. The ciphertext is
+        processed chunk by chunk. The plain text is kept in a temporary file,
+        in memory up to spool_size bytes, and only written to dst once the
+        authentication tag has been verified.
+
+        :param src: File like object to read the JWE from
+        :param dst: File like object, opened for writing bytes
+        :param keys: A set of possibly usable keys
+        :param alg: The expected key management algorithm
+        :param chunk_size: The number of bytes to read from src at a time
+        :param spool_size: The maximum size of plain text kept in memory
+        :return: The number of bytes written to dst
+        """
+        reader = CompactStreamReader(read_chunks(src, chunk_size))
+        _b64_header = reader.read_part()
+        encrypted_key = b64d(reader.read_part())
+        iv = b64d(reader.read_part())
+        if reader.eof:
+            raise WrongNumberOfParts("Too few parts in stream")
+
+        headers = json_codec.loads(as_unicode(b64d(_b64_header)))
+        _alg = headers["alg"]
+        if alg and alg != _alg:
+            raise WrongEncryptionAlgorithm()
+
+        _enc = headers["enc"]
+        if _enc not in SUPPORTED["enc"]:
+            raise NotSupportedAlgorithm(_enc)
+
+        if keys:
+            keys = self.pick_keys(keys, use="enc", alg=_alg)
+        else:
+            keys = self.pick_keys(self._get_keys(), use="enc", alg=_alg)
+
+        keys = self._order_keys(headers, keys)
+        if not keys:
+            raise NoSuitableDecryptionKey(_alg)
+
+        # The ciphertext can only be read once so the key is picked by
+        # which one can recover a content encryption key.
+        self.key_trials = 0
+        cek, _ = self._unwrap_cek(self._key_manager(_alg), headers, encrypted_key, keys)
+        if cek is None:
+            raise DecryptionFailed("No available key that could decrypt the message")
+
+        _ctx = JWEKey.stream_setup(_enc, cek, iv, _b64_header, decrypt=True)
+        with tempfile.SpooledTemporaryFile(max_size=spool_size) as spool:
+            for chunk in b64d_stream(reader.iter_part()):
+                spool.write(_ctx.update(chunk))
+
+            if reader.eof:
+                raise WrongNumberOfParts("Too few parts in stream")
+            tag = b64d(reader.read_part().strip())
+            if not reader.eof:
+                raise WrongNumberOfParts("Too many parts in stream")
+
+            try:
+                spool.write(_ctx.finalize(tag))
+            except VerificationError as err:
+                raise DecryptionFailed(err)
+
+            spool.seek(0)
+            _chunks = read_chunks(spool, chunk_size)
+            if "zip" in headers:
+                if headers["zip"] != "DEF":
+                    raise ParameterError("Zip has unknown value: %s" % headers["zip"])
+                _chunks = inflate_stream(_chunks, self.zip_max_size)
+
+            _written = 0
+            for chunk in _chunks:
+                dst.write(chunk)
+                _written += len(chunk)
+
+        return _written
+
+    def encrypt_json(self, keys=None, cek="", iv="", aad=None, unprotected=None, flatten=True):
+        """
+        Encrypt a payload for one or more recipients using the JWE JSON
+        Serialization (RFC 7516 section 7.2). The content is encrypted once,
+        only the content encryption key is wrapped for each recipient.
+
+        A recipient key with an "alg" that is a key management algorithm
+        is used with that algorithm, otherwise the "alg" of this instance
+        is used.
+
+        :param keys: The recipient keys
+        :param cek: Content master key
+        :param iv: Initialization vector
+        :param aad: Additional authenticated data
+        :param unprotected: Shared unprotected header parameters
+        :param flatten: Use the flattened syntax if there is only one recipient
+        :return: The JWE as a JSON document
+        """
+
+        _enc = self["enc"]
+        if keys is None:
+            keys = self._get_keys()
+
+        _recipients = []
+        for key in keys:
+            if key.alg in SUPPORTED["alg"]:
+                _alg = key.alg
+            else:
+                _alg = self["alg"]
+            if self.pick_keys([key], use="enc", alg=_alg):
+                _recipients.append((key, _alg))
+
+        if not _recipients:
+            logger.error(KEY_ERR.format(self._dict.get("alg")))
+            raise NoSuitableEncryptionKey(self._dict.get("alg"))
+
+        _args = self._dict.copy()
+        _args.pop("cek", None)
+        cek = JWEKey._generate_key(_enc, cek)
+        iv = JWEKey._generate_iv(_enc, iv)
+
+        recipients = []
+        for key, _alg in _recipients:
+            if _alg in ["ECDH-ES", "dir"] and len(_recipients) > 1:
+                raise ParameterError("{} can only be used with one recipient".format(_alg))
+
+            _cek, encrypted_key, params = self._key_manager(_alg).wrap_cek(
+                self._encryption_key(key), cek, **_args
+            )
+            # With ECDH-ES and dir the key management produces the content
+            # encryption key
+            cek = _cek
+
+            _header = {"alg": _alg}
+            if key.kid:
+                _header["kid"] = key.kid
+            _header.update(params)
+            _recipient = {"header": bytes2str_conv(_header)}
+            if encrypted_key:
+                _recipient["encrypted_key"] = as_unicode(b64e(encrypted_key))
+            recipients.append(_recipient)
+
+        _protected = self.headers()
+        for param in ["alg", "kid", "epk", "apu", "apv"]:
+            _protected.pop(param, None)
+        _b64_protected = b64encode_item(_protected)
+
+        res = {"protected": as_unicode(_b64_protected)}
+        if unprotected:
+            res["unprotected"] = unprotected
+
+        _auth_data = _b64_protected
+        if aad:
+            res["aad"] = as_unicode(b64e(as_bytes(aad)))
+            _auth_data += b"." + b64e(as_bytes(aad))
+
+        if flatten and len(recipients) == 1:
+            res.update(recipients[0])
+        else:
+            res["recipients"] = recipients
+
+        # With dir the content encryption key is a long lived shared key
+        _key, _alg = _recipients[0]
+        _owner = _key if _alg == "dir" and isinstance(_key, SYMKey) else None
+        ctxt, tag, _ = JWEKey().enc_setup(
+            _enc,
+            self._plaintext(self.msg),
+            auth_data=_auth_data,
+            key=cek,
+            iv=iv,
+            key_owner=_owner,
+        )
+        res.update(
+            {
+                "iv": as_unicode(b64e(iv)),
+                "ciphertext": as_unicode(b64e(ctxt)),
+                "tag": as_unicode(b64e(tag)),
+            }
+        )
+        return json_codec.dumps(res)
+
+    def decrypt_json(self, token, keys=None, alg=None):
+        """
+        Decrypt a JWE using the General or Flattened JWE JSON Serialization.
+        The recipients are tried in order until one of them has an encrypted
+        key that can be unwrapped with one of the keys.
+
+        :param token: The JWE as a JSON document
+        :param keys: A set of possibly usable keys
+        :param alg: The expected key management algorithm
+        :return: The decrypted message
+        """
+        _jwe = json_codec.loads(token)
+        if keys is None:
+            keys = self._get_keys()
+
+        _b64_protected = _jwe.get("protected", "").encode("ascii")
+        _protected = {}
+        if _b64_protected:
+            _protected = json_codec.loads(as_unicode(b64d(_b64_protected)))
+        _shared = _jwe.get("unprotected", {}).copy()
+        # RFC 7516 section 7.2.1, the header parameter names must be disjoint
+        if set(_protected).intersection(_shared):
+            raise ParameterError("Header parameters in both protected and unprotected header")
+        _shared.update(_protected)
+
+        _auth_data = _b64_protected
+        if "aad" in _jwe:
+            _auth_data += b"." + _jwe["aad"].encode("ascii")
+
+        try:
+            _recipients = _jwe["recipients"]
+        except KeyError:
+            # Flattened JWE JSON Serialization Syntax
+            _recipients = [
+                dict([(k, v) for k, v in _jwe.items() if k in ["header", "encrypted_key"]])
+            ]
+
+        # enc and zip must be integrity protected
+        if "enc" not in _protected:
+            raise ParameterError("enc must be in the protected header")
+        if "zip" in _shared and "zip" not in _protected:
+            raise ParameterError("zip must be in the protected header")
+        _enc = _protected["enc"]
+        if _enc not in SUPPORTED["enc"]:
+            raise NotSupportedAlgorithm(_enc)
+
+        iv = b64d(_jwe["iv"].encode("ascii"))
+        ctxt = b64d(_jwe["ciphertext"].encode("ascii"))
+        tag = b64d(_jwe["tag"].encode("ascii"))
+
+        self.key_trials = 0
+        _matched = False
+        for _recipient in _recipients:
+            _header = _recipient.get("header", {})
+            if set(_header).intersection(_shared):
+                raise ParameterError("Recipient header parameters also in the shared headers")
+            if "zip" in _header:
+                raise ParameterError("zip must be in the protected header")
+            headers = _shared.copy()
+            headers.update(_header)
+            _alg = headers["alg"]
+            if alg and alg != _alg:
+                continue
+            _matched = True
+
+            _keys = self._order_keys(headers, self.pick_keys(keys, use="enc", alg=_alg))
+
+            encrypted_key = b64d(_recipient.get("encrypted_key", "").encode("ascii"))
+            cek, _key = self._unwrap_cek(self._key_manager(_alg), headers, encrypted_key, _keys)
+            if cek is None:
+                continue
+
+            try:
+                msg = JWEKey._decrypt(
+                    _enc,
+                    cek,
+                    ctxt,
+                    iv,
+                    tag,
+                    auth_data=_auth_data,
+                    key_owner=_key if _alg == "dir" and isinstance(_key, SYMKey) else None,
+                )
+            except DecryptionFailed:
+                continue
+
+            if "zip" in _protected:
+                if _protected["zip"] != "DEF":
+                    raise ParameterError("Zip has unknown value: %s" % _protected["zip"])
+                msg = inflate(msg, self.zip_max_size)
+            return msg
+
+        if not _matched:
+            raise WrongEncryptionAlgorithm()
+        raise DecryptionFailed("No available key that could decrypt the message")
+
     def alg2keytype(self, alg):
         return alg2keytype(alg)
 
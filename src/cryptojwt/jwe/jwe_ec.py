@@ -2,16 +2,17 @@ import struct
 
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.keywrap import InvalidUnwrap
 from cryptography.hazmat.primitives.keywrap import aes_key_unwrap
 from cryptography.hazmat.primitives.keywrap import aes_key_wrap
 
 from ..jwk.ec import NIST2SEC
 from ..jwk.ec import ECKey
-from ..utils import as_bytes
 from ..utils import as_unicode
 from ..utils import b64d
 from ..utils import b64e
 from . import KEY_LEN
+from .exception import DecryptionFailed
 from .jwekey import JWEKey
 from .jwenc import JWEnc
 from .utils import concat_sha256
@@ -48,12 +49,14 @@ def ecdh_derive_key(key, epk, apu, apv, alg, dk_len):
 
 class JWE_EC(JWEKey):
     args = JWEKey.args[:]
-    args.append("enc")
+    args.extend(["enc", "zip"])
 
-    def __init__(self, msg=None, with_digest=False, **kwargs):
+    def __init__(self, msg=None, with_digest=False, epk_pool=None, **kwargs):
         JWEKey.__init__(self, msg, with_digest, **kwargs)
         self.msg_valid = False
         self.auth_data = b""
+        # A cryptojwt.jwe.epk_pool.EphemeralKeyPool instance
+        self.epk_pool = epk_pool
 
     def enc_setup(self, msg, key=None, auth_data=b"", **kwargs):
         """
@@ -84,11 +87,15 @@ class JWE_EC(JWEKey):
 
         # epk is either an Elliptic curve key instance or a JWK description of
         # one. This key belongs to the entity on the other side.
+        _epk_jwk = None
         try:
             _epk = kwargs["epk"]
         except KeyError:
-            _epk = ec.generate_private_key(NIST2SEC[as_unicode(key.crv)], default_backend())
-            epk = ECKey().load_key(_epk.public_key())
+            if self.epk_pool is not None:
+                _epk, epk, _epk_jwk = self.epk_pool.get(key.crv)
+            else:
+                _epk = ec.generate_private_key(NIST2SEC[as_unicode(key.crv)], default_backend())
+                epk = ECKey().load_key(_epk.public_key())
         else:
             if isinstance(_epk, ec.EllipticCurvePrivateKey):
                 epk = ECKey().load_key(_epk)
@@ -98,7 +105,9 @@ class JWE_EC(JWEKey):
             else:
                 raise ValueError("epk of a type I can't handle")
 
-        params = {"apu": b64e(apu), "apv": b64e(apv), "epk": epk.serialize(False)}
+        if _epk_jwk is None:
+            _epk_jwk = epk.serialize(False)
+        params = {"apu": b64e(apu), "apv": b64e(apv), "epk": _epk_jwk}
 
         cek = iv = None
         if "cek" in kwargs and kwargs["cek"]:
@@ -139,44 +148,73 @@ class JWE_EC(JWEKey):
         self.ctxt = token.ciphertext()
         self.tag = token.authentication_tag()
 
+        self.cek = self.unwrap_cek(self.headers, token.encrypted_key(), key)
+        return self.cek
+
+    def wrap_cek(self, key, cek="", **kwargs):
+        """
+        Agree on a content encryption key using ECDH-ES. Depending on the
+        algorithm the agreed key is used directly or to wrap the content
+        encryption key.
+
+        :param key: The recipients EC key
+        :param cek: Content encryption key, generated if not given
+        :return: Tuple (cek, encrypted key, extra header parameters)
+        """
+        kwargs["cek"] = cek
+        cek, encrypted_key, _, params, _ = self.enc_setup(None, key=key, **kwargs)
+        return cek, encrypted_key, params
+
+    def unwrap_cek(self, headers, encrypted_key, key):
+        """
+        Recover the content encryption key using ECDH-ES.
+
+        :param headers: The JWE header
+        :param encrypted_key: The JWE encrypted key
+        :param key: Private Elliptic Curve Key
+        :return: The content encryption key
+        """
         # Handle EPK / Curve
-        if "epk" not in self.headers or "crv" not in self.headers["epk"]:
+        if "epk" not in headers or "crv" not in headers["epk"]:
             raise Exception("Ephemeral Public Key Missing in ECDH-ES Computation")
 
-        epubkey = ECKey(**self.headers["epk"])
+        epubkey = ECKey(**headers["epk"])
         apu = apv = ""
-        if "apu" in self.headers:
-            apu = b64d(self.headers["apu"].encode())
-        if "apv" in self.headers:
-            apv = b64d(self.headers["apv"].encode())
+        if "apu" in headers:
+            apu = b64d(headers["apu"].encode())
+        if "apv" in headers:
+            apv = b64d(headers["apv"].encode())
 
-        if self.headers["alg"] == "ECDH-ES":
+        if headers["alg"] == "ECDH-ES":
             try:
-                dk_len = KEY_LEN[self.headers["enc"]]
+                dk_len = KEY_LEN[headers["enc"]]
             except KeyError:
                 raise Exception("Unknown key length for algorithm")
 
-            self.cek = ecdh_derive_key(
+            cek = ecdh_derive_key(
                 key,
                 epubkey.pub_key,
                 apu,
                 apv,
-                str(self.headers["enc"]).encode(),
+                str(headers["enc"]).encode(),
                 dk_len,
             )
-        elif self.headers["alg"] in [
+        elif headers["alg"] in [
             "ECDH-ES+A128KW",
             "ECDH-ES+A192KW",
             "ECDH-ES+A256KW",
         ]:
-            _pre, _post = self.headers["alg"].split("+")
+            _pre, _post = headers["alg"].split("+")
             klen = int(_post[1:4])
             kek = ecdh_derive_key(key, epubkey.pub_key, apu, apv, str(_post).encode(), klen)
-            self.cek = aes_key_unwrap(kek, token.encrypted_key(), default_backend())
+            try:
+                cek = aes_key_unwrap(kek, encrypted_key, default_backend())
+            except InvalidUnwrap as err:
+                raise DecryptionFailed(err)
         else:
-            raise Exception("Unsupported algorithm %s" % self.headers["alg"])
+            raise Exception("Unsupported algorithm %s" % headers["alg"])
 
-        return self.cek
+        return cek
 
     def encrypt(self, key=None, iv="", cek="", **kwargs):
         """
@@ -188,7 +226,7 @@ class JWE_EC(JWEKey):
         :param kwargs: Extra keyword arguments
         :return: An encrypted JWT
         """
-        _msg = as_bytes(self.msg)
+        _msg = self._compress(self.msg)
 
         _args = self._dict
         try:
@@ -230,6 +268,7 @@ class JWE_EC(JWEKey):
             iv=self.iv,
             tag=self.tag,
         )
+        msg = self._decompress(self.headers, msg)
         self.msg = msg
         self.msg_valid = True
         return msg
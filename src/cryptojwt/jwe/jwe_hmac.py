@@ -1,15 +1,16 @@
 import logging
-import zlib
 
 from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.keywrap import InvalidUnwrap
 from cryptography.hazmat.primitives.keywrap import aes_key_unwrap
 from cryptography.hazmat.primitives.keywrap import aes_key_wrap
 
 from ..exception import MissingKey
 from ..exception import WrongNumberOfParts
 from ..jwk.hmac import SYMKey
-from ..utils import as_bytes
 from ..utils import intarr2str
+from . import KEY_LEN_BYTES
+from .exception import DecryptionFailed
 from .jwekey import JWEKey
 from .jwenc import JWEnc
 
@@ -20,7 +21,53 @@ __author__ = "Roland Hedberg"
 
 class JWE_SYM(JWEKey):
     args = JWEKey.args[:]
-    args.append("enc")
+    args.extend(["enc", "zip"])
+
+    @staticmethod
+    def _kek(key):
+        if isinstance(key, SYMKey):
+            try:
+                return key.key.encode("utf8")
+            except AttributeError:
+                return key.key
+        elif isinstance(key, bytes):
+            return key
+        else:
+            return intarr2str(key)
+
+    def _wrap(self, key, cek):
+        # The iv for this function must be 64 bit
+        # Which is certainly different from the one used for the content
+        return aes_key_wrap(self._kek(key), cek, default_backend())
+
+    def _unwrap(self, key, jek):
+        # The iv for this function must be 64 bit
+        return aes_key_unwrap(self._kek(key), jek, default_backend())
+
+    def wrap_cek(self, key, cek="", **kwargs):
+        """
+        Produce the content encryption key and wrap it with the shared key.
+
+        :param key: Shared symmetric key
+        :param cek: Content encryption key, generated if not given
+        :return: Tuple (cek, encrypted key, extra header parameters)
+        """
+        cek = self._generate_key(self["enc"], cek)
+        return cek, self._wrap(key, cek), {}
+
+    def unwrap_cek(self, headers, encrypted_key, key):
+        """
+        Unwrap the content encryption key with the shared key.
+
+        :param headers: The JWE header
+        :param encrypted_key: The JWE encrypted key
+        :param key: Shared symmetric key
+        :return: The content encryption key
+        """
+        try:
+            return self._unwrap(key, encrypted_key)
+        except (InvalidUnwrap, ValueError) as err:
+            raise DecryptionFailed(err)
 
     def encrypt(self, key, iv="", cek="", **kwargs):
         """
@@ -32,9 +79,9 @@ class JWE_SYM(JWEKey):
         :param kwargs: Extra keyword arguments, just ignore for now.
         :return:
         """
-        _msg = as_bytes(self.msg)
+        _msg = self._compress(self.msg)
 
-        _args = self._dict
+        _args = self._dict.copy()
         try:
             _args["kid"] = kwargs["kid"]
         except KeyError:
@@ -45,19 +92,7 @@ class JWE_SYM(JWEKey):
         # If no iv and cek are given generate them
         iv = self._generate_iv(self["enc"], iv)
         cek = self._generate_key(self["enc"], cek)
-        if isinstance(key, SYMKey):
-            try:
-                kek = key.key.encode("utf8")
-            except AttributeError:
-                kek = key.key
-        elif isinstance(key, bytes):
-            kek = key
-        else:
-            kek = intarr2str(key)
-
-        # The iv for this function must be 64 bit
-        # Which is certainly different from the one above
-        jek = aes_key_wrap(kek, cek, default_backend())
+        jek = self._wrap(key, cek)
 
         _enc = self["enc"]
         _auth_data = jwe.b64_encode_header()
@@ -78,14 +113,7 @@ class JWE_SYM(JWEKey):
             raise WrongNumberOfParts(len(jwe))
 
         if not cek:
-            jek = jwe.encrypted_key()
-            if isinstance(key, SYMKey):
-                try:
-                    key = key.key.encode("utf8")
-                except AttributeError:
-                    key = key.key
-            # The iv for this function must be 64 bit
-            cek = aes_key_unwrap(key, jek, default_backend())
+            cek = self.unwrap_cek(jwe.headers, jwe.encrypted_key(), key)
 
         auth_data = jwe.b64_protected_header()
         msg = self._decrypt(
@@ -97,7 +125,114 @@ class JWE_SYM(JWEKey):
             tag=jwe.authentication_tag(),
         )
 
-        if "zip" in self and self["zip"] == "DEF":
-            msg = zlib.decompress(msg)
+        return self._decompress(jwe.headers, msg)
+
+
+class JWE_DIR(JWEKey):
+    """
+    Direct encryption with a shared symmetric key, the key is used as the
+    content encryption key. See RFC 7518 section 4.5.
+    """
+
+    args = JWEKey.args[:]
+    args.extend(["enc", "zip"])
+
+    @staticmethod
+    def _cek(key, enc):
+        cek = JWE_SYM._kek(key)
+        try:
+            _len = KEY_LEN_BYTES[enc]
+        except KeyError:
+            raise ValueError("Unsupported encryption algorithm %s" % enc)
+        if len(cek) != _len:
+            raise ValueError("A key of %d bytes can not be used with %s" % (len(cek), enc))
+        return cek
+
+    def wrap_cek(self, key, cek="", **kwargs):
+        """
+        The shared key is the content encryption key, there is no encrypted key.
+
+        :param key: Shared symmetric key
+        :param cek: Not used
+        :return: Tuple (cek, encrypted key, extra header parameters)
+        """
+        return self._cek(key, self["enc"]), b"", {}
+
+    def unwrap_cek(self, headers, encrypted_key, key):
+        """
+        The shared key is the content encryption key.
+
+        :param headers: The JWE header
+        :param encrypted_key: The JWE encrypted key, must be empty
+        :param key: Shared symmetric key
+        :return: The content encryption key
+        """
+        if encrypted_key:
+            raise DecryptionFailed("Encrypted key must be empty with direct encryption")
+        try:
+            return self._cek(key, headers["enc"])
+        except ValueError as err:
+            raise DecryptionFailed(err)
+
+    def encrypt(self, key, iv="", cek="", **kwargs):
+        """
+        Produces a JWE as defined in RFC7516 using direct encryption
+
+        :param key: Shared symmetric key
+        :param iv: Initialization vector
+        :param cek: Not used, the shared key is the content encryption key
+        :param kwargs: Extra keyword arguments, just ignore for now.
+        :return: An encrypted JWT
+        """
+        _msg = self._compress(self.msg)
+
+        _args = self._dict.copy()
+        try:
+            _args["kid"] = kwargs["kid"]
+        except KeyError:
+            pass
+
+        jwe = JWEnc(**_args)
+
+        _enc = self["enc"]
+        cek = self._cek(key, _enc)
+        iv = self._generate_iv(_enc, iv)
+        # The shared key is used for every message, reuse the cipher set up for it
+        ctxt, tag, _ = self.enc_setup(
+            _enc,
+            _msg,
+            auth_data=jwe.b64_encode_header(),
+            key=cek,
+            iv=iv,
+            key_owner=key if isinstance(key, SYMKey) else None,
+        )
+        return jwe.pack(parts=[b"", iv, ctxt, tag])
+
+    def decrypt(self, token, key=None, cek=None):
+        if isinstance(token, JWEnc):
+            jwe = token
+        else:
+            jwe = JWEnc().unpack(token)
+
+        if len(jwe) != 5:
+            raise WrongNumberOfParts(len(jwe))
+
+        _owner = None
+        if not cek:
+            if not key:
+                raise MissingKey("On of key or cek must be specified")
+            cek = self.unwrap_cek(jwe.headers, jwe.encrypted_key(), key)
+            if isinstance(key, SYMKey):
+                _owner = key
+
+        msg = self._decrypt(
+            jwe.headers["enc"],
+            cek,
+            jwe.ciphertext(),
+            auth_data=jwe.b64_protected_header(),
+            iv=jwe.initialization_vector(),
+            tag=jwe.authentication_tag(),
+            key_owner=_owner,
+        )
 
-        return msg
+        return self._decompress(jwe.headers, msg)
@@ -1,10 +1,8 @@
 import logging
-import zlib
 
-from ..utils import as_bytes
 from . import SUPPORTED
+from .exception import DecryptionFailed
 from .exception import NotSupportedAlgorithm
-from .exception import ParameterError
 from .jwekey import JWEKey
 from .jwenc import JWEnc
 from .rsa import RSAEncrypter
@@ -33,6 +31,56 @@ class JWE_RSA(JWEKey):
         "crit",
     ]
 
+    def _encrypt_cek(self, cek, key):
+        _encrypt = RSAEncrypter(self.with_digest).encrypt
+
+        _alg = self["alg"]
+        if _alg == "RSA-OAEP":
+            return _encrypt(cek, key, "pkcs1_oaep_padding")
+        elif _alg == "RSA-OAEP-256":
+            return _encrypt(cek, key, "pkcs1_oaep_256_padding")
+        elif _alg == "RSA1_5":
+            return _encrypt(cek, key)
+        else:
+            raise NotSupportedAlgorithm(_alg)
+
+    def _decrypt_cek(self, alg, jek, key):
+        _decrypt = RSAEncrypter(self.with_digest).decrypt
+
+        if alg == "RSA-OAEP":
+            return _decrypt(jek, key, "pkcs1_oaep_padding")
+        elif alg == "RSA-OAEP-256":
+            return _decrypt(jek, key, "pkcs1_oaep_256_padding")
+        elif alg == "RSA1_5":
+            return _decrypt(jek, key)
+        else:
+            raise NotSupportedAlgorithm(alg)
+
+    def wrap_cek(self, key, cek="", **kwargs):
+        """
+        Produce the content encryption key and encrypt it with the RSA key.
+
+        :param key: RSA public key
+        :param cek: Content encryption key, generated if not given
+        :return: Tuple (cek, encrypted key, extra header parameters)
+        """
+        cek = self._generate_key(self["enc"], cek)
+        return cek, self._encrypt_cek(cek, key), {}
+
+    def unwrap_cek(self, headers, encrypted_key, key):
+        """
+        Decrypt the content encryption key with the RSA key.
+
+        :param headers: The JWE header
+        :param encrypted_key: The JWE encrypted key
+        :param key: RSA private key
+        :return: The content encryption key
+        """
+        try:
+            return self._decrypt_cek(headers["alg"], encrypted_key, key)
+        except ValueError as err:
+            raise DecryptionFailed(err)
+
     def encrypt(self, key, iv="", cek="", **kwargs):
         """
         Produces a JWE as defined in RFC7516 using RSA algorithms
@@ -44,12 +92,7 @@ class JWE_RSA(JWEKey):
         :return: A signed payload
         """
 
-        _msg = as_bytes(self.msg)
-        if "zip" in self:
-            if self["zip"] == "DEF":
-                _msg = zlib.compress(_msg)
-            else:
-                raise ParameterError("Zip has unknown value: %s" % self["zip"])
+        _msg = self._compress(self.msg)
 
         kwarg_cek = cek or None
 
@@ -60,19 +103,10 @@ class JWE_RSA(JWEKey):
 
         logger.debug("cek: %s, iv: %s" % ([c for c in cek], [c for c in iv]))
 
-        _encrypt = RSAEncrypter(self.with_digest).encrypt
-
-        _alg = self["alg"]
         if kwarg_cek:
             jwe_enc_key = ""
-        elif _alg == "RSA-OAEP":
-            jwe_enc_key = _encrypt(cek, key, "pkcs1_oaep_padding")
-        elif _alg == "RSA-OAEP-256":
-            jwe_enc_key = _encrypt(cek, key, "pkcs1_oaep_256_padding")
-        elif _alg == "RSA1_5":
-            jwe_enc_key = _encrypt(cek, key)
         else:
-            raise NotSupportedAlgorithm(_alg)
+            jwe_enc_key = self._encrypt_cek(cek, key)
 
         jwe = JWEnc(**self.headers())
 
@@ -100,19 +134,8 @@ class JWE_RSA(JWEKey):
         self.jwt = jwe.encrypted_key()
         jek = jwe.encrypted_key()
 
-        _decrypt = RSAEncrypter(self.with_digest).decrypt
-
-        _alg = jwe.headers["alg"]
-        if cek:
-            pass
-        elif _alg == "RSA-OAEP":
-            cek = _decrypt(jek, key, "pkcs1_oaep_padding")
-        elif _alg == "RSA-OAEP-256":
-            cek = _decrypt(jek, key, "pkcs1_oaep_256_padding")
-        elif _alg == "RSA1_5":
-            cek = _decrypt(jek, key)
-        else:
-            raise NotSupportedAlgorithm(_alg)
+        if not cek:
+            cek = self.unwrap_cek(jwe.headers, jek, key)
 
         self["cek"] = cek
         enc = jwe.headers["enc"]
@@ -130,7 +153,4 @@ class JWE_RSA(JWEKey):
             tag=jwe.authentication_tag(),
         )
 
-        if "zip" in jwe.headers and jwe.headers["zip"] == "DEF":
-            msg = zlib.decompress(msg)
-
-        return msg
+        return self._decompress(jwe.headers, msg)
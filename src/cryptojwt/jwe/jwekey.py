@@ -1,15 +1,67 @@
+from ..exception import VerificationError
 from ..jwx import JWx
+from ..utils import as_bytes
 from . import KEY_LEN_BYTES
-from .aes import AES_CBCEncrypter
-from .aes import AES_GCMEncrypter
+from .aes import AES_CBCStream
+from .aes import AES_GCMStream
+from .aes import aead_context
 from .exception import DecryptionFailed
 from .exception import NotSupportedAlgorithm
+from .exception import ParameterError
+from .utils import ZIP_MAX_SIZE
 from .utils import alg2keytype
+from .utils import deflate
 from .utils import get_random_bytes
-from .utils import split_ctx_and_tag
+from .utils import inflate
 
 
 class JWEKey(JWx):
+    """
+    :param msg: The message
+    :param with_digest: Passed on to the key management algorithm
+    :param zip_level: The compression level used with zip "DEF", 0-9 or -1
+        for the zlib default
+    :param zip_max_size: The maximum size in bytes of decompressed content,
+        None for no limit
+    """
+
+    def __init__(
+        self, msg=None, with_digest=False, zip_level=-1, zip_max_size=ZIP_MAX_SIZE, **kwargs
+    ):
+        JWx.__init__(self, msg, with_digest, **kwargs)
+        self.zip_level = zip_level
+        self.zip_max_size = zip_max_size
+
+    def _compress(self, msg):
+        """
+        Compress the plain text if the "zip" header parameter says so.
+
+        :param msg: The plain text message
+        :return: The possibly compressed message as bytes
+        """
+        _msg = as_bytes(msg)
+        if "zip" not in self:
+            return _msg
+        elif self["zip"] == "DEF":
+            return deflate(_msg, self.zip_level)
+        else:
+            raise ParameterError("Zip has unknown value: %s" % self["zip"])
+
+    def _decompress(self, headers, msg):
+        """
+        Decompress decrypted content if the JWE header says it's compressed.
+
+        :param headers: The JWE header
+        :param msg: The decrypted content
+        :return: The plain text message
+        """
+        if "zip" not in headers:
+            return msg
+        elif headers["zip"] == "DEF":
+            return inflate(msg, self.zip_max_size)
+        else:
+            raise ParameterError("Zip has unknown value: %s" % headers["zip"])
+
     @staticmethod
     def _generate_iv(encalg, iv=""):
         if iv:
@@ -37,31 +89,77 @@ class JWEKey(JWx):
     def alg2keytype(self, alg):
         return alg2keytype(alg)
 
-    def enc_setup(self, enc_alg, msg, auth_data=b"", key=None, iv=""):
+    @staticmethod
+    def aead_setup(enc_alg, key, key_owner=None):
+        """Set up content encryption and decryption with a CEK.
+
+        :param enc_alg: The JWE "enc" value specifying the encryption algorithm
+        :param key: Key (CEK)
+        :param key_owner: The :py:class:`cryptojwt.jwk.hmac.SYMKey` instance
+            that is used directly as the CEK, with direct encryption. The
+            context it has prepared for the key is reused.
+        :return: A :py:class:`cryptojwt.jwe.aes.AES_GCMContext` or
+            :py:class:`cryptojwt.jwe.aes.AES_CBCContext` instance
+        """
+        if key_owner is not None:
+            return key_owner.aead_context(enc_alg)
+        return aead_context(enc_alg, key)
+
+    def enc_setup(self, enc_alg, msg, auth_data=b"", key=None, iv="", key_owner=None):
         """Encrypt JWE content.
 
         :param enc_alg: The JWE "enc" value specifying the encryption algorithm
         :param msg: The plain text message
         :param auth_data: Additional authenticated data
         :param key: Key (CEK)
-        :return: Tuple (ciphertext, tag), both as bytes
+        :param key_owner: The SYMKey instance used as the CEK, if any
+        :return: Tuple (ciphertext, tag, key)
         """
 
         iv = self._generate_iv(enc_alg, iv)
+        ctx, tag = self.aead_setup(enc_alg, key, key_owner).encrypt(msg, iv, auth_data)
+        return bytes(ctx), bytes(tag), key
+
+    @staticmethod
+    def stream_setup(enc_alg, key, iv, auth_data=b"", decrypt=False):
+        """Set up incremental encryption or decryption of JWE content.
 
-        if enc_alg in ["A192GCM", "A128GCM", "A256GCM"]:
-            aes = AES_GCMEncrypter(key=key)
-            ctx, tag = split_ctx_and_tag(aes.encrypt(msg, iv, auth_data))
+        :param enc_alg: The JWE "enc" value specifying the encryption algorithm
+        :param key: Key (CEK)
+        :param iv: Initialization vector
+        :param auth_data: Additional authenticated data
+        :param decrypt: Whether to decrypt instead of encrypt
+        :return: A :py:class:`cryptojwt.jwe.aes.AES_GCMStream` or
+            :py:class:`cryptojwt.jwe.aes.AES_CBCStream` instance
+        """
+        if enc_alg in ["A128GCM", "A192GCM", "A256GCM"]:
+            return AES_GCMStream(key, iv, auth_data, decrypt)
         elif enc_alg in ["A128CBC-HS256", "A192CBC-HS384", "A256CBC-HS512"]:
-            aes = AES_CBCEncrypter(key=key)
-            ctx, tag = aes.encrypt(msg, iv, auth_data)
+            return AES_CBCStream(key, iv, auth_data, decrypt)
         else:
             raise NotSupportedAlgorithm(enc_alg)
 
-        return ctx, tag, aes.key
+    def wrap_cek(self, key, cek="", **kwargs):
+        """Produce the content encryption key and its encrypted form.
+
+        :param key: The recipients key
+        :param cek: Content encryption key, generated if not given
+        :return: Tuple (cek, encrypted key, extra header parameters)
+        """
+        raise NotImplementedError()
+
+    def unwrap_cek(self, headers, encrypted_key, key):
+        """Recover the content encryption key.
+
+        :param headers: The JWE header
+        :param encrypted_key: The JWE encrypted key
+        :param key: The recipients private or symmetric key
+        :return: The content encryption key
+        """
+        raise NotImplementedError()
 
     @staticmethod
-    def _decrypt(enc, key, ctxt, iv, tag, auth_data=b""):
+    def _decrypt(enc, key, ctxt, iv, tag, auth_data=b"", key_owner=None):
         """Decrypt JWE content.
 
         :param enc: The JWE "enc" value specifying the encryption algorithm
@@ -70,16 +168,12 @@ class JWEKey(JWx):
         :param auth_data: Additional authenticated data (AAD)
         :param ctxt : Ciphertext
         :param tag: Authentication tag
-        :return: plain text message or None if decryption failed
+        :param key_owner: The SYMKey instance used as the CEK, if any
+        :return: plain text message
+        :raises: DecryptionFailed if the content could not be authenticated
         """
-        if enc in ["A128GCM", "A192GCM", "A256GCM"]:
-            aes = AES_GCMEncrypter(key=key)
-        elif enc in ["A128CBC-HS256", "A192CBC-HS384", "A256CBC-HS512"]:
-            aes = AES_CBCEncrypter(key=key)
-        else:
-            raise Exception("Unsupported encryption algorithm %s" % enc)
-
+        _ctx = JWEKey.aead_setup(enc, key, key_owner)
         try:
-            return aes.decrypt(ctxt, iv=iv, auth_data=auth_data, tag=tag)
-        except DecryptionFailed:
-            raise
+            return _ctx.decrypt(ctxt, iv=iv, auth_data=auth_data, tag=tag)
+        except VerificationError as err:
+            raise DecryptionFailed(err)
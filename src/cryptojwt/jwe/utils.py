@@ -1,5 +1,6 @@
 import os
 import struct
+import zlib
 from math import ceil
 
 from cryptography.hazmat.backends import default_backend
@@ -9,9 +10,16 @@ from cryptography.hazmat.primitives.hashes import SHA384
 from cryptography.hazmat.primitives.hashes import SHA512
 
 from ..utils import b64e
+from .exception import CannotDecode
+from .exception import DecompressionLimitExceeded
 
 LENMET = {32: (16, SHA256), 48: (24, SHA384), 64: (32, SHA512)}
 
+# zip "DEF" is raw DEFLATE (RFC 1951) without the zlib header and trailer
+DEF_WBITS = -zlib.MAX_WBITS
+# The default upper limit for the size of decompressed content
+ZIP_MAX_SIZE = 10 * 1024 * 1024
+
 
 def get_keys_seclen_dgst(key, iv):
     # Validate input
@@ -74,6 +82,8 @@ def alg2keytype(alg):
         return "oct"
     elif alg.startswith("ECDH"):
         return "EC"
+    elif alg == "dir":
+        return "oct"
     else:
         return None
 
@@ -113,3 +123,153 @@ def concat_sha256(secret, dk_len, other_info):
         digest.update(other_info)
         dkm += digest.finalize()
     return dkm[:dk_bytes]
+
+
+class CompactStreamReader(object):
+    """
+    Reads the dot separated parts of a compact serialized token from a
+    sequence of byte strings, one part at the time.
+
+    :param chunks: An iterable of byte strings
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buf = b""
+        self.eof = False
+
+    def iter_part(self):
+        """
+        The pieces of the next part. The part must be completely consumed
+        before the next one is read.
+
+        :return: A generator of byte strings
+        """
+        while True:
+            pos = self._buf.find(b".")
+            if pos >= 0:
+                piece, self._buf = self._buf[:pos], self._buf[pos + 1 :]
+                if piece:
+                    yield piece
+                return
+
+            if self._buf:
+                piece, self._buf = self._buf, b""
+                yield piece
+
+            try:
+                self._buf = next(self._chunks)
+            except StopIteration:
+                self.eof = True
+                return
+
+    def read_part(self):
+        """
+        :return: The next part as one byte string
+        """
+        return b"".join(self.iter_part())
+
+
+def deflate_stream(chunks, level=zlib.Z_DEFAULT_COMPRESSION):
+    """
+    Compress a sequence of byte strings as specified for the JWE "zip"
+    value "DEF".
+
+    :param chunks: An iterable of byte strings
+    :param level: The zlib compression level, 0-9 or -1 for the default
+    :return: A generator of byte strings
+    """
+    _compressor = zlib.compressobj(level, zlib.DEFLATED, DEF_WBITS)
+    for chunk in chunks:
+        _out = _compressor.compress(chunk)
+        if _out:
+            yield _out
+    yield _compressor.flush()
+
+
+def deflate(msg, level=zlib.Z_DEFAULT_COMPRESSION):
+    """
+    Compress a message as specified for the JWE "zip" value "DEF".
+
+    :param msg: The message as a byte string
+    :param level: The zlib compression level, 0-9 or -1 for the default
+    :return: The compressed message
+    """
+    return b"".join(deflate_stream([msg], level))
+
+
+def inflate_stream(chunks, max_size=ZIP_MAX_SIZE):
+    """
+    Decompress a sequence of byte strings compressed with the JWE "zip"
+    value "DEF". Output is produced incrementally and never more than
+    max_size bytes in total. Content compressed by earlier versions of
+    this library, which used the zlib format, is also accepted.
+
+    :param chunks: An iterable of byte strings
+    :param max_size: The maximum size of the decompressed content in bytes,
+        None for no limit
+    :return: A generator of byte strings
+    :raises: DecompressionLimitExceeded if the decompressed content would
+        be larger than max_size
+    :raises: CannotDecode if the content isn't correctly compressed
+    """
+    _decompressor = zlib.decompressobj(DEF_WBITS)
+    _first = True
+    _total = 0
+
+    def _limit():
+        # Ask for one byte more than allowed to detect an overflow
+        if max_size is None:
+            return 0
+        return max_size - _total + 1
+
+    for chunk in chunks:
+        while chunk:
+            try:
+                _out = _decompressor.decompress(chunk, _limit())
+            except zlib.error as err:
+                if not _first:
+                    raise CannotDecode("Could not decompress content: {}".format(err))
+                # Fall back to the zlib format
+                _decompressor = zlib.decompressobj(zlib.MAX_WBITS)
+                _first = False
+                continue
+            _first = False
+            _total += len(_out)
+            if max_size is not None and _total > max_size:
+                raise DecompressionLimitExceeded(
+                    "Decompressed content larger than {} bytes".format(max_size)
+                )
+            if _out:
+                yield _out
+            chunk = _decompressor.unconsumed_tail
+
+    # Output may still be pending when the input is exhausted
+    while not _decompressor.eof:
+        try:
+            _out = _decompressor.decompress(b"", _limit())
+        except zlib.error as err:
+            raise CannotDecode("Could not decompress content: {}".format(err))
+        if not _out:
+            break
+        _total += len(_out)
+        if max_size is not None and _total > max_size:
+            raise DecompressionLimitExceeded(
+                "Decompressed content larger than {} bytes".format(max_size)
+            )
+        yield _out
+
+    if not _decompressor.eof:
+        raise CannotDecode("Compressed content is truncated")
+
+
+def inflate(msg, max_size=ZIP_MAX_SIZE):
+    """
+    Decompress a message compressed with the JWE "zip" value "DEF".
+
+    :param msg: The compressed message
+    :param max_size: The maximum size of the decompressed content in bytes,
+        None for no limit
+    :return: The decompressed message
+    """
+    return b"".join(inflate_stream([msg], max_size))
@@ -23,15 +23,33 @@ class JWK(object):
 
     """
 
+    # Keys are kept by the ten thousands in key jars, so no instance __dict__
+    __slots__ = (
+        "kty",
+        "alg",
+        "use",
+        "kid",
+        "x5c",
+        "x5t",
+        "x5u",
+        "key_ops",
+        "inactive_since",
+        "extra_args",
+        "_thumbprints",
+    )
+
     members = ["kty", "alg", "use", "kid", "x5c", "x5t", "x5u", "key_ops"]
     longs: List[str] = []
     public_members = ["kty", "alg", "use", "kid", "x5c", "x5t", "x5u", "key_ops"]
     required = ["kty"]
+    # Besides the required members these hold key material
+    key_objects = ["key", "pub_key", "priv_key"]
 
     def __init__(
         self, kty="", alg="", use="", kid="", x5c=None, x5t="", x5u="", key_ops=None, **kwargs
     ):
-
+        # thumbprints over the required members, one per hash function
+        self._thumbprints = {}
         self.extra_args = kwargs
 
         # want kty, alg, use and kid to be strings
@@ -56,6 +74,7 @@ class JWK(object):
                     "ECDH-ES+A128KW",
                     "ECDH-ES+A192KW",
                     "ECDH-ES+A256KW",
+                    "dir",
                 ]:
                     raise UnsupportedAlgorithm("Unknown algorithm: {}".format(alg))
             elif use == "sig":
@@ -74,6 +93,7 @@ class JWK(object):
                     "PS256",
                     "PS384",
                     "PS512",
+                    "EdDSA",
                     "none",
                 ]:
                     raise UnsupportedAlgorithm("Unknown algorithm: {}".format(alg))
@@ -91,6 +111,7 @@ class JWK(object):
                     "PS256",
                     "PS384",
                     "PS512",
+                    "EdDSA",
                     "none",
                     "RSA1_5",
                     "RSA-OAEP",
@@ -102,6 +123,7 @@ class JWK(object):
                     "ECDH-ES+A128KW",
                     "ECDH-ES+A192KW",
                     "ECDH-ES+A256KW",
+                    "dir",
                 ]:
                     raise UnsupportedAlgorithm("Unknown algorithm: {}".format(alg))
         self.alg = alg
@@ -134,6 +156,15 @@ class JWK(object):
         self.x5u = x5u
         self.inactive_since = kwargs.get("inactive_since", 0)
 
+    def __setattr__(self, name, value):
+        if name in self.required or name in self.key_objects:
+            # serialize() sets the same values over and over again
+            if getattr(self, name, None) != value:
+                # The key material changes. A new dictionary since a copy
+                # of this instance may share the old one.
+                object.__setattr__(self, "_thumbprints", {})
+        object.__setattr__(self, name, value)
+
     def to_dict(self):
         """
         A wrapper for to_dict the makes sure that all the private information
@@ -226,7 +257,8 @@ class JWK(object):
         if self.__class__ != other.__class__:
             return False
 
-        if set(self.__dict__.keys()) != set(other.__dict__.keys()):
+        # Only subclasses that don't define __slots__ have a __dict__
+        if getattr(self, "__dict__", {}).keys() != getattr(other, "__dict__", {}).keys():
             return False
 
         for key in self.public_members:
@@ -238,6 +270,20 @@ class JWK(object):
     def keys(self):
         return list(self.to_dict().keys())
 
+    def _slot_values(self):
+        """
+        :return: Dictionary with the values of all the attributes that are
+            defined by __slots__ and are set
+        """
+        res = {}
+        for cls in type(self).__mro__:
+            for name in cls.__dict__.get("__slots__", ()):
+                try:
+                    res[name] = getattr(self, name)
+                except AttributeError:
+                    pass
+        return res
+
     def thumbprint(self, hash_function, members=None):
         """
         Create a thumbprint of the key following the outline in
@@ -250,13 +296,20 @@ class JWK(object):
             then all the required attributes are used.
         :return: A base64 encode hash over a set of Key attributes
         """
-        if members is None:
-            members = self.required
+        if members is not None:
+            return self._thumbprint(hash_function, members)
+
+        try:
+            return self._thumbprints[hash_function]
+        except KeyError:
+            _thumbprint = self._thumbprint(hash_function, self.required)
+            self._thumbprints[hash_function] = _thumbprint
+            return _thumbprint
 
-        members.sort()
+    def _thumbprint(self, hash_function, members):
         ser = self.serialize()
         _se = []
-        for elem in members:
+        for elem in sorted(members):
             try:
                 _val = ser[elem]
             except KeyError:  # should never happen with the required set
@@ -1,3 +1,5 @@
+from typing import List
+
 from . import JWK
 from . import USE
 
@@ -7,6 +9,11 @@ class AsymmetricKey(JWK):
     JSON Web key representation of an Asymmetric key
     """
 
+    __slots__ = ("k", "pub_key", "priv_key")
+    # base64url encoded key material that can be regenerated from the
+    # key instances
+    serialized_members: List[str] = []
+
     def __init__(
         self,
         kty="oct",
@@ -63,6 +70,18 @@ class AsymmetricKey(JWK):
         else:
             return False
 
+    def compact(self):
+        """
+        Forget the base64url encoded key material to use less memory. It's
+        regenerated from the key instances when the key is serialized.
+        """
+        if not self.pub_key and not self.priv_key:
+            return
+
+        for param in self.serialized_members:
+            # The key material doesn't change so the thumbprints are kept
+            object.__setattr__(self, param, "")
+
     def public_key(self):
         """
         Return a public key instance.
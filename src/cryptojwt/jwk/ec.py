@@ -81,6 +81,8 @@ class ECKey(AsymmetricKey):
     Parameters according to https://tools.ietf.org/html/rfc7518#section-6.2
     """
 
+    __slots__ = ("crv", "x", "y", "d")
+
     members = AsymmetricKey.members[:]
     # The elliptic curve specific attributes
     members.extend(["crv", "x", "y", "d"])
@@ -89,6 +91,7 @@ class ECKey(AsymmetricKey):
     public_members.extend(["kty", "alg", "use", "kid", "crv", "x", "y"])
     # required attributes
     required = ["kty", "crv", "x", "y"]
+    serialized_members = ["x", "y", "d"]
 
     def __init__(self, kty="EC", alg="", use="", kid="", crv="", x="", y="", d="", **kwargs):
         AsymmetricKey.__init__(self, kty, alg, use, kid, **kwargs)
@@ -156,18 +159,28 @@ class ECKey(AsymmetricKey):
             self.pub_key = ec_construct_public({"x": _x, "y": _y, "crv": self.crv})
 
     def _serialize(self, key):
+        for param, value in self._members(key).items():
+            setattr(self, param, value)
+
+    @staticmethod
+    def _members(key):
         mlen = int(key.key_size / 8)
         if isinstance(key, ec.EllipticCurvePublicKey):
             pn = key.public_numbers()
-            self.x = long_to_base64(pn.x, mlen)
-            self.y = long_to_base64(pn.y, mlen)
-            self.crv = SEC2NIST[pn.curve.name]
+            return {
+                "x": long_to_base64(pn.x, mlen),
+                "y": long_to_base64(pn.y, mlen),
+                "crv": SEC2NIST[pn.curve.name],
+            }
         elif isinstance(key, ec.EllipticCurvePrivateKey):
             pn = key.private_numbers()
-            self.x = long_to_base64(pn.public_numbers.x, mlen)
-            self.y = long_to_base64(pn.public_numbers.y, mlen)
-            self.crv = SEC2NIST[pn.public_numbers.curve.name]
-            self.d = long_to_base64(pn.private_value, mlen)
+            return {
+                "x": long_to_base64(pn.public_numbers.x, mlen),
+                "y": long_to_base64(pn.public_numbers.y, mlen),
+                "crv": SEC2NIST[pn.public_numbers.curve.name],
+                "d": long_to_base64(pn.private_value, mlen),
+            }
+        return {}
 
     def serialize(self, private=False):
         """
@@ -178,17 +191,15 @@ class ECKey(AsymmetricKey):
         :param private: Whether we should include the private attributes or not.
         :return: A JWK as a dictionary
         """
-        if self.priv_key:
-            self._serialize(self.priv_key)
-        else:
-            self._serialize(self.pub_key)
+        # Not stored, that would undo compact()
+        _values = self._members(self.priv_key or self.pub_key)
 
         res = self.common()
 
-        res.update({"crv": self.crv, "x": self.x, "y": self.y})
+        res.update({"crv": _values["crv"], "x": _values["x"], "y": _values["y"]})
 
-        if private and self.d:
-            res["d"] = self.d
+        if private and _values.get("d"):
+            res["d"] = _values["d"]
 
         return res
 
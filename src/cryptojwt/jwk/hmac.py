@@ -1,6 +1,9 @@
 import logging
 import os
 
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hmac
+
 from ..exception import JWKException
 from ..exception import UnsupportedAlgorithm
 from ..exception import WrongUsage
@@ -40,6 +43,8 @@ class SYMKey(JWK):
 
     """
 
+    __slots__ = ("k", "key", "_hmac_ctx", "_aead_ctx")
+
     members = JWK.members[:]
     members.extend(["kty", "alg", "use", "kid", "k"])
     public_members = JWK.public_members[:]
@@ -49,6 +54,10 @@ class SYMKey(JWK):
         self, kty="oct", alg="", use="", kid="", x5c=None, x5t="", x5u="", k="", key="", **kwargs
     ):
         JWK.__init__(self, kty, alg, use, kid, x5c, x5t, x5u, **kwargs)
+        # pre-keyed HMAC contexts, one per hash algorithm
+        self._hmac_ctx = {}
+        # content encryption contexts for direct encryption, one per enc
+        self._aead_ctx = {}
         self.k = k
         self.key = as_bytes(key)
         if not self.key and self.k:
@@ -72,6 +81,65 @@ class SYMKey(JWK):
             self.deserialize()
         return self.key
 
+    def hmac_context(self, algorithm):
+        """
+        Return a HMAC context keyed with this key. The context is created
+        once per hash algorithm and reused as long as the key stays the same.
+        It must never be updated directly, use a copy() of it.
+
+        :param algorithm: A hash algorithm class, e.g. hashes.SHA256
+        :return: A cryptography.hazmat.primitives.hmac.HMAC instance
+        """
+        if not self.key:
+            self.deserialize()
+
+        try:
+            _key, _ctx = self._hmac_ctx[algorithm.name]
+        except KeyError:
+            _key = _ctx = None
+
+        if _key is not self.key:
+            _ctx = hmac.HMAC(self.key, algorithm(), default_backend())
+            self._hmac_ctx[algorithm.name] = (self.key, _ctx)
+
+        return _ctx
+
+    def aead_context(self, enc_alg):
+        """
+        Return a content encryption context for this key used directly as the
+        content encryption key, as with the 'dir' algorithm. The context is
+        created once per encryption algorithm and reused as long as the key
+        stays the same. It goes away with this key instance.
+
+        :param enc_alg: The JWE "enc" value
+        :return: A :py:class:`cryptojwt.jwe.aes.AES_GCMContext` or
+            :py:class:`cryptojwt.jwe.aes.AES_CBCContext` instance
+        """
+        if not self.key:
+            self.deserialize()
+
+        try:
+            _key, _ctx = self._aead_ctx[enc_alg]
+        except KeyError:
+            _key = _ctx = None
+
+        if _key is not self.key:
+            # Imported here, keys don't otherwise depend on JWE
+            from ..jwe.aes import aead_context
+
+            _ctx = aead_context(enc_alg, self.key)
+            self._aead_ctx[enc_alg] = (self.key, _ctx)
+
+        return _ctx
+
+    def __getstate__(self):
+        # HMAC and encryption contexts can not be copied or pickled, they are
+        # rebuilt on demand
+        state = self._slot_values()
+        state["_hmac_ctx"] = {}
+        state["_aead_ctx"] = {}
+        return getattr(self, "__dict__", None), state
+
     def appropriate_for(self, usage, alg="HS256"):
         """
         Make sure there is a key instance present that can be used for
@@ -85,6 +153,9 @@ class SYMKey(JWK):
             if not self.use or self.use == _use:
                 if _use == "sig":
                     return self.get_key()
+                elif alg == "dir":
+                    # Direct encryption, the key is the content encryption key
+                    return as_bytes(self.key)
                 else:
                     return self.encryption_key(alg)
 
@@ -133,7 +204,8 @@ class SYMKey(JWK):
         if self.__class__ != other.__class__:
             return False
 
-        if set(self.__dict__.keys()) != set(other.__dict__.keys()):
+        # Only subclasses that don't define __slots__ have a __dict__
+        if getattr(self, "__dict__", {}).keys() != getattr(other, "__dict__", {}).keys():
             return False
 
         if self.key != other.key:
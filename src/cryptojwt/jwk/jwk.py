@@ -9,14 +9,19 @@ from cryptography.hazmat.primitives.asymmetric.rsa import rsa_crt_dmp1
 from cryptography.hazmat.primitives.asymmetric.rsa import rsa_crt_dmq1
 from cryptography.hazmat.primitives.asymmetric.rsa import rsa_crt_iqmp
 
+from .. import json_codec
 from ..exception import MissingValue
 from ..exception import UnknownKeyType
 from ..exception import UnsupportedAlgorithm
 from ..exception import WrongKeyType
+from ..utils import LRUCache
 from ..utils import base64url_to_long
 from .ec import NIST2SEC
 from .ec import ECKey
 from .hmac import SYMKey
+from .okp import OKP_CRV2PUBLIC
+from .okp import OKPKey
+from .okp import is_okp_key
 from .rsa import RSAKey
 
 EC_PUBLIC_REQUIRED = frozenset(["crv", "x", "y"])
@@ -31,6 +36,16 @@ RSA_PRIVATE_REQUIRED = frozenset(["p", "q", "d"])
 RSA_PRIVATE_OPTIONAL = frozenset(["qi", "dp", "dq"])
 RSA_PRIVATE = RSA_PRIVATE_REQUIRED | RSA_PRIVATE_OPTIONAL
 
+OKP_PUBLIC_REQUIRED = frozenset(["crv", "x"])
+OKP_PUBLIC = OKP_PUBLIC_REQUIRED
+OKP_PRIVATE_REQUIRED = frozenset(["d"])
+OKP_PRIVATE_OPTIONAL = frozenset()
+OKP_PRIVATE = OKP_PRIVATE_REQUIRED | OKP_PRIVATE_OPTIONAL
+
+# Parsed public keys, keyed by the canonical JSON representation of the JWK
+JWK_CACHE_SIZE = 256
+_jwk_cache = LRUCache(JWK_CACHE_SIZE)
+
 
 def ensure_ec_params(jwk_dict, private):
     """Ensure all required EC parameters are present in dictionary"""
@@ -52,6 +67,16 @@ def ensure_rsa_params(jwk_dict, private):
     return ensure_params("RSA", provided, required)
 
 
+def ensure_okp_params(jwk_dict, private):
+    """Ensure all required OKP parameters are present in dictionary"""
+    provided = frozenset(jwk_dict.keys())
+    if private is not None and private:
+        required = OKP_PUBLIC_REQUIRED | OKP_PRIVATE_REQUIRED
+    else:
+        required = OKP_PUBLIC_REQUIRED
+    return ensure_params("OKP", provided, required)
+
+
 def ensure_params(kty, provided, required):
     """Ensure all required parameters are present in dictionary"""
     if not required <= provided:
@@ -65,8 +90,9 @@ def key_from_jwk_dict(jwk_dict, private=None):
     :param jwk_dict: Dictionary representing a JWK
     """
 
-    # uncouple from the original item
-    _jwk_dict = copy.deepcopy(jwk_dict)
+    # uncouple from the original item. Only top level items are added or
+    # removed below so a shallow copy is enough.
+    _jwk_dict = dict(jwk_dict)
 
     if "kty" not in _jwk_dict:
         raise MissingValue("kty missing")
@@ -145,10 +171,55 @@ def key_from_jwk_dict(jwk_dict, private=None):
             raise MissingValue('There has to be one of "k" or "key" in a symmetric key')
 
         return SYMKey(**_jwk_dict)
+    elif _jwk_dict["kty"] == "OKP":
+        ensure_okp_params(_jwk_dict, private)
+
+        if private is not None and not private:
+            # remove private components
+            for v in OKP_PRIVATE:
+                _jwk_dict.pop(v, None)
+
+        if _jwk_dict["crv"] not in OKP_CRV2PUBLIC:
+            raise UnsupportedAlgorithm("Unknown curve: %s" % (_jwk_dict["crv"]))
+
+        return OKPKey(**_jwk_dict)
     else:
         raise UnknownKeyType
 
 
+def cached_key_from_jwk_dict(jwk_dict):
+    """
+    Load a public JWK from a dictionary, like the jwk header of a JWS or JWE.
+    The parsed keys are kept in a bounded cache so a key that is seen again
+    doesn't have to be rebuilt. Keys with private or symmetric key material
+    are never cached.
+
+    :param jwk_dict: Dictionary representing a JWK
+    :return: A new :py:class:`cryptojwt.jwk.JWK` instance. Instances for the
+        same JWK share only the underlying cryptography key object, the
+        other members are the caller's own.
+    """
+    if jwk_dict.get("kty") not in ["EC", "RSA", "OKP"] or "d" in jwk_dict:
+        return key_from_jwk_dict(jwk_dict)
+
+    try:
+        _cache_key = json_codec.dumps(jwk_dict, compact=True, sort_keys=True)
+    except (TypeError, ValueError):
+        return key_from_jwk_dict(jwk_dict)
+
+    _key = _jwk_cache.get(_cache_key)
+    if _key is None:
+        _key = key_from_jwk_dict(jwk_dict)
+        _jwk_cache.set(_cache_key, _key)
+
+    # The instance in the cache must not be changed by the caller
+    _key = copy.copy(_key)
+    _key.extra_args = copy.deepcopy(_key.extra_args)
+    _key.x5c = list(_key.x5c)
+    _key.key_ops = list(_key.key_ops)
+    return _key
+
+
 def jwk_wrap(key, use="", kid=""):
     """
     Instantiate a Key instance with the given key
@@ -164,6 +235,8 @@ def jwk_wrap(key, use="", kid=""):
         kspec = SYMKey(key=key, use=use, kid=kid)
     elif isinstance(key, ec.EllipticCurvePublicKey):
         kspec = ECKey(use=use, kid=kid).load_key(key)
+    elif is_okp_key(key):
+        kspec = OKPKey(use=use, kid=kid).load_key(key)
     else:
         raise Exception("Unknown key type:key=" + str(type(key)))
 
@@ -175,7 +248,7 @@ def jwk_wrap(key, use="", kid=""):
 
 
 def dump_jwk(filename, key):
-    """Writes a RSAKey, ECKey or SYMKey instance as a JWK to a file."""
+    """Writes a RSAKey, ECKey, OKPKey or SYMKey instance as a JWK to a file."""
     head, tail = os.path.split(filename)
     if head and not os.path.isdir(head):
         os.makedirs(head)
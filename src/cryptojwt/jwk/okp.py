@@ -0,0 +1,291 @@
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed448
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from cryptography.hazmat.primitives.asymmetric import x448
+from cryptography.hazmat.primitives.asymmetric import x25519
+
+from ..exception import DeSerializationNotPossible
+from ..exception import JWKESTException
+from ..exception import UnsupportedOKPCurve
+from ..utils import as_unicode
+from ..utils import b64d
+from ..utils import b64e
+from .asym import AsymmetricKey
+from .x509 import import_private_key_from_pem_file
+
+# Translation between the curve names used in RFC 8037 and the key classes
+# in Cryptography.
+OKP_CRV2PUBLIC = {
+    "Ed25519": ed25519.Ed25519PublicKey,
+    "Ed448": ed448.Ed448PublicKey,
+    "X25519": x25519.X25519PublicKey,
+    "X448": x448.X448PublicKey,
+}
+
+OKP_CRV2PRIVATE = {
+    "Ed25519": ed25519.Ed25519PrivateKey,
+    "Ed448": ed448.Ed448PrivateKey,
+    "X25519": x25519.X25519PrivateKey,
+    "X448": x448.X448PrivateKey,
+}
+
+OKP_PUBLIC_KEY_TYPES = tuple(OKP_CRV2PUBLIC.values())
+OKP_PRIVATE_KEY_TYPES = tuple(OKP_CRV2PRIVATE.values())
+
+
+def okp_crv(key):
+    """
+    Find the RFC 8037 curve name of a Cryptography OKP key instance.
+
+    :param key: A public or private OKP key instance
+    :return: The curve name
+    """
+    for crv, cls in OKP_CRV2PUBLIC.items():
+        if isinstance(key, cls):
+            return crv
+    for crv, cls in OKP_CRV2PRIVATE.items():
+        if isinstance(key, cls):
+            return crv
+    raise UnsupportedOKPCurve("Unsupported OKP key: {}".format(type(key)))
+
+
+def is_okp_key(key):
+    """
+    Check whether a Cryptography key instance is an OKP key.
+
+    :param key: A key instance
+    :return: True/False
+    """
+    return isinstance(key, OKP_PUBLIC_KEY_TYPES + OKP_PRIVATE_KEY_TYPES)
+
+
+class OKPKey(AsymmetricKey):
+    """
+    JSON Web key representation of an Octet Key Pair.
+    According to RFC 8037 a JWK representation of an OKP key can look like
+    this::
+
+        {
+          "kty":"OKP",
+          "crv":"Ed25519",
+          "x":"11qYAYKxCrfVS_7TyWQHOg7hcvPapiMlrwIaaPcHURo",
+          "d":"nWGxne_9WmC6hEr0kuwsxERJxWl7MmkZcDusAxyuf2A"
+        }
+
+    Parameters according to https://tools.ietf.org/html/rfc8037#section-2
+    """
+
+    __slots__ = ("crv", "x", "d")
+
+    members = AsymmetricKey.members[:]
+    # The OKP specific attributes
+    members.extend(["crv", "x", "d"])
+    public_members = AsymmetricKey.public_members[:]
+    public_members.extend(["kty", "alg", "use", "kid", "crv", "x"])
+    # required attributes
+    required = ["kty", "crv", "x"]
+    serialized_members = ["x", "d"]
+
+    def __init__(self, kty="OKP", alg="", use="", kid="", crv="", x="", d="", **kwargs):
+        AsymmetricKey.__init__(self, kty, alg, use, kid, **kwargs)
+        self.crv = crv
+        self.x = x
+        self.d = d
+
+        if not self.pub_key and not self.priv_key:
+            if self.x and self.crv:
+                self.verify()
+                self.deserialize()
+            elif any([self.x, self.crv]):
+                raise JWKESTException("Missing required parameter")
+        else:
+            if self.priv_key and not self.pub_key:
+                self.pub_key = self.priv_key.public_key()
+            self._serialize(self.priv_key or self.pub_key)
+
+    def deserialize(self):
+        """
+        Starting with information gathered from the on-the-wire representation
+        of an OKP key (a JWK) initiate a Cryptography public or private key
+        instance. If 'd' has a value then we're dealing with a private key
+        otherwise a public key.
+        """
+        try:
+            _pub_cls = OKP_CRV2PUBLIC[as_unicode(self.crv)]
+        except KeyError:
+            raise UnsupportedOKPCurve("Unsupported OKP curve: {}".format(self.crv))
+
+        if not isinstance(self.x, (str, bytes)):
+            raise ValueError('"x" MUST be a string')
+
+        try:
+            if self.d:
+                _priv_cls = OKP_CRV2PRIVATE[as_unicode(self.crv)]
+                self.priv_key = _priv_cls.from_private_bytes(b64d(self._as_bytes(self.d)))
+                self.pub_key = self.priv_key.public_key()
+                if self._public_bytes(self.pub_key) != b64d(self._as_bytes(self.x)):
+                    raise DeSerializationNotPossible("'x' does not match 'd'")
+            else:
+                self.pub_key = _pub_cls.from_public_bytes(b64d(self._as_bytes(self.x)))
+        except ValueError as err:
+            raise DeSerializationNotPossible(str(err))
+
+    @staticmethod
+    def _as_bytes(val):
+        if isinstance(val, str):
+            return val.encode("utf-8")
+        return val
+
+    @staticmethod
+    def _public_bytes(key):
+        return key.public_bytes(
+            encoding=serialization.Encoding.Raw, format=serialization.PublicFormat.Raw
+        )
+
+    def _serialize(self, key):
+        for param, value in self._members(key).items():
+            setattr(self, param, value)
+
+    @classmethod
+    def _members(cls, key):
+        res = {"crv": okp_crv(key)}
+        if isinstance(key, OKP_PRIVATE_KEY_TYPES):
+            res["d"] = as_unicode(
+                b64e(
+                    key.private_bytes(
+                        encoding=serialization.Encoding.Raw,
+                        format=serialization.PrivateFormat.Raw,
+                        encryption_algorithm=serialization.NoEncryption(),
+                    )
+                )
+            )
+            res["x"] = as_unicode(b64e(cls._public_bytes(key.public_key())))
+        else:
+            res["x"] = as_unicode(b64e(cls._public_bytes(key)))
+        return res
+
+    def serialize(self, private=False):
+        """
+        Go from a Cryptography OKP key instance to a JWK representation.
+
+        :param private: Whether we should include the private attributes or not.
+        :return: A JWK as a dictionary
+        """
+        if self.x:
+            _values = {"crv": self.crv, "x": self.x, "d": self.d}
+        else:
+            # Compacted, the key material is not kept this time either
+            _values = self._members(self.priv_key or self.pub_key)
+
+        res = self.common()
+
+        res.update({"crv": _values["crv"], "x": _values["x"]})
+
+        if private and _values.get("d"):
+            res["d"] = _values["d"]
+
+        return res
+
+    def load_key(self, key):
+        """
+        Load an OKP key
+
+        :param key: An OKP key instance, private or public.
+        :return: Reference to this instance
+        """
+        self._serialize(key)
+        if isinstance(key, OKP_PRIVATE_KEY_TYPES):
+            self.priv_key = key
+            self.pub_key = key.public_key()
+        else:
+            self.pub_key = key
+
+        return self
+
+    def load(self, filename):
+        """
+        Load an OKP key from a file.
+
+        :param filename: File name
+        """
+        return self.load_key(import_private_okp_key_from_file(filename))
+
+    def decryption_key(self):
+        """
+        Get a key appropriate for decrypting a message.
+
+        :return: A private key instance
+        """
+        return self.priv_key
+
+    def encryption_key(self):
+        """
+        Get a key appropriate for encrypting a message.
+
+        :return: A public key instance
+        """
+        return self.pub_key
+
+    def __eq__(self, other):
+        """
+        Verify that the other key has the same properties as myself.
+
+        :param other: The other key
+        :return: True if the keys as the same otherwise False
+        """
+
+        if self.__class__ != other.__class__:
+            return False
+
+        if self.crv != other.crv:
+            return False
+
+        if not self.pub_key or not other.pub_key:
+            return False
+
+        if self._public_bytes(self.pub_key) != self._public_bytes(other.pub_key):
+            return False
+
+        if other.private_key():
+            # Either key may have been compacted
+            return self.serialize(private=True).get("d") == other.serialize(private=True).get("d")
+        elif self.private_key():
+            return False
+
+        return True
+
+
+def new_okp_key(crv="Ed25519", kid="", **kwargs):
+    """
+    Creates a new OKP key pair and wraps it in a
+    :py:class:`cryptojwt.jwk.okp.OKPKey` instance
+
+    :param crv: The curve, one of Ed25519, Ed448, X25519 or X448
+    :param kid: The key ID
+    :return: A :py:class:`cryptojwt.jwk.okp.OKPKey` instance
+    """
+    try:
+        _key = OKP_CRV2PRIVATE[crv].generate()
+    except KeyError:
+        raise UnsupportedOKPCurve("Unsupported OKP curve: {}".format(crv))
+
+    _rk = OKPKey(priv_key=_key, kid=kid, **kwargs)
+    if not kid:
+        _rk.add_kid()
+
+    return _rk
+
+
+def import_private_okp_key_from_file(filename, passphrase=None):
+    """
+    Read a private OKP key from a PEM file.
+
+    :param filename: The name of the file
+    :param passphrase: A pass phrase to use to unpack the PEM file.
+    :return: A private OKP key instance
+    """
+    private_key = import_private_key_from_pem_file(filename, passphrase)
+    if isinstance(private_key, OKP_PRIVATE_KEY_TYPES):
+        return private_key
+    else:
+        raise ValueError("Not a private OKP key")
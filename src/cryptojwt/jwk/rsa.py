@@ -235,6 +235,8 @@ class RSAKey(AsymmetricKey):
     Parameters according to https://tools.ietf.org/html/rfc7518#section-6.3
     """
 
+    __slots__ = ("n", "e", "d", "p", "q", "dp", "dq", "di", "qi")
+
     members = JWK.members[:]
     # These are the RSA key specific parameters, they are always supposed to
     # be strings or bytes
@@ -245,6 +247,8 @@ class RSAKey(AsymmetricKey):
     # the public members of the key
     public_members.extend(["n", "e"])
     required = ["kty", "n", "e"]
+    # dp, dq and qi are not regenerated by _serialize
+    serialized_members = ["n", "e", "d", "p", "q"]
 
     def __init__(
         self,
@@ -367,11 +371,17 @@ class RSAKey(AsymmetricKey):
         if not self.priv_key and not self.pub_key:
             raise SerializationNotPossible()
 
+        if self.n:
+            _values = {param: getattr(self, param) for param in self.longs}
+        else:
+            # Compacted, the key material is not kept this time either
+            _values = self._members(self.priv_key or self.pub_key)
+
         res = self.common()
 
         public_longs = list(set(self.public_members) & set(self.longs))
         for param in public_longs:
-            item = getattr(self, param)
+            item = _values.get(param)
             if item:
                 res[param] = item
 
@@ -379,7 +389,7 @@ class RSAKey(AsymmetricKey):
             for param in self.longs:
                 if not private and param in ["d", "p", "q", "dp", "dq", "di", "qi"]:
                     continue
-                item = getattr(self, param)
+                item = _values.get(param)
                 if item:
                     res[param] = item
         if self.x5c:
@@ -388,17 +398,23 @@ class RSAKey(AsymmetricKey):
         return res
 
     def _serialize(self, key):
+        for param, value in self._members(key).items():
+            setattr(self, param, value)
+
+    @staticmethod
+    def _members(key):
         if isinstance(key, rsa.RSAPrivateKey):
             pn = key.private_numbers()
-            self.n = long_to_base64(pn.public_numbers.n)
-            self.e = long_to_base64(pn.public_numbers.e)
-            self.d = long_to_base64(pn.d)
-            self.p = long_to_base64(pn.p)
-            self.q = long_to_base64(pn.q)
+            return {
+                "n": long_to_base64(pn.public_numbers.n),
+                "e": long_to_base64(pn.public_numbers.e),
+                "d": long_to_base64(pn.d),
+                "p": long_to_base64(pn.p),
+                "q": long_to_base64(pn.q),
+            }
         elif isinstance(key, rsa.RSAPublicKey):
             pn = key.public_numbers()
-            self.n = long_to_base64(pn.n)
-            self.e = long_to_base64(pn.e)
+            return {"n": long_to_base64(pn.n), "e": long_to_base64(pn.e)}
         else:
             raise UnsupportedKeyType()
 
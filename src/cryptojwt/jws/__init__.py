@@ -1,3 +1,6 @@
+from ..exception import Unsupported
+
+
 class Signer(object):
     """Abstract base class for signing algorithms."""
 
@@ -8,3 +11,21 @@ class Signer(object):
     def verify(self, msg, sig, key):
         """Return True if ``sig`` is a valid signature for ``msg``."""
         raise NotImplementedError()
+
+    def hasher(self, key):
+        """
+        Return an object with an ``update`` method through which the message
+        can be fed piece by piece. Used together with ``sign_hashed`` and
+        ``verify_hashed`` when the message is too large to keep in memory.
+        """
+        raise Unsupported("Incremental signing not supported by {}".format(self.__class__.__name__))
+
+    def sign_hashed(self, hasher, key):
+        """Sign the message fed into ``hasher`` with ``key``."""
+        raise Unsupported("Incremental signing not supported by {}".format(self.__class__.__name__))
+
+    def verify_hashed(self, hasher, sig, key):
+        """Return True if ``sig`` is a valid signature for the message fed into ``hasher``."""
+        raise Unsupported(
+            "Incremental verification not supported by {}".format(self.__class__.__name__)
+        )
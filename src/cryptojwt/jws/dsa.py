@@ -1,6 +1,8 @@
 from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric.utils import Prehashed
 from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
 from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
 from cryptography.utils import int_from_bytes
@@ -37,13 +39,26 @@ class ECDSASigner(Signer):
         :return:
         """
 
+        return self._sign(msg, key, ec.ECDSA(self.hash_algorithm()))
+
+    def sign_hashed(self, hasher, key):
+        """
+        Create a signature over the message fed into the hasher
+
+        :param hasher: A hash context created by :py:meth:`hasher`
+        :param key: An ec.EllipticCurvePrivateKey instance
+        :return:
+        """
+        return self._sign(hasher.finalize(), key, ec.ECDSA(Prehashed(self.hash_algorithm())))
+
+    def _sign(self, data, key, algorithm):
         if not isinstance(key, ec.EllipticCurvePrivateKey):
             raise TypeError("The private key must be an instance of " "ec.EllipticCurvePrivateKey")
 
         self._cross_check(key.public_key())
         num_bits = key.curve.key_size
         num_bytes = (num_bits + 7) // 8
-        asn1sig = key.sign(msg, ec.ECDSA(self.hash_algorithm()))
+        asn1sig = key.sign(data, algorithm)
         # Cryptography returns ASN.1-encoded signature data; decode as JWS
         # uses raw signatures (r||s)
         (r, s) = decode_dss_signature(asn1sig)
@@ -59,6 +74,24 @@ class ECDSASigner(Signer):
         :raises: BadSignature if the signature can't be verified.
         :return: True
         """
+        return self._verify(msg, sig, key, ec.ECDSA(self.hash_algorithm()))
+
+    def verify_hashed(self, hasher, sig, key):
+        """
+        Verify the signature over the message fed into the hasher
+
+        :param hasher: A hash context created by :py:meth:`hasher`
+        :param sig: A signature
+        :param key: A ec.EllipticCurvePublicKey to use for the verification.
+        :raises: BadSignature if the signature can't be verified.
+        :return: True
+        """
+        return self._verify(hasher.finalize(), sig, key, ec.ECDSA(Prehashed(self.hash_algorithm())))
+
+    def hasher(self, key):
+        return hashes.Hash(self.hash_algorithm(), backend=default_backend())
+
+    def _verify(self, data, sig, key, algorithm):
         if not isinstance(key, ec.EllipticCurvePublicKey):
             raise TypeError("The public key must be an instance of " "ec.EllipticCurvePublicKey")
         self._cross_check(key)
@@ -73,7 +106,7 @@ class ECDSASigner(Signer):
             # signature (r||s) and encode before verification
             (r, s) = self._split_raw_signature(sig)
             asn1sig = encode_dss_signature(r, s)
-            key.verify(asn1sig, msg, ec.ECDSA(self.hash_algorithm()))
+            key.verify(asn1sig, data, algorithm)
         except InvalidSignature as err:
             raise BadSignature(err)
         else:
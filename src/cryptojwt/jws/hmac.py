@@ -3,6 +3,7 @@ from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives import hmac
 
 from ..exception import Unsupported
+from ..jwk.hmac import SYMKey
 from . import Signer
 
 
@@ -17,16 +18,29 @@ class HMACSigner(Signer):
         else:
             raise Unsupported("algorithm: {}".format(algorithm))
 
+    def _context(self, key):
+        """
+        Get a fresh HMAC context for the key. A SYMKey instance keeps a
+        pre-keyed context around which is cheaper to clone than to set up
+        a new one from the raw key bytes.
+
+        :param key: A SYMKey instance or the raw key as a byte string
+        :return: A cryptography.hazmat.primitives.hmac.HMAC instance
+        """
+        if isinstance(key, SYMKey):
+            return key.hmac_context(self.algorithm).copy()
+        return hmac.HMAC(key, self.algorithm(), default_backend())
+
     def sign(self, msg, key):
         """
         Create a signature over a message as defined in RFC7515 using a
         symmetric key
 
         :param msg: The message
-        :param key: The key
+        :param key: The key, a SYMKey instance or a byte string
         :return: A signature
         """
-        h = hmac.HMAC(key, self.algorithm(), default_backend())
+        h = self._context(key)
         h.update(msg)
         return h.finalize()
 
@@ -36,14 +50,31 @@ class HMACSigner(Signer):
 
         :param msg: The data
         :param sig: The message authentication code to verify against data.
-        :param key: The key to use
+        :param key: The key to use, a SYMKey instance or a byte string
         :return: Returns true if the mac was valid otherwise it will raise an
             Exception.
         """
         try:
-            h = hmac.HMAC(key, self.algorithm(), default_backend())
+            h = self._context(key)
             h.update(msg)
             h.verify(sig)
             return True
         except:
             return False
+
+    def hasher(self, key):
+        """
+        :param key: The key, a SYMKey instance or a byte string
+        :return: A HMAC context to feed the message into
+        """
+        return self._context(key)
+
+    def sign_hashed(self, hasher, key):
+        return hasher.finalize()
+
+    def verify_hashed(self, hasher, sig, key):
+        try:
+            hasher.verify(sig)
+            return True
+        except:
+            return False
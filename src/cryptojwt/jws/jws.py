@@ -1,19 +1,25 @@
 """JSON Web Token"""
-import json
 import logging
 
-from cryptojwt.jws.exception import JWSException
-
+from .. import json_codec
 from ..exception import BadSignature
 from ..exception import UnknownAlgorithm
 from ..exception import WrongNumberOfParts
 from ..jwk.asym import AsymmetricKey
+from ..jwk.hmac import SYMKey
 from ..jwx import JWx
 from ..simple_jwt import SimpleJWT
+from ..utils import as_unicode
+from ..utils import b64d
 from ..utils import b64d_enc_dec
+from ..utils import b64e
 from ..utils import b64e_enc_dec
+from ..utils import b64e_stream
 from ..utils import b64encode_item
+from ..utils import payload_bytes
+from ..utils import read_chunks
 from .dsa import ECDSASigner
+from .eddsa import EDDSASigner
 from .exception import FormatError
 from .exception import NoSuitableSigningKeys
 from .exception import SignerAlgError
@@ -45,12 +51,70 @@ SIGNER_ALGS = {
     "PS256": PSSSigner("SHA256"),
     "PS384": PSSSigner("SHA384"),
     "PS512": PSSSigner("SHA512"),
+    "EdDSA": EDDSASigner(),
     "none": None,
 }
 
 
 class JWSig(SimpleJWT):
+    def _decode_parts(self, part):
+        _header = b64d(part[0])
+        # An unencoded payload (RFC 7797) is kept as is
+        if len(part) == 3 and b'"b64"' in _header:
+            if json_codec.loads(as_unicode(_header)).get("b64", True) is False:
+                return [_header, part[1], b64d(part[2])]
+        return [_header] + [b64d(p) for p in part[1:]]
+
+    def _decode_part(self, index):
+        # An unencoded payload (RFC 7797) is kept as is
+        if index == 1 and self.is_unencoded():
+            return self.view.b64part(1)
+        return self.view.part(index)
+
+    def is_unencoded(self):
+        """
+        Whether the payload is unencoded as described in RFC 7797.
+
+        :return: True/False
+        """
+        return self.headers.get("b64", True) is False
+
+    def attach_payload(self, payload):
+        """
+        Add a detached payload (RFC 7515 Appendix F) to the JWS
+
+        :param payload: The payload
+        """
+        if self.b64part[1]:
+            raise FormatError("The JWS already has a payload")
+
+        _payload = payload_bytes(payload)
+        self.part[1] = _payload
+        if self.is_unencoded():
+            self.b64part[1] = _payload
+        else:
+            self.b64part[1] = b64e(_payload)
+
+    def set_parts(self, b64part, part, headers):
+        """
+        Set the parts of an already unpacked JWS
+
+        :param b64part: The base64url encoded parts
+        :param part: The decoded parts
+        :param headers: The decoded headers
+        :return: This instance
+        """
+        self.view = None
+        self.b64part = list(b64part)
+        self.part = list(part)
+        self.headers = headers
+        return self
+
     def sign_input(self):
+        if self.view is not None and self.view.part_size(1):
+            # The payload is part of the token, so the signing input is a
+            # prefix of it
+            return self.view.signing_input()
         return self.b64part[0] + b"." + self.b64part[1]
 
     def signature(self):
@@ -66,12 +130,70 @@ class JWSig(SimpleJWT):
         return True
 
 
+class _PayloadParts(object):
+    """
+    The payload of a JSON serialized JWS in its different forms, each
+    computed at most once.
+    """
+
+    def __init__(self, jwss, detached_payload=None):
+        if detached_payload is not None:
+            if "payload" in jwss:
+                raise FormatError("The JWS already has a payload")
+            self.member = None
+            self._raw = payload_bytes(detached_payload)
+        else:
+            try:
+                self.member = jwss["payload"].encode("utf-8")
+            except KeyError:
+                raise FormatError("Missing payload")
+            self._raw = None
+        self._b64 = None
+
+    def parts(self, unencoded):
+        """
+        :param unencoded: Whether the signature has b64=False
+        :return: 2-tuple of the payload as used in the signing input and
+            the decoded payload
+        """
+        if unencoded:
+            if self.member is None:
+                return self._raw, self._raw
+            return self.member, self.member
+
+        if self.member is None:
+            if self._b64 is None:
+                self._b64 = b64e(self._raw)
+            return self._b64, self._raw
+
+        if self._raw is None:
+            self._raw = b64d(self.member)
+        return self.member, self._raw
+
+
 class JWS(JWx):
-    def __init__(self, msg=None, with_digest=False, httpc=None, **kwargs):
+    """
+    :param b64: If False the payload is not base64url encoded (RFC 7797)
+    :param key_mru: A :py:class:`cryptojwt.jws.utils.KeyMRU` instance. If
+        given, the key that last verified a token from the same issuer using
+        the same algorithm is tried first.
+    :param max_key_trials: The maximum number of keys that will be tried
+        when verifying a signature. 0 means no limit.
+    """
+
+    args = JWx.args + ["b64"]
+
+    def __init__(
+        self, msg=None, with_digest=False, httpc=None, key_mru=None, max_key_trials=0, **kwargs
+    ):
         JWx.__init__(self, msg, with_digest, httpc, **kwargs)
         if "alg" not in self:
             self["alg"] = "RS256"
         self._protected_headers = {}
+        self.key_mru = key_mru
+        self.max_key_trials = max_key_trials
+        # Number of signature verifications done for the last token
+        self.key_trials = 0
 
     def alg_keys(self, keys, use, protected=None):
         _alg = self._pick_alg(keys)
@@ -100,16 +222,12 @@ class JWS(JWx):
 
         return key, xargs, _alg
 
-    def sign_compact(self, keys=None, protected=None, **kwargs):
+    def _sign_init(self, keys, protected, **kwargs):
         """
-        Produce a JWS using the JWS Compact Serialization
+        Pick the signing key and construct the JWS header.
 
-        :param keys: A dictionary of keys
-        :param protected: The protected headers (a dictionary)
-        :param kwargs: claims you want to add to the standard headers
-        :return: A signed JSON Web Token
+        :return: 3-tuple of key, algorithm and a JWSig instance
         """
-
         _headers = self._header
         _headers.update(kwargs)
 
@@ -117,29 +235,118 @@ class JWS(JWx):
 
         if "typ" in self:
             xargs["typ"] = self["typ"]
+        if "b64" in self:
+            xargs["b64"] = self["b64"]
 
         _headers.update(xargs)
-        jwt = JWSig(**_headers)
-        if _alg == "none":
-            return jwt.pack(parts=[self.msg, ""])
+        if _headers.get("b64", True) is False:
+            # RFC 7797 section 6, b64 MUST be understood by the recipient
+            _crit = _headers.get("crit", [])
+            if "b64" not in _crit:
+                _headers["crit"] = list(_crit) + ["b64"]
 
-        # All other cases
+        return key, _alg, JWSig(**_headers)
+
+    @staticmethod
+    def _signer(alg):
         try:
-            _signer = SIGNER_ALGS[_alg]
+            return SIGNER_ALGS[alg]
         except KeyError:
-            raise UnknownAlgorithm(_alg)
+            raise UnknownAlgorithm(alg)
 
-        _input = jwt.pack(parts=[self.msg])
+    @staticmethod
+    def _signing_key(key):
+        if isinstance(key, AsymmetricKey):
+            return key.private_key()
+        elif isinstance(key, SYMKey):
+            return key
+        else:
+            return key.key
 
+    @staticmethod
+    def _verification_key(key):
         if isinstance(key, AsymmetricKey):
-            sig = _signer.sign(_input.encode("utf-8"), key.private_key())
+            return key.public_key()
+        elif isinstance(key, SYMKey):
+            return key
         else:
-            sig = _signer.sign(_input.encode("utf-8"), key.key)
+            return key.key
+
+    def sign_compact(self, keys=None, protected=None, detached=False, **kwargs):
+        """
+        Produce a JWS using the JWS Compact Serialization
+
+        :param keys: A dictionary of keys
+        :param protected: The protected headers (a dictionary)
+        :param detached: If True the payload is left out of the JWS as
+            described in RFC 7515 Appendix F.
+        :param kwargs: claims you want to add to the standard headers
+        :return: A signed JSON Web Token
+        """
+
+        key, _alg, jwt = self._sign_init(keys, protected, **kwargs)
+        if _alg == "none":
+            return jwt.pack(parts=[self.msg, ""])
+
+        # All other cases
+        _signer = self._signer(_alg)
+
+        if jwt.is_unencoded():
+            _payload = payload_bytes(self.msg)
+            if not detached and b"." in _payload:
+                raise ValueError("An unencoded payload can not contain '.'")
+            _input = jwt.b64part[0] + b"." + _payload
+        else:
+            _input = jwt.pack(parts=[self.msg]).encode("utf-8")
+
+        sig = _signer.sign(_input, self._signing_key(key))
 
         logger.debug("Signed message using key with kid=%s" % key.kid)
-        return ".".join([_input, b64encode_item(sig).decode("utf-8")])
+        _sig = b64encode_item(sig).decode("utf-8")
+        if detached:
+            return ".".join([jwt.b64part[0].decode("utf-8"), "", _sig])
+        return ".".join([as_unicode(_input), _sig])
+
+    def sign_stream(self, src, keys=None, protected=None, chunk_size=65536, **kwargs):
+        """
+        Produce a JWS with a detached payload (RFC 7515 Appendix F) over the
+        content of a file like object. The content is read and hashed in
+        chunks so it never has to be in memory all at once.
 
-    def verify_compact(self, jws=None, keys=None, allow_none=False, sigalg=None):
+        :param src: A file like object opened for reading
+        :param keys: A dictionary of keys
+        :param protected: The protected headers (a dictionary)
+        :param chunk_size: The number of bytes read at a time
+        :param kwargs: claims you want to add to the standard headers
+        :return: A signed JSON Web Token with an empty payload part
+        """
+
+        key, _alg, jwt = self._sign_init(keys, protected, **kwargs)
+        if _alg == "none":
+            raise SignerAlgError("none not allowed")
+
+        _signer = self._signer(_alg)
+        _key = self._signing_key(key)
+
+        hasher = _signer.hasher(_key)
+        hasher.update(jwt.b64part[0] + b".")
+        for chunk in self._payload_chunks(jwt, src, chunk_size):
+            hasher.update(chunk)
+        sig = _signer.sign_hashed(hasher, _key)
+
+        logger.debug("Signed stream using key with kid=%s" % key.kid)
+        return ".".join([jwt.b64part[0].decode("utf-8"), "", b64encode_item(sig).decode("utf-8")])
+
+    @staticmethod
+    def _payload_chunks(jwt, src, chunk_size):
+        _chunks = read_chunks(src, chunk_size)
+        if jwt.is_unencoded():
+            return _chunks
+        return b64e_stream(_chunks)
+
+    def verify_compact(
+        self, jws=None, keys=None, allow_none=False, sigalg=None, detached_payload=None
+    ):
         """
         Verify a JWT signature
 
@@ -148,11 +355,14 @@ class JWS(JWx):
             signature
         :param allow_none: If signature algorithm 'none' is allowed
         :param sigalg: Expected sigalg
+        :param detached_payload: The payload if it was detached from the JWS
         :return: Dictionary with 2 keys 'msg' required, 'key' optional
         """
-        return self.verify_compact_verbose(jws, keys, allow_none, sigalg)["msg"]
+        return self.verify_compact_verbose(jws, keys, allow_none, sigalg, detached_payload)["msg"]
 
-    def verify_compact_verbose(self, jws=None, keys=None, allow_none=False, sigalg=None):
+    def verify_compact_verbose(
+        self, jws=None, keys=None, allow_none=False, sigalg=None, detached_payload=None
+    ):
         """
         Verify a JWT signature and return dict with validation results
 
@@ -161,6 +371,7 @@ class JWS(JWx):
             signature
         :param allow_none: If signature algorithm 'none' is allowed
         :param sigalg: Expected sigalg
+        :param detached_payload: The payload if it was detached from the JWS
         :return: Dictionary with 2 keys 'msg' required, 'key' optional.
             The value of 'msg' is the unpacked and verified message.
             The value of 'key' is the key used to verify the message
@@ -176,6 +387,11 @@ class JWS(JWx):
         else:
             jwt = self.jwt
 
+        if detached_payload is not None:
+            jwt.attach_payload(detached_payload)
+
+        self._check_unencoded(jwt)
+
         try:
             _alg = jwt.headers["alg"]
         except KeyError:
@@ -188,6 +404,115 @@ class JWS(JWx):
                 else:
                     raise SignerAlgError("none not allowed")
 
+        self._check_alg(_alg, sigalg)
+
+        _keys = self._keys_to_try(jwt, keys, _alg)
+        verifier = SIGNER_ALGS[_alg]
+
+        self.key_trials = 0
+        for key in _keys:
+            self.key_trials += 1
+            _key = self._verification_key(key)
+
+            try:
+                if not verifier.verify(jwt.sign_input(), jwt.signature(), _key):
+                    continue
+            except (BadSignature, IndexError):
+                pass
+            except (ValueError, TypeError) as err:
+                logger.warning('Exception "{}" caught'.format(err))
+            else:
+                logger.debug("Verified message using key with kid=%s" % key.kid)
+                self._verified(jwt, _alg, key)
+                self.msg = jwt.payload()
+                return {"msg": self.msg, "key": key}
+
+        raise BadSignature()
+
+    def verify_stream(self, jws, src, keys=None, sigalg=None, chunk_size=65536):
+        """
+        Verify a JWS with a detached payload (RFC 7515 Appendix F) against
+        the content of a file like object. The content is read and hashed in
+        chunks so it never has to be in memory all at once.
+
+        :param jws: A signed JSON Web Token with an empty payload part
+        :param src: A file like object opened for reading
+        :param keys: A list of keys that can possibly be used to verify the
+            signature
+        :param sigalg: Expected sigalg
+        :param chunk_size: The number of bytes read at a time
+        :return: True if the signature could be verified. The key used is
+            available as self.key. Raises BadSignature otherwise.
+        """
+        jwt = JWSig().unpack(jws)
+        if len(jwt) != 3:
+            raise WrongNumberOfParts(len(jwt))
+        if jwt.b64part[1]:
+            raise FormatError("Expected a JWS with a detached payload")
+
+        self.jwt = jwt
+        self._check_unencoded(jwt)
+
+        _alg = jwt.headers.get("alg")
+        if not _alg or _alg.lower() == "none":
+            raise SignerAlgError("none not allowed")
+
+        self._check_alg(_alg, sigalg)
+
+        _keys = self._keys_to_try(jwt, keys, _alg)
+        verifier = SIGNER_ALGS[_alg]
+
+        # One hash context per candidate key, the content is only read once
+        _hashers = []
+        for key in _keys:
+            _key = self._verification_key(key)
+            try:
+                hasher = verifier.hasher(_key)
+            except (ValueError, TypeError) as err:
+                logger.warning('Exception "{}" caught'.format(err))
+                continue
+            hasher.update(jwt.b64part[0] + b".")
+            _hashers.append((key, _key, hasher))
+
+        for chunk in self._payload_chunks(jwt, src, chunk_size):
+            for _, _, hasher in _hashers:
+                hasher.update(chunk)
+
+        self.key_trials = 0
+        for key, _key, hasher in _hashers:
+            self.key_trials += 1
+            try:
+                if not verifier.verify_hashed(hasher, jwt.signature(), _key):
+                    continue
+            except (BadSignature, IndexError):
+                pass
+            except (ValueError, TypeError) as err:
+                logger.warning('Exception "{}" caught'.format(err))
+            else:
+                logger.debug("Verified stream using key with kid=%s" % key.kid)
+                self._verified(jwt, _alg, key)
+                return True
+
+        raise BadSignature()
+
+    @staticmethod
+    def _check_unencoded(jwt):
+        if jwt.is_unencoded() and "b64" not in jwt.headers.get("crit", []):
+            raise FormatError('An unencoded payload requires "b64" to be listed in "crit"')
+
+    def _verified(self, jwt, alg, key):
+        self.key = key
+        self._protected_headers = jwt.headers.copy()
+        if self.key_mru is not None:
+            self.key_mru.update(self._unverified_issuer(jwt), alg, key)
+
+    def _check_alg(self, _alg, sigalg):
+        """
+        Check that the signing algorithm used is the expected one.
+
+        :param _alg: The algorithm in the JWS header
+        :param sigalg: Expected sigalg
+        """
         if "alg" in self and self["alg"] and _alg:
             if isinstance(self["alg"], list):
                 if _alg not in self["alg"]:
@@ -200,10 +525,21 @@ class JWS(JWx):
                 )
 
         if sigalg and sigalg != _alg:
-            raise SignerAlgError("Expected {0} got {1}".format(sigalg, jwt.headers["alg"]))
+            raise SignerAlgError("Expected {0} got {1}".format(sigalg, _alg))
 
         self["alg"] = _alg
 
+    def _keys_to_try(self, jwt, keys, _alg):
+        """
+        Pick out the keys that could have been used to sign the JWS, in the
+        order they should be tried.
+
+        :param jwt: A JWSig instance
+        :param keys: A list of keys, if not given the keys are picked from
+            the JWS headers
+        :param _alg: The signing algorithm
+        :return: List of keys
+        """
         if keys:
             _keys = self.pick_keys(keys)
         else:
@@ -217,37 +553,41 @@ class JWS(JWx):
             else:
                 raise NoSuitableSigningKeys("No key for algorithm: %s" % _alg)
 
-        verifier = SIGNER_ALGS[_alg]
+        if self.key_mru is not None and len(_keys) > 1:
+            _keys = self.key_mru.order(_keys, self._unverified_issuer(jwt), _alg)
 
-        for key in _keys:
-            if isinstance(key, AsymmetricKey):
-                _key = key.public_key()
-            else:
-                _key = key.key
+        if self.max_key_trials and len(_keys) > self.max_key_trials:
+            logger.debug("Trying %d of %d possible keys", self.max_key_trials, len(_keys))
+            _keys = _keys[: self.max_key_trials]
 
-            try:
-                if not verifier.verify(jwt.sign_input(), jwt.signature(), _key):
-                    continue
-            except (BadSignature, IndexError):
-                pass
-            except (ValueError, TypeError) as err:
-                logger.warning('Exception "{}" caught'.format(err))
-            else:
-                logger.debug("Verified message using key with kid=%s" % key.kid)
-                self.msg = jwt.payload()
-                self.key = key
-                self._protected_headers = jwt.headers.copy()
-                return {"msg": self.msg, "key": key}
+        return _keys
 
-        raise BadSignature()
+    @staticmethod
+    def _unverified_issuer(jwt):
+        """
+        Pick out the issuer from a not yet verified token. Only used as a
+        hint for the key ordering.
+        """
+        try:
+            _payload = jwt.payload()
+        except Exception:
+            return ""
 
-    def sign_json(self, keys=None, headers=None, flatten=False):
+        if isinstance(_payload, dict):
+            _iss = _payload.get("iss", "")
+            if isinstance(_iss, str):
+                return _iss
+        return ""
+
+    def sign_json(self, keys=None, headers=None, flatten=False, detached=False):
         """
         Produce JWS using the JWS JSON Serialization
 
         :param keys: list of keys to use for signing the JWS
         :param headers: list of tuples (protected headers, unprotected
             headers) for each signature
+        :param detached: If True the payload is left out of the JWS as
+            described in RFC 7515 Appendix F.
         :return: A signed message using the JSON serialization format.
         """
 
@@ -256,8 +596,8 @@ class JWS(JWx):
             # always protect the signing alg header
             protected_headers.setdefault("alg", self.alg)
             _jws = JWS(self.msg, **protected_headers)
-            encoded_header, payload, signature = _jws.sign_compact(
-                protected=protected, keys=keys
+            encoded_header, _, signature = _jws.sign_compact(
+                protected=protected, keys=keys, detached=True
             ).split(".")
             signature_entry = {"signature": signature}
             if unprotected:
@@ -267,11 +607,22 @@ class JWS(JWx):
 
             return signature_entry
 
-        res = {"payload": b64e_enc_dec(self.msg, "utf-8", "ascii")}
-
         if headers is None:
             headers = [(dict(alg=self.alg), None)]
 
+        # RFC 7797 section 3, all signatures must use the same b64 value
+        _b64 = set([(p or {}).get("b64", True) is not False for p, _ in headers])
+        if len(_b64) > 1:
+            raise ValueError("All signatures must use the same b64 value")
+
+        res = {}
+        if detached:
+            pass
+        elif _b64 == {False}:
+            res["payload"] = payload_bytes(self.msg).decode("utf-8")
+        else:
+            res["payload"] = b64e_enc_dec(self.msg, "utf-8", "ascii")
+
         if flatten and len(headers) == 1:  # Flattened JWS JSON Serialization Syntax
             signature_entry = create_signature(*headers[0])
             res.update(signature_entry)
@@ -281,9 +632,17 @@ class JWS(JWx):
                 signature_entry = create_signature(protected, unprotected)
                 res["signatures"].append(signature_entry)
 
-        return json.dumps(res)
-
-    def verify_json(self, jws, keys=None, allow_none=False, at_least_one=False):
+        return json_codec.dumps(res)
+
+    def verify_json(
+        self,
+        jws,
+        keys=None,
+        allow_none=False,
+        at_least_one=False,
+        detached_payload=None,
+        executor=None,
+    ):
         """
         Verifies a JSON serialized signed JWT. The object may contain multiple
         signatures. In the case that the verifier does not have the whole
@@ -296,15 +655,18 @@ class JWS(JWx):
             as allowing no signature at all.
         :param at_least_one: At least one of the signatures must verify
             correctly. No suitable signing key is the only allowed exception.
+            The signatures are looked at in order and verification stops as
+            soon as one has been verified, a failure before that is raised.
+        :param detached_payload: The payload if it was detached from the JWS
+        :param executor: A concurrent.futures.Executor instance. If given the
+            signatures are verified concurrently.
         :return:
         """
 
-        _jwss = json.loads(jws)
+        _jwss = json_codec.loads(jws)
 
-        try:
-            _payload = _jwss["payload"]
-        except KeyError:
-            raise FormatError("Missing payload")
+        # The payload is the same for all signatures, only decode it once
+        _payload = _PayloadParts(_jwss, detached_payload)
 
         try:
             _signs = _jwss["signatures"]
@@ -316,50 +678,82 @@ class JWS(JWx):
                     signature[key] = _jwss[key]
             _signs = [signature]
 
-        _claim = None
         _all_protected = {}
+        _sigs = []
         for _sign in _signs:
             protected_headers = _sign.get("protected", "")
-            token = b".".join(
-                [
-                    protected_headers.encode(),
-                    _payload.encode(),
-                    _sign["signature"].encode(),
-                ]
-            )
 
             unprotected_headers = _sign.get("header", {})
             all_headers = unprotected_headers.copy()
+            _protected = {}
             if protected_headers:
-                _protected = json.loads(b64d_enc_dec(protected_headers))
+                _protected = json_codec.loads(b64d_enc_dec(protected_headers))
                 _all_protected.update(_protected)
                 all_headers.update(_protected)
-            self.__init__(**all_headers)
 
-            try:
-                _tmp = self.verify_compact(token, keys, allow_none)
-            except NoSuitableSigningKeys:
-                if at_least_one is True:
+            _b64payload, _decoded = _payload.parts(_protected.get("b64", True) is False)
+            jwt = JWSig().set_parts(
+                [protected_headers.encode(), _b64payload, _sign["signature"].encode()],
+                [b64d(protected_headers.encode()), _decoded, b64d(_sign["signature"].encode())],
+                _protected,
+            )
+            _sigs.append((jwt, all_headers))
+
+        if executor is None:
+            # Lazy, so nothing more is done after an early exit
+            _results = (self._verify_signature(j, h, keys, allow_none) for j, h in _sigs)
+        else:
+            _futures = [
+                executor.submit(self._verify_signature, j, h, keys, allow_none) for j, h in _sigs
+            ]
+            # In the order the signatures appear, so the outcome is the same
+            # as without an executor whichever verification finishes first
+            _results = (f.result() for f in _futures)
+
+        _verifier = None
+        try:
+            for all_headers, _jws, err in _results:
+                if err is None:
+                    if _verifier is None:
+                        _verifier = _jws
+                    if at_least_one is True:
+                        break
+                elif at_least_one is True and isinstance(err, NoSuitableSigningKeys):
                     logger.warning(
                         "Could not verify signature with headers: {}".format(all_headers)
                     )
-                    continue
                 else:
-                    raise
-            except JWSException as err:
-                raise
+                    raise err
+        finally:
+            if executor is not None:
+                for _future in _futures:
+                    _future.cancel()
 
-            if _claim is None:
-                _claim = _tmp
-            else:
-                if _claim != _tmp:
-                    raise ValueError()
-
-        if not _claim:
+        if _verifier is None:
             raise NoSuitableSigningKeys("None")
 
+        self.jwt = _verifier.jwt
+        self.msg = _verifier.msg
+        self.key = getattr(_verifier, "key", None)
         self._protected_headers = _all_protected
-        return _claim
+        return self.msg
+
+    def _verify_signature(self, jwt, headers, keys, allow_none):
+        """
+        Verify one of the signatures in a JSON serialized JWS.
+
+        :return: 3-tuple of the headers, the JWS instance used for the
+            verification and the exception raised if the verification failed.
+        """
+        _jws = JWS(
+            httpc=self.httpc, key_mru=self.key_mru, max_key_trials=self.max_key_trials, **headers
+        )
+        _jws.jwt = jwt
+        try:
+            _jws.verify_compact_verbose(None, keys, allow_none)
+        except Exception as err:
+            return headers, _jws, err
+        return headers, _jws, None
 
     def is_jws(self, jws):
         """
@@ -371,10 +765,10 @@ class JWS(JWx):
         try:
             # JWS JSON serialization
             try:
-                json_jws = json.loads(jws)
+                json_jws = json_codec.loads(jws)
             except TypeError:
                 jws = jws.decode("utf8")
-                json_jws = json.loads(jws)
+                json_jws = json_codec.loads(jws)
 
             return self._is_json_serialized_jws(json_jws)
         except ValueError:
@@ -69,3 +69,44 @@ class PSSSigner(Signer):
             raise BadSignature(err)
         else:
             return True
+
+    def _padding(self):
+        return padding.PSS(
+            mgf=padding.MGF1(self.hash_algorithm()),
+            salt_length=padding.PSS.MAX_LENGTH,
+        )
+
+    def hasher(self, key):
+        return hashes.Hash(self.hash_algorithm(), backend=default_backend())
+
+    def sign_hashed(self, hasher, key):
+        """
+        Create a signature over the message fed into the hasher
+
+        :param hasher: A hash context created by :py:meth:`hasher`
+        :param key: The key
+        :return: A signature
+        """
+        return key.sign(hasher.finalize(), self._padding(), utils.Prehashed(self.hash_algorithm()))
+
+    def verify_hashed(self, hasher, signature, key):
+        """
+        Verify the signature over the message fed into the hasher
+
+        :param hasher: A hash context created by :py:meth:`hasher`
+        :param signature: A signature
+        :param key: A rsa.RSAPublicKey to use for the verification.
+        :raises: BadSignature if the signature can't be verified.
+        :return: True
+        """
+        try:
+            key.verify(
+                signature,
+                hasher.finalize(),
+                self._padding(),
+                utils.Prehashed(self.hash_algorithm()),
+            )
+        except InvalidSignature as err:
+            raise BadSignature(err)
+        else:
+            return True
@@ -1,5 +1,8 @@
 from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.asymmetric import utils
 
 from ..exception import BadSignature
 from . import Signer
@@ -48,3 +51,37 @@ class RSASigner(Signer):
             return False
         else:
             return True
+
+    def hasher(self, key):
+        return hashes.Hash(self.hash.__class__(), backend=default_backend())
+
+    def sign_hashed(self, hasher, key):
+        """
+        Create a signature over the message fed into the hasher.
+
+        :param hasher: A hash context created by :py:meth:`hasher`
+        :param key: A rsa.RSAPrivateKey instance
+        :return: The signature
+        """
+        if not isinstance(key, rsa.RSAPrivateKey):
+            raise TypeError("The key must be an instance of rsa.RSAPrivateKey")
+        return key.sign(hasher.finalize(), self.padding, utils.Prehashed(self.hash))
+
+    def verify_hashed(self, hasher, signature, key):
+        """
+        Verifies whether signature is a valid signature for the message fed
+        into the hasher.
+
+        :param hasher: A hash context created by :py:meth:`hasher`
+        :param signature: The signature to be verified
+        :param key: The key
+        :return: True is the signature is valid otherwise False
+        """
+        if not isinstance(key, rsa.RSAPublicKey):
+            raise TypeError("The public key must be an instance of RSAPublicKey")
+        try:
+            key.verify(signature, hasher.finalize(), self.padding, utils.Prehashed(self.hash))
+        except InvalidSignature as err:
+            raise BadSignature(str(err))
+        else:
+            return True
@@ -6,6 +6,7 @@ from ..exception import UnsupportedAlgorithm
 from ..jwk.hmac import sha256_digest
 from ..jwk.hmac import sha384_digest
 from ..jwk.hmac import sha512_digest
+from ..utils import LRUCache
 from ..utils import as_unicode
 from ..utils import b64e
 
@@ -48,10 +49,58 @@ def alg2keytype(alg):
         return "oct"
     elif alg.startswith("ES") or alg.startswith("ECDH-ES"):
         return "EC"
+    elif alg == "EdDSA":
+        return "OKP"
     else:
         return None
 
 
+class KeyMRU(object):
+    """
+    Remembers, per issuer and signing algorithm, the key that most recently
+    verified a signature. When a token carries no kid that key is the one
+    most likely to verify the next token from the same issuer, so it is
+    tried first.
+    """
+
+    def __init__(self, max_entries=1024):
+        self._last = LRUCache(max_entries)
+
+    def order(self, keys, issuer, alg):
+        """
+        Move the key that last verified a signature to the front of the list.
+
+        :param keys: List of :py:class:`cryptojwt.jwk.JWK` instances
+        :param issuer: The issuer ID, may be empty
+        :param alg: The signing algorithm
+        :return: The keys, possibly reordered
+        """
+        _last = self._last.get((issuer, alg))
+        if _last is None:
+            return keys
+
+        for i, key in enumerate(keys):
+            if key is _last:
+                if i:
+                    return [key] + keys[:i] + keys[i + 1 :]
+                break
+
+        return keys
+
+    def update(self, issuer, alg, key):
+        """
+        Record that a key successfully verified a signature.
+
+        :param issuer: The issuer ID, may be empty
+        :param alg: The signing algorithm
+        :param key: The key that was used
+        """
+        self._last.set((issuer, alg), key)
+
+    def forget(self, issuer, alg):
+        self._last.pop((issuer, alg))
+
+
 def parse_rsa_algorithm(algorithm):
     """
     Parses a RSA algorithm and returns tuple (hash, padding).
@@ -1,18 +1,25 @@
 """Basic JSON Web Token implementation."""
-import json
 import logging
+import time
 import uuid
 from datetime import datetime
 from json import JSONDecodeError
 
+from . import json_codec
+from .exception import BadSyntax
+from .exception import Expired
 from .exception import HeaderError
+from .exception import InvalidClaim
+from .exception import ReplayDetected
 from .exception import VerificationError
 from .jwe.jwe import JWE
 from .jwe.jwe import factory as jwe_factory
+from .jwe.utils import ZIP_MAX_SIZE
 from .jwe.utils import alg2keytype as jwe_alg2keytype
 from .jws.exception import NoSuitableSigningKeys
 from .jws.jws import JWS
 from .jws.jws import factory as jws_factory
+from .jws.utils import KeyMRU
 from .jws.utils import alg2keytype as jws_alg2keytype
 from .utils import as_unicode
 
@@ -93,6 +100,15 @@ class JWT:
         allowed_enc_algs=None,
         allowed_enc_encs=None,
         zip="",
+        max_key_trials=0,
+        allow_missing_kid=False,
+        strict_decrypt_key_selection=False,
+        epk_pool=None,
+        zip_level=-1,
+        zip_max_size=ZIP_MAX_SIZE,
+        claims_policy=None,
+        replay_store=None,
+        admission_filter=None,
     ):
         self.key_jar = key_jar  # KeyJar instance
         self.iss = iss  # My identifier
@@ -113,6 +129,26 @@ class JWT:
         self.allowed_enc_algs = allowed_enc_algs
         self.allowed_enc_encs = allowed_enc_encs
         self.zip = zip
+        # Compression level and max decompressed size with zip "DEF"
+        self.zip_level = zip_level
+        self.zip_max_size = zip_max_size
+        # Remembers which key last verified a token from an issuer
+        self.key_mru = KeyMRU()
+        # Max number of keys to try when verifying a signature, 0 = no limit
+        self.max_key_trials = max_key_trials
+        # Whether all the issuers keys should be tried if a token has no kid
+        self.allow_missing_kid = allow_missing_kid
+        # Only try decryption keys pointed out by the JWE header
+        self.strict_decrypt_key_selection = strict_decrypt_key_selection
+        # Pre-generated ephemeral keys for ECDH-ES encryption
+        self.epk_pool = epk_pool
+        # A cryptojwt.claims.ClaimsPolicy the claims must fulfill
+        self.claims_policy = claims_policy
+        # A cryptojwt.replay.ReplayStore, if set the jti of every unpacked
+        # token is remembered until the token expires and replays rejected
+        self.replay_store = replay_store
+        # A cryptojwt.admission.AdmissionFilter the raw token must pass
+        self.admission_filter = admission_filter
 
     def receiver_keys(self, recv, use):
         """
@@ -149,7 +185,7 @@ class JWT:
             kwargs["zip"] = zip
 
         # use the clients public key for encryption
-        _jwe = JWE(payload, **kwargs)
+        _jwe = JWE(payload, epk_pool=self.epk_pool, zip_level=self.zip_level, **kwargs)
         return _jwe.encrypt(self.receiver_keys(recv, "enc"), context="public")
 
     @staticmethod
@@ -246,10 +282,10 @@ class JWT:
             else:
                 _key = None
 
-            _jws = JWS(json.dumps(_args), alg=self.alg)
+            _jws = JWS(json_codec.dumps(_args), alg=self.alg)
             _sjwt = _jws.sign_compact([_key])
         else:
-            _sjwt = json.dumps(_args)
+            _sjwt = json_codec.dumps(_args)
 
         if _encrypt:
             if not self.sign:
@@ -267,9 +303,62 @@ class JWT:
         :param token: The signed JSON Web Token
         :return: A verified message
         """
-        keys = self.key_jar.get_jwt_verify_keys(rj.jwt)
+        keys = self.key_jar.get_jwt_verify_keys(rj.jwt, allow_missing_kid=self.allow_missing_kid)
+        rj.key_mru = self.key_mru
+        rj.max_key_trials = self.max_key_trials
         return rj.verify_compact(token, keys)
 
+    def _pre_check_claims(self, rj):
+        """
+        Run the claims policy on the payload of a signed JWT before the
+        signature is verified, to reject tokens that would be rejected
+        anyway without doing any signature work. This can only reject,
+        the claims are checked again once the signature is verified.
+
+        :param rj: A :py:class:`cryptojwt.jws.JWS` instance
+        """
+        if rj.jwt is None:  # JSON serialized
+            return
+
+        try:
+            _claims = rj.jwt.payload()
+        except (BadSyntax, UnicodeDecodeError):
+            # Leave it to the signature verification to reject the token
+            return
+
+        if isinstance(_claims, dict):
+            self.claims_policy.check(_claims)
+
+    def _check_replay(self, claims):
+        """
+        Remember the jti of a verified token until the token expires.
+
+        :param claims: The claims of the token
+        :raises: Expired if the token has expired, ReplayDetected if it has
+            been seen before or ReplayStoreFull if it can't be remembered
+        """
+        if not isinstance(claims, dict):
+            raise InvalidClaim("The payload is not a JSON object")
+
+        # Without exp the jti would have to be remembered forever
+        for claim in ["jti", "exp"]:
+            if claim not in claims:
+                raise InvalidClaim("Missing claim: {}".format(claim))
+
+        _exp = claims["exp"]
+        if isinstance(_exp, bool) or not isinstance(_exp, (int, float)):
+            raise InvalidClaim("Invalid exp")
+
+        # An expired token is never remembered so it has to be rejected here
+        _now = time.time()
+        if _exp + self.skew < _now:
+            raise Expired("Token has expired")
+
+        # jti values are only unique per issuer
+        _key = "{}:{}".format(claims.get("iss", ""), claims["jti"])
+        if not self.replay_store.add(_key, _exp + self.skew, _now):
+            raise ReplayDetected(claims["jti"])
+
     def _decrypt(self, rj, token):
         """
         Decrypt an encrypted JsonWebToken
@@ -282,6 +371,8 @@ class JWT:
             keys = self.key_jar.get_jwt_decrypt_keys(rj.jwt, aud=self.iss)
         else:
             keys = self.key_jar.get_jwt_decrypt_keys(rj.jwt)
+        rj.strict_key_selection = self.strict_decrypt_key_selection
+        rj.zip_max_size = self.zip_max_size
         return rj.decrypt(token, keys=keys)
 
     @staticmethod
@@ -312,6 +403,9 @@ class JWT:
         if not token:
             raise KeyError
 
+        if self.admission_filter is not None:
+            self.admission_filter.admit(token)
+
         _jwe_header = _jws_header = None
 
         # Check if it's an encrypted JWT
@@ -347,6 +441,8 @@ class JWT:
                 _verifier = jws_factory(_info)
 
             if _verifier:
+                if self.claims_policy:
+                    self._pre_check_claims(_verifier)
                 _info = self._verify(_verifier, _info)
             else:
                 raise Exception()
@@ -355,16 +451,25 @@ class JWT:
             # So, not a signed JWT
             try:
                 # A JSON document ?
-                _info = json.loads(_info)
+                _info = json_codec.loads(_info)
             except JSONDecodeError:  # Oh, no ! Not JSON
+                if self.claims_policy or self.replay_store is not None:
+                    raise InvalidClaim("The payload is not a JSON object")
                 return _info
             except TypeError:
                 try:
                     _info = as_unicode(_info)
-                    _info = json.loads(_info)
+                    _info = json_codec.loads(_info)
                 except JSONDecodeError:  # Oh, no ! Not JSON
+                    if self.claims_policy or self.replay_store is not None:
+                        raise InvalidClaim("The payload is not a JSON object")
                     return _info
 
+        if self.claims_policy:
+            self.claims_policy.check(_info)
+        if self.replay_store is not None:
+            self._check_replay(_info)
+
         # If I know what message class the info should be mapped into
         if self.msg_cls:
             _msg_cls = self.msg_cls
@@ -1,5 +1,4 @@
 """A basic class on which to build the JWS and JWE classes."""
-import json
 import logging
 
 import requests
@@ -7,8 +6,9 @@ import requests
 from cryptojwt.jwk import JWK
 from cryptojwt.key_bundle import KeyBundle
 
+from . import json_codec
 from .exception import HeaderError
-from .jwk.jwk import key_from_jwk_dict
+from .jwk.jwk import cached_key_from_jwk_dict
 from .jwk.rsa import RSAKey
 from .jwk.rsa import import_rsa_key
 from .jwk.x509 import load_x509_cert
@@ -94,12 +94,12 @@ class JWx:
 
     def _set_jwk(self, val):
         if isinstance(val, dict):
-            _k = key_from_jwk_dict(val)
+            _k = cached_key_from_jwk_dict(val)
             self._dict["jwk"] = val
         elif isinstance(val, str):
             # verify that it's a real JWK
-            _val = json.loads(val)
-            _j = key_from_jwk_dict(_val)
+            _val = json_codec.loads(val)
+            _j = cached_key_from_jwk_dict(_val)
             self._dict["jwk"] = _val
         elif isinstance(val, JWK):
             self._dict["jwk"] = val.to_dict()
@@ -140,9 +140,9 @@ class JWx:
                     if isinstance(_jwk, dict):
                         header["jwk"] = _jwk  # dictionary
                     else:
-                        _d = json.loads(_jwk)  # JSON
+                        _d = json_codec.loads(_jwk)  # JSON
                         # Verify that it's a valid JWK
-                        _k = key_from_jwk_dict(_d)
+                        _k = cached_key_from_jwk_dict(_d)
                         header["jwk"] = _d
 
     def headers(self, **kwargs):
@@ -169,7 +169,7 @@ class JWx:
     def _get_keys(self):
         _keys = []
         if self._jwk:
-            _keys.append(key_from_jwk_dict(self._jwk))
+            _keys.append(cached_key_from_jwk_dict(self._jwk))
         if self._jwks is not None:
             _keys.extend(self._jwks.keys())
         return _keys
@@ -254,7 +254,7 @@ class JWx:
         _msg = b64d(as_bytes(payload))
         if "cty" in self:
             if self["cty"] == "JWT":
-                _msg = json.loads(as_unicode(_msg))
+                _msg = json_codec.loads(as_unicode(_msg))
         return _msg
 
     def dump_header(self):
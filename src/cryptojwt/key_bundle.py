@@ -1,6 +1,7 @@
 """Implementation of a Key Bundle."""
 import copy
-import json
+import gzip
+import hashlib
 import logging
 import os
 import time
@@ -12,20 +13,27 @@ from cryptojwt.jwk.ec import NIST2SEC
 from cryptojwt.jwk.hmac import new_sym_key
 from cryptojwt.jwk.x509 import import_private_key_from_pem_file
 
+from . import json_codec
 from .exception import JWKException
 from .exception import UnknownKeyType
 from .exception import UnsupportedAlgorithm
 from .exception import UnsupportedECurve
+from .exception import UnsupportedOKPCurve
 from .exception import UpdateFailed
 from .jwk.ec import ECKey
 from .jwk.ec import new_ec_key
 from .jwk.hmac import SYMKey
 from .jwk.jwk import dump_jwk
 from .jwk.jwk import import_jwk
+from .jwk.okp import OKP_CRV2PRIVATE
+from .jwk.okp import OKPKey
+from .jwk.okp import new_okp_key
 from .jwk.rsa import RSAKey
 from .jwk.rsa import import_private_rsa_key_from_file
 from .jwk.rsa import new_rsa_key
+from .utils import as_bytes
 from .utils import as_unicode
+from .utils import b64e
 
 __author__ = "Roland Hedberg"
 
@@ -40,11 +48,30 @@ LOGGER = logging.getLogger(__name__)
 #     raise excep(_err, 'application/json')
 
 # Make sure the keys are all uppercase
-K2C = {"RSA": RSAKey, "EC": ECKey, "oct": SYMKey}
+K2C = {"RSA": RSAKey, "EC": ECKey, "oct": SYMKey, "OKP": OKPKey}
 
 MAP = {"dec": "enc", "enc": "enc", "ver": "sig", "sig": "sig"}
 
 
+class SerializedJWKS(object):
+    """
+    A JWKS serialized once so it can be served many times. Holds the JSON
+    document, its UTF-8 encoding, a strong ETag and a gzip compressed copy.
+    """
+
+    __slots__ = ("json", "content", "etag", "gzipped")
+
+    def __init__(self, jwks):
+        """
+        :param jwks: A dictionary with one key: 'keys'
+        """
+        self.json = json_codec.dumps(jwks)
+        self.content = as_bytes(self.json)
+        self.etag = '"{}"'.format(as_unicode(b64e(hashlib.sha256(self.content).digest())))
+        # mtime=0 so the same keys always give the same bytes
+        self.gzipped = gzip.compress(self.content, mtime=0)
+
+
 def harmonize_usage(use):
     """
 
@@ -148,6 +175,29 @@ def ec_init(spec):
     return _kb
 
 
+def okp_init(spec):
+    """
+    Initiate a key bundle with an Octet Key Pair (RFC 8037) key.
+
+    :param spec: Key specifics of the form::
+        {"type": "OKP", "crv": "Ed25519", "use": ["sig"]}
+
+    :return: A KeyBundle instance
+    """
+    curve = spec.get("crv", DEFAULT_OKP_CURVE)
+
+    _kb = KeyBundle(keytype="OKP")
+    if "use" in spec:
+        for use in spec["use"]:
+            okpk = new_okp_key(crv=curve, use=use)
+            _kb.append(okpk)
+    else:
+        okpk = new_okp_key(crv=curve)
+        _kb.append(okpk)
+
+    return _kb
+
+
 class KeyBundle:
     """The Key Bundle"""
 
@@ -185,6 +235,12 @@ class KeyBundle:
         """
 
         self._keys = []
+        # hash function -> (keys, number of keys, thumbprint -> key)
+        self._thumbprint_index = {}
+        # Increased whenever the keys change
+        self._version = 0
+        # private -> (version, SerializedJWKS)
+        self._jwks_cache = {}
         self.remote = False
         self.local = False
         self.cache_time = cache_time
@@ -288,7 +344,7 @@ class KeyBundle:
                 except KeyError:
                     _error = "UnknownKeyType: {}".format(_typ)
                     continue
-                except (UnsupportedECurve, UnsupportedAlgorithm) as err:
+                except (UnsupportedECurve, UnsupportedOKPCurve, UnsupportedAlgorithm) as err:
                     _error = str(err)
                     break
                 except JWKException as err:
@@ -306,6 +362,7 @@ class KeyBundle:
 
         if _new_key:
             self._keys.extend(_new_key)
+            self._version += 1
 
         self.last_updated = time.time()
 
@@ -317,7 +374,7 @@ class KeyBundle:
         """
         LOGGER.info("Reading local JWKS from %s", filename)
         with open(filename) as input_file:
-            _info = json.load(input_file)
+            _info = json_codec.loads(input_file.read())
         if "keys" in _info:
             self.do_keys(_info["keys"])
         else:
@@ -330,13 +387,13 @@ class KeyBundle:
         Load a DER encoded file amd create a key from it.
 
         :param filename: Name of the file
-        :param keytype: Presently 'rsa' and 'ec' supported
+        :param keytype: Presently 'rsa', 'ec' and 'okp' supported
         :param keyusage: encryption ('enc') or signing ('sig') or both
         """
         LOGGER.info("Reading local DER from %s", filename)
         key_args = {}
         _kty = keytype.lower()
-        if _kty in ["rsa", "ec"]:
+        if _kty in ["rsa", "ec", "okp"]:
             key_args["kty"] = _kty
             _key = import_private_key_from_pem_file(filename)
             key_args["priv_key"] = _key
@@ -428,7 +485,7 @@ class KeyBundle:
 
         LOGGER.debug("Loaded JWKS: %s from %s", response.text, self.source)
         try:
-            return json.loads(response.text)
+            return json_codec.loads(response.text)
         except ValueError:
             return None
 
@@ -451,6 +508,7 @@ class KeyBundle:
         """
         res = True  # An update was successful
         if self.source:
+            self._version += 1
             _old_keys = self._keys  # just in case
 
             # reread everything
@@ -530,6 +588,7 @@ class KeyBundle:
         """
         _typs = [typ.lower(), typ.upper()]
         self._keys = [k for k in self._keys if not k.kty in _typs]
+        self._version += 1
 
     def __str__(self):
         return str(self.jwks())
@@ -541,7 +600,26 @@ class KeyBundle:
         :param private: Whether private key information should be included.
         :return: A JWKS JSON representation of the keys in this bundle
         """
-        self._uptodate()
+        return self.serialized_jwks(private).json
+
+    def serialized_jwks(self, private=False):
+        """
+        The keys in this bundle serialized as a JWKS. The serialization is
+        cached until the keys change. Keys modified in place, rather than
+        through the methods of the bundle, are not noticed.
+
+        :param private: Whether private key information should be included.
+        :return: A :py:class:`SerializedJWKS` instance
+        """
+        _version = self.version()
+        try:
+            _cached_version, _serialized = self._jwks_cache[private]
+        except KeyError:
+            pass
+        else:
+            if _cached_version == _version:
+                return _serialized
+
         keys = list()
         for k in self._keys:
             if private:
@@ -551,7 +629,28 @@ class KeyBundle:
                 for _attr, _val in key.items():
                     key[_attr] = as_unicode(_val)
             keys.append(key)
-        return json.dumps({"keys": keys})
+        _serialized = SerializedJWKS({"keys": keys})
+        self._jwks_cache[private] = (_version, _serialized)
+        return _serialized
+
+    def version(self):
+        """
+        A value that changes whenever the keys in this bundle change. The
+        keys are updated from their source first if that is due.
+
+        :return: An opaque value that can be compared for equality
+        """
+        self._uptodate()
+        return self._state()
+
+    def _state(self):
+        """
+        Like :py:meth:`version` but never updates the keys from their source.
+
+        :return: An opaque value that can be compared for equality
+        """
+        # The number of keys catches changes made to the list from keys()
+        return self._version, len(self._keys)
 
     def append(self, key):
         """
@@ -560,10 +659,12 @@ class KeyBundle:
         :param key: Key to be added
         """
         self._keys.append(key)
+        self._version += 1
 
     def extend(self, keys):
         """Add a key to the list of keys."""
         self._keys.extend(keys)
+        self._version += 1
 
     def remove(self, key):
         """
@@ -575,6 +676,8 @@ class KeyBundle:
             self._keys.remove(key)
         except ValueError:
             pass
+        else:
+            self._version += 1
 
     def __len__(self):
         """
@@ -587,6 +690,7 @@ class KeyBundle:
     def set(self, keys):
         """Set the keys to the set provided."""
         self._keys = keys
+        self._version += 1
 
     def get_key_with_kid(self, kid):
         """
@@ -608,15 +712,47 @@ class KeyBundle:
 
         return None
 
-    def kids(self):
+    def get_key_by_thumbprint(self, thumbprint, hash_function="SHA-256"):
+        """
+        Return the key that has a specific JWK thumbprint (RFC 7638)
+
+        :param thumbprint: The base64url encoded thumbprint
+        :param hash_function: The hash function used to create the thumbprint
+        :return: The key or None
+        """
+        self._uptodate()
+        try:
+            _keys, _len, _index = self._thumbprint_index[hash_function]
+        except KeyError:
+            _keys = None
+
+        # Rebuild the index if the set of keys has been replaced or changed
+        if _keys is not self._keys or _len != len(self._keys):
+            _index = {}
+            for key in self._keys:
+                _index.setdefault(key.thumbprint(hash_function), key)
+            self._thumbprint_index[hash_function] = (self._keys, len(self._keys), _index)
+
+        _thumbprint = as_bytes(thumbprint)
+        key = _index.get(_thumbprint)
+        # The key material may have changed after the key was indexed
+        if key is not None and key.thumbprint(hash_function) == _thumbprint:
+            return key
+
+        return None
+
+    def kids(self, update=True):
         """
         Return a list of key IDs.
 
         Note that this list may be shorter then the list of keys.
         The reason might be that there are some keys with no key ID.
+        :param update: Whether the keys are updated from their source first
+            if that is due
         :return: A list of all the key IDs that exists in this bundle
         """
-        self._uptodate()
+        if update:
+            self._uptodate()
         return [key.kid for key in self._keys if key.kid != ""]
 
     def mark_as_inactive(self, kid):
@@ -630,6 +766,7 @@ class KeyBundle:
             self._keys.remove(k)
             k.inactive_since = time.time()
             self._keys.append(k)
+            self._version += 1
             return True
         else:
             return False
@@ -644,6 +781,7 @@ class KeyBundle:
             k.inactive_since = time.time()
             _updated.append(k)
         self._keys = _updated
+        self._version += 1
 
     def remove_outdated(self, after, when=0):
         """
@@ -673,8 +811,21 @@ class KeyBundle:
             _kl.append(k)
 
         self._keys = _kl
+        if changed:
+            self._version += 1
         return changed
 
+    def compact(self):
+        """
+        Have the asymmetric keys in the bundle forget their base64url encoded
+        key material. Useful for bundles that are kept around for a long time.
+        """
+        for key in self._keys:
+            try:
+                key.compact()
+            except AttributeError:  # Symmetric keys
+                pass
+
     def __contains__(self, key):
         return key in self._keys
 
@@ -812,7 +963,7 @@ def dump_jwks(kbl, target, private=False, symmetric_too=False):
         os.makedirs(head)
         _fp = open(target, "w")
 
-    _txt = json.dumps(res)
+    _txt = json_codec.dumps(res)
     _fp.write(_txt)
     _fp.close()
 
@@ -841,13 +992,14 @@ def build_key_bundle(key_conf, kid_template=""):
             {"type": "RSA", "key": "cp_keys/key.pem", "use": ["enc", "sig"], 'size': 2048},
             {"type": "EC", "crv": "P-256", "use": ["sig"], "kid": "ec.1"},
             {"type": "EC", "crv": "P-256", "use": ["enc"], "kid": "ec.2"},
+            {"type": "OKP", "crv": "Ed25519", "use": ["sig"], "kid": "okp.1"},
             {"type": "oct", "bytes":}
         ]
 
     Keys in this specification are:
 
     type
-        The type of key. Presently only 'rsa', 'ec' and 'oct' supported.
+        The type of key. Presently only 'rsa', 'ec', 'okp' and 'oct' supported.
 
     key
         A name of a file where a key can be found. Works with PEM encoded
@@ -858,7 +1010,7 @@ def build_key_bundle(key_conf, kid_template=""):
 
     crv
         The elliptic curve that should be used. Only applies to elliptic curve
-        keys :-)
+        and octet key pair keys :-)
 
     kid
         Key ID, can only be used with one usage type is specified. If there
@@ -901,6 +1053,8 @@ def build_key_bundle(key_conf, kid_template=""):
                 _bundle = ec_init(spec)
         elif typ.lower() == "oct":
             _bundle = sym_init(spec)
+        elif typ.upper() == "OKP":
+            _bundle = okp_init(spec)
         else:
             continue
 
@@ -943,7 +1097,7 @@ def type_order(kd1, kd2):
     if _l:
         return _l
 
-    if kd1["type"] == "EC":
+    if kd1["type"].upper() in ["EC", "OKP"]:
         _l = _cmp(kd1["crv"], kd2["crv"])
         if _l:
             return _l
@@ -1051,8 +1205,8 @@ def key_diff(key_bundle, key_defs):
             if key.kty != key_def["type"]:
                 continue
 
-            if key.kty == "EC":
-                # special test only for EC keys
+            if key.kty in ["EC", "OKP"]:
+                # special test only for EC and OKP keys
                 if key.crv != key_def["crv"]:
                     continue
 
@@ -1126,7 +1280,7 @@ def key_rollover(bundle):
     key_spec = []
     for key in bundle.get():
         _spec = {"type": key.kty, "use": [key.use]}
-        if key.kty == "EC":
+        if key.kty in ["EC", "OKP"]:
             _spec["crv"] = key.crv
 
         key_spec.append(_spec)
@@ -1160,17 +1314,19 @@ DEFAULT_SYM_KEYSIZE = 32
 DEFAULT_RSA_KEYSIZE = 2048
 DEFAULT_RSA_EXP = 65537
 DEFAULT_EC_CURVE = "P-256"
+DEFAULT_OKP_CURVE = "Ed25519"
 
 
 def key_gen(type, **kwargs):
     """
     Create a key and return it as a JWK.
 
-    :param type: Key type (RSA, EC, OCT)
+    :param type: Key type (RSA, EC, OKP, OCT)
     :param kid:
     :param kwargs: key specific keyword arguments
         RSA: size, exp
         EC: crv
+        OKP: crv
         SYM: bytes
     """
     # common args are use, key_ops and alg
@@ -1186,6 +1342,12 @@ def key_gen(type, **kwargs):
             logging.error("Unknown curve: %s", crv)
             raise ValueError("Unknown curve: {}".format(crv))
         _key = new_ec_key(crv=crv, **kargs)
+    elif type.upper() == "OKP":
+        crv = kwargs.get("crv", DEFAULT_OKP_CURVE)
+        if crv not in OKP_CRV2PRIVATE:
+            logging.error("Unknown curve: %s", crv)
+            raise ValueError("Unknown curve: {}".format(crv))
+        _key = new_okp_key(crv=crv, **kargs)
     elif type.lower() in ["sym", "oct"]:
         keysize = kwargs.get("bytes", 24)
         randomkey = os.urandom(keysize)
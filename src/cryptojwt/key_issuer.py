@@ -1,12 +1,13 @@
-import json
 import logging
 import os
 
 from requests import request
 
+from . import json_codec
 from .jwe.utils import alg2keytype as jwe_alg2keytype
 from .jws.utils import alg2keytype as jws_alg2keytype
 from .key_bundle import KeyBundle
+from .key_bundle import SerializedJWKS
 from .key_bundle import build_key_bundle
 from .key_bundle import key_diff
 from .key_bundle import update_key_bundle
@@ -44,6 +45,8 @@ class KeyIssuer(object):
         """
 
         self._bundles = []
+        # (private, usage) -> (bundles and their versions, SerializedJWKS)
+        self._jwks_cache = {}
 
         self.keybundle_cls = keybundle_cls
         self.name = name
@@ -144,6 +147,20 @@ class KeyIssuer(object):
             res.extend(kb.keys())
         return res
 
+    def get_key_by_thumbprint(self, thumbprint, hash_function="SHA-256"):
+        """
+        Find the key that has a specific JWK thumbprint (RFC 7638).
+
+        :param thumbprint: The base64url encoded thumbprint
+        :param hash_function: The hash function used to create the thumbprint
+        :return: The key or None
+        """
+        for kb in self._bundles:
+            _key = kb.get_key_by_thumbprint(thumbprint, hash_function)
+            if _key is not None:
+                return _key
+        return None
+
     def __contains__(self, item):
         for kb in self._bundles:
             if item in kb:
@@ -212,7 +229,31 @@ class KeyIssuer(object):
         :param private: Whether it should be the private keys or the public
         :return: A JSON representation of a JWKS
         """
-        return json.dumps(self.export_jwks(private, usage=usage))
+        return self.serialized_jwks(private, usage=usage).json
+
+    def serialized_jwks(self, private=False, usage=None):
+        """
+        Export a JWKS serialized and ready to be served. The serialization
+        is cached until a key bundle is added or removed or the keys in one
+        of them change.
+
+        :param private: Whether it should be the private keys or the public
+        :param usage: If only keys for a special usage should be included
+        :return: A :py:class:`cryptojwt.key_bundle.SerializedJWKS` instance
+        """
+        # KeyBundle doesn't define __eq__ so the bundles compare by identity
+        _state = [(kb, kb.version()) for kb in self._bundles]
+        try:
+            _cached_state, _serialized = self._jwks_cache[(private, usage)]
+        except KeyError:
+            pass
+        else:
+            if _cached_state == _state:
+                return _serialized
+
+        _serialized = SerializedJWKS(self.export_jwks(private, usage=usage))
+        self._jwks_cache[(private, usage)] = (_state, _serialized)
+        return _serialized
 
     def import_jwks(self, jwks):
         """
@@ -236,7 +277,7 @@ class KeyIssuer(object):
 
         :param jwks: JSON representation of a JWKS
         """
-        return self.import_jwks(json.loads(jwks))
+        return self.import_jwks(json_codec.loads(jwks))
 
     def import_jwks_from_file(self, filename):
         with open(filename) as jwks_file:
@@ -564,7 +605,7 @@ def init_key_issuer(public_path="", private_path="", key_defs="", read_only=True
         if os.path.isfile(private_path):
             _jwks = open(private_path, "r").read()
             _issuer = KeyIssuer()
-            _issuer.import_jwks(json.loads(_jwks))
+            _issuer.import_jwks(json_codec.loads(_jwks))
             if key_defs:
                 _kb = _issuer[0]
                 _diff = key_diff(_kb, key_defs)
@@ -576,7 +617,7 @@ def init_key_issuer(public_path="", private_path="", key_defs="", read_only=True
                         _issuer.set([_kb])
                         jwks = _issuer.export_jwks(private=True)
                         fp = open(private_path, "w")
-                        fp.write(json.dumps(jwks))
+                        fp.write(json_codec.dumps(jwks))
                         fp.close()
         else:
             _issuer = build_keyissuer(key_defs)
@@ -586,7 +627,7 @@ def init_key_issuer(public_path="", private_path="", key_defs="", read_only=True
                 if head and not os.path.isdir(head):
                     os.makedirs(head)
                 fp = open(private_path, "w")
-                fp.write(json.dumps(jwks))
+                fp.write(json_codec.dumps(jwks))
                 fp.close()
 
         if public_path and not read_only:
@@ -595,13 +636,13 @@ def init_key_issuer(public_path="", private_path="", key_defs="", read_only=True
             if head and not os.path.isdir(head):
                 os.makedirs(head)
             fp = open(public_path, "w")
-            fp.write(json.dumps(jwks))
+            fp.write(json_codec.dumps(jwks))
             fp.close()
     elif public_path:
         if os.path.isfile(public_path):
             _jwks = open(public_path, "r").read()
             _issuer = KeyIssuer()
-            _issuer.import_jwks(json.loads(_jwks))
+            _issuer.import_jwks(json_codec.loads(_jwks))
             if key_defs:
                 _kb = _issuer[0]
                 _diff = key_diff(_kb, key_defs)
@@ -613,7 +654,7 @@ def init_key_issuer(public_path="", private_path="", key_defs="", read_only=True
                         _issuer.set([_kb])
                         jwks = _issuer.export_jwks()
                         fp = open(public_path, "w")
-                        fp.write(json.dumps(jwks))
+                        fp.write(json_codec.dumps(jwks))
                         fp.close()
         else:
             _issuer = build_keyissuer(key_defs)
@@ -623,7 +664,7 @@ def init_key_issuer(public_path="", private_path="", key_defs="", read_only=True
                 if head and not os.path.isdir(head):
                     os.makedirs(head)
                 fp = open(public_path, "w")
-                fp.write(json.dumps(_jwks))
+                fp.write(json_codec.dumps(_jwks))
                 fp.close()
     else:
         _issuer = build_keyissuer(key_defs)
@@ -1,14 +1,19 @@
-import json
 import logging
+import threading
+from collections import Counter
+from collections import OrderedDict
 from typing import List
 from typing import Optional
 
 from requests import request
 
+from . import json_codec
 from .exception import IssuerNotFound
+from .issuer_index import IssuerIndex
 from .jwe.jwe import alg2keytype as jwe_alg2keytype
 from .jws.utils import alg2keytype as jws_alg2keytype
 from .key_bundle import KeyBundle
+from .key_bundle import SerializedJWKS
 from .key_issuer import KeyIssuer
 from .key_issuer import build_keyissuer
 from .key_issuer import init_key_issuer
@@ -21,6 +26,230 @@ __author__ = "Roland Hedberg"
 logger = logging.getLogger(__name__)
 
 
+def _bundle_state(issuer):
+    # Must not update the bundles, that could fetch keys while the lock is held
+    return [(kb, kb._state()) for kb in issuer]
+
+
+def _unchanged(issuer, state):
+    _now = _bundle_state(issuer)
+    if len(_now) != len(state):
+        return False
+    return all(a is b and v == w for (a, v), (b, w) in zip(_now, state))
+
+
+class BoundedIssuers(object):
+    """
+    The issuers of a key jar, with at most max_resident of them kept as
+    KeyIssuer instances. When there are more the least recently used one is
+    evicted in its serialized form, see :py:meth:`KeyIssuer.dump`, and it's
+    loaded again the next time it's asked for.
+
+    Implements the parts of the dictionary interface that KeyJar uses.
+    """
+
+    def __init__(self, max_resident, storage=None, loader=None, on_evict=None):
+        """
+        :param max_resident: The maximum number of KeyIssuer instances
+        :param storage: Where the serialized issuers are kept, a dictionary
+            if not given. Issuers already in it are loaded when asked for.
+        :param loader: Function that makes a KeyIssuer instance from its
+            serialized form
+        :param on_evict: Function called with the issuer ID and the KeyIssuer
+            instance when an issuer that has changed since it was loaded is
+            evicted
+        """
+        if max_resident < 1:
+            raise ValueError("max_resident must be at least 1")
+        self.max_resident = max_resident
+        if storage is None:
+            self._serialized = {}
+        else:
+            self._serialized = storage
+        self._loader = loader or (lambda info: KeyIssuer().load(info))
+        self._on_evict = on_evict
+        # issuer ID -> (KeyIssuer, bundle state when loaded), least recently
+        # used first
+        self._resident = OrderedDict()
+        # All the issuer IDs in the order they were added, a dictionary is
+        # used as an ordered set
+        self._ids = dict.fromkeys(self._serialized.keys())
+        # 'reloads' and 'evictions'
+        self.counters = Counter()
+        self._lock = threading.RLock()
+
+    def _make_resident(self, issuer_id, issuer, state):
+        self._resident[issuer_id] = (issuer, state)
+        self._resident.move_to_end(issuer_id)
+        while len(self._resident) > self.max_resident:
+            _id, (_issuer, _state) = self._resident.popitem(last=False)
+            # An issuer that hasn't changed since it was loaded is already
+            # serialized
+            if _state is None or not _unchanged(_issuer, _state):
+                self._serialized[_id] = _issuer.dump()
+                if self._on_evict is not None:
+                    self._on_evict(_id, _issuer)
+            self.counters["evictions"] += 1
+
+    def get(self, issuer_id, default=None):
+        """
+        Get an issuer, loading it if it has been evicted.
+
+        :param issuer_id: The issuer ID
+        :param default: What to return if there is no such issuer
+        :return: A KeyIssuer instance or default
+        """
+        with self._lock:
+            try:
+                _issuer, _ = self._resident[issuer_id]
+            except KeyError:
+                if issuer_id not in self._ids:
+                    return default
+                _issuer = self._loader(self._serialized[issuer_id])
+                self.counters["reloads"] += 1
+                self._make_resident(issuer_id, _issuer, _bundle_state(_issuer))
+            else:
+                self._resident.move_to_end(issuer_id)
+            return _issuer
+
+    def __getitem__(self, issuer_id):
+        _issuer = self.get(issuer_id)
+        if _issuer is None:
+            raise KeyError(issuer_id)
+        return _issuer
+
+    def __setitem__(self, issuer_id, issuer):
+        with self._lock:
+            self._ids[issuer_id] = None
+            self._make_resident(issuer_id, issuer, None)
+
+    def __delitem__(self, issuer_id):
+        with self._lock:
+            del self._ids[issuer_id]
+            self._resident.pop(issuer_id, None)
+            if issuer_id in self._serialized:
+                del self._serialized[issuer_id]
+
+    def __contains__(self, issuer_id):
+        return issuer_id in self._ids
+
+    def discover(self, issuer_id):
+        """
+        Pick up an issuer that something else has added to the storage.
+
+        :param issuer_id: The issuer ID
+        :return: True if there is such an issuer
+        """
+        with self._lock:
+            if issuer_id in self._ids:
+                return True
+            if issuer_id not in self._serialized:
+                return False
+            self._ids[issuer_id] = None
+            return True
+
+    def stored_ids(self):
+        """
+        :return: The IDs of the issuers in the storage, including the ones
+            that something else has added to it
+        """
+        return list(self._serialized.keys())
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        return list(self._ids)
+
+    def items(self):
+        """
+        Iterates over all the issuers, loading the evicted ones one by one.
+        """
+        for _id in self.keys():
+            _issuer = self.get(_id)
+            if _issuer is not None:
+                yield _id, _issuer
+
+    def resident_count(self):
+        """
+        :return: The number of issuers kept as KeyIssuer instances
+        """
+        return len(self._resident)
+
+    def resident_items(self):
+        """
+        The issuers kept as KeyIssuer instances, without changing which one
+        is the least recently used.
+
+        :return: List of (issuer ID, KeyIssuer instance) tuples
+        """
+        with self._lock:
+            return [(_id, _issuer) for _id, (_issuer, _) in self._resident.items()]
+
+    def serialized(self, issuer_id):
+        """
+        The serialized form of an issuer, an evicted one isn't loaded.
+
+        :param issuer_id: The issuer ID
+        :return: A dictionary, see :py:meth:`KeyIssuer.dump`
+        """
+        with self._lock:
+            try:
+                _issuer, _ = self._resident[issuer_id]
+            except KeyError:
+                return self._serialized[issuer_id]
+            return _issuer.dump()
+
+    def set_serialized(self, issuer_id, info):
+        """
+        Add an issuer in its serialized form, it's loaded when asked for.
+
+        :param issuer_id: The issuer ID
+        :param info: A dictionary, see :py:meth:`KeyIssuer.dump`
+        """
+        with self._lock:
+            self._ids[issuer_id] = None
+            self._resident.pop(issuer_id, None)
+            self._serialized[issuer_id] = info
+
+    def sources(self, issuer_id):
+        """
+        The sources of the key bundles of an issuer, an evicted one isn't
+        loaded.
+
+        :param issuer_id: The issuer ID
+        :return: A set of sources
+        """
+        with self._lock:
+            try:
+                _issuer, _ = self._resident[issuer_id]
+            except KeyError:
+                return {kb.get("source") for kb in self._serialized[issuer_id]["bundles"]}
+            return {kb.source for kb in _issuer}
+
+    def kids(self, issuer_id):
+        """
+        The key IDs of the keys of an issuer, an evicted one isn't loaded.
+
+        :param issuer_id: The issuer ID
+        :return: A set of key IDs
+        """
+        with self._lock:
+            try:
+                _issuer, _ = self._resident[issuer_id]
+            except KeyError:
+                return {
+                    key["kid"]
+                    for kb in self._serialized[issuer_id]["bundles"]
+                    for key in kb.get("keys", [])
+                    if key.get("kid")
+                }
+            return {kid for kb in _issuer for kid in kb.kids(update=False)}
+
+
 class KeyJar(object):
     """ A keyjar contains a number of KeyBundles sorted by owner/issuer """
 
@@ -33,6 +262,7 @@ class KeyJar(object):
         httpc=None,
         httpc_params=None,
         storage=None,
+        max_resident_issuers=0,
     ):
         """
         KeyJar init function
@@ -44,10 +274,21 @@ class KeyJar(object):
         :param httpc: A HTTP client to use. Default is Requests request.
         :param httpc_params: HTTP request parameters
         :param storage: An instance that can store information. It basically look like dictionary.
+            Issuers that other key jars add to it are found when looked up.
+        :param max_resident_issuers: If not 0, at most this many issuers are kept parsed.
+            The least recently used ones are evicted in serialized form, to the storage if
+            given, and loaded again when needed. See :py:class:`BoundedIssuers`.
         :return: Keyjar instance
         """
 
-        if storage is None:
+        self.max_resident_issuers = max_resident_issuers
+        # Other key jars may add issuers to an external storage
+        self._shared = storage is not None
+        if max_resident_issuers:
+            self._issuers = BoundedIssuers(
+                max_resident_issuers, storage, self._load_issuer, self._reindex
+            )
+        elif storage is None:
             self._issuers = {}
         else:
             self._issuers = storage
@@ -63,6 +304,68 @@ class KeyJar(object):
         if not self.httpc_params:  # backward compatibility
             self.httpc_params["verify"] = verify_ssl
 
+        # Issuer IDs, in normalized form, as a prefix trie, by the sources of
+        # their key bundles and by key ID. Kept in sync by the methods of this
+        # class.
+        self._index = IssuerIndex()
+        if isinstance(self._issuers, BoundedIssuers):
+            for _id in self._issuers.keys():
+                self._add_serialized_to_index(_id)
+        else:
+            for _id, _issuer in self._issuers.items():
+                self._index.add(_id, _issuer)
+
+    def _add_serialized_to_index(self, issuer_id):
+        self._index.add_sources(
+            issuer_id, self._issuers.sources(issuer_id), self._issuers.kids(issuer_id)
+        )
+
+    def _from_storage(self, issuer_id):
+        """
+        Add an issuer that another key jar has put in a shared storage to the
+        index.
+
+        :param issuer_id: The issuer ID
+        :return: True if the issuer is in the storage
+        """
+        if not self._shared:
+            return False
+        if isinstance(self._issuers, BoundedIssuers):
+            if not self._issuers.discover(issuer_id):
+                return False
+            self._add_serialized_to_index(issuer_id)
+        else:
+            _issuer = self._issuers.get(issuer_id)
+            if _issuer is None:
+                return False
+            self._index.add(issuer_id, _issuer)
+        return True
+
+    def _resolve(self, issuer_id):
+        """
+        Find the issuer ID used in the key jar for an issuer, which may differ
+        by a trailing '/'.
+
+        :param issuer_id: The issuer ID
+        :return: The issuer ID in the key jar or None
+        """
+        _id = self._index.resolve(issuer_id)
+        if _id is not None or not self._shared:
+            return _id
+
+        if issuer_id.endswith("/"):
+            _alternatives = [issuer_id, issuer_id[:-1]]
+        else:
+            _alternatives = [issuer_id, issuer_id + "/"]
+        for _id in _alternatives:
+            if self._from_storage(_id):
+                return _id
+        return None
+
+    def _reindex(self, issuer_id, issuer):
+        if issuer_id in self._index:
+            self._index.add(issuer_id, issuer)
+
     def _issuer_ids(self) -> List[str]:
         """
         Returns a list of issuer identifiers
@@ -82,6 +385,12 @@ class KeyJar(object):
 
         return self._issuers.get(issuer_id)
 
+    def _load_issuer(self, info):
+        _issuer = KeyIssuer(httpc=self.httpc).load(info)
+        for kb in _issuer:
+            kb.httpc = self.httpc
+        return _issuer
+
     @deprecated_alias(issuer="issuer_id", owner="issuer_id")
     def _add_issuer(self, issuer_id) -> KeyIssuer:
         _issuer = KeyIssuer(
@@ -93,6 +402,7 @@ class KeyJar(object):
             httpc_params=self.httpc_params,
         )
         self._issuers[issuer_id] = _issuer
+        self._index.add(issuer_id, _issuer)
         return _issuer
 
     def items(self):
@@ -137,6 +447,7 @@ class KeyJar(object):
 
         issuer = self.return_issuer(issuer_id)
         kb = issuer.add_url(url, **kwargs)
+        self._index.add(issuer_id, issuer)
         return kb
 
     @deprecated_alias(issuer="issuer_id", owner="issuer_id")
@@ -153,6 +464,7 @@ class KeyJar(object):
         """
         issuer = self.return_issuer(issuer_id)
         issuer.add_symmetric(key, usage=usage)
+        self._index.add(issuer_id, issuer)
 
     @deprecated_alias(issuer="issuer_id", owner="issuer_id")
     def add_kb(self, issuer_id, kb):
@@ -164,7 +476,7 @@ class KeyJar(object):
         """
         issuer = self.return_issuer(issuer_id)
         issuer.add_kb(kb)
-        self._issuers[issuer_id] = issuer
+        self[issuer_id] = issuer
 
     @deprecated_alias(issuer="issuer_id", owner="issuer_id")
     def get(self, key_use, key_type="", issuer_id="", kid=None, **kwargs):
@@ -180,12 +492,10 @@ class KeyJar(object):
 
         _issuer = None
         if issuer_id != "":
-            _issuer = self._get_issuer(issuer_id)
-            if _issuer is None:
-                if issuer_id.endswith("/"):
-                    _issuer = self._get_issuer(issuer_id[:-1])
-                else:
-                    _issuer = self._get_issuer(issuer_id + "/")
+            # With or without a trailing '/'
+            _id = self._resolve(issuer_id)
+            if _id is not None:
+                _issuer = self._get_issuer(_id)
         else:
             _issuer = self._get_issuer(issuer_id)
 
@@ -250,13 +560,24 @@ class KeyJar(object):
             raise IssuerNotFound(issuer_id)
         return _issuer.all_keys()
 
+    def get_key_by_thumbprint(self, thumbprint, issuer_id="", hash_function="SHA-256"):
+        """
+        Find the key that has a specific JWK thumbprint (RFC 7638).
+
+        :param thumbprint: The base64url encoded thumbprint
+        :param issuer_id: Who is the owner of the key, "" == me (default)
+        :param hash_function: The hash function used to create the thumbprint
+        :return: The key or None
+        """
+        _issuer = self._get_issuer(issuer_id)
+        if _issuer is None:
+            return None
+        return _issuer.get_key_by_thumbprint(thumbprint, hash_function)
+
     @deprecated_alias(issuer="issuer_id", owner="issuer_id")
     def __contains__(self, issuer_id):
-        _iss = self._get_issuer(issuer_id)
-        if _iss is None:
-            return False
-        else:
-            return True
+        # Doesn't load an evicted issuer
+        return issuer_id in self._index or self._from_storage(issuer_id)
 
     @deprecated_alias(issuer="issuer_id", owner="issuer_id")
     def __getitem__(self, issuer_id=""):
@@ -280,6 +601,7 @@ class KeyJar(object):
         :param key_issuer: KeyIssuer instance
         """
         self._issuers[issuer_id] = key_issuer
+        self._index.add(issuer_id, key_issuer)
 
     def set(self, issuer_id, issuer):
         self[issuer_id] = issuer
@@ -301,9 +623,18 @@ class KeyJar(object):
         :param url: A URL
         :return: An issue entity ID that exists in the Key jar
         """
-        _iss = [i for i in self._issuers.keys() if i.startswith(url)]
-        if _iss:
-            return _iss[0]
+        _iss = self._index.match_prefix(url)
+        if _iss is not None:
+            return _iss
+
+        if self._shared:
+            if isinstance(self._issuers, BoundedIssuers):
+                _ids = self._issuers.stored_ids()
+            else:
+                _ids = self._issuers.keys()
+            for _iss in _ids:
+                if _iss.startswith(url) and self._from_storage(_iss):
+                    return _iss
 
         raise KeyError("No keys for '{}' in this keyjar".format(url))
 
@@ -311,7 +642,7 @@ class KeyJar(object):
         _res = {}
         for _id, _issuer in self._issuers.items():
             _res[_id] = _issuer.key_summary()
-        return json.dumps(_res)
+        return json_codec.dumps(_res)
 
     @deprecated_alias(issuer="issuer_id", owner="issuer_id")
     def load_keys(self, issuer_id, jwks_uri="", jwks=None, replace=False):
@@ -352,10 +683,18 @@ class KeyJar(object):
         """
         if issuer_id is None:
             res = {}
-            for _, _issuer in self._issuers.items():
+            for _id in self._index.issuers_with_source(source):
+                _issuer = self._get_issuer(_id)
                 kbs = _issuer.find(source)
                 if kbs:
                     res[_issuer.name] = kbs
+            if not res:
+                # Bundles added to a KeyIssuer directly aren't in the index
+                for _id, _issuer in self._issuers.items():
+                    kbs = _issuer.find(source)
+                    if kbs:
+                        res[_issuer.name] = kbs
+                        self._index.add(_id, _issuer)
         else:
             _issuer = self._get_issuer(issuer_id)
             if _issuer is None:
@@ -365,6 +704,34 @@ class KeyJar(object):
 
         return res
 
+    def issuers_with_kid(self, kid):
+        """
+        Find the issuers that have a key with a specific key ID. Neither are
+        evicted issuers loaded nor key bundles updated from their sources.
+
+        Keys added to a KeyIssuer in the key jar directly, or by a key bundle
+        update, are found once the KeyIssuer has been set again or
+        :py:meth:`update_index` has been called.
+
+        :param kid: The key ID
+        :return: List of issuer IDs
+        """
+        return self._index.issuers_with_kid(kid)
+
+    def update_index(self):
+        """
+        Index the keys of the issuers kept as KeyIssuer instances again. Key
+        bundles are not updated from their sources, that happens when their
+        keys are used. Evicted issuers are not loaded, they were indexed when
+        they were evicted.
+        """
+        if isinstance(self._issuers, BoundedIssuers):
+            _items = self._issuers.resident_items()
+        else:
+            _items = list(self._issuers.items())
+        for _id, _issuer in _items:
+            self._reindex(_id, _issuer)
+
     @deprecated_alias(issuer="issuer_id", owner="issuer_id")
     def export_jwks(self, private=False, issuer_id="", usage=None):
         """
@@ -400,7 +767,24 @@ class KeyJar(object):
         :param issuer_id: The entity ID.
         :return: A JSON representation of a JWKS
         """
-        return json.dumps(self.export_jwks(private, issuer_id))
+        return self.serialized_jwks(private, issuer_id).json
+
+    def serialized_jwks(self, private=False, issuer_id="", usage=None):
+        """
+        Export a JWKS serialized and ready to be served, for instance from a
+        jwks_uri endpoint. The serialization is cached by the key issuer
+        until its keys change.
+
+        :param private: Whether it should be the private keys or the public
+        :param issuer_id: The entity ID.
+        :param usage: If only keys for a special usage should be included
+        :return: A :py:class:`cryptojwt.key_bundle.SerializedJWKS` instance
+        """
+        _issuer = self._get_issuer(issuer_id=issuer_id)
+        if _issuer is None:
+            return SerializedJWKS({"keys": []})
+
+        return _issuer.serialized_jwks(private, usage=usage)
 
     @deprecated_alias(issuer="issuer_id", owner="issuer_id")
     def import_jwks(self, jwks, issuer_id):
@@ -429,7 +813,7 @@ class KeyJar(object):
         :param jwks: JSON representation of a JWKS
         :param issuer_id: Who 'owns' the JWKS
         """
-        return self.import_jwks(json.loads(jwks), issuer_id)
+        return self.import_jwks(json_codec.loads(jwks), issuer_id)
 
     @deprecated_alias(issuer="issuer_id", owner="issuer_id")
     def import_jwks_from_file(self, filename, issuer_id):
@@ -453,6 +837,7 @@ class KeyJar(object):
 
     def __delitem__(self, key):
         del self._issuers[key]
+        self._index.remove(key)
 
     def remove_outdated(self, when=0):
         """
@@ -469,6 +854,8 @@ class KeyJar(object):
         for _id, _issuer in self._issuers.items():
             _before = len(_issuer)
             _issuer.remove_outdated(when)
+            if len(_issuer) != _before:
+                self._index.add(_id, _issuer)
 
     @deprecated_alias(issuer="issuer_id", owner="issuer_id")
     def _add_key(
@@ -618,11 +1005,12 @@ class KeyJar(object):
         Make deep copy of the content of this key jar.
 
         Note that if this key jar uses an external storage module the copy will not.
+        The copy keeps at most as many issuers parsed as this key jar does.
 
         :return: A :py:class:`oidcmsg.key_jar.KeyJar` instance
         """
 
-        kj = KeyJar()
+        kj = KeyJar(max_resident_issuers=self.max_resident_issuers)
         for _id, _issuer in self._issuers.items():
             _issuer_copy = KeyIssuer()
             _issuer_copy.set([kb.copy() for kb in _issuer])
@@ -651,10 +1039,15 @@ class KeyJar(object):
         }
 
         _issuers = {}
-        for _id, _issuer in self._issuers.items():
-            if exclude and _issuer.name in exclude:
+        if isinstance(self._issuers, BoundedIssuers):
+            # Evicted issuers are already serialized
+            _items = ((_id, self._issuers.serialized(_id)) for _id in self._issuers.keys())
+        else:
+            _items = ((_id, _issuer.dump()) for _id, _issuer in self._issuers.items())
+        for _id, _info in _items:
+            if exclude and _info["name"] in exclude:
                 continue
-            _issuers[_id] = _issuer.dump()
+            _issuers[_id] = _info
         info["issuers"] = _issuers
 
         return info
@@ -672,9 +1065,32 @@ class KeyJar(object):
         self.httpc_params = info["httpc_params"]
 
         for _issuer_id, _issuer_desc in info["issuers"].items():
-            self._issuers[_issuer_id] = KeyIssuer().load(_issuer_desc)
+            if isinstance(self._issuers, BoundedIssuers):
+                # Loaded when needed
+                self._issuers.set_serialized(_issuer_id, _issuer_desc)
+                self._add_serialized_to_index(_issuer_id)
+            else:
+                self[_issuer_id] = KeyIssuer().load(_issuer_desc)
         return self
 
+    def issuer_stats(self):
+        """
+        Numbers on the issuers in this key jar.
+
+        :return: A dictionary with the number of issuers ('issuers'), how many
+            of them are kept parsed ('resident'), and how many times an
+            evicted issuer has been loaded ('reloads') and an issuer evicted
+            ('evictions')
+        """
+        if isinstance(self._issuers, BoundedIssuers):
+            return {
+                "issuers": len(self._issuers),
+                "resident": self._issuers.resident_count(),
+                "reloads": self._issuers.counters["reloads"],
+                "evictions": self._issuers.counters["evictions"],
+            }
+        return {"issuers": len(self), "resident": len(self), "reloads": 0, "evictions": 0}
+
     @deprecated_alias(issuer="issuer_id", owner="issuer_id")
     def key_summary(self, issuer_id):
         _issuer = self._get_issuer(issuer_id)
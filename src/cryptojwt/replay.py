@@ -0,0 +1,283 @@
+"""Remembering values, like jti claims, that may only be used once."""
+import heapq
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .exception import ReplayStoreFull
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayStore(object):
+    """
+    Abstract base class for stores remembering values, like jti claims,
+    until they expire.
+    """
+
+    def add(self, key, expires_at, now=None):
+        """
+        Remember a key until it expires.
+
+        :param key: The key
+        :param expires_at: When the key can be forgotten, seconds since epoch
+        :param now: The current time, seconds since epoch
+        :return: True if the key wasn't known before, False if it was or if
+            it has already expired
+        :raises ReplayStoreFull: If the key can't be remembered because the
+            store is full
+        """
+        raise NotImplementedError()
+
+    def clear(self):
+        """Forget all keys."""
+        raise NotImplementedError()
+
+    def __contains__(self, key):
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
+
+
+class MemoryReplayStore(ReplayStore):
+    """
+    Remembers keys until they expire. The keys are kept in buckets by
+    expiration time so expired keys are dropped a bucket at a time.
+
+    At most max_entries keys are kept. When the store is full new keys are
+    rejected until some expire. With evict_when_full the bucket that expires
+    first is dropped early instead, after which replays of those keys will
+    not be detected.
+    """
+
+    def __init__(self, bucket_size=10, max_entries=100000, evict_when_full=False):
+        """
+        :param bucket_size: The number of seconds covered by a bucket
+        :param max_entries: The maximum number of keys kept
+        :param evict_when_full: Forget keys before they expire rather than
+            reject new keys when the store is full
+        """
+        self.bucket_size = bucket_size
+        self.max_entries = max_entries
+        self.evict_when_full = evict_when_full
+        # Number of keys rejected because the store was full
+        self.rejected = 0
+        # bucket number -> set of keys
+        self._buckets = {}
+        # key -> bucket number
+        self._bucket_of = {}
+        # heap of bucket numbers
+        self._order = []
+        self._lock = threading.Lock()
+
+    def add(self, key, expires_at, now=None):
+        """
+        Remember a key until it expires.
+
+        :param key: The key, must be hashable
+        :param expires_at: When the key can be forgotten, seconds since epoch
+        :param now: The current time, seconds since epoch
+        :return: True if the key wasn't known before, False if it was or if
+            it has already expired
+        :raises ReplayStoreFull: If the store is full
+        """
+        if now is None:
+            now = time.time()
+
+        # Would be forgotten right away so a replay couldn't be detected
+        if expires_at < now:
+            return False
+
+        with self._lock:
+            self._expire(now)
+            if key in self._bucket_of:
+                return False
+            if len(self._bucket_of) >= self.max_entries and not self.evict_when_full:
+                self.rejected += 1
+                logger.warning("Replay store full, rejecting key")
+                raise ReplayStoreFull(key)
+
+            # A bucket is dropped when its end has passed so round up
+            _bucket = int(expires_at // self.bucket_size) + 1
+            try:
+                self._buckets[_bucket].add(key)
+            except KeyError:
+                self._buckets[_bucket] = {key}
+                heapq.heappush(self._order, _bucket)
+            self._bucket_of[key] = _bucket
+
+            while len(self._bucket_of) > self.max_entries:
+                logger.warning("Replay store full, forgetting keys before they expire")
+                self._drop(heapq.heappop(self._order))
+
+            return True
+
+    def _expire(self, now):
+        _current = int(now // self.bucket_size)
+        while self._order and self._order[0] <= _current:
+            self._drop(heapq.heappop(self._order))
+
+    def _drop(self, bucket):
+        for key in self._buckets.pop(bucket):
+            del self._bucket_of[key]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._bucket_of.clear()
+            self._order = []
+
+    def __contains__(self, key):
+        return key in self._bucket_of
+
+    def __len__(self):
+        return len(self._bucket_of)
+
+
+class SQLiteReplayStore(ReplayStore):
+    """
+    Remembers keys in a SQLite database until they expire. Worker processes
+    on the same host using the same database file share what they have seen.
+
+    Expired keys are removed at most once every purge_interval seconds. The
+    number of keys is counted when expired keys are removed and then kept up
+    to date by each process for its own keys, so with several processes the
+    store may grow past max_entries until the next count. When the store is
+    full new keys are rejected until expired keys are removed. With
+    evict_when_full the keys that expire first are removed
+    early instead, after which replays of those keys will not be detected.
+    """
+
+    def __init__(
+        self, path, max_entries=100000, purge_interval=10, timeout=5.0, evict_when_full=False
+    ):
+        """
+        :param path: The database file
+        :param max_entries: The maximum number of keys kept
+        :param purge_interval: Seconds between removals of expired keys
+        :param timeout: How many seconds to wait for another process holding
+            the database lock
+        :param evict_when_full: Forget keys before they expire rather than
+            reject new keys when the store is full
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.purge_interval = purge_interval
+        self.timeout = timeout
+        self.evict_when_full = evict_when_full
+        # Number of keys rejected because the store was full
+        self.rejected = 0
+        self._next_purge = 0
+        # Number of keys as of the last purge plus the ones added since
+        self._count = 0
+        self._db = None
+        self._pid = None
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connect()
+
+    def _connect(self):
+        # A connection can't be used in a process forked after it was opened
+        if self._db is not None and self._pid == os.getpid():
+            return self._db
+
+        self._db = sqlite3.connect(
+            self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False
+        )
+        self._pid = os.getpid()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Safe with WAL, only the last keys may be lost on a power failure
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS replay (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS replay_expires_at ON replay (expires_at)")
+        return self._db
+
+    def add(self, key, expires_at, now=None):
+        """
+        Remember a key until it expires.
+
+        :param key: The key, a string
+        :param expires_at: When the key can be forgotten, seconds since epoch
+        :param now: The current time, seconds since epoch
+        :return: True if the key wasn't known before, False if it was or if
+            it has already expired
+        :raises ReplayStoreFull: If the store is full
+        """
+        if now is None:
+            now = time.time()
+
+        # Would be removed right away so a replay couldn't be detected
+        if expires_at < now:
+            return False
+
+        with self._lock:
+            _db = self._connect()
+            # Other processes must not get in between the check and the insert
+            _db.execute("BEGIN IMMEDIATE")
+            try:
+                _cursor = _db.execute(
+                    "DELETE FROM replay WHERE key = ? AND expires_at < ?", (key, now)
+                )
+                self._count -= _cursor.rowcount
+                if now >= self._next_purge:
+                    self._purge(_db, now)
+                if self._count >= self.max_entries and not self.evict_when_full:
+                    _known = _db.execute("SELECT 1 FROM replay WHERE key = ?", (key,)).fetchone()
+                    if _known is None:
+                        self.rejected += 1
+                        logger.warning("Replay store full, rejecting key")
+                        raise ReplayStoreFull(key)
+                    _added = False
+                else:
+                    _cursor = _db.execute(
+                        "INSERT OR IGNORE INTO replay VALUES (?, ?)", (key, expires_at)
+                    )
+                    _added = _cursor.rowcount == 1
+                    self._count += _cursor.rowcount
+            except BaseException:
+                _db.execute("ROLLBACK")
+                raise
+            _db.execute("COMMIT")
+
+        return _added
+
+    def _purge(self, db, now):
+        db.execute("DELETE FROM replay WHERE expires_at < ?", (now,))
+        self._count = db.execute("SELECT COUNT(*) FROM replay").fetchone()[0]
+        # Make room for the key being added
+        _excess = self._count - self.max_entries + 1
+        if _excess > 0 and self.evict_when_full:
+            logger.warning("Replay store full, forgetting keys before they expire")
+            db.execute(
+                "DELETE FROM replay WHERE key IN "
+                "(SELECT key FROM replay ORDER BY expires_at LIMIT ?)",
+                (_excess,),
+            )
+            self._count -= _excess
+        self._next_purge = now + self.purge_interval
+
+    def clear(self):
+        with self._lock:
+            self._connect().execute("DELETE FROM replay")
+            self._count = 0
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __contains__(self, key):
+        with self._lock:
+            _cursor = self._connect().execute("SELECT 1 FROM replay WHERE key = ?", (key,))
+            return _cursor.fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM replay").fetchone()[0]
@@ -1,18 +1,161 @@
-import json
 import logging
 
+from cryptojwt.exception import BadSyntax
 from cryptojwt.exception import HeaderError
 
+from . import json_codec
 from .utils import as_unicode
 from .utils import b64d
 from .utils import b64encode_item
-from .utils import split_token
 
 __author__ = "Roland Hedberg"
 
 logger = logging.getLogger(__name__)
 
 
+class TokenView(object):
+    """
+    A lazy view over a compact serialized JWS or JWE. The token is kept as
+    one buffer and only the positions of the dots are recorded. A part is
+    sliced out, and base64url decoded, the first time it's asked for.
+
+    :param token: The token as bytes or str
+    """
+
+    def __init__(self, token):
+        if isinstance(token, str):
+            token = token.encode("utf-8")
+        self.token = bytes(token)
+
+        self._bounds = []
+        _start = 0
+        while True:
+            _end = self.token.find(b".", _start)
+            if _end < 0:
+                break
+            self._bounds.append((_start, _end))
+            _start = _end + 1
+        if not self._bounds:
+            raise BadSyntax(self.token, "expected token to contain at least one dot")
+        self._bounds.append((_start, len(self.token)))
+
+        self._decoded = {}
+        self._headers = None
+        self._signing_input = None
+
+    def __len__(self):
+        return len(self._bounds)
+
+    def raw(self, index):
+        """
+        :param index: Part number
+        :return: The base64url encoded part as a memoryview, no copy is made
+        """
+        _start, _end = self._bounds[index]
+        return memoryview(self.token)[_start:_end]
+
+    def part_size(self, index):
+        """
+        :param index: Part number
+        :return: The length of the base64url encoded part
+        """
+        _start, _end = self._bounds[index]
+        return _end - _start
+
+    def b64part(self, index):
+        """
+        :param index: Part number
+        :return: The base64url encoded part
+        """
+        _start, _end = self._bounds[index]
+        return self.token[_start:_end]
+
+    def part(self, index):
+        """
+        :param index: Part number
+        :return: The base64url decoded part
+        """
+        try:
+            return self._decoded[index]
+        except KeyError:
+            _part = self._decoded[index] = b64d(self.b64part(index))
+            return _part
+
+    def signing_input(self):
+        """
+        :return: The first two parts together with the dot between them
+        """
+        if self._signing_input is None:
+            self._signing_input = self.token[: self._bounds[1][1]]
+        return self._signing_input
+
+    @property
+    def headers(self):
+        """The decoded header of the token"""
+        if self._headers is None:
+            self._headers = json_codec.loads(as_unicode(self.part(0)))
+        return self._headers
+
+
+def peek_header(token):
+    """
+    Get the header of a compact serialized JWS or JWE without touching the
+    rest of the token. Nothing is verified or decrypted.
+
+    :param token: The token as bytes or str
+    :return: The header as a dictionary
+    """
+    if isinstance(token, str):
+        _end = token.find(".")
+        _header = token[:_end].encode("utf-8")
+    else:
+        _end = token.find(b".")
+        _header = token[:_end]
+    if _end < 0:
+        raise BadSyntax(token, "expected token to contain at least one dot")
+    try:
+        _headers = json_codec.loads(as_unicode(b64d(_header)))
+    except ValueError as err:
+        raise BadSyntax(_header, "header is not valid JSON: {}".format(err))
+    if not isinstance(_headers, dict):
+        raise BadSyntax(_header, "header is not a JSON object")
+    return _headers
+
+
+class _LazyParts(object):
+    """
+    A list like sequence whose items are produced by a function the first
+    time they are accessed. Assigned items replace the produced ones.
+    """
+
+    def __init__(self, size, loader):
+        self._items = [None] * size
+        self._loaded = [False] * size
+        self._loader = loader
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if not self._loaded[index]:
+            self._items[index] = self._loader(index % len(self))
+            self._loaded[index] = True
+        return self._items[index]
+
+    def __setitem__(self, index, value):
+        self._items[index] = value
+        self._loaded[index] = True
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+
 class SimpleJWT(object):
     """
     Basic JSON Web Token class that doesn't make any assumptions as to what
@@ -23,6 +166,7 @@ class SimpleJWT(object):
         if not headers.get("alg"):
             headers["alg"] = None
         self.headers = headers
+        self.view = None
         self.b64part = [b64encode_item(headers)]
         self.part = [b64d(self.b64part[0])]
 
@@ -35,16 +179,27 @@ class SimpleJWT(object):
         :param kwargs: A possible empty set of claims to verify the header
             against.
         """
-        if isinstance(token, str):
-            try:
-                token = token.encode("utf-8")
-            except UnicodeDecodeError:
-                pass
+        self.view = TokenView(token)
+        self.b64part = _LazyParts(len(self.view), self.view.b64part)
+        self.part = _LazyParts(len(self.view), self._decode_part)
+        self.headers = self.view.headers
+        return self._verify_header_claims(**kwargs)
+
+    def unpack_parts(self, part, **kwargs):
+        """
+        Base64 decodes the parts of an already split JWT individually.
 
-        part = split_token(token)
-        self.b64part = part
-        self.part = [b64d(p) for p in part]
-        self.headers = json.loads(as_unicode(self.part[0]))
+        :param part: A list of the base64url encoded parts
+        :param kwargs: A possible empty set of claims to verify the header
+            against.
+        """
+        self.view = None
+        self.b64part = list(part)
+        self.part = self._decode_parts(part)
+        self.headers = json_codec.loads(as_unicode(self.part[0]))
+        return self._verify_header_claims(**kwargs)
+
+    def _verify_header_claims(self, **kwargs):
         for key, val in kwargs.items():
             if not val and key in self.headers:
                 continue
@@ -61,6 +216,12 @@ class SimpleJWT(object):
 
         return self
 
+    def _decode_parts(self, part):
+        return [b64d(p) for p in part]
+
+    def _decode_part(self, index):
+        return self.view.part(index)
+
     def pack(self, parts=None, headers=None):
         """
         Packs components into a JWT
@@ -80,6 +241,7 @@ class SimpleJWT(object):
         if not parts:
             return ".".join([a.decode() for a in self.b64part])
 
+        self.view = None
         self.part = [headers] + parts
         _all = self.b64part = [b64encode_item(headers)]
         _all.extend([b64encode_item(p) for p in parts])
@@ -101,7 +263,7 @@ class SimpleJWT(object):
             pass
         else:
             try:
-                _msg = json.loads(_msg)
+                _msg = json_codec.loads(_msg)
             except ValueError:
                 pass
 
@@ -14,10 +14,10 @@ from cryptojwt.jwk.ec import ECKey
 from cryptojwt.jwk.ec import import_private_ec_key_from_file
 from cryptojwt.jwk.ec import import_public_ec_key_from_file
 from cryptojwt.jwk.hmac import SYMKey
+from cryptojwt.jwk.jwk import key_from_jwk_dict
 from cryptojwt.jwk.rsa import RSAKey
 from cryptojwt.jwk.rsa import import_private_rsa_key_from_file
 from cryptojwt.jwk.rsa import import_public_rsa_key_from_file
-from cryptojwt.jwx import key_from_jwk_dict
 
 
 def jwk_from_file(filename: str, private: bool = True) -> JWK:
@@ -9,6 +9,8 @@ import sys
 from cryptojwt.jwk.ec import NIST2SEC
 from cryptojwt.jwk.ec import new_ec_key
 from cryptojwt.jwk.hmac import SYMKey
+from cryptojwt.jwk.okp import OKP_CRV2PRIVATE
+from cryptojwt.jwk.okp import new_okp_key
 from cryptojwt.jwk.rsa import new_rsa_key
 from cryptojwt.utils import b64e
 
@@ -16,6 +18,7 @@ DEFAULT_SYM_KEYSIZE = 32
 DEFAULT_RSA_KEYSIZE = 2048
 DEFAULT_RSA_EXP = 65537
 DEFAULT_EC_CURVE = "P-256"
+DEFAULT_OKP_CURVE = "Ed25519"
 
 
 def main():
@@ -28,9 +31,9 @@ def main():
         "--crv",
         dest="crv",
         metavar="curve",
-        help="EC curve",
-        choices=NIST2SEC.keys(),
-        default=DEFAULT_EC_CURVE,
+        help="EC/OKP curve (default {} or {})".format(DEFAULT_EC_CURVE, DEFAULT_OKP_CURVE),
+        choices=list(NIST2SEC.keys()) + list(OKP_CRV2PRIVATE.keys()),
+        default=None,
     )
     parser.add_argument(
         "--exp",
@@ -48,10 +51,19 @@ def main():
             args.keysize = DEFAULT_RSA_KEYSIZE
         jwk = new_rsa_key(public_exponent=args.rsa_exp, key_size=args.keysize, kid=args.kid)
     elif args.kty.upper() == "EC":
+        if args.crv is None:
+            args.crv = DEFAULT_EC_CURVE
         if args.crv not in NIST2SEC:
             print("Unknown curve: {0}".format(args.crv), file=sys.stderr)
             exit(1)
         jwk = new_ec_key(crv=args.crv, kid=args.kid)
+    elif args.kty.upper() == "OKP":
+        if args.crv is None:
+            args.crv = DEFAULT_OKP_CURVE
+        if args.crv not in OKP_CRV2PRIVATE:
+            print("Unknown curve: {0}".format(args.crv), file=sys.stderr)
+            exit(1)
+        jwk = new_okp_key(crv=args.crv, kid=args.kid)
     elif args.kty.upper() == "SYM":
         if args.keysize is None:
             args.keysize = DEFAULT_SYM_KEYSIZE
@@ -1,48 +1,65 @@
 import base64
+import binascii
 import functools
 import importlib
-import json
 import re
-import struct
+import threading
 import warnings
-from binascii import unhexlify
+from collections import OrderedDict
 from typing import List
 
 from cryptojwt.exception import BadSyntax
 
+from . import json_codec
+
 # ---------------------------------------------------------------------------
 # Helper functions
 
 
 def intarr2bin(arr):
-    return unhexlify("".join(["%02x" % byte for byte in arr]))
+    return bytes(arr)
+
+
+def bytes2long(data):
+    """
+    Convert big endian bytes into an integer.
+
+    :param data: bytes
+    :return: The integer
+    :raises: ValueError if there are no bytes
+    """
+    if not data:
+        raise ValueError("No bytes to convert to an integer")
+    return int.from_bytes(data, "big")
 
 
 def intarr2long(arr):
-    return int("".join(["%02x" % byte for byte in arr]), 16)
+    return bytes2long(bytes(arr))
 
 
 def intarr2str(arr):
     return "".join([chr(c) for c in arr])
 
 
+def long2bytes(long_int, length=0):
+    """
+    Convert a non-negative integer into big endian bytes.
+
+    :param long_int: The integer
+    :param length: The minimum number of bytes, shorter results are left
+        padded with zeros
+    :return: bytes, empty if the integer is 0 and no length is given
+    """
+    return long_int.to_bytes(max((long_int.bit_length() + 7) // 8, length), "big")
+
+
 def long2intarr(long_int):
-    _bytes: List[int] = []
-    while long_int:
-        long_int, r = divmod(long_int, 256)
-        _bytes.insert(0, r)
+    _bytes: List[int] = list(long2bytes(long_int))
     return _bytes
 
 
 def long_to_base64(n, mlen=0):
-    bys = long2intarr(n)
-    if mlen:
-        _len = mlen - len(bys)
-        if _len:
-            bys = [0] * _len + bys
-    data = struct.pack("%sB" % len(bys), *bys)
-    if not len(data):
-        data = b"\x00"
+    data = long2bytes(n, max(mlen, 1))
     s = base64.urlsafe_b64encode(data).rstrip(b"=")
     return s.decode("ascii")
 
@@ -53,7 +70,7 @@ def base64_to_long(data):
 
     # urlsafe_b64decode will happily convert b64encoded data
     _d = base64.urlsafe_b64decode(as_bytes(data) + b"==")
-    return intarr2long(struct.unpack("%sB" % len(_d), _d))
+    return bytes2long(_d)
 
 
 def base64url_to_long(data):
@@ -68,9 +85,9 @@ def base64url_to_long(data):
     _d = base64.urlsafe_b64decode(_data + b"==")
     # verify that it's base64url encoded and not just base64
     # that is no '+' and '/' characters and not trailing "="s.
-    if [e for e in [b"+", b"/", b"="] if e in _data]:
+    if _not_b64url_re.search(_data):
         raise ValueError("Not base64url encoded")
-    return intarr2long(struct.unpack("%sB" % len(_d), _d))
+    return bytes2long(_d)
 
 
 # =============================================================================
@@ -83,7 +100,76 @@ def b64e(b):
     return base64.urlsafe_b64encode(b).rstrip(b"=")
 
 
+def b64e_stream(chunks):
+    """Base64url encode a sequence of byte strings piece by piece.
+
+    The output pieces joined together are the same as b64e() of the
+    joined input.
+
+    :param chunks: An iterable of byte strings
+    :return: A generator of base64url encoded byte strings
+    """
+    _rest = b""
+    for chunk in chunks:
+        _data = _rest + chunk
+        _cut = len(_data) - len(_data) % 3
+        _rest = _data[_cut:]
+        if _cut:
+            yield b64e(_data[:_cut])
+    if _rest:
+        yield b64e(_rest)
+
+
+def b64d_stream(chunks):
+    """Base64url decode a sequence of byte strings piece by piece.
+
+    The output pieces joined together are the same as b64d() of the
+    joined input.
+
+    :param chunks: An iterable of base64url encoded byte strings
+    :return: A generator of byte strings
+    """
+    _rest = b""
+    for chunk in chunks:
+        _data = _rest + chunk
+        _cut = len(_data) - len(_data) % 4
+        _rest = _data[_cut:]
+        if _cut:
+            yield b64d(_data[:_cut])
+    if _rest:
+        yield b64d(_rest)
+
+
+def read_chunks(src, chunk_size=65536):
+    """Read a file like object in chunks.
+
+    :param src: A file like object opened for reading
+    :param chunk_size: The maximum size of each chunk
+    :return: A generator of byte strings
+    """
+    while True:
+        _chunk = src.read(chunk_size)
+        if not _chunk:
+            break
+        yield as_bytes(_chunk)
+
+
 _b64_re = re.compile(b"^[A-Za-z0-9_-]*$")
+_not_b64url_re = re.compile(b"[+/=]")
+
+
+def _b64url_translation():
+    # Maps the base64url alphabet onto the standard one and every other
+    # byte onto "!", which isn't in either alphabet.
+    _table = bytearray(b"!" * 256)
+    for _char in b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789":
+        _table[_char] = _char
+    _table[ord("-")] = ord("+")
+    _table[ord("_")] = ord("/")
+    return bytes(_table)
+
+
+_b64url_to_std = _b64url_translation()
 
 
 def add_padding(b):
@@ -111,14 +197,19 @@ def b64d(b):
     cb = b.rstrip(b"=")  # shouldn't but there you are
 
     # Python's base64 functions ignore invalid characters, so we need to
-    # check for them explicitly.
-    if not _b64_re.match(cb):
+    # check for them explicitly. Translating to the standard alphabet
+    # does that in the same pass.
+    _std = cb.translate(_b64url_to_std)
+    if b"!" in _std:
         raise BadSyntax(cb, "base64-encoded data contains illegal characters")
 
-    if cb == b:
-        b = add_padding(b)
+    if len(cb) != len(b):
+        return base64.urlsafe_b64decode(b)
+
+    if len(b) % 4 == 1:
+        raise BadSyntax(b, "incorrect padding")
 
-    return base64.urlsafe_b64decode(b)
+    return binascii.a2b_base64(add_padding(_std))
 
 
 def b64e_enc_dec(str, encode="utf-8", decode="ascii"):
@@ -172,14 +263,30 @@ def bytes2str_conv(item):
 
 
 def b64encode_item(item):
-    if isinstance(item, bytes):
+    if isinstance(item, (bytes, memoryview)):
         return b64e(item)
     elif isinstance(item, str):
         return b64e(item.encode("utf-8"))
     elif isinstance(item, int):
         return b64e(item)
     else:
-        return b64e(json.dumps(bytes2str_conv(item), separators=(",", ":")).encode("utf-8"))
+        return b64e(json_codec.dumps(bytes2str_conv(item), compact=True).encode("utf-8"))
+
+
+def payload_bytes(item):
+    """
+    The byte representation of a JWS payload. Dictionaries and lists are
+    JSON encoded.
+
+    :param item: The payload
+    :return: bytes
+    """
+    if isinstance(item, bytes):
+        return item
+    elif isinstance(item, str):
+        return item.encode("utf-8")
+    else:
+        return json_codec.dumps(bytes2str_conv(item), compact=True).encode("utf-8")
 
 
 def split_token(token):
@@ -255,3 +362,63 @@ def rename_kwargs(func_name, kwargs, aliases):
                 raise TypeError("{} received both {} and {}".format(func_name, alias, new))
             warnings.warn("{} is deprecated; use {}".format(alias, new), DeprecationWarning)
             kwargs[new] = kwargs.pop(alias)
+
+
+class LRUCache(object):
+    """
+    A thread safe mapping that holds at most max_size items. When full the
+    least recently used item is evicted to make room for a new one.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Get an item and mark it as the most recently used.
+
+        :param key: The key
+        :param default: What to return if the key is not in the cache
+        :return: The cached value or default
+        """
+        with self._lock:
+            try:
+                _val = self._data[key]
+            except KeyError:
+                return default
+            self._data.move_to_end(key)
+            return _val
+
+    def set(self, key, value):
+        """
+        Add or replace an item, evicting the least recently used item if
+        the cache is full.
+
+        :param key: The key
+        :param value: The value
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def keys(self):
+        with self._lock:
+            return list(self._data.keys())
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
@@ -1,4 +1,10 @@
+import pytest
+
+from cryptojwt.exception import BadSyntax
 from cryptojwt.simple_jwt import SimpleJWT
+from cryptojwt.simple_jwt import TokenView
+from cryptojwt.simple_jwt import peek_header
+from cryptojwt.utils import b64e
 
 __author__ = "roland"
 
@@ -58,3 +64,45 @@ def test_unpack_str():
     _jwt2 = SimpleJWT().unpack(jwt)
     assert _jwt2
     _ = _jwt2.payload()
+
+
+def test_token_view():
+    _jwt = SimpleJWT(**{"alg": "none", "kid": "abc"})
+    jwt = _jwt.pack(parts=[{"iss": "joe"}, ""])
+
+    view = TokenView(jwt)
+    assert len(view) == 3
+    assert view.headers == {"alg": "none", "kid": "abc"}
+    assert view.b64part(1) == jwt.split(".")[1].encode()
+    assert bytes(view.raw(1)) == view.b64part(1)
+    assert view.part(1) == b'{"iss":"joe"}'
+    assert view.signing_input() == ".".join(jwt.split(".")[:2]).encode()
+    assert view.part_size(2) == 0
+
+
+def test_token_view_no_dot():
+    with pytest.raises(BadSyntax):
+        TokenView(b"abc")
+
+
+def test_unpack_is_lazy():
+    header = b64e(b'{"alg":"none"}')
+    # The payload isn't valid base64url but is never looked at
+    _jwt = SimpleJWT().unpack(header + b".#invalid#.")
+    assert _jwt.headers == {"alg": "none"}
+    assert len(_jwt.b64part) == 3
+    with pytest.raises(BadSyntax):
+        _jwt.part[1]
+
+
+def test_peek_header():
+    _jwt = SimpleJWT(**{"alg": "none", "kid": "abc"})
+    jwt = _jwt.pack(parts=[{"iss": "joe"}, ""])
+    assert peek_header(jwt) == {"alg": "none", "kid": "abc"}
+    assert peek_header(jwt.encode()) == {"alg": "none", "kid": "abc"}
+
+
+@pytest.mark.parametrize("token", [b"abc", b64e(b"[1]") + b".", b64e(b"{") + b"."])
+def test_peek_header_invalid(token):
+    with pytest.raises(BadSyntax):
+        peek_header(token)
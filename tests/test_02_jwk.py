@@ -2,17 +2,24 @@
 from __future__ import print_function
 
 import base64
+import copy
 import json
 import os.path
+import pickle
 import struct
 from collections import Counter
 
 import pytest
+from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric import ed25519
 from cryptography.hazmat.primitives.asymmetric import rsa
 
+from cryptojwt.exception import BadSyntax
 from cryptojwt.exception import DeSerializationNotPossible
+from cryptojwt.exception import MissingValue
 from cryptojwt.exception import UnsupportedAlgorithm
+from cryptojwt.exception import UnsupportedOKPCurve
 from cryptojwt.exception import WrongUsage
 from cryptojwt.jwk import JWK
 from cryptojwt.jwk import calculate_x5t
@@ -24,10 +31,13 @@ from cryptojwt.jwk.ec import new_ec_key
 from cryptojwt.jwk.hmac import SYMKey
 from cryptojwt.jwk.hmac import new_sym_key
 from cryptojwt.jwk.hmac import sha256_digest
+from cryptojwt.jwk.jwk import cached_key_from_jwk_dict
 from cryptojwt.jwk.jwk import dump_jwk
 from cryptojwt.jwk.jwk import import_jwk
 from cryptojwt.jwk.jwk import jwk_wrap
 from cryptojwt.jwk.jwk import key_from_jwk_dict
+from cryptojwt.jwk.okp import OKPKey
+from cryptojwt.jwk.okp import new_okp_key
 from cryptojwt.jwk.rsa import RSAKey
 from cryptojwt.jwk.rsa import import_private_rsa_key_from_file
 from cryptojwt.jwk.rsa import import_public_rsa_key_from_file
@@ -36,10 +46,13 @@ from cryptojwt.jwk.rsa import new_rsa_key
 from cryptojwt.jwk.x509 import import_public_key_from_pem_file
 from cryptojwt.utils import as_bytes
 from cryptojwt.utils import as_unicode
+from cryptojwt.utils import b64d
 from cryptojwt.utils import b64e
 from cryptojwt.utils import base64_to_long
 from cryptojwt.utils import base64url_to_long
+from cryptojwt.utils import intarr2long
 from cryptojwt.utils import long2intarr
+from cryptojwt.utils import long_to_base64
 
 __author__ = "Roland Hedberg"
 BASEDIR = os.path.abspath(os.path.dirname(__file__))
@@ -83,6 +96,57 @@ def test_urlsafe_base64decode():
     assert l
 
 
+@pytest.mark.parametrize("n", [0, 1, 255, 256, 65537, 2 ** 2048 - 1, base64_to_long(N)])
+def test_long_base64_round_trip(n):
+    _b64 = long_to_base64(n)
+    assert "=" not in _b64
+    assert base64_to_long(_b64) == n
+    assert base64url_to_long(_b64) == n
+    assert intarr2long(long2intarr(n) or [0]) == n
+
+
+def test_long_to_base64_mlen():
+    assert long_to_base64(0) == "AA"
+    assert long_to_base64(1, 4) == "AAAAAQ"
+    # mlen never truncates
+    assert long_to_base64(65537, 1) == "AQAB"
+    assert len(b64d(long_to_base64(1, 66).encode())) == 66
+
+
+@pytest.mark.parametrize("value", ["", b""])
+def test_base64_to_long_empty(value):
+    with pytest.raises(ValueError):
+        base64_to_long(value)
+    with pytest.raises(ValueError):
+        base64url_to_long(value)
+    with pytest.raises(ValueError):
+        intarr2long([])
+
+
+@pytest.mark.parametrize("value", ["AQAB=", "+/8", "_/8"])
+def test_base64url_to_long_not_base64url(value):
+    with pytest.raises(ValueError):
+        base64url_to_long(value)
+
+
+def test_b64d():
+    assert b64d(b"-_8") == b"\xfb\xff"
+    assert b64d(b"AQAB") == b"\x01\x00\x01"
+    assert b64d(b"AQ==") == b"\x01"
+    assert b64d(b"") == b""
+
+
+@pytest.mark.parametrize("value", [b"+/8", b"AQ AB", b"AQ=B", b"AQ\x00B", b"\xc3\xa5AAA"])
+def test_b64d_illegal_characters(value):
+    with pytest.raises(BadSyntax):
+        b64d(value)
+
+
+def test_b64d_incorrect_padding():
+    with pytest.raises(BadSyntax):
+        b64d(b"AQABA")
+
+
 def test_import_rsa_key_from_cert_file():
     _ckey = import_rsa_key_from_cert_file(CERT)
     assert isinstance(_ckey, rsa.RSAPublicKey)
@@ -456,6 +520,13 @@ def test_get_asym_key_all():
         assert rsakey.appropriate_for(usage) is None
 
 
+def test_sym_key_appropriate_for_dir():
+    _key = SYMKey(key=b"0123456789abcdef", alg="dir", use="enc")
+    # With direct encryption the key is used as is
+    assert _key.appropriate_for("encrypt", alg="dir") == b"0123456789abcdef"
+    assert _key.appropriate_for("decrypt", alg="A128KW") != b"0123456789abcdef"
+
+
 def test_get_asym_key_for_unknown_usage():
     with pytest.raises(ValueError):
         RSA1.appropriate_for("binding")
@@ -537,6 +608,64 @@ def test_key_from_jwk_dict_sym():
     assert jwk == {"kty": "oct", "k": "YWJjZGVmZ2hpamtsbW5vcHE"}
 
 
+def test_key_from_jwk_dict_does_not_change_input():
+    jwk = new_ec_key("P-256").serialize(private=True)
+    _orig = dict(jwk)
+    _key = key_from_jwk_dict(jwk, private=False)
+    assert not _key.has_private_key()
+    assert jwk == _orig
+
+
+def test_cached_key_from_jwk_dict():
+    jwk = new_ec_key("P-256", kid="cached").serialize()
+    _key = cached_key_from_jwk_dict(jwk)
+    assert isinstance(_key, ECKey)
+    assert _key == key_from_jwk_dict(jwk)
+
+    # Same JWK, possibly differently ordered, gives a new instance that
+    # shares the parsed key
+    _key2 = cached_key_from_jwk_dict(dict(reversed(list(jwk.items()))))
+    assert _key2 is not _key
+    assert _key2.pub_key is _key.pub_key
+
+    # Changing the returned instance doesn't affect the cache
+    _key2.kid = "changed"
+    assert cached_key_from_jwk_dict(jwk).kid == "cached"
+
+
+def test_cached_key_from_jwk_dict_mutable_members():
+    jwk = new_ec_key("P-256", kid="cached").serialize()
+    jwk.update({"key_ops": ["verify"], "x5c": [], "ext": {"a": ["b"]}})
+    _key = cached_key_from_jwk_dict(jwk)
+    _key.key_ops.append("sign")
+    _key.x5c.append("cert")
+    _key.extra_args["ext"]["a"].append("c")
+    _key.extra_args["other"] = 1
+
+    _key2 = cached_key_from_jwk_dict(jwk)
+    assert _key2.key_ops == ["verify"]
+    assert _key2.x5c == []
+    assert _key2.extra_args == {"ext": {"a": ["b"]}}
+
+
+def test_cached_key_from_jwk_dict_private_not_cached():
+    jwk = new_ec_key("P-256").serialize(private=True)
+    _key = cached_key_from_jwk_dict(jwk)
+    assert _key.has_private_key()
+    assert cached_key_from_jwk_dict(jwk).priv_key is not _key.priv_key
+
+    jwk = {"kty": "oct", "key": "abcdefghijklmnopq"}
+    assert isinstance(cached_key_from_jwk_dict(jwk), SYMKey)
+
+
+def test_cached_key_from_jwk_dict_invalid():
+    jwk = new_ec_key("P-256").serialize()
+    del jwk["y"]
+    for _ in range(2):
+        with pytest.raises(MissingValue):
+            cached_key_from_jwk_dict(jwk)
+
+
 def test_jwk_wrong_alg():
     with pytest.raises(UnsupportedAlgorithm):
         _j = JWK(alg="xyz")
@@ -616,6 +745,68 @@ def test_thumbprint_rsa():
     assert (jwk.thumbprint("SHA-256").decode()) == thumbprint
 
 
+def test_thumbprint_cached():
+    key = new_ec_key("P-256")
+    _thumbprint = key.thumbprint("SHA-256")
+    assert key.thumbprint("SHA-256") is _thumbprint
+    assert key.thumbprint("SHA-512") != _thumbprint
+    # kid isn't part of the thumbprint
+    key.kid = "other"
+    assert key.thumbprint("SHA-256") is _thumbprint
+
+
+def test_thumbprint_invalidated():
+    key = new_ec_key("P-256")
+    _thumbprint = key.thumbprint("SHA-256")
+    _copy = copy.copy(key)
+
+    _other = new_ec_key("P-256")
+    key.priv_key = _other.priv_key
+    key.pub_key = _other.pub_key
+    assert key.thumbprint("SHA-256") == _other.thumbprint("SHA-256")
+    # The copy still has the old key material
+    assert _copy.thumbprint("SHA-256") == _thumbprint
+
+
+def test_thumbprint_members():
+    key = new_rsa_key()
+    _required = RSAKey.required[:]
+    _members = ["n", "kty", "e"]
+    assert key.thumbprint("SHA-256", members=_members) == key.thumbprint("SHA-256")
+    assert key.thumbprint("SHA-256", members=["kid", "kty"]) != key.thumbprint("SHA-256")
+    assert _members == ["n", "kty", "e"]
+    assert RSAKey.required == _required
+
+
+@pytest.mark.parametrize("key", [new_rsa_key(), new_ec_key("P-256"), new_okp_key()])
+def test_compact(key):
+    assert not hasattr(key, "__dict__")
+    _copy = copy.copy(key)
+    _private = key.serialize(private=True)
+    _public = key.serialize()
+    key.compact()
+    assert key.serialize(private=True) == _private
+    assert key.serialize() == _public
+    assert key == _copy
+    # Still compacted
+    assert all(getattr(key, param) == "" for param in key.serialized_members)
+
+
+def test_compact_public_only():
+    key = key_from_jwk_dict(new_rsa_key().serialize())
+    _public = key.serialize()
+    key.compact()
+    assert key.n == ""
+    assert key.serialize() == _public
+
+
+def test_sym_key_pickle():
+    key = SYMKey(key="0123456789abcdef0123456789abcdef", kid="sym")
+    assert key.hmac_context(hashes.SHA256)
+    assert pickle.loads(pickle.dumps(key)) == key
+    assert copy.deepcopy(key) == key
+
+
 def test_mint_new_sym_key():
     key = new_sym_key(bytes=24, use="sig", kid="one")
     assert key
@@ -719,3 +910,71 @@ def test_import_public_key_from_pem_file(filename, key_type):
     _file = full_path(filename)
     pub_key = import_public_key_from_pem_file(_file)
     assert isinstance(pub_key, key_type)
+
+
+# Test vectors from RFC 8037, Appendix A
+OKP_ED25519_JWK = {
+    "kty": "OKP",
+    "crv": "Ed25519",
+    "d": "nWGxne_9WmC6hEr0kuwsxERJxWl7MmkZcDusAxyuf2A",
+    "x": "11qYAYKxCrfVS_7TyWQHOg7hcvPapiMlrwIaaPcHURo",
+}
+
+
+def test_okp_key_from_jwk_dict():
+    _key = key_from_jwk_dict(OKP_ED25519_JWK)
+    assert isinstance(_key, OKPKey)
+    assert _key.has_private_key()
+    assert _key.serialize(private=True) == OKP_ED25519_JWK
+
+    _pub = key_from_jwk_dict(OKP_ED25519_JWK, private=False)
+    assert not _pub.has_private_key()
+    assert _pub.serialize() == {k: v for k, v in OKP_ED25519_JWK.items() if k != "d"}
+
+
+def test_okp_thumbprint():
+    _key = key_from_jwk_dict(OKP_ED25519_JWK)
+    assert _key.thumbprint("SHA-256") == b"kPrK_qmxVWaYVA9wwBF6Iuo3vVzz7TxHCTwXBygrS4k"
+
+
+def test_okp_key_x_does_not_match_d():
+    _jwk = OKP_ED25519_JWK.copy()
+    _jwk["x"] = new_okp_key().x
+    with pytest.raises(DeSerializationNotPossible):
+        key_from_jwk_dict(_jwk)
+
+
+def test_okp_unknown_curve():
+    _jwk = OKP_ED25519_JWK.copy()
+    _jwk["crv"] = "P-256"
+    with pytest.raises(UnsupportedAlgorithm):
+        key_from_jwk_dict(_jwk)
+
+    with pytest.raises(UnsupportedOKPCurve):
+        OKPKey(**_jwk)
+
+
+@pytest.mark.parametrize("crv", ["Ed25519", "Ed448", "X25519", "X448"])
+def test_new_okp_key(crv):
+    _key = new_okp_key(crv=crv)
+    assert _key.kid
+    assert _key.crv == crv
+
+    _key2 = OKPKey(**_key.serialize(private=True))
+    assert _key == _key2
+    assert OKPKey(**_key.serialize()) != _key
+
+
+def test_okp_jwk_wrap():
+    _key = ed25519.Ed25519PrivateKey.generate()
+    _jwk = jwk_wrap(_key, use="sig")
+    assert isinstance(_jwk, OKPKey)
+    assert _jwk.kid
+    assert _jwk.crv == "Ed25519"
+
+
+def test_dump_import_okp_jwk():
+    _key = new_okp_key(crv="Ed448")
+    dump_jwk(full_path("tmp_jwk.json"), _key)
+    _key2 = import_jwk(full_path("tmp_jwk.json"))
+    assert _key == _key2
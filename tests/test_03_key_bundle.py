@@ -1,4 +1,5 @@
 # pylint: disable=missing-docstring,no-self-use
+import gzip
 import json
 import os
 import shutil
@@ -13,6 +14,7 @@ from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptojwt.jwk.ec import ECKey
 from cryptojwt.jwk.ec import new_ec_key
 from cryptojwt.jwk.hmac import SYMKey
+from cryptojwt.jwk.okp import OKPKey
 from cryptojwt.jwk.rsa import RSAKey
 from cryptojwt.jwk.rsa import import_rsa_key_from_cert_file
 from cryptojwt.jwk.rsa import new_rsa_key
@@ -24,6 +26,7 @@ from cryptojwt.key_bundle import key_diff
 from cryptojwt.key_bundle import key_gen
 from cryptojwt.key_bundle import key_rollover
 from cryptojwt.key_bundle import keybundle_from_local_file
+from cryptojwt.key_bundle import order_key_defs
 from cryptojwt.key_bundle import rsa_init
 from cryptojwt.key_bundle import unique_keys
 from cryptojwt.key_bundle import update_key_bundle
@@ -273,6 +276,21 @@ def test_unknown_source():
 
 
 def test_ignore_unknown_types():
+    kb = KeyBundle(
+        {
+            "kid": "q-H9y8iuh3BIKZBbK6S0mH_isBlJsk"
+            "-u6VtZ5rAdBo5fCjjy3LnkrsoK_QWrlKB08j_PcvwpAMfTEDHw5spepw",
+            "use": "sig",
+            "alg": "XYZ",
+            "kty": "XYZ",
+            "x": "FnbcUAXZ4ySvrmdXK1MrDuiqlqTXvGdAaE4RWZjmFIQ",
+        }
+    )
+
+    assert len(kb) == 0
+
+
+def test_okp_key():
     kb = KeyBundle(
         {
             "kid": "q-H9y8iuh3BIKZBbK6S0mH_isBlJsk"
@@ -285,7 +303,8 @@ def test_ignore_unknown_types():
         }
     )
 
-    assert len(kb) == 0
+    assert len(kb) == 1
+    assert isinstance(kb.get("OKP")[0], OKPKey)
 
 
 def test_remove_rsa():
@@ -471,6 +490,74 @@ def test_mark_as_inactive():
     assert len(kb.active_keys()) == 1
 
 
+def test_get_key_by_thumbprint():
+    keys = [new_ec_key("P-256"), new_rsa_key(), new_ec_key("P-384")]
+    kb = KeyBundle()
+    kb.extend(keys[:2])
+    for key in keys[:2]:
+        assert kb.get_key_by_thumbprint(key.thumbprint("SHA-256")) is key
+        assert kb.get_key_by_thumbprint(key.thumbprint("SHA-256").decode()) is key
+        assert kb.get_key_by_thumbprint(key.thumbprint("SHA-512"), "SHA-512") is key
+    assert kb.get_key_by_thumbprint(keys[2].thumbprint("SHA-256")) is None
+
+    # Changes to the bundle are picked up
+    kb.append(keys[2])
+    assert kb.get_key_by_thumbprint(keys[2].thumbprint("SHA-256")) is keys[2]
+    kb.remove(keys[0])
+    assert kb.get_key_by_thumbprint(keys[0].thumbprint("SHA-256")) is None
+    kb.set([keys[0]])
+    assert kb.get_key_by_thumbprint(keys[0].thumbprint("SHA-256")) is keys[0]
+
+
+def test_compact():
+    keys = [new_ec_key("P-256"), new_rsa_key(), SYMKey(key="highestsupersecret")]
+    kb = KeyBundle()
+    kb.extend(keys)
+    _jwks = kb.jwks()
+    kb.compact()
+    assert keys[0].x == ""
+    assert keys[1].n == ""
+    assert kb.jwks() == _jwks
+    assert kb.dump()
+    assert keys[0].x == ""
+    assert keys[1].n == ""
+
+
+def test_serialized_jwks():
+    kb = KeyBundle()
+    kb.append(new_ec_key("P-256"))
+    _serialized = kb.serialized_jwks()
+    assert kb.serialized_jwks() is _serialized
+    assert kb.jwks() == _serialized.json
+    assert json.loads(_serialized.content) == json.loads(gzip.decompress(_serialized.gzipped))
+    assert _serialized.etag.startswith('"')
+    assert "d" not in json.loads(_serialized.json)["keys"][0]
+    assert "d" in json.loads(kb.jwks(private=True))["keys"][0]
+
+    kb.append(new_rsa_key())
+    _new = kb.serialized_jwks()
+    assert len(json.loads(_new.json)["keys"]) == 2
+    assert _new.etag != _serialized.etag
+
+    kb.mark_all_as_inactive()
+    assert kb.serialized_jwks() is not _new
+    kb.remove(kb.keys()[0])
+    assert len(json.loads(kb.jwks())["keys"]) == 1
+    # Changes made to the list of keys are noticed
+    kb.keys().append(new_ec_key("P-256"))
+    assert len(json.loads(kb.jwks())["keys"]) == 2
+
+
+def test_serialized_jwks_stable():
+    keys = [new_ec_key("P-256"), new_rsa_key()]
+    kb1 = KeyBundle()
+    kb1.extend(keys)
+    kb2 = KeyBundle()
+    kb2.extend(keys)
+    assert kb1.serialized_jwks().etag == kb2.serialized_jwks().etag
+    assert kb1.serialized_jwks().gzipped == kb2.serialized_jwks().gzipped
+
+
 def test_copy():
     desc = {"kty": "oct", "key": "highestsupersecret", "use": "sig"}
     kb = KeyBundle([desc])
@@ -914,6 +1001,53 @@ def test_key_gen_rsa():
     assert isinstance(_jwk, RSAKey)
 
 
+def test_key_gen_okp():
+    _jwk = key_gen("OKP", crv="Ed448", kid="kid1")
+    assert _jwk.kty == "OKP"
+    assert _jwk.crv == "Ed448"
+    assert _jwk.kid == "kid1"
+
+    assert isinstance(_jwk, OKPKey)
+
+    with pytest.raises(ValueError):
+        key_gen("OKP", crv="P-256")
+
+
+def test_build_key_bundle_okp():
+    _kb = build_key_bundle(
+        key_conf=[
+            {"type": "OKP", "crv": "Ed25519", "use": ["sig"]},
+            {"type": "OKP", "crv": "X25519", "use": ["enc"]},
+        ]
+    )
+    assert len(_kb.get("OKP")) == 2
+    assert {k.crv for k in _kb.get("OKP")} == {"Ed25519", "X25519"}
+
+    _kb2 = KeyBundle(keys=json.loads(_kb.jwks(private=True))["keys"])
+    assert len(_kb2.get("OKP")) == 2
+
+
+def test_build_key_bundle_okp_lower_case():
+    _kb = build_key_bundle(key_conf=[{"type": "okp", "crv": "Ed25519", "use": ["sig"]}])
+    assert len(_kb.get("OKP")) == 1
+
+    _defs = order_key_defs(
+        [
+            {"type": "okp", "crv": "X25519", "use": ["sig"]},
+            {"type": "okp", "crv": "Ed25519", "use": ["sig"]},
+        ]
+    )
+    assert [d["crv"] for d in _defs] == ["Ed25519", "X25519"]
+
+
+def test_key_rollover_okp():
+    kb_0 = build_key_bundle(key_conf=[{"type": "OKP", "crv": "Ed448", "use": ["sig"]}])
+    kb_1 = key_rollover(kb_0)
+
+    assert len(kb_1.get(only_active=False)) == 2
+    assert [k.crv for k in kb_1.get()] == ["Ed448"]
+
+
 def test_init_key():
     spec = {"type": "RSA", "kid": "one"}
 
@@ -0,0 +1,118 @@
+import random
+
+import pytest
+
+from cryptojwt.issuer_index import IssuerIndex
+from cryptojwt.issuer_index import PrefixTrie
+from cryptojwt.issuer_index import normalize_issuer
+from cryptojwt.key_bundle import KeyBundle
+from cryptojwt.key_issuer import KeyIssuer
+
+
+def scan(keys, prefix):
+    for key in keys:
+        if key.startswith(prefix):
+            return key
+    return None
+
+
+def test_normalize_issuer():
+    assert normalize_issuer("https://example.com/") == "https://example.com"
+    assert normalize_issuer("https://example.com") == "https://example.com"
+    assert normalize_issuer("") == ""
+
+
+def test_trie_first_with_prefix():
+    trie = PrefixTrie()
+    for key in ["https://b.example.com/x", "https://a.example.com", "https://b.example.com"]:
+        trie.add(key)
+
+    assert trie.first_with_prefix("https://a") == "https://a.example.com"
+    # The first added, not the shortest
+    assert trie.first_with_prefix("https://b.example.com") == "https://b.example.com/x"
+    assert trie.first_with_prefix("https://b.example.com/") == "https://b.example.com/x"
+    assert trie.first_with_prefix("") == "https://b.example.com/x"
+    assert trie.first_with_prefix("https://c") is None
+    assert trie.first_with_prefix("https://b.example.com/xy") is None
+
+
+def test_trie_remove():
+    trie = PrefixTrie()
+    for key in ["abc", "ab", "abd", ""]:
+        trie.add(key)
+
+    trie.remove("abc")
+    assert trie.first_with_prefix("abc") is None
+    assert trie.first_with_prefix("ab") == "ab"
+    trie.remove("ab")
+    assert trie.first_with_prefix("ab") == "abd"
+    trie.remove("xyz")
+    trie.remove("")
+    assert trie.first_with_prefix("") == "abd"
+    trie.remove("abd")
+    assert trie.first_with_prefix("") is None
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_trie_same_as_scan(seed):
+    rnd = random.Random(seed)
+    trie = PrefixTrie()
+    keys = []
+    for _ in range(500):
+        key = "".join(rnd.choice("ab/") for _ in range(rnd.randint(0, 6)))
+        if key in keys:
+            trie.remove(key)
+            keys.remove(key)
+        else:
+            trie.add(key)
+            keys.append(key)
+
+        prefix = "".join(rnd.choice("ab/") for _ in range(rnd.randint(0, 4)))
+        assert trie.first_with_prefix(prefix) == scan(keys, prefix)
+
+
+def test_index_resolve():
+    index = IssuerIndex()
+    index.add("https://example.com/", KeyIssuer())
+    assert index.resolve("https://example.com") == "https://example.com/"
+    assert index.resolve("https://example.com/") == "https://example.com/"
+    assert index.resolve("https://example.org") is None
+
+    index.add("https://example.com", KeyIssuer())
+    assert index.resolve("https://example.com") == "https://example.com"
+    index.remove("https://example.com/")
+    assert index.resolve("https://example.com/") == "https://example.com"
+
+
+def test_index_sources():
+    _url = "https://example.com/jwks.json"
+    issuer = KeyIssuer()
+    issuer.add_kb(KeyBundle(source=_url))
+    index = IssuerIndex()
+    index.add("A", issuer)
+    index.add("B", issuer)
+    assert index.issuers_with_source(_url) == ["A", "B"]
+
+    index.add("A", KeyIssuer())
+    assert index.issuers_with_source(_url) == ["B"]
+    index.remove("B")
+    assert index.issuers_with_source(_url) == []
+    assert len(index) == 1
+    assert "A" in index
+
+
+def test_index_kids():
+    issuer = KeyIssuer()
+    issuer.add_kb(KeyBundle([{"kty": "oct", "k": "c2VjcmV0c2VjcmV0c2VjcmV0", "kid": "k1"}]))
+    index = IssuerIndex()
+    index.add("A", issuer)
+    index.add_sources("B", {None}, {"k1", "k2"})
+    assert index.issuers_with_kid("k1") == ["A", "B"]
+    assert index.issuers_with_kid("k2") == ["B"]
+
+    index.add_sources("B", {None}, {"k2"})
+    assert index.issuers_with_kid("k1") == ["A"]
+    index.remove("A")
+    assert index.issuers_with_kid("k1") == []
+    index.clear()
+    assert index.issuers_with_kid("k2") == []
@@ -1,3 +1,4 @@
+import json
 import os
 import shutil
 import time
@@ -405,6 +406,24 @@ KEYDEFS = [
 ]
 
 
+def test_serialized_jwks():
+    key_issuer = build_keyissuer(KEYDEFS)
+    _serialized = key_issuer.serialized_jwks()
+    assert key_issuer.serialized_jwks() is _serialized
+    assert key_issuer.export_jwks_as_json() == _serialized.json
+    assert json.loads(_serialized.json) == key_issuer.export_jwks()
+    assert key_issuer.serialized_jwks(private=True) is not _serialized
+    assert json.loads(key_issuer.serialized_jwks(usage="enc").json) == {"keys": []}
+
+    key_issuer.add_symmetric("a client secret that is long enough")
+    assert key_issuer.serialized_jwks() is not _serialized
+    assert len(json.loads(key_issuer.export_jwks_as_json())["keys"]) == 3
+
+    _serialized = key_issuer.serialized_jwks()
+    key_issuer.mark_as_inactive(key_issuer.all_keys()[0].kid)
+    assert len(json.loads(key_issuer.serialized_jwks().json)["keys"]) == 2
+
+
 def test_remove_after():
     # initial key_issuer
     key_issuer = build_keyissuer(KEYDEFS)
@@ -526,7 +545,7 @@ JWKS_SPO = {
 def test_load_spomky_keys():
     issuer = KeyIssuer()
     issuer.import_jwks(JWKS_SPO)
-    assert len(issuer) == 4
+    assert len(issuer) == 6
 
 
 def test_get_ec():
@@ -619,7 +619,7 @@ JWKS_SPO = {
 def test_load_spomky_keys():
     kj = KeyJar()
     kj.import_jwks(JWKS_SPO, "")
-    assert len(kj.get_issuer_keys("")) == 4
+    assert len(kj.get_issuer_keys("")) == 6
 
 
 def test_get_ec():
@@ -804,6 +804,118 @@ def test_match_owner():
         kj.match_owner("https://example.com")
 
 
+def test_match_owner_after_delete():
+    kj = KeyJar()
+    kj.add_kb("https://delphi.example.com/a", KeyBundle(JWK0["keys"]))
+    kj.add_kb("https://delphi.example.com/b", KeyBundle(JWK1["keys"]))
+    assert kj.match_owner("https://delphi.example.com") == "https://delphi.example.com/a"
+
+    del kj["https://delphi.example.com/a"]
+    assert kj.match_owner("https://delphi.example.com") == "https://delphi.example.com/b"
+    del kj["https://delphi.example.com/b"]
+    with pytest.raises(KeyError):
+        kj.match_owner("https://delphi.example.com")
+
+
+def test_get_trailing_slash():
+    kj = KeyJar()
+    kj.add_kb("https://delphi.example.com/", KeyBundle(JWK0["keys"]))
+    assert kj.get_verify_key(issuer_id="https://delphi.example.com")
+    assert kj.get_verify_key(issuer_id="https://delphi.example.com/")
+
+    del kj["https://delphi.example.com/"]
+    assert kj.get_verify_key(issuer_id="https://delphi.example.com") == []
+
+
+def test_find():
+    _url = "https://delphi.example.com/jwks.json"
+    kj = KeyJar()
+    kj.add_kb("A", KeyBundle(source=_url))
+    kj.add_kb("B", KeyBundle(JWK0["keys"]))
+    kj.add_url("C", _url)
+
+    res = kj.find(_url)
+    assert set(res.keys()) == {"A", "C"}
+    assert kj.find(_url, "C")[0].source == _url
+    assert kj.find("https://example.com/jwks.json") == {}
+
+    del kj["A"]
+    assert set(kj.find(_url).keys()) == {"C"}
+
+
+def test_find_after_set():
+    _url = "https://delphi.example.com/jwks.json"
+    kj = KeyJar()
+    kj.add_kb("A", KeyBundle(JWK0["keys"]))
+    _issuer = kj["A"]
+    _issuer.add_url(_url)
+    kj["A"] = _issuer
+    assert set(kj.find(_url).keys()) == {"A"}
+
+    _issuer.set([])
+    kj["A"] = _issuer
+    assert kj.find(_url) == {}
+
+
+def test_find_added_to_issuer():
+    _url = "https://delphi.example.com/jwks.json"
+    kj = KeyJar()
+    kj.add_kb("A", KeyBundle(JWK0["keys"]))
+    kb = KeyBundle(source=_url)
+    kj["A"].add_kb(kb)
+    assert kj.find(_url) == {"A": [kb]}
+    kj["A"].add_url("https://example.com/jwks.json")
+    assert set(kj.find("https://example.com/jwks.json").keys()) == {"A"}
+
+
+def test_index_after_load():
+    _url = "https://delphi.example.com/jwks.json"
+    kj = KeyJar()
+    kj.add_kb("https://delphi.example.com/", KeyBundle(JWK0["keys"]))
+    kj.add_url("https://delphi.example.com/", _url)
+
+    nkj = KeyJar().load(kj.dump())
+    assert nkj.match_owner("https://delphi") == "https://delphi.example.com/"
+    assert nkj.get_verify_key(issuer_id="https://delphi.example.com")
+    assert set(nkj.find(_url).keys()) == {"https://delphi.example.com/"}
+
+
+def test_index_storage():
+    kj = KeyJar()
+    kj.add_kb("https://delphi.example.com", KeyBundle(JWK0["keys"]))
+
+    nkj = KeyJar(storage=dict(kj.items()))
+    assert nkj.match_owner("https://delphi") == "https://delphi.example.com"
+    assert nkj.get_verify_key(issuer_id="https://delphi.example.com/")
+
+
+def test_get_key_by_thumbprint():
+    kj = KeyJar()
+    kj.add_kb("Alice", KeyBundle(JWK0["keys"]))
+    kj.add_kb("Bob", KeyBundle(JWK1["keys"]))
+    for key in kj.get_issuer_keys("Bob"):
+        _thumbprint = key.thumbprint("SHA-256")
+        assert kj.get_key_by_thumbprint(_thumbprint, "Bob") is key
+        assert kj.get_key_by_thumbprint(_thumbprint, "Alice") is None
+    assert kj.get_key_by_thumbprint(_thumbprint, "Carol") is None
+
+
+def test_serialized_jwks():
+    kj = KeyJar()
+    kj.add_kb("Alice", KeyBundle(JWK0["keys"]))
+    _serialized = kj.serialized_jwks(issuer_id="Alice")
+    assert kj.serialized_jwks(issuer_id="Alice") is _serialized
+    assert kj.export_jwks_as_json(issuer_id="Alice") == _serialized.json
+    assert json.loads(_serialized.json) == kj.export_jwks(issuer_id="Alice")
+    assert json.loads(kj.serialized_jwks(issuer_id="Bob").json) == {"keys": []}
+
+    kj.add_kb("Alice", KeyBundle(JWK1["keys"]))
+    assert kj.serialized_jwks(issuer_id="Alice") is not _serialized
+    assert json.loads(kj.export_jwks_as_json(issuer_id="Alice")) == kj.export_jwks(
+        issuer_id="Alice"
+    )
+
+
 def test_str():
     kj = KeyJar()
     kj.add_kb("Alice", KeyBundle(JWK0["keys"]))
@@ -1047,3 +1159,195 @@ def test_similar():
     keys1 = kj.get_issuer_keys(ISSUER)
     keys2 = kj[ISSUER].all_keys()
     assert keys1 == keys2
+
+
+def test_bounded_evict_and_reload():
+    kj = KeyJar(max_resident_issuers=2)
+    kj.add_kb("Alice", KeyBundle(JWK0["keys"]))
+    kj.add_kb("Bob", KeyBundle(JWK1["keys"]))
+    kj.add_kb("C", KeyBundle(JWK2["keys"]))
+
+    assert kj.issuer_stats() == {"issuers": 3, "resident": 2, "reloads": 0, "evictions": 1}
+    assert kj.owners() == ["Alice", "Bob", "C"]
+    assert "Alice" in kj
+    assert kj.issuer_stats()["reloads"] == 0
+
+    assert kj.get_verify_key("rsa", "Alice", kid="abc")
+    assert kj.issuer_stats() == {"issuers": 3, "resident": 2, "reloads": 1, "evictions": 2}
+    # Bob is now the least recently used
+    assert kj.get_issuer_keys("C")
+    assert kj.get_issuer_keys("Alice")
+    assert kj.issuer_stats()["reloads"] == 1
+    assert kj.get_issuer_keys("Bob")
+    assert kj.issuer_stats()["reloads"] == 2
+
+
+def test_bounded_keeps_changes():
+    _storage = {}
+    kj = KeyJar(max_resident_issuers=1, storage=_storage)
+    kj.add_kb("Alice", KeyBundle(JWK0["keys"]))
+    kj["Alice"].add_kb(KeyBundle(JWK2["keys"]))
+    kj.add_kb("Bob", KeyBundle(JWK1["keys"]))
+    assert set(_storage.keys()) == {"Alice"}
+
+    assert len(kj.get_issuer_keys("Alice")) == len(JWK0["keys"]) + len(JWK2["keys"])
+    assert set(_storage.keys()) == {"Alice", "Bob"}
+
+    del kj["Bob"]
+    assert set(_storage.keys()) == {"Alice"}
+    assert kj.owners() == ["Alice"]
+    assert kj.get_verify_key(issuer_id="Bob") == []
+
+
+def test_bounded_storage():
+    kj = KeyJar()
+    kj.add_kb("Alice", KeyBundle(JWK0["keys"]))
+    kj.add_kb("https://delphi.example.com/", KeyBundle(JWK2["keys"]))
+    _storage = {_id: _issuer.dump() for _id, _issuer in kj.items()}
+
+    nkj = KeyJar(max_resident_issuers=1, storage=_storage)
+    assert nkj.issuer_stats()["resident"] == 0
+    assert nkj.match_owner("https://delphi") == "https://delphi.example.com/"
+    assert nkj.get_verify_key(issuer_id="https://delphi.example.com")
+    assert nkj.issuer_stats()["reloads"] == 1
+
+
+def test_bounded_dump_load():
+    kj = KeyJar(max_resident_issuers=1)
+    kj.add_kb("Alice", KeyBundle(JWK0["keys"]))
+    kj.add_kb("Bob", KeyBundle(JWK1["keys"]))
+    kj.add_kb("C", KeyBundle(JWK2["keys"]))
+
+    res = kj.dump(exclude=["Bob"])
+    assert set(res["issuers"].keys()) == {"Alice", "C"}
+    assert kj.issuer_stats()["reloads"] == 0
+
+    nkj = KeyJar(max_resident_issuers=1).load(res)
+    assert nkj.issuer_stats() == {"issuers": 2, "resident": 0, "reloads": 0, "evictions": 0}
+    assert nkj.get_signing_key("rsa", "Alice", kid="abc")
+    assert nkj == KeyJar().load(res)
+
+
+def test_bounded_jwt_verify():
+    alice = build_keyjar(KEYDEFS)
+    _jws = JWS(json.dumps({"iss": "Alice"}), alg="RS256")
+    _token = _jws.sign_compact(alice.get_signing_key("RSA"))
+
+    kj = KeyJar(max_resident_issuers=2)
+    kj.import_jwks(alice.export_jwks(), "Alice")
+    for i in range(5):
+        kj.add_kb("issuer{}".format(i), KeyBundle(JWK0["keys"]))
+
+    keys = kj.get_jwt_verify_keys(factory(_token).jwt)
+    assert len(keys) == 1
+    assert JWS().verify_compact(_token, keys)
+    assert kj.issuer_stats()["reloads"] == 1
+
+
+def test_bounded_copy():
+    kj = KeyJar(max_resident_issuers=1)
+    kj.add_kb("Alice", KeyBundle(JWK0["keys"]))
+    kj.add_kb("Bob", KeyBundle(JWK1["keys"]))
+
+    kjc = kj.copy()
+    assert kjc.issuer_stats()["resident"] == 1
+    assert kjc == kj
+
+
+class CountingStorage(dict):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def __setitem__(self, key, value):
+        self.writes += 1
+        super().__setitem__(key, value)
+
+
+def test_bounded_unchanged_not_written():
+    _storage = CountingStorage()
+    kj = KeyJar(max_resident_issuers=1, storage=_storage)
+    kj.add_kb("Alice", KeyBundle(JWK0["keys"]))
+    kj.add_kb("Bob", KeyBundle(JWK1["keys"]))
+    assert _storage.writes == 1
+
+    for _ in range(3):
+        kj.get_issuer_keys("Alice")
+        kj.get_issuer_keys("Bob")
+    # Only Bob's first eviction
+    assert _storage.writes == 2
+
+
+def test_bounded_eviction_never_updates(monkeypatch):
+    kj = KeyJar()
+    kj.add_kb("Alice", KeyBundle(JWK0["keys"]))
+    _alice = kj.dump()["issuers"]["Alice"]
+    # A remote bundle that is due for an update
+    _alice["bundles"][0].update({"source": "https://alice.example.com/jwks", "remote": True})
+
+    def _update(self):
+        raise AssertionError("Updated while evicting")
+
+    monkeypatch.setattr(KeyBundle, "update", _update)
+    kj = KeyJar(max_resident_issuers=1, storage={"Alice": _alice})
+    assert kj["Alice"]
+    kj.add_kb("Bob", KeyBundle(JWK1["keys"]))
+    assert kj["Alice"]
+    assert kj.issuer_stats() == {"issuers": 2, "resident": 1, "reloads": 2, "evictions": 2}
+
+
+def test_issuers_with_kid():
+    kj = KeyJar()
+    kj.add_kb("Alice", KeyBundle(JWK0["keys"]))
+    kj.add_kb("C", KeyBundle(JWK2["keys"]))
+    assert kj.issuers_with_kid("abc") == ["Alice"]
+    assert kj.issuers_with_kid("MnC_VZcATfM5pOYiJHMba9goEKY") == ["C"]
+
+    kj["C"].add_kb(KeyBundle(JWK0["keys"]))
+    assert kj.issuers_with_kid("abc") == ["Alice"]
+    kj.update_index()
+    assert kj.issuers_with_kid("abc") == ["Alice", "C"]
+    del kj["Alice"]
+    assert kj.issuers_with_kid("abc") == ["C"]
+
+
+def test_bounded_issuers_with_kid():
+    kj = KeyJar(max_resident_issuers=1)
+    kj.add_kb("Alice", KeyBundle(JWK0["keys"]))
+    kj["Alice"].add_kb(KeyBundle(JWK2["keys"]))
+    kj.add_kb("Bob", KeyBundle(JWK1["keys"]))
+    # Indexed again when evicted
+    assert kj.issuers_with_kid("MnC_VZcATfM5pOYiJHMba9goEKY") == ["Alice"]
+
+    nkj = KeyJar(max_resident_issuers=1).load(kj.dump())
+    assert nkj.issuers_with_kid("abc") == ["Alice"]
+    nkj.update_index()
+    assert nkj.issuers_with_kid("abc") == ["Alice"]
+    assert nkj.issuer_stats()["reloads"] == 0
+
+
+def test_shared_storage():
+    _storage = {}
+    kj1 = KeyJar(storage=_storage)
+    kj2 = KeyJar(storage=_storage)
+    kj1.add_kb("https://delphi.example.com/", KeyBundle(JWK2["keys"]))
+
+    assert "https://delphi.example.com/" in kj2
+    assert kj2.match_owner("https://delphi") == "https://delphi.example.com/"
+    assert kj2.get_verify_key(issuer_id="https://delphi.example.com")
+    assert "https://other.example.com" not in kj2
+
+
+def test_bounded_shared_storage():
+    _storage = {}
+    kj1 = KeyJar(max_resident_issuers=1, storage=_storage)
+    kj2 = KeyJar(max_resident_issuers=1, storage=_storage)
+    kj1.add_kb("https://delphi.example.com/", KeyBundle(JWK2["keys"]))
+    # Written to the storage when evicted
+    kj1.add_kb("Alice", KeyBundle(JWK0["keys"]))
+
+    assert kj2.match_owner("https://delphi") == "https://delphi.example.com/"
+    assert kj2.get_verify_key(issuer_id="https://delphi.example.com")
+    assert "https://delphi.example.com/" in kj2
+    assert kj2.issuers_with_kid("MnC_VZcATfM5pOYiJHMba9goEKY") == ["https://delphi.example.com/"]
+    assert "Alice" not in kj2
@@ -1,17 +1,25 @@
 from __future__ import print_function
 
+import copy
+import io
 import json
 import os.path
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import ec
 
 from cryptojwt.exception import BadSignature
 from cryptojwt.exception import UnknownAlgorithm
+from cryptojwt.exception import Unsupported
 from cryptojwt.exception import WrongNumberOfParts
 from cryptojwt.jwk.ec import ECKey
+from cryptojwt.jwk.ec import new_ec_key
 from cryptojwt.jwk.hmac import SYMKey
+from cryptojwt.jwk.okp import OKPKey
+from cryptojwt.jwk.okp import new_okp_key
 from cryptojwt.jwk.rsa import RSAKey
 from cryptojwt.jwk.rsa import import_private_rsa_key_from_file
 from cryptojwt.jws.exception import FormatError
@@ -22,6 +30,7 @@ from cryptojwt.jws.jws import SIGNER_ALGS
 from cryptojwt.jws.jws import JWSig
 from cryptojwt.jws.jws import factory
 from cryptojwt.jws.rsa import RSASigner
+from cryptojwt.jws.utils import KeyMRU
 from cryptojwt.jws.utils import left_hash
 from cryptojwt.jws.utils import parse_rsa_algorithm
 from cryptojwt.key_bundle import KeyBundle
@@ -290,6 +299,27 @@ def test_hmac_from_keyrep():
     assert info == payload
 
 
+def test_hmac_cached_context():
+    payload = b"Please take a moment to register today"
+    key = SYMKey(key=b"My hollow echo chamber", alg="HS256")
+    signer = SIGNER_ALGS["HS256"]
+
+    sig = signer.sign(payload, key)
+    assert sig == signer.sign(payload, key.key)
+    assert signer.verify(payload, sig, key)
+    # The cached context is reused
+    assert key.hmac_context(hashes.SHA256) is key.hmac_context(hashes.SHA256)
+
+    # and rebuilt when the key changes
+    key.key = b"Another hollow echo chamber"
+    assert signer.verify(payload, sig, key) is False
+    assert signer.sign(payload, key) == signer.sign(payload, key.key)
+
+    _key = copy.deepcopy(key)
+    assert _key == key
+    assert signer.sign(payload, _key) == signer.sign(payload, key)
+
+
 def test_left_hash_hs256():
     hsh = left_hash("Please take a moment to register today")
     assert hsh == "rCFHVJuxTqRxOsn2IUzgvA"
@@ -944,3 +974,271 @@ def test_verify_json_missing_key():
 
     # With both
     assert JWS().verify_json(_jwt, keys=[vkeys[0], sym_key])
+
+
+def _multi_signed_json():
+    ec_key = ECKey(kid="ec").load_key(P256())
+    sym_key = SYMKey(key=b"My hollow echo chamber", alg="HS384", kid="sym")
+    _jwt = JWS(msg="hello world").sign_json(
+        headers=[({"alg": "ES256"}, {"kid": "ec"}), ({"alg": "HS384"}, {"kid": "sym"})],
+        keys=[ec_key, sym_key],
+    )
+    return _jwt, ECKey(kid="ec").load_key(ec_key.public_key()), sym_key
+
+
+def test_verify_json_executor():
+    _jwt, ec_key, sym_key = _multi_signed_json()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        _jws = JWS()
+        assert _jws.verify_json(_jwt, keys=[ec_key, sym_key], executor=executor) == "hello world"
+        assert _jws.jwt.headers["alg"] == "ES256"
+
+        with pytest.raises(NoSuitableSigningKeys):
+            JWS().verify_json(_jwt, keys=[sym_key], executor=executor)
+
+        assert JWS().verify_json(_jwt, keys=[sym_key], at_least_one=True, executor=executor)
+
+
+def test_verify_json_bad_signature():
+    _jwt, ec_key, sym_key = _multi_signed_json()
+    _jwss = json.loads(_jwt)
+    _jwss["signatures"][1]["signature"] = _jwss["signatures"][0]["signature"]
+    _bad = json.dumps(_jwss)
+
+    with pytest.raises(BadSignature):
+        JWS().verify_json(_bad, keys=[ec_key, sym_key])
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        with pytest.raises(BadSignature):
+            JWS().verify_json(_bad, keys=[ec_key, sym_key], executor=executor)
+
+
+def test_verify_json_at_least_one_early_exit():
+    _jwt, ec_key, sym_key = _multi_signed_json()
+    _jwss = json.loads(_jwt)
+    # Second signature broken, never looked at since the first one verifies
+    _jwss["signatures"][1]["signature"] = _jwss["signatures"][0]["signature"]
+    _bad = json.dumps(_jwss)
+
+    _jws = JWS()
+    assert _jws.verify_json(_bad, keys=[ec_key, sym_key], at_least_one=True) == "hello world"
+    assert _jws.jwt.headers["alg"] == "ES256"
+
+
+@pytest.mark.parametrize("bad", [0, 1])
+def test_verify_json_at_least_one_mixed(bad):
+    _jwt, ec_key, sym_key = _multi_signed_json()
+    _jwss = json.loads(_jwt)
+    _jwss["signatures"][bad]["signature"] = _jwss["signatures"][1 - bad]["signature"]
+    _mixed = json.dumps(_jwss)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        for _executor in [None, executor] * 5:
+            if bad == 0:
+                with pytest.raises(BadSignature):
+                    JWS().verify_json(
+                        _mixed, keys=[ec_key, sym_key], at_least_one=True, executor=_executor
+                    )
+            else:
+                assert JWS().verify_json(
+                    _mixed, keys=[ec_key, sym_key], at_least_one=True, executor=_executor
+                )
+
+
+def test_signer_eddsa():
+    # RFC 8037, Appendix A.4
+    _key = OKPKey(
+        crv="Ed25519",
+        d="nWGxne_9WmC6hEr0kuwsxERJxWl7MmkZcDusAxyuf2A",
+        x="11qYAYKxCrfVS_7TyWQHOg7hcvPapiMlrwIaaPcHURo",
+    )
+    _jws = (
+        "eyJhbGciOiJFZERTQSJ9.RXhhbXBsZSBvZiBFZDI1NTE5IHNpZ25pbmc.hgyY0il_MGCjP0JzlnLWG1PPOt7"
+        "-09PGcvMg3AIbQR6dWbhijcNR4ki4iylGjg5BhVsPt9g7sVvpAr_MuM0KAg"
+    )
+    _pub = OKPKey(crv="Ed25519", x=_key.x)
+    info = JWS(alg="EdDSA").verify_compact(_jws, [_pub])
+    assert info == "Example of Ed25519 signing"
+
+    _signer = SIGNER_ALGS["EdDSA"]
+    _input = _jws.rsplit(".", 1)[0].encode()
+    assert b64e(_signer.sign(_input, _key.priv_key)) == _jws.rsplit(".", 1)[1].encode()
+
+
+@pytest.mark.parametrize("crv", ["Ed25519", "Ed448"])
+def test_signer_eddsa_roundtrip(crv):
+    payload = "Please take a moment to register today"
+    _key = new_okp_key(crv=crv)
+    _jws = JWS(payload, alg="EdDSA")
+    _jwt = _jws.sign_compact([_key])
+
+    _pub = OKPKey(**_key.serialize())
+    _rj = JWS(alg="EdDSA")
+    info = _rj.verify_compact(_jwt, [_pub])
+    assert info == payload
+
+
+def test_signer_eddsa_fail():
+    payload = "Please take a moment to register today"
+    _key = new_okp_key()
+    _jwt = JWS(payload, alg="EdDSA").sign_compact([_key])
+
+    _jwt = _jwt[:-6] + "abcdef"
+    with pytest.raises(BadSignature):
+        JWS(alg="EdDSA").verify_compact(_jwt, [_key])
+
+
+def test_signer_eddsa_wrong_curve():
+    payload = "Please take a moment to register today"
+    _key = new_okp_key(crv="X25519")
+    with pytest.raises(TypeError):
+        JWS(payload, alg="EdDSA").sign_compact([_key])
+
+
+def test_key_mru_no_kid():
+    payload = json.dumps({"iss": "https://example.com", "sub": "subject"})
+    keys = [new_ec_key(crv="P-256") for _ in range(5)]
+    for key in keys:
+        key.kid = ""
+    signing_key = keys[3]
+    _jwt = JWS(payload, alg="ES256").sign_compact([signing_key])
+
+    mru = KeyMRU()
+    _rj = JWS(alg="ES256", key_mru=mru)
+    _rj.verify_compact(_jwt, keys)
+    assert _rj.key_trials == 4
+
+    # Next time the key that worked is tried first
+    _rj = JWS(alg="ES256", key_mru=mru)
+    _rj.verify_compact(_jwt, keys)
+    assert _rj.key_trials == 1
+
+    # Without the tracker the list order is used
+    _rj = JWS(alg="ES256")
+    _rj.verify_compact(_jwt, keys)
+    assert _rj.key_trials == 4
+
+
+def test_max_key_trials():
+    payload = "Please take a moment to register today"
+    keys = [new_ec_key(crv="P-256") for _ in range(5)]
+    for key in keys:
+        key.kid = ""
+    _jwt = JWS(payload, alg="ES256").sign_compact([keys[3]])
+
+    _rj = JWS(alg="ES256", max_key_trials=2)
+    with pytest.raises(BadSignature):
+        _rj.verify_compact(_jwt, keys)
+    assert _rj.key_trials == 2
+
+    _rj = JWS(alg="ES256", max_key_trials=4)
+    assert _rj.verify_compact(_jwt, keys) == payload
+
+
+def test_key_mru_order():
+    keys = [SYMKey(key="My hollow echo chamber {}".format(i).encode()) for i in range(3)]
+    mru = KeyMRU(max_entries=1)
+    assert mru.order(keys, "iss", "HS256") == keys
+
+    mru.update("iss", "HS256", keys[2])
+    assert mru.order(keys, "iss", "HS256") == [keys[2], keys[0], keys[1]]
+    assert mru.order(keys, "iss", "HS384") == keys
+    assert mru.order(keys, "other", "HS256") == keys
+
+    # Only room for one entry
+    mru.update("other", "HS256", keys[1])
+    assert mru.order(keys, "iss", "HS256") == keys
+
+
+# RFC 7797 section 4
+RFC7797_KEY = SYMKey(
+    k="AyM1SysPpbyDfgZld3umj1qzKObwVMkoqQ-EstJQLr_T-1qS0gZH75aKtMN3Yj0iPS4hcgUuTwjAzZr1Z9CAow"
+)
+
+
+def test_rfc7797_unencoded_detached():
+    _jws = JWS("$.02", alg="HS256", b64=False).sign_compact([RFC7797_KEY], detached=True)
+    assert _jws == (
+        "eyJhbGciOiJIUzI1NiIsImI2NCI6ZmFsc2UsImNyaXQiOlsiYjY0Il19"
+        "..A5dxf2s96_n5FLueVuW1Z_vh161FwXZC4YLPff6dmDY"
+    )
+
+    info = JWS(alg="HS256").verify_compact(_jws, [RFC7797_KEY], detached_payload="$.02")
+    assert info == "$.02"
+
+    with pytest.raises(BadSignature):
+        JWS(alg="HS256").verify_compact(_jws, [RFC7797_KEY], detached_payload="$.03")
+
+
+def test_rfc7797_encoded_detached():
+    _jws = JWS("$.02", alg="HS256").sign_compact([RFC7797_KEY], detached=True)
+    assert _jws == ("eyJhbGciOiJIUzI1NiJ9..5mvfOroL-g7HyqJoozehmsaqmvTYGEq5jTI1gVvoEoQ")
+    info = JWS(alg="HS256").verify_compact(_jws, [RFC7797_KEY], detached_payload="$.02")
+    assert info == "$.02"
+
+
+def test_unencoded_compact():
+    payload = "Please take a moment to register today"
+    _key = ECKey().load_key(P256())
+    _jws = JWS(payload, alg="ES256", b64=False).sign_compact([_key])
+    assert _jws.split(".")[1] == payload
+
+    _verifier = factory(_jws)
+    assert _verifier.jwt.headers["crit"] == ["b64"]
+    assert _verifier.verify_compact(_jws, [_key]) == payload
+
+    # A '.' in the payload can not be handled
+    with pytest.raises(ValueError):
+        JWS("$.02", alg="ES256", b64=False).sign_compact([_key])
+
+
+def test_unencoded_missing_crit():
+    _jws = JWS("$.02", alg="HS256", b64=False).sign_compact([RFC7797_KEY], detached=True)
+    _hdr = b64e(b'{"alg":"HS256","b64":false}').decode()
+    _jws = ".".join([_hdr] + _jws.split(".")[1:])
+    with pytest.raises(FormatError):
+        JWS(alg="HS256").verify_compact(_jws, [RFC7797_KEY], detached_payload="$.02")
+
+
+def test_detached_payload_json():
+    _key = SYMKey(key=b"My hollow echo chamber", alg="HS384")
+    _jwt = JWS(msg="$.02").sign_json(
+        headers=[({"alg": "HS384", "b64": False}, None)], keys=[_key], detached=True
+    )
+    assert "payload" not in json.loads(_jwt)
+    assert JWS().verify_json(_jwt, keys=[_key], detached_payload="$.02") == "$.02"
+
+    _jwt = JWS(msg="$.02").sign_json(headers=[({"alg": "HS384", "b64": False}, None)], keys=[_key])
+    assert json.loads(_jwt)["payload"] == "$.02"
+    assert JWS().verify_json(_jwt, keys=[_key]) == "$.02"
+
+
+@pytest.mark.parametrize("alg", ["HS256", "RS256", "PS384", "ES256", "ES512"])
+@pytest.mark.parametrize("b64", [True, False])
+def test_sign_verify_stream(alg, b64):
+    if alg.startswith("HS"):
+        _key = SYMKey(key=b"My hollow echo chamber")
+    elif alg.startswith("ES"):
+        _key = new_ec_key(crv="P-{}".format(alg[2:]).replace("512", "521"))
+    else:
+        _key = RSAKey(priv_key=import_private_rsa_key_from_file(full_path("./size2048.key")))
+
+    content = os.urandom(200000)
+    _signer = JWS(alg=alg, b64=b64)
+    _jws = _signer.sign_stream(io.BytesIO(content), [_key], chunk_size=1000)
+    # Same as signing it all in one go
+    info = JWS(alg=alg).verify_compact(_jws, [_key], detached_payload=content)
+    assert info
+
+    _verifier = JWS(alg=alg)
+    assert _verifier.verify_stream(_jws, io.BytesIO(content), [_key], chunk_size=4096)
+    assert _verifier.key == _key
+
+    with pytest.raises(BadSignature):
+        JWS(alg=alg).verify_stream(_jws, io.BytesIO(content[:-1]), [_key])
+
+
+def test_sign_stream_eddsa_unsupported():
+    with pytest.raises(Unsupported):
+        JWS(alg="EdDSA").sign_stream(io.BytesIO(b"content"), [new_okp_key()])
@@ -1,37 +1,59 @@
 # from __future__ import print_function
 import array
+import copy
 import hashlib
+import io
+import json
 import os
 import random
 import string
 import sys
+import time
+import zlib
 
 import pytest
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 from cryptojwt.exception import BadSyntax
 from cryptojwt.exception import HeaderError
 from cryptojwt.exception import MissingKey
 from cryptojwt.exception import Unsupported
+from cryptojwt.exception import UnsupportedECurve
 from cryptojwt.exception import VerificationError
+from cryptojwt.exception import WrongNumberOfParts
+from cryptojwt.jwe import KEY_LEN_BYTES
+from cryptojwt.jwe import epk_pool
 from cryptojwt.jwe.aes import AES_CBCEncrypter
 from cryptojwt.jwe.aes import AES_GCMEncrypter
+from cryptojwt.jwe.aes import aead_context
+from cryptojwt.jwe.epk_pool import EphemeralKeyPool
+from cryptojwt.jwe.epk_pool import new_ephemeral_key
+from cryptojwt.jwe.exception import DecompressionLimitExceeded
+from cryptojwt.jwe.exception import DecryptionFailed
 from cryptojwt.jwe.exception import NoSuitableDecryptionKey
 from cryptojwt.jwe.exception import NoSuitableEncryptionKey
+from cryptojwt.jwe.exception import ParameterError
 from cryptojwt.jwe.exception import UnsupportedBitLength
 from cryptojwt.jwe.exception import WrongEncryptionAlgorithm
 from cryptojwt.jwe.jwe import JWE
 from cryptojwt.jwe.jwe import factory
 from cryptojwt.jwe.jwe_ec import JWE_EC
+from cryptojwt.jwe.jwe_hmac import JWE_DIR
 from cryptojwt.jwe.jwe_hmac import JWE_SYM
 from cryptojwt.jwe.jwe_rsa import JWE_RSA
+from cryptojwt.jwe.utils import deflate
+from cryptojwt.jwe.utils import inflate
 from cryptojwt.jwe.utils import split_ctx_and_tag
 from cryptojwt.jwk.ec import ECKey
 from cryptojwt.jwk.hmac import SYMKey
 from cryptojwt.jwk.rsa import RSAKey
 from cryptojwt.jwk.rsa import import_private_rsa_key_from_file
 from cryptojwt.utils import as_bytes
+from cryptojwt.utils import as_unicode
+from cryptojwt.utils import b64d
 from cryptojwt.utils import b64e
 
 __author__ = "rohe0002"
@@ -328,6 +350,65 @@ def test_aes_cbc_missing_decrypt_key():
         encrypter.decrypt(ctx, iv=encrypter.iv, tag=b"12346567890")
 
 
+@pytest.mark.parametrize("size", [0, 1, 15, 16, 17, 1000])
+def test_aes_cbc_context(size):
+    key = os.urandom(32)
+    iv = os.urandom(16)
+    msg = os.urandom(size)
+    _ctx = aead_context("A128CBC-HS256", key)
+    ctxt, tag = _ctx.encrypt(msg, iv, b"aad")
+    assert _ctx.decrypt(ctxt, iv, b"aad", tag) == msg
+    # The context can be used again
+    ctxt, tag = _ctx.encrypt(b"again", iv)
+    assert _ctx.decrypt(ctxt, iv, b"", tag) == b"again"
+
+
+@pytest.mark.parametrize("size", [0, 1, 1000])
+def test_aes_gcm_context(size):
+    key = os.urandom(16)
+    iv = os.urandom(12)
+    msg = os.urandom(size)
+    _ctx = aead_context("A128GCM", key)
+    ctxt, tag = _ctx.encrypt(msg, iv, b"aad")
+    assert bytes(ctxt) + bytes(tag) == AESGCM(key).encrypt(iv, msg, b"aad")
+    assert _ctx.decrypt(ctxt, iv, b"aad", tag) == msg
+    with pytest.raises(VerificationError):
+        _ctx.decrypt(ctxt, iv, b"other", tag)
+
+
+def test_aes_cbc_context_wrong_tag():
+    _ctx = aead_context("A128CBC-HS256", os.urandom(32))
+    iv = os.urandom(16)
+    ctxt, tag = _ctx.encrypt(b"Murder must advertise.", iv)
+    with pytest.raises(VerificationError):
+        _ctx.decrypt(ctxt, iv, b"", b"12346567890")
+
+
+def test_symkey_aead_context():
+    key = SYMKey(key=os.urandom(32))
+    assert key.aead_context("A256GCM") is key.aead_context("A256GCM")
+    assert key.aead_context("A256GCM") is not key.aead_context("A128CBC-HS256")
+
+    _ctx = key.aead_context("A256GCM")
+    key.key = os.urandom(32)
+    assert key.aead_context("A256GCM") is not _ctx
+    # Not shared with copies
+    assert copy.copy(key).aead_context("A256GCM") is not key.aead_context("A256GCM")
+
+
+def test_dir_uses_key_context():
+    _key = SYMKey(key=os.urandom(32), kid="dir")
+    token = JWE(plain, alg="dir", enc="A256GCM").encrypt([_key])
+    assert list(_key._aead_ctx.keys()) == ["A256GCM"]
+    _ctx = _key.aead_context("A256GCM")
+    assert JWE().decrypt(token, [_key]) == plain
+    assert _key.aead_context("A256GCM") is _ctx
+
+    token = JWE(plain, alg="dir", enc="A256GCM").encrypt_json([_key])
+    assert JWE().decrypt_json(token, [_key]) == plain
+    assert _key.aead_context("A256GCM") is _ctx
+
+
 BASEDIR = os.path.abspath(os.path.dirname(__file__))
 
 
@@ -643,3 +724,452 @@ def test_invalid():
     decrypter = JWE(plain, alg="A128KW", enc="A128CBC-HS256")
     with pytest.raises(BadSyntax):
         decrypter.decrypt("a.b.c.d.e", keys=[encryption_key])
+
+
+STREAM_CASES = [
+    ("RSA-OAEP", "A256GCM", RSAKey(pub_key=pub_key), RSAKey(priv_key=priv_key)),
+    ("RSA1_5", "A128CBC-HS256", RSAKey(pub_key=pub_key), RSAKey(priv_key=priv_key)),
+    ("A128KW", "A256CBC-HS512", SYMKey(key=b"0123456789abcdef"), SYMKey(key=b"0123456789abcdef")),
+    ("ECDH-ES", "A192GCM", ECKey().load_key(bob.public_key()), eck_bob),
+    ("ECDH-ES+A128KW", "A192CBC-HS384", ECKey().load_key(bob.public_key()), eck_bob),
+]
+
+
+@pytest.mark.parametrize("alg,enc,ekey,dkey", STREAM_CASES)
+def test_encrypt_decrypt_stream(alg, enc, ekey, dkey):
+    content = os.urandom(10000)
+    dst = io.BytesIO()
+    written = JWE(alg=alg, enc=enc).encrypt_stream(io.BytesIO(content), dst, [ekey], chunk_size=7)
+    token = dst.getvalue()
+    assert written == len(token)
+
+    # Compatible with the non streaming API
+    assert JWE().decrypt(token, [dkey]) == content
+
+    out = io.BytesIO()
+    assert JWE().decrypt_stream(io.BytesIO(token), out, [dkey], chunk_size=5) == len(content)
+    assert out.getvalue() == content
+
+
+@pytest.mark.parametrize("alg,enc,ekey,dkey", STREAM_CASES)
+def test_decrypt_stream_compact_jwe(alg, enc, ekey, dkey):
+    token = JWE(plain, alg=alg, enc=enc).encrypt([ekey])
+    out = io.BytesIO()
+    JWE().decrypt_stream(io.BytesIO(token.encode()), out, [dkey])
+    assert out.getvalue() == plain
+
+
+ZIP_CASES = STREAM_CASES + [
+    ("dir", "A128GCM", SYMKey(key=b"0123456789abcdef"), SYMKey(key=b"0123456789abcdef")),
+]
+
+
+@pytest.mark.parametrize("alg,enc,ekey,dkey", ZIP_CASES)
+def test_encrypt_decrypt_zip(alg, enc, ekey, dkey):
+    content = json.dumps({"sub": "foo", "scope": ["openid"] * 100}).encode()
+    token = JWE(content, alg=alg, enc=enc, zip="DEF").encrypt([ekey])
+    assert len(token) < len(content)
+    assert JWE().decrypt(token, [dkey]) == content
+
+    _decrypter = JWE(zip_max_size=len(content) - 1)
+    with pytest.raises(DecompressionLimitExceeded):
+        _decrypter.decrypt(token, [dkey])
+
+
+def test_zip_level():
+    content = json.dumps({"claims": list(range(1000))}).encode()
+    _key = SYMKey(key=b"0123456789abcdef")
+    stored = JWE(content, alg="A128KW", enc="A128GCM", zip="DEF", zip_level=0).encrypt([_key])
+    best = JWE(content, alg="A128KW", enc="A128GCM", zip="DEF", zip_level=9).encrypt([_key])
+    assert len(best) < len(stored)
+    assert JWE().decrypt(stored, [_key]) == content
+
+
+def test_zip_unknown_value():
+    _key = SYMKey(key=b"0123456789abcdef")
+    with pytest.raises(ParameterError):
+        JWE(plain, alg="A128KW", enc="A128GCM", zip="GZIP").encrypt([_key])
+
+
+def test_inflate():
+    content = b"x" * 10000
+    assert inflate(deflate(content)) == content
+    # zlib format, as produced by earlier versions
+    assert inflate(zlib.compress(content)) == content
+    assert inflate(deflate(content), max_size=10000) == content
+    with pytest.raises(DecompressionLimitExceeded):
+        inflate(deflate(content), max_size=9999)
+
+
+def test_encrypt_decrypt_stream_zip():
+    content = b"a" * 100000
+    _key = SYMKey(key=b"0123456789abcdef")
+    dst = io.BytesIO()
+    JWE(alg="A128KW", enc="A128GCM", zip="DEF").encrypt_stream(io.BytesIO(content), dst, [_key])
+    assert len(dst.getvalue()) < 1000
+
+    out = io.BytesIO()
+    JWE().decrypt_stream(io.BytesIO(dst.getvalue()), out, [_key])
+    assert out.getvalue() == content
+
+    with pytest.raises(DecompressionLimitExceeded):
+        JWE(zip_max_size=50000).decrypt_stream(io.BytesIO(dst.getvalue()), io.BytesIO(), [_key])
+
+
+@pytest.mark.parametrize("enc", ["A128GCM", "A128CBC-HS256"])
+def test_decrypt_stream_tampered(enc):
+    _key = SYMKey(key=b"0123456789abcdef")
+    dst = io.BytesIO()
+    JWE(alg="A128KW", enc=enc).encrypt_stream(io.BytesIO(os.urandom(1000)), dst, [_key])
+    parts = dst.getvalue().split(b".")
+    _ct = bytearray(b64d(parts[3]))
+    _ct[100] ^= 1
+    parts[3] = b64e(bytes(_ct))
+
+    out = io.BytesIO()
+    with pytest.raises(DecryptionFailed):
+        JWE().decrypt_stream(io.BytesIO(b".".join(parts)), out, [_key])
+    # Nothing is released before the authentication tag has been verified
+    assert out.getvalue() == b""
+
+
+def test_decrypt_stream_wrong_key():
+    dst = io.BytesIO()
+    JWE(alg="A128KW", enc="A128GCM").encrypt_stream(
+        io.BytesIO(plain), dst, [SYMKey(key=b"0123456789abcdef")]
+    )
+    with pytest.raises(DecryptionFailed):
+        JWE().decrypt_stream(
+            io.BytesIO(dst.getvalue()), io.BytesIO(), [SYMKey(key=b"fedcba9876543210")]
+        )
+
+
+def test_decrypt_stream_wrong_number_of_parts():
+    _key = SYMKey(key=b"0123456789abcdef")
+    dst = io.BytesIO()
+    JWE(alg="A128KW", enc="A128GCM").encrypt_stream(io.BytesIO(plain), dst, [_key])
+
+    with pytest.raises(WrongNumberOfParts):
+        JWE().decrypt_stream(io.BytesIO(dst.getvalue() + b".AAAA"), io.BytesIO(), [_key])
+    with pytest.raises(WrongNumberOfParts):
+        JWE().decrypt_stream(io.BytesIO(dst.getvalue().rsplit(b".", 1)[0]), io.BytesIO(), [_key])
+
+
+def test_decrypt_json_rfc7516_a5():
+    # RFC 7516 Appendix A.5, Flattened JWE JSON Serialization
+    token = json.dumps(
+        {
+            "protected": "eyJlbmMiOiJBMTI4Q0JDLUhTMjU2In0",
+            "unprotected": {"jku": "https://server.example.com/keys.jwks"},
+            "header": {"alg": "A128KW", "kid": "7"},
+            "encrypted_key": "6KB707dM9YTIgHtLvtgWQ8mKwboJW3of9locizkDTHzBC2IlrT1oOQ",
+            "iv": "AxY8DCtDaGlsbGljb3RoZQ",
+            "ciphertext": "KDlTtXchhZTGufMYmOYGS4HffxPSUrfmqCHXaI9wOGY",
+            "tag": "Mz-VPPyU4RlcuYv1IwIvzw",
+        }
+    )
+    _key = SYMKey(key=b64d(b"GawgguFyGrWKav7AX4VKUg"), kid="7")
+    assert JWE().decrypt_json(token, [_key]) == b"Live long and prosper."
+
+
+def test_encrypt_decrypt_json_many_recipients():
+    rsa_key = RSAKey(priv_key=priv_key, kid="rsa")
+    sym_key = SYMKey(key=b"0123456789abcdef", kid="sym", alg="A128KW")
+    ec_key = ECKey(priv_key=bob, kid="ec", alg="ECDH-ES+A256KW")
+
+    token = JWE(plain, alg="RSA-OAEP", enc="A256GCM").encrypt_json(
+        [rsa_key, sym_key, ec_key], aad=b"extra", unprotected={"cty": "text/plain"}
+    )
+    _jwe = json.loads(token)
+    assert [r["header"]["alg"] for r in _jwe["recipients"]] == [
+        "RSA-OAEP",
+        "A128KW",
+        "ECDH-ES+A256KW",
+    ]
+    # Content is encrypted once
+    assert set(_jwe.keys()) == {
+        "protected",
+        "unprotected",
+        "aad",
+        "recipients",
+        "iv",
+        "ciphertext",
+        "tag",
+    }
+
+    for _key in [rsa_key, sym_key, ec_key]:
+        assert JWE().decrypt_json(token, [_key]) == plain
+
+    with pytest.raises(DecryptionFailed):
+        JWE().decrypt_json(token, [SYMKey(key=b"fedcba9876543210", kid="sym")])
+
+    _jwe["aad"] = as_unicode(b64e(b"other"))
+    with pytest.raises(DecryptionFailed):
+        JWE().decrypt_json(json.dumps(_jwe), [sym_key])
+
+
+def test_encrypt_decrypt_json_flattened():
+    _key = SYMKey(key=b"0123456789abcdef", kid="sym")
+    token = JWE(plain, alg="A128KW", enc="A128CBC-HS256", zip="DEF").encrypt_json([_key])
+    _jwe = json.loads(token)
+    assert "recipients" not in _jwe
+    assert _jwe["header"] == {"alg": "A128KW", "kid": "sym"}
+    assert JWE().decrypt_json(token, [_key]) == plain
+
+    token = JWE(plain, alg="A128KW", enc="A128CBC-HS256").encrypt_json([_key], flatten=False)
+    assert len(json.loads(token)["recipients"]) == 1
+    assert JWE().decrypt_json(token, [_key]) == plain
+
+    with pytest.raises(WrongEncryptionAlgorithm):
+        JWE().decrypt_json(token, [_key], alg="RSA-OAEP")
+
+
+@pytest.mark.parametrize(
+    "part,header",
+    [
+        ("unprotected", {"enc": "A128CBC-HS256"}),
+        ("unprotected", {"zip": "DEF"}),
+        ("header", {"enc": "A256GCM"}),
+        ("header", {"zip": "DEF"}),
+        ("header", {"cty": "text/plain"}),
+    ],
+)
+def test_decrypt_json_header_not_disjoint(part, header):
+    _key = SYMKey(key=b"0123456789abcdef", kid="sym")
+    token = JWE(plain, alg="A128KW", enc="A128CBC-HS256", zip="DEF").encrypt_json(
+        [_key], unprotected={"cty": "text/plain"}
+    )
+    _jwe = json.loads(token)
+    _jwe[part].update(header)
+    with pytest.raises(ParameterError):
+        JWE().decrypt_json(json.dumps(_jwe), [_key])
+
+
+def test_decrypt_json_unprotected_zip():
+    _key = SYMKey(key=b"0123456789abcdef", kid="sym")
+    token = JWE(plain, alg="A128KW", enc="A128CBC-HS256").encrypt_json([_key])
+    _jwe = json.loads(token)
+    _jwe["header"]["zip"] = "DEF"
+    with pytest.raises(ParameterError):
+        JWE().decrypt_json(json.dumps(_jwe), [_key])
+
+
+def test_encrypt_json_ecdh_es_direct():
+    token = JWE(plain, alg="ECDH-ES", enc="A128GCM").encrypt_json(
+        [ECKey().load_key(bob.public_key())]
+    )
+    assert "encrypted_key" not in json.loads(token)
+    assert JWE().decrypt_json(token, [eck_bob]) == plain
+
+    with pytest.raises(ParameterError):
+        JWE(plain, alg="ECDH-ES", enc="A128GCM").encrypt_json(
+            [eck_alice, ECKey().load_key(bob.public_key())]
+        )
+
+
+def test_encrypt_json_no_keys():
+    with pytest.raises(NoSuitableEncryptionKey):
+        JWE(plain, alg="RSA-OAEP", enc="A128GCM").encrypt_json([SYMKey(key=b"0123456789abcdef")])
+
+
+@pytest.mark.parametrize("enc", ["A128GCM", "A256GCM", "A128CBC-HS256", "A256CBC-HS512"])
+def test_dir_encrypt_decrypt(enc):
+    _key = SYMKey(key=os.urandom(KEY_LEN_BYTES[enc]), kid="dir-key")
+    _jwe = JWE(plain, alg="dir", enc=enc)
+    token = _jwe.encrypt([_key])
+    # No encrypted key
+    assert token.split(".")[1] == ""
+
+    _decrypter = factory(token, alg="dir", enc=enc)
+    assert _decrypter.decrypt(token, [_key]) == plain
+
+    with pytest.raises(DecryptionFailed):
+        JWE().decrypt(token, [SYMKey(key=os.urandom(KEY_LEN_BYTES[enc]))])
+
+
+def test_dir_encrypt_keeps_headers():
+    _key = SYMKey(key=os.urandom(16))
+    _jwe = JWE_DIR(plain, alg="dir", enc="A128GCM")
+    token = _jwe.encrypt(_key, kid="one")
+    assert "kid" not in _jwe.headers()
+    assert "kid" not in factory(_jwe.encrypt(_key), alg="dir", enc="A128GCM").jwt.headers
+
+
+@pytest.mark.parametrize("enc", ["A128GCM", "A128CBC-HS256"])
+def test_enc_setup_returns_bytes(enc):
+    ctxt, tag, _ = JWE_SYM().enc_setup(enc, plain, key=os.urandom(KEY_LEN_BYTES[enc]))
+    assert isinstance(ctxt, bytes)
+    assert isinstance(tag, bytes)
+
+
+def test_dir_wrong_key_length():
+    with pytest.raises(ValueError):
+        JWE(plain, alg="dir", enc="A256GCM").encrypt([SYMKey(key=b"0123456789abcdef")])
+
+
+def test_dir_encrypted_key_not_empty():
+    _key = SYMKey(key=b"0123456789abcdef")
+    part = JWE(plain, alg="dir", enc="A128GCM").encrypt([_key]).split(".")
+    part[1] = "AAAA"
+    with pytest.raises(DecryptionFailed):
+        JWE().decrypt(".".join(part), [_key])
+
+
+def test_dir_json_one_recipient():
+    _key = SYMKey(key=b"0123456789abcdef", kid="1")
+    token = JWE(plain, alg="dir", enc="A128GCM").encrypt_json([_key])
+    assert JWE().decrypt_json(token, [_key]) == plain
+
+    with pytest.raises(ParameterError):
+        JWE(plain, alg="dir", enc="A128GCM").encrypt_json([_key, SYMKey(key=b"fedcba9876543210")])
+
+
+def _rsa_keys():
+    return [RSAKey(priv_key=import_private_rsa_key_from_file(KEY), kid="k0")] + [
+        RSAKey(priv_key=rsa.generate_private_key(65537, 2048, default_backend()), kid="k%d" % i)
+        for i in range(1, 4)
+    ]
+
+
+RSA_KEYS = _rsa_keys()
+
+
+def test_decrypt_kid_first():
+    keys = RSA_KEYS
+    token = JWE(plain, alg="RSA-OAEP", enc="A128GCM").encrypt([keys[3]])
+
+    _jwe = JWE()
+    assert _jwe.decrypt(token, keys) == plain
+    assert _jwe.key_trials == 1
+
+
+def test_decrypt_trial_without_kid():
+    keys = [RSAKey(priv_key=k.priv_key) for k in RSA_KEYS]
+    token = JWE(plain, alg="RSA-OAEP", enc="A128GCM").encrypt([keys[2]])
+
+    _jwe = JWE()
+    assert _jwe.decrypt(token, keys) == plain
+    assert _jwe.key_trials == 3
+
+    _jwe = JWE(strict_key_selection=True)
+    with pytest.raises(NoSuitableDecryptionKey):
+        _jwe.decrypt(token, keys)
+
+
+def test_decrypt_strict_key_selection():
+    token = JWE(plain, alg="RSA-OAEP", enc="A128GCM").encrypt([RSA_KEYS[1]])
+
+    _jwe = JWE(strict_key_selection=True)
+    assert _jwe.decrypt(token, RSA_KEYS) == plain
+    assert _jwe.key_trials == 1
+
+    with pytest.raises(NoSuitableDecryptionKey):
+        JWE(strict_key_selection=True).decrypt(token, [RSA_KEYS[0], RSA_KEYS[2]])
+
+
+def test_decrypt_x5t_first():
+    keys = [RSAKey(priv_key=k.priv_key, x5t="x5t-%d" % i) for i, k in enumerate(RSA_KEYS)]
+    token = JWE(plain, alg="RSA-OAEP", enc="A128GCM", x5t="x5t-2").encrypt([keys[2]])
+
+    _jwe = JWE(strict_key_selection=True)
+    assert _jwe.decrypt(token, keys) == plain
+    assert _jwe.key_trials == 1
+
+
+def test_order_keys():
+    keys = [RSAKey(pub_key=k.pub_key, kid="k%d" % i) for i, k in enumerate(RSA_KEYS)]
+    keys[1].x5t = "abc"
+    headers = {"kid": "k3", "x5t": "abc", "jwk": keys[2].serialize()}
+    assert JWE()._order_keys(headers, keys) == [keys[3], keys[1], keys[2], keys[0]]
+    assert JWE(strict_key_selection=True)._order_keys(headers, keys) == [
+        keys[3],
+        keys[1],
+        keys[2],
+    ]
+    assert JWE(strict_key_selection=True)._order_keys({}, keys) == []
+
+
+def test_ecdh_decrypt_second_key():
+    token = JWE(plain, alg="ECDH-ES+A128KW", enc="A128GCM").encrypt(
+        [ECKey().load_key(bob.public_key())]
+    )
+    _jwe = JWE()
+    assert _jwe.decrypt(token, [eck_alice, eck_bob]) == plain
+    assert _jwe.key_trials == 2
+
+
+def test_epk_pool_single_use():
+    pool = EphemeralKeyPool(curves=["P-256", "P-384"], size=4, start=False)
+    pool.fill()
+    assert len(pool) == 8
+
+    _seen = set()
+    for _ in range(10):
+        _priv, _epk, _jwk = pool.get("P-384")
+        assert _jwk["crv"] == "P-384"
+        assert _epk.serialize() == _jwk
+        _seen.add(_jwk["x"])
+    assert len(_seen) == 10
+    assert pool.hits == 4
+    assert pool.misses == 6
+
+
+def test_epk_pool_fill_when_full(monkeypatch):
+    pool = EphemeralKeyPool(curves=["P-256"], size=2, start=False)
+    pool.fill()
+    _generated = []
+
+    def _new_ephemeral_key(crv):
+        _generated.append(crv)
+        return new_ephemeral_key(crv)
+
+    monkeypatch.setattr(epk_pool, "new_ephemeral_key", _new_ephemeral_key)
+    pool.fill()
+    assert _generated == []
+    pool.get("P-256")
+    pool.fill()
+    assert _generated == ["P-256"]
+
+
+def test_epk_pool_refill():
+    pool = EphemeralKeyPool(curves=["P-256"], size=2)
+    try:
+        for _ in range(5):
+            pool.get("P-256")
+        pool._wakeup.set()
+        for _ in range(100):
+            if len(pool) == 2:
+                break
+            time.sleep(0.05)
+        assert len(pool) == 2
+    finally:
+        pool.stop()
+
+
+def test_epk_pool_after_fork():
+    pool = EphemeralKeyPool(curves=["P-256"], size=2, start=False)
+    pool.fill()
+    _pooled = [k[2]["x"] for k in list(pool._keys["P-256"].queue)]
+    # Pretend to be a forked child
+    pool._pid = -1
+    try:
+        assert pool.get("P-256")[2]["x"] not in _pooled
+    finally:
+        pool.stop()
+
+
+def test_epk_pool_unsupported_curve():
+    with pytest.raises(UnsupportedECurve):
+        EphemeralKeyPool(curves=["P-999"], start=False)
+
+
+def test_ecdh_encrypt_with_epk_pool():
+    pool = EphemeralKeyPool(curves=["P-256"], size=2, start=False)
+    pool.fill()
+    _pooled = [k[2]["x"] for k in list(pool._keys["P-256"].queue)]
+
+    _jwe = JWE(plain, alg="ECDH-ES+A128KW", enc="A128GCM", epk_pool=pool)
+    token = _jwe.encrypt([ECKey().load_key(bob.public_key())])
+    assert factory(token).jwt.headers["epk"]["x"] == _pooled[0]
+    assert JWE().decrypt(token, [eck_bob]) == plain
+    assert pool.hits == 1
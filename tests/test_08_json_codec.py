@@ -0,0 +1,100 @@
+import pytest
+
+from cryptojwt import json_codec
+from cryptojwt.json_codec import JSONCodec
+from cryptojwt.jwk.hmac import SYMKey
+from cryptojwt.jws.jws import JWS
+from cryptojwt.utils import b64encode_item
+
+CODECS = ["json"]
+try:
+    import orjson  # noqa: F401
+except ImportError:
+    pass
+else:
+    CODECS.append("orjson")
+
+
+@pytest.fixture(params=CODECS)
+def codec(request):
+    _codec = json_codec.set_codec(request.param)
+    yield _codec
+    json_codec.set_codec("json")
+
+
+def test_default_codec():
+    assert json_codec.get_codec().name == "json"
+
+
+def test_compact(codec):
+    assert (
+        codec.dumps({"alg": "HS256", "typ": "JWT"}, compact=True) == '{"alg":"HS256","typ":"JWT"}'
+    )
+
+
+def test_sort_keys(codec):
+    assert json_codec.loads(json_codec.dumps({"b": 1, "a": 2}, sort_keys=True)) == {"a": 2, "b": 1}
+    assert json_codec.dumps({"b": 1, "a": 2}, compact=True, sort_keys=True) == '{"a":2,"b":1}'
+
+
+def test_big_integer(codec):
+    _val = {"n": 2 ** 100}
+    assert json_codec.loads(json_codec.dumps(_val)) == _val
+
+
+def test_big_integer_loads(codec):
+    for _val in [2 ** 100 + 1, -(2 ** 63) - 1, 2 ** 64]:
+        assert json_codec.loads('{"n": %d}' % _val) == {"n": _val}
+        assert json_codec.loads(b'{"n": %d}' % _val) == {"n": _val}
+
+
+def test_loads_not_utf8(codec):
+    assert json_codec.loads('"\ud800"') == "\ud800"
+    assert json_codec.loads('{"a":1}'.encode("utf-16")) == {"a": 1}
+    assert json_codec.loads(b'\xef\xbb\xbf{"a":1}') == {"a": 1}
+
+
+def test_loads_bytes(codec):
+    assert json_codec.loads(b'{"a":1}') == {"a": 1}
+
+
+def test_loads_invalid(codec):
+    with pytest.raises(ValueError):
+        json_codec.loads("{")
+
+
+def test_dumps_invalid(codec):
+    with pytest.raises(TypeError):
+        json_codec.dumps({"a": object()})
+
+
+def test_header_encoding(codec):
+    assert b64encode_item({"alg": "HS256"}) == b"eyJhbGciOiJIUzI1NiJ9"
+
+
+def test_sign_verify(codec):
+    key = SYMKey(key=b"0123456789abcdef0123456789abcdef", kid="k")
+    token = JWS({"iss": "joe", "exp": 1300819380}, alg="HS256").sign_compact([key])
+    assert JWS(alg="HS256").verify_compact(token, [key]) == {"iss": "joe", "exp": 1300819380}
+
+
+def test_unknown_codec_falls_back():
+    try:
+        assert json_codec.set_codec("no-such-codec").name == "json"
+    finally:
+        json_codec.set_codec("json")
+
+
+def test_register_codec():
+    class _Missing(JSONCodec):
+        name = "missing"
+
+        def __init__(self):
+            raise ImportError("missing")
+
+    json_codec.register_codec("missing", _Missing)
+    try:
+        assert json_codec.set_codec("missing").name == "json"
+    finally:
+        del json_codec.CODECS["missing"]
+        json_codec.set_codec("json")
@@ -1,15 +1,26 @@
+import json
 import os
 
 import pytest
 
+from cryptojwt.claims import ClaimsPolicy
+from cryptojwt.exception import BadSignature
+from cryptojwt.exception import Expired
+from cryptojwt.exception import InvalidClaim
 from cryptojwt.exception import IssuerNotFound
 from cryptojwt.exception import JWKESTException
+from cryptojwt.exception import ReplayDetected
+from cryptojwt.jwk.ec import ECKey
 from cryptojwt.jws.exception import NoSuitableSigningKeys
+from cryptojwt.jws.jws import JWS
 from cryptojwt.jwt import JWT
 from cryptojwt.jwt import pick_key
+from cryptojwt.jwt import utc_time_sans_frac
 from cryptojwt.key_bundle import KeyBundle
+from cryptojwt.key_bundle import build_key_bundle
 from cryptojwt.key_jar import KeyJar
 from cryptojwt.key_jar import init_key_jar
+from cryptojwt.replay import MemoryReplayStore
 
 __author__ = "Roland Hedberg"
 
@@ -141,6 +152,21 @@ def test_jwt_pack_unpack_sym():
     assert info
 
 
+def test_jwt_pack_encrypt_dir():
+    _secret = "MDEyMzQ1Njc4OWFiY2RlZjAxMjM0NTY3ODlhYmNkZWY"
+
+    alice_kj = KeyJar()
+    alice_kj.add_kb(BOB, KeyBundle([{"kty": "oct", "k": _secret, "use": "enc"}]))
+    alice = JWT(key_jar=alice_kj, sign=False, iss=ALICE, enc_alg="dir", enc_enc="A128CBC-HS256")
+    _jwt = alice.pack(payload={"sub": "sub"}, encrypt=True, recv=BOB)
+
+    bob_kj = KeyJar()
+    bob_kj.add_kb(BOB, KeyBundle([{"kty": "oct", "k": _secret, "use": "enc"}]))
+    bob = JWT(key_jar=bob_kj, iss=BOB, allowed_enc_algs=["dir"])
+    info = bob.unpack(_jwt)
+    assert info["sub"] == "sub"
+
+
 def test_jwt_pack_encrypt_no_sign():
     alice = JWT(sign=False, key_jar=ALICE_KEY_JAR, iss=ALICE)
 
@@ -186,6 +212,88 @@ def test_with_jti():
     assert "jti" in info
 
 
+def test_claims_policy():
+    alice = JWT(key_jar=ALICE_KEY_JAR, iss=ALICE, lifetime=600)
+    _jwt = alice.pack(payload={"sub": "sub"}, aud=[BOB])
+
+    bob = JWT(key_jar=BOB_KEY_JAR, claims_policy=ClaimsPolicy(iss=ALICE, aud=BOB))
+    info = bob.unpack(_jwt)
+    assert info["sub"] == "sub"
+
+    bob.claims_policy = ClaimsPolicy(iss=ALICE, aud="https://example.com/carol")
+    with pytest.raises(InvalidClaim):
+        bob.unpack(_jwt)
+
+
+def test_claims_policy_before_signature():
+    _jws = JWS({"iss": ALICE, "exp": utc_time_sans_frac() - 3600}, alg="RS256")
+    _jwt = _jws.sign_compact(ALICE_KEY_JAR.get_signing_key("RSA", ALICE))
+
+    # The keys of the issuer are never looked for
+    bob = JWT(key_jar=KeyJar(), claims_policy=ClaimsPolicy())
+    with pytest.raises(Expired):
+        bob.unpack(_jwt)
+
+
+def test_claims_policy_no_accept_unverified():
+    alice = JWT(key_jar=ALICE_KEY_JAR, iss=ALICE, lifetime=600)
+    _header, _payload, _sig = alice.pack(payload={"sub": "sub"}).split(".")
+    _other = alice.pack(payload={"sub": "other"}).split(".")[2]
+
+    bob = JWT(key_jar=BOB_KEY_JAR, claims_policy=ClaimsPolicy(iss=ALICE))
+    with pytest.raises(BadSignature):
+        bob.unpack(".".join([_header, _payload, _other]))
+
+
+def test_claims_policy_encrypted():
+    alice = JWT(key_jar=ALICE_KEY_JAR, iss=ALICE, lifetime=600)
+    _jwt = alice.pack(payload={"sub": "sub"}, encrypt=True, recv=BOB)
+
+    bob = JWT(key_jar=BOB_KEY_JAR, iss=BOB, claims_policy=ClaimsPolicy(aud=BOB))
+    assert bob.unpack(_jwt)["sub"] == "sub"
+
+    bob.claims_policy = ClaimsPolicy(iss=BOB)
+    with pytest.raises(InvalidClaim):
+        bob.unpack(_jwt)
+
+
+def test_replay_store():
+    alice = JWT(key_jar=ALICE_KEY_JAR, iss=ALICE, lifetime=600)
+    alice.with_jti = True
+    _jwt = alice.pack(payload={"sub": "sub"})
+
+    bob = JWT(key_jar=BOB_KEY_JAR, replay_store=MemoryReplayStore())
+    assert bob.unpack(_jwt)["sub"] == "sub"
+    with pytest.raises(ReplayDetected):
+        bob.unpack(_jwt)
+    bob.unpack(alice.pack(payload={"sub": "sub"}))
+
+
+def test_replay_store_expired():
+    alice = JWT(key_jar=ALICE_KEY_JAR, iss=ALICE, lifetime=-100)
+    alice.with_jti = True
+    _jwt = alice.pack(payload={"sub": "sub"})
+
+    bob = JWT(key_jar=BOB_KEY_JAR, replay_store=MemoryReplayStore())
+    # Would otherwise be accepted every time as it's never remembered
+    for _ in range(2):
+        with pytest.raises(Expired):
+            bob.unpack(_jwt)
+    assert len(bob.replay_store) == 0
+
+
+def test_replay_store_needs_jti_and_exp():
+    bob = JWT(key_jar=BOB_KEY_JAR, replay_store=MemoryReplayStore())
+    alice = JWT(key_jar=ALICE_KEY_JAR, iss=ALICE, lifetime=600)
+    with pytest.raises(InvalidClaim):
+        bob.unpack(alice.pack(payload={"sub": "sub"}))
+
+    alice = JWT(key_jar=ALICE_KEY_JAR, iss=ALICE)
+    alice.with_jti = True
+    with pytest.raises(InvalidClaim):
+        bob.unpack(alice.pack(payload={"sub": "sub"}))
+
+
 class DummyMsg(object):
     def __init__(self, **kwargs):
         for key, val in kwargs.items():
@@ -236,3 +344,20 @@ def test_pick_key():
 
     _k = pick_key(keys, "enc", "ECDH-ES")
     assert len(_k) == 0
+
+
+def test_jwt_unpack_no_kid_key_mru():
+    kj = KeyJar()
+    kj.add_kb(ALICE, build_key_bundle([{"type": "EC", "crv": "P-256", "use": ["sig"]}] * 4))
+    _key = kj.get_signing_key("EC", issuer_id=ALICE)[-1]
+    payload = json.dumps({"iss": ALICE, "sub": "sub"})
+    _jws = JWS(payload, alg="ES256").sign_compact([ECKey(priv_key=_key.priv_key)])
+
+    bob = JWT(key_jar=kj, iss=BOB, allow_missing_kid=True)
+    info = bob.unpack(_jws)
+    assert info["sub"] == "sub"
+    assert bob.key_mru.order(kj.get_verify_key("EC", issuer_id=ALICE), ALICE, "ES256")[0] is _key
+
+    bob = JWT(key_jar=kj, iss=BOB, allow_missing_kid=True, max_key_trials=1)
+    with pytest.raises(BadSignature):
+        bob.unpack(_jws)
@@ -0,0 +1,220 @@
+import time
+import uuid
+
+import pytest
+
+from cryptojwt.dpop import DPoPVerifier
+from cryptojwt.dpop import access_token_hash
+from cryptojwt.dpop import normalize_htu
+from cryptojwt.exception import BadSignature
+from cryptojwt.exception import BadType
+from cryptojwt.exception import Expired
+from cryptojwt.exception import InvalidDPoPProof
+from cryptojwt.exception import ReplayDetected
+from cryptojwt.exception import ReplayStoreFull
+from cryptojwt.jwk.ec import new_ec_key
+from cryptojwt.jwk.hmac import SYMKey
+from cryptojwt.jwk.rsa import new_rsa_key
+from cryptojwt.jws.jws import JWS
+from cryptojwt.replay import MemoryReplayStore
+from cryptojwt.utils import as_unicode
+
+HTM = "POST"
+HTU = "https://server.example.com/token"
+NOW = 1700000000
+
+EC_KEY = new_ec_key("P-256")
+RSA_KEY = new_rsa_key(2048)
+
+
+def make_proof(key=EC_KEY, alg="ES256", typ="dpop+jwt", jwk=None, **claims):
+    _claims = {"jti": uuid.uuid4().hex, "htm": HTM, "htu": HTU, "iat": NOW}
+    _claims.update(claims)
+    _claims = {k: v for k, v in _claims.items() if v is not None}
+    if jwk is None:
+        jwk = key.serialize()
+    return JWS(_claims, alg=alg).sign_compact([key], typ=typ, jwk=jwk)
+
+
+def test_verify():
+    verifier = DPoPVerifier()
+    res = verifier.verify(make_proof(), HTM, HTU, now=NOW)
+    assert res["msg"]["htm"] == HTM
+    assert res["jkt"] == as_unicode(EC_KEY.thumbprint("SHA-256"))
+    assert res["key"].public_key().public_numbers() == EC_KEY.public_key().public_numbers()
+
+
+def test_verify_rsa():
+    verifier = DPoPVerifier()
+    res = verifier.verify(make_proof(RSA_KEY, "PS256"), HTM, HTU, now=NOW)
+    assert res["jkt"] == as_unicode(RSA_KEY.thumbprint("SHA-256"))
+
+
+def test_verify_caches_header():
+    verifier = DPoPVerifier()
+    _res1 = verifier.verify(make_proof(), HTM, HTU, now=NOW)
+    _res2 = verifier.verify(make_proof(), HTM, HTU, now=NOW)
+    assert _res1["key"] is _res2["key"]
+
+
+def test_replay():
+    verifier = DPoPVerifier()
+    proof = make_proof()
+    verifier.verify(proof, HTM, HTU, now=NOW)
+    with pytest.raises(ReplayDetected):
+        verifier.verify(proof, HTM, HTU, now=NOW + 10)
+
+
+def test_replay_store_full():
+    verifier = DPoPVerifier(replay_store=MemoryReplayStore(max_entries=1))
+    verifier.verify(make_proof(), HTM, HTU, now=NOW)
+    # Fails closed, a replay of the first proof must stay detectable
+    with pytest.raises(ReplayStoreFull):
+        verifier.verify(make_proof(), HTM, HTU, now=NOW)
+    assert verifier.replay_store.rejected == 1
+
+
+def test_same_jti_other_key():
+    verifier = DPoPVerifier()
+    verifier.verify(make_proof(jti="abc"), HTM, HTU, now=NOW)
+    verifier.verify(make_proof(RSA_KEY, "RS256", jti="abc"), HTM, HTU, now=NOW)
+
+
+def test_bad_signature_not_remembered():
+    verifier = DPoPVerifier()
+    proof = make_proof(jti="abc")
+    _header, _payload, _sig = proof.split(".")
+    _other = make_proof(jti="other").split(".")[2]
+    with pytest.raises(BadSignature):
+        verifier.verify(".".join([_header, _payload, _other]), HTM, HTU, now=NOW)
+    verifier.verify(proof, HTM, HTU, now=NOW)
+
+
+def test_wrong_key_in_header():
+    verifier = DPoPVerifier()
+    _jwk = new_ec_key("P-256").serialize()
+    # The kid of the signing key is in the header
+    with pytest.raises(InvalidDPoPProof):
+        verifier.verify(make_proof(jwk=_jwk), HTM, HTU, now=NOW)
+    _jwk["kid"] = EC_KEY.kid
+    with pytest.raises(BadSignature):
+        verifier.verify(make_proof(jwk=_jwk), HTM, HTU, now=NOW)
+
+
+def test_wrong_typ():
+    with pytest.raises(BadType):
+        DPoPVerifier().verify(make_proof(typ="JWT"), HTM, HTU, now=NOW)
+
+
+def test_symmetric_alg_not_allowed():
+    key = SYMKey(key="0123456789abcdef0123456789abcdef")
+    proof = make_proof(key, "HS256", jwk={"kty": "oct", "k": "MDEyMzQ1Njc4OWFiY2RlZg"})
+    with pytest.raises(InvalidDPoPProof):
+        DPoPVerifier().verify(proof, HTM, HTU, now=NOW)
+
+
+def test_alg_not_allowed():
+    with pytest.raises(InvalidDPoPProof):
+        DPoPVerifier(allowed_algs=["ES256"]).verify(make_proof(RSA_KEY, "RS256"), HTM, HTU, now=NOW)
+
+
+def test_private_key_in_header():
+    proof = make_proof(jwk=EC_KEY.serialize(private=True))
+    with pytest.raises(InvalidDPoPProof):
+        DPoPVerifier().verify(proof, HTM, HTU, now=NOW)
+
+
+@pytest.mark.parametrize("claim", ["jti", "htm", "htu", "iat"])
+def test_missing_claim(claim):
+    with pytest.raises(InvalidDPoPProof):
+        DPoPVerifier().verify(make_proof(**{claim: None}), HTM, HTU, now=NOW)
+
+
+def test_htm_htu_mismatch():
+    verifier = DPoPVerifier()
+    with pytest.raises(InvalidDPoPProof):
+        verifier.verify(make_proof(), "GET", HTU, now=NOW)
+    with pytest.raises(InvalidDPoPProof):
+        verifier.verify(make_proof(), HTM, "https://server.example.com/other", now=NOW)
+
+
+def test_htu_normalized():
+    proof = make_proof(htu="HTTPS://Server.Example.com:443/token")
+    DPoPVerifier().verify(proof, HTM, HTU + "?a=b#c", now=NOW)
+
+
+def test_normalize_htu():
+    assert normalize_htu("https://example.com") == "https://example.com/"
+    assert normalize_htu("http://Example.com:80/a?b") == "http://example.com/a"
+    assert normalize_htu("https://example.com:8443/a") == "https://example.com:8443/a"
+
+
+def test_iat_window():
+    verifier = DPoPVerifier(lifetime=60, leeway=5)
+    verifier.verify(make_proof(), HTM, HTU, now=NOW + 65)
+    verifier.verify(make_proof(), HTM, HTU, now=NOW - 5)
+    with pytest.raises(Expired):
+        verifier.verify(make_proof(), HTM, HTU, now=NOW + 66)
+    with pytest.raises(Expired):
+        verifier.verify(make_proof(), HTM, HTU, now=NOW - 6)
+
+
+def test_ath():
+    verifier = DPoPVerifier()
+    proof = make_proof(ath=access_token_hash("token"))
+    with pytest.raises(InvalidDPoPProof):
+        verifier.verify(proof, HTM, HTU, access_token="other", now=NOW)
+    verifier.verify(proof, HTM, HTU, access_token="token", now=NOW)
+    with pytest.raises(InvalidDPoPProof):
+        verifier.verify(make_proof(), HTM, HTU, access_token="token", now=NOW)
+
+
+def test_jkt():
+    verifier = DPoPVerifier()
+    with pytest.raises(InvalidDPoPProof):
+        verifier.verify(make_proof(), HTM, HTU, jkt="other", now=NOW)
+    _jkt = as_unicode(EC_KEY.thumbprint("SHA-256"))
+    verifier.verify(make_proof(), HTM, HTU, jkt=_jkt, now=NOW)
+
+
+def test_nonce():
+    verifier = DPoPVerifier()
+    with pytest.raises(InvalidDPoPProof):
+        verifier.verify(make_proof(), HTM, HTU, nonce="n-1", now=NOW)
+    verifier.verify(make_proof(nonce="n-1"), HTM, HTU, nonce="n-1", now=NOW)
+
+
+def test_default_now():
+    DPoPVerifier().verify(make_proof(iat=int(time.time())), HTM, HTU)
+
+
+def test_replay_store():
+    store = MemoryReplayStore(bucket_size=10)
+    assert store.add("a", 105, now=100)
+    assert not store.add("a", 105, now=101)
+    assert "a" in store
+    # Never forgotten before it expires
+    assert not store.add("a", 105, now=105)
+    assert store.add("a", 125, now=110)
+    assert store.add("b", 125, now=110)
+    assert len(store) == 2
+    store.clear()
+    assert len(store) == 0
+
+
+def test_replay_store_max_entries():
+    store = MemoryReplayStore(bucket_size=10, max_entries=2)
+    assert store.add("a", 100, now=0)
+    assert store.add("b", 200, now=0)
+    with pytest.raises(ReplayStoreFull):
+        store.add("c", 200, now=0)
+    assert "a" in store
+    assert len(store) == 2
+
+    store = MemoryReplayStore(bucket_size=10, max_entries=2, evict_when_full=True)
+    assert store.add("a", 100, now=0)
+    assert store.add("b", 200, now=0)
+    assert store.add("c", 200, now=0)
+    # The bucket expiring first was dropped
+    assert "a" not in store
+    assert len(store) == 2
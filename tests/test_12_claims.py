@@ -0,0 +1,80 @@
+import pytest
+
+from cryptojwt.claims import ClaimsPolicy
+from cryptojwt.exception import Expired
+from cryptojwt.exception import InvalidClaim
+
+NOW = 1700000000
+ISS = "https://op.example.org"
+AUD = "https://rp.example.com"
+
+
+def test_empty_policy():
+    policy = ClaimsPolicy()
+    policy.check({}, now=NOW)
+    policy.check({"iss": "foo", "aud": "bar", "exp": NOW + 10}, now=NOW)
+
+
+def test_exp():
+    policy = ClaimsPolicy(skew=10)
+    policy.check({"exp": NOW - 10}, now=NOW)
+    with pytest.raises(Expired):
+        policy.check({"exp": NOW - 11}, now=NOW)
+
+
+def test_nbf():
+    policy = ClaimsPolicy(skew=10)
+    policy.check({"nbf": NOW + 10}, now=NOW)
+    with pytest.raises(Expired):
+        policy.check({"nbf": NOW + 11}, now=NOW)
+
+
+def test_iat():
+    policy = ClaimsPolicy(skew=10, max_age=60)
+    policy.check({"iat": NOW - 70}, now=NOW)
+    with pytest.raises(Expired):
+        policy.check({"iat": NOW - 71}, now=NOW)
+    with pytest.raises(Expired):
+        policy.check({"iat": NOW + 11}, now=NOW)
+    # max_age makes iat required
+    with pytest.raises(InvalidClaim):
+        policy.check({}, now=NOW)
+
+
+@pytest.mark.parametrize("value", ["1700000000", None, True, [NOW]])
+def test_invalid_time_claim(value):
+    with pytest.raises(InvalidClaim):
+        ClaimsPolicy().check({"exp": value}, now=NOW)
+
+
+def test_iss():
+    policy = ClaimsPolicy(iss=[ISS, "https://other.example.org"])
+    policy.check({"iss": ISS}, now=NOW)
+    with pytest.raises(InvalidClaim):
+        policy.check({"iss": "https://evil.example.org"}, now=NOW)
+    with pytest.raises(InvalidClaim):
+        policy.check({}, now=NOW)
+
+
+def test_aud():
+    policy = ClaimsPolicy(aud=AUD)
+    policy.check({"aud": AUD}, now=NOW)
+    policy.check({"aud": ["https://other.example.com", AUD]}, now=NOW)
+    with pytest.raises(InvalidClaim):
+        policy.check({"aud": "https://other.example.com"}, now=NOW)
+    with pytest.raises(InvalidClaim):
+        policy.check({"aud": {"a": AUD}}, now=NOW)
+    with pytest.raises(InvalidClaim):
+        policy.check({}, now=NOW)
+
+
+def test_required():
+    policy = ClaimsPolicy(required=["sub", "jti"])
+    policy.check({"sub": "alice", "jti": "abc"}, now=NOW)
+    with pytest.raises(InvalidClaim):
+        policy.check({"sub": "alice"}, now=NOW)
+
+
+def test_not_a_dict():
+    with pytest.raises(InvalidClaim):
+        ClaimsPolicy().check(["exp"], now=NOW)
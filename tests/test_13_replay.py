@@ -0,0 +1,108 @@
+import os
+
+import pytest
+
+from cryptojwt.exception import ReplayStoreFull
+from cryptojwt.replay import MemoryReplayStore
+from cryptojwt.replay import SQLiteReplayStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmpdir):
+    if request.param == "memory":
+        return MemoryReplayStore(bucket_size=10, max_entries=100)
+    return SQLiteReplayStore(os.path.join(tmpdir, "replay.db"), max_entries=100)
+
+
+def test_add(store):
+    assert store.add("a", 105, now=100)
+    assert not store.add("a", 105, now=101)
+    assert "a" in store
+    assert "b" not in store
+    # Never forgotten before it expires
+    assert not store.add("a", 105, now=105)
+    assert store.add("a", 135, now=130)
+    assert store.add("b", 135, now=130)
+    store.clear()
+    assert len(store) == 0
+    assert store.add("a", 125, now=110)
+
+
+def test_already_expired(store):
+    assert not store.add("a", 99, now=100)
+    assert len(store) == 0
+    # Remembered until and including when it expires
+    assert store.add("a", 100, now=100)
+    assert not store.add("a", 100, now=100)
+
+
+def test_expired_removed(store):
+    for i in range(10):
+        store.add(str(i), 100 + i, now=100)
+    assert len(store) == 10
+    store.add("late", 300, now=200)
+    assert len(store) == 1
+
+
+def test_max_entries(store):
+    for i in range(100):
+        assert store.add(str(i), 1000 + i * 10, now=100)
+    assert len(store) == 100
+    # Rejected rather than forgetting keys that haven't expired
+    with pytest.raises(ReplayStoreFull):
+        store.add("more", 2000, now=200)
+    assert store.rejected == 1
+    assert "more" not in store
+    assert "0" in store
+    # Still detected as a replay
+    assert not store.add("0", 1000, now=200)
+    # Room again once keys expire
+    assert store.add("last", 2000, now=1020)
+    assert "0" not in store
+    assert len(store) == 99
+
+
+def test_sqlite_full_not_purged_on_every_add(tmpdir, monkeypatch):
+    store = SQLiteReplayStore(os.path.join(tmpdir, "replay.db"), max_entries=10)
+    for i in range(10):
+        assert store.add(str(i), 1000, now=100)
+    purges = []
+    _purge = store._purge
+    monkeypatch.setattr(store, "_purge", lambda db, now: purges.append(now) or _purge(db, now))
+    for i in range(5):
+        with pytest.raises(ReplayStoreFull):
+            store.add("more%d" % i, 2000, now=200)
+    assert purges == [200]
+    assert store.rejected == 5
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_max_entries_evict(kind, tmpdir):
+    if kind == "memory":
+        store = MemoryReplayStore(bucket_size=10, max_entries=100, evict_when_full=True)
+    else:
+        store = SQLiteReplayStore(
+            os.path.join(tmpdir, "replay.db"), max_entries=100, evict_when_full=True
+        )
+    for i in range(100):
+        assert store.add(str(i), 1000 + i * 10, now=100)
+    # Purged at most once every purge_interval seconds
+    store.add("more", 2000, now=200)
+    store.add("last", 2000, now=300)
+    assert len(store) <= 100
+    assert "0" not in store
+    assert "last" in store
+    assert store.rejected == 0
+
+
+def test_sqlite_shared(tmpdir):
+    _path = os.path.join(tmpdir, "replay.db")
+    store1 = SQLiteReplayStore(_path)
+    store2 = SQLiteReplayStore(_path)
+    assert store1.add("a", 200, now=100)
+    assert not store2.add("a", 200, now=100)
+    assert store2.add("b", 200, now=100)
+    assert "b" in store1
+    store1.close()
+    # Reopened on demand
+    assert len(store1) == 2
@@ -0,0 +1,172 @@
+import json
+
+import pytest
+
+from cryptojwt.admission import AdmissionFilter
+from cryptojwt.exception import TokenRejected
+from cryptojwt.jwe.jwe import JWE
+from cryptojwt.jws.jws import JWS
+from cryptojwt.jws.utils import alg2keytype
+from cryptojwt.jwt import JWT
+from cryptojwt.key_bundle import KeyBundle
+from cryptojwt.key_jar import KeyJar
+from cryptojwt.key_jar import build_keyjar
+from cryptojwt.utils import as_unicode
+from cryptojwt.utils import b64e
+
+ISS = "https://op.example.org"
+KEYDEFS = [
+    {"type": "RSA", "key": "", "use": ["sig", "enc"]},
+    {"type": "EC", "crv": "P-256", "use": ["sig"]},
+]
+
+KEY_JAR = build_keyjar(KEYDEFS)
+KEY_JAR.import_jwks(KEY_JAR.export_jwks(), ISS)
+
+
+def sign(payload=None, alg="ES256", **headers):
+    _keys = KEY_JAR.get_signing_key(alg2keytype(alg))
+    if payload is None:
+        payload = {"iss": ISS, "sub": "sub"}
+    return JWS(payload, alg=alg).sign_compact(_keys, **headers)
+
+
+def make_token(header, payload=None):
+    """A token with any header. The signature is never looked at."""
+    if payload is None:
+        payload = {"iss": ISS}
+    return ".".join(as_unicode(b64e(json.dumps(p).encode())) for p in [header, payload]) + ".c2ln"
+
+
+def rejected(admission, token):
+    with pytest.raises(TokenRejected) as err:
+        admission.admit(token)
+    return err.value.reason
+
+
+def test_admit():
+    admission = AdmissionFilter(allowed_algs=["ES256"])
+    assert admission.admit(sign())["alg"] == "ES256"
+    assert admission.admit(sign().encode())["alg"] == "ES256"
+    assert not admission.counters
+
+
+def test_token_length():
+    admission = AdmissionFilter(max_token_length=100)
+    assert rejected(admission, sign()) == "token_length"
+    assert admission.counters["token_length"] == 1
+
+
+def test_header_size():
+    admission = AdmissionFilter(max_header_length=100)
+    assert rejected(admission, sign(foo="x" * 100)) == "header_size"
+
+
+@pytest.mark.parametrize(
+    "token", ["abc", "a.b", "a.b.c.d", "!!!.b.c", "WzFd.e30.", '{"payload": "e30"}']
+)
+def test_malformed(token):
+    assert rejected(AdmissionFilter(), token) == "malformed"
+
+
+def test_json_serialization():
+    _token = JWS('{"sub": "sub"}', alg="ES256").sign_json(KEY_JAR.get_signing_key("EC"))
+    assert rejected(AdmissionFilter(), _token) == "malformed"
+    assert AdmissionFilter(allow_json=True).admit(_token) is None
+
+
+def test_alg():
+    admission = AdmissionFilter(allowed_algs=["RS256"])
+    assert rejected(admission, sign()) == "alg"
+    assert rejected(admission, sign(alg="none")) == "alg"
+
+
+def test_enc():
+    _key = KEY_JAR.get_encrypt_key("RSA", ISS)
+    _token = JWE("payload", alg="RSA-OAEP", enc="A128GCM").encrypt(_key)
+    AdmissionFilter(allowed_algs=["RSA-OAEP"], allowed_encs=["A128GCM"]).admit(_token)
+    admission = AdmissionFilter(allowed_encs=["A256GCM"])
+    assert rejected(admission, _token) == "enc"
+
+
+def test_crit():
+    admission = AdmissionFilter()
+    admission.admit(sign(crit=["b64"], b64=True))
+    assert rejected(admission, sign(crit=["exp"], exp=1)) == "crit"
+    # Listed but not present
+    assert rejected(admission, sign(crit=["b64"])) == "crit"
+    assert rejected(admission, sign(crit=[])) == "crit"
+    assert rejected(admission, sign(crit=[["b64"]], b64=True)) == "crit"
+    AdmissionFilter(understood_crit=["exp"]).admit(sign(crit=["exp"], exp=1))
+
+
+def test_kid():
+    admission = AdmissionFilter(key_jar=KEY_JAR, check_kid=True, refresh_interval=3600)
+    admission.admit(sign())
+    assert rejected(admission, make_token({"alg": "ES256", "kid": "unknown"})) == "kid"
+    assert rejected(admission, make_token({"alg": "ES256", "kid": ["a"]})) == "kid"
+    _token = JWS({"sub": "sub"}, alg="none").sign_compact()
+    admission.admit(_token)
+    admission.require_kid = True
+    assert rejected(admission, _token) == "kid"
+    assert admission.counters == {"kid": 3}
+
+
+def test_kid_refresh():
+    key_jar = build_keyjar(KEYDEFS)
+    admission = AdmissionFilter(key_jar=key_jar, check_kid=True, refresh_interval=0)
+    _other = build_keyjar(KEYDEFS)
+    _token = JWS({"sub": "sub"}, alg="ES256").sign_compact(_other.get_signing_key("EC"))
+    assert rejected(admission, _token) == "kid"
+    key_jar.import_jwks(_other.export_jwks(), ISS)
+    admission.admit(_token)
+
+
+def test_kid_bounded_key_jar():
+    key_jar = KeyJar(max_resident_issuers=1)
+    key_jar.import_jwks(KEY_JAR.export_jwks(), ISS)
+    for i in range(3):
+        key_jar.import_jwks(build_keyjar(KEYDEFS).export_jwks(), "https://{}.example.org".format(i))
+    admission = AdmissionFilter(key_jar=key_jar, check_kid=True, refresh_interval=0)
+    admission.admit(sign())
+    assert rejected(admission, make_token({"alg": "ES256", "kid": "unknown"})) == "kid"
+    # Evicted issuers are never loaded
+    assert key_jar.issuer_stats()["reloads"] == 0
+
+
+def test_kid_never_fetches(monkeypatch):
+    key_jar = build_keyjar(KEYDEFS)
+    key_jar.add_url(ISS, "https://op.example.org/jwks.json")
+
+    def _update(self):
+        raise AssertionError("Keys fetched for an unknown kid")
+
+    monkeypatch.setattr(KeyBundle, "update", _update)
+    admission = AdmissionFilter(key_jar=key_jar, check_kid=True, refresh_interval=0)
+    assert rejected(admission, make_token({"alg": "ES256", "kid": "unknown"})) == "kid"
+    assert rejected(admission, make_token({"alg": "ES256", "kid": "unknown"})) == "kid"
+
+
+def test_iss():
+    admission = AdmissionFilter(key_jar=KEY_JAR, check_iss=True)
+    admission.admit(sign())
+    assert rejected(admission, sign({"iss": "https://evil.example.org"})) == "iss"
+    assert rejected(admission, make_token({"alg": "ES256"}, {"iss": 1})) == "iss"
+    admission.admit(sign({"sub": "sub"}))
+    admission.admit(sign("not a JSON object"))
+    assert rejected(admission, "e30.!!!.c2ln") == "malformed"
+
+
+def test_needs_key_jar():
+    with pytest.raises(ValueError):
+        AdmissionFilter(check_kid=True)
+
+
+def test_jwt_unpack():
+    _token = JWT(key_jar=KEY_JAR, sign_alg="ES256").pack(payload={"sub": "sub"})
+    admission = AdmissionFilter(allowed_algs=["RS256"])
+    _jwt = JWT(key_jar=KEY_JAR, admission_filter=admission)
+    with pytest.raises(TokenRejected):
+        _jwt.unpack(_token)
+    admission.allowed_algs = ["ES256"]
+    assert _jwt.unpack(_token)["sub"] == "sub"
@@ -2,7 +2,7 @@ import json
 import os
 
 from cryptojwt.jwk import JWK
-from cryptojwt.jwx import key_from_jwk_dict
+from cryptojwt.jwk.jwk import key_from_jwk_dict
 from cryptojwt.tools import keyconv as keyconv
 
 BASEDIR = os.path.abspath(os.path.dirname(__file__))